@@ -12,8 +12,6 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
-from keystoneclient.v2_0 import client as ksclient
-
 from ironicclient.common.i18n import _
 from ironicclient.common import utils
 from ironicclient import exc
@@ -29,6 +27,10 @@ def _get_ksclient(**kwargs):
             * insecure: allow insecure SSL (no cert verification)
             * tenant_{name|id}: name or ID of tenant
     """
+    # NOTE: imported here, as it is slow to import and only used without
+    # a token and an endpoint
+    from keystoneclient.v2_0 import client as ksclient
+
     return ksclient.Client(username=kwargs.get('username'),
                            password=kwargs.get('password'),
                            tenant_id=kwargs.get('tenant_id'),
@@ -106,8 +108,13 @@ def get_client(api_version, **kwargs):
         'auth_ref': auth_ref,
     }
     for key in ('insecure', 'timeout', 'ca_file', 'cert_file', 'key_file',
-                'os_ironic_api_version', 'max_retries', 'retry_interval'):
+                'os_ironic_api_version', 'max_retries', 'retry_interval',
+                'retry_policy'):
         cli_kwargs[key] = kwargs.get(key)
+    for key in ('version_cache', 'resource_cache', 'compression', 'timings',
+                'instrumentation'):
+        if key in kwargs:
+            cli_kwargs[key] = kwargs[key]
 
     return Client(api_version, endpoint, **cli_kwargs)
 
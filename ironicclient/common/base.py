@@ -20,12 +20,29 @@ Base utilities to build API operation managers and objects on top of.
 """
 
 import copy
+import sys
+import threading
 
+import six
+from six.moves import queue
 import six.moves.urllib.parse as urlparse
 
+from ironicclient.common import cache
+from ironicclient.common import http
+from ironicclient.common.i18n import _
+from ironicclient import exc
 from ironicclient.openstack.common.apiclient import base
 
 
+# Number of pages fetched ahead of the one being processed when paginating,
+# 0 fetches the pages one after another.
+DEFAULT_PREFETCH_DEPTH = 1
+
+# The first API version letting the server select the fields of the
+# resources it returns
+FIELDS_API_VERSION = (1, 8)
+
+
 def getid(obj):
     """Wrapper to get  object's ID.
 
@@ -38,19 +55,127 @@ def getid(obj):
         return obj
 
 
+def _trim(info, fields):
+    """Keep only some fields of a resource, when fields is not None."""
+    if fields is None:
+        return info
+    return dict((field, info[field]) for field in fields if field in info)
+
+
+def _relative_url(url):
+    """Remove the scheme and netloc of a 'next' link, None if empty."""
+    if not url:
+        return None
+    # NOTE(lucasagomes): We need to edit the URL to remove
+    # the scheme and netloc
+    url_parts = list(urlparse.urlparse(url))
+    url_parts[0] = url_parts[1] = ''
+    return urlparse.urlunparse(url_parts)
+
+
+class _PagePrefetcher(object):
+    """Iterate over the pages of a list fetched in a background thread.
+
+    :param pages: iterator doing the requests for the pages.
+    :param depth: maximum number of pages fetched ahead of the consumer.
+    """
+
+    _DONE = object()
+
+    def __init__(self, pages, depth):
+        self._pages = pages
+        self._queue = queue.Queue(maxsize=depth)
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def _put(self, item):
+        # NOTE: don't block forever if the consumer went away
+        while not self._stopped.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def _run(self):
+        try:
+            for page in self._pages:
+                if not self._put((page, None)):
+                    return
+        except Exception:
+            self._put((None, sys.exc_info()))
+        else:
+            self._put((self._DONE, None))
+
+    def stop(self):
+        """Stop fetching the pages, e.g. when the consumer goes away."""
+        self._stopped.set()
+
+    def __iter__(self):
+        try:
+            while True:
+                page, exc_info = self._queue.get()
+                if exc_info is not None:
+                    six.reraise(*exc_info)
+                if page is self._DONE:
+                    return
+                yield page
+        finally:
+            self.stop()
+
+
 class Manager(object):
     """Provides  CRUD operations with a particular API."""
     resource_class = None
+    prefetch_depth = DEFAULT_PREFETCH_DEPTH
+    # The ironicclient.common.cache.ResourceCache used by _get(), if any
+    resource_cache = None
 
     def __init__(self, api):
         self.api = api
 
+    def _select_fields(self, fields, detail=False):
+        """Decide whether the server or the client selects the fields.
+
+        From API version 1.8, the server returns only the fields asked for.
+        With older versions, the detailed resources are requested and
+        trimmed by the client.
+
+        :param fields: the fields of the resources to return, None for all.
+        :param detail: whether the detailed resources were asked for.
+        :raises: InvalidAttribute if both fields and detail are given.
+        :returns: a tuple with the fields to request from the server, the
+            fields to trim the resources to and whether to request the
+            detailed resources.
+        """
+        if not fields:
+            return None, None, detail
+        if detail:
+            raise exc.InvalidAttribute(
+                _("The fields can't be selected along with 'detail'."))
+        fields = list(fields)
+        version = getattr(self.api, 'os_ironic_api_version', None)
+        if version and http._version_tuple(version) >= FIELDS_API_VERSION:
+            return fields, None, False
+        return None, fields, True
+
+    def _invalidate(self, url):
+        if self.resource_cache is not None:
+            self.resource_cache.invalidate(url)
+
     def _create(self, url, body):
-        resp, body = self.api.json_request('POST', url, body=body)
+        try:
+            resp, body = self.api.json_request('POST', url, body=body)
+        finally:
+            self._invalidate(url)
         if body:
             return self.resource_class(self, body)
 
-    def _format_body_data(self, body, response_key):
+    @staticmethod
+    def _format_body_data(body, response_key):
         if response_key:
             try:
                 data = body[response_key]
@@ -64,8 +189,64 @@ class Manager(object):
 
         return data
 
+    def _get_page(self, url, response_key=None):
+        """Retrieve one page of a list.
+
+        :returns: a tuple with the list of items of the page and the
+            partial URL of the next page (None if this is the last one).
+        """
+        if response_key:
+            resp, items = self.api.json_stream_request('GET', url,
+                                                       response_key)
+            data = list(items)
+            url = items.extra.get('next')
+        else:
+            resp, body = self.api.json_request('GET', url)
+            data = self._format_body_data(body, response_key)
+            url = body.get('next')
+        return data, _relative_url(url)
+
+    def _iter_pages(self, url, response_key=None, limit=None):
+        """Generate (items, next_url) for each page, stopping at 'limit'."""
+        object_count = 0
+        while url:
+            data, url = self._get_page(url, response_key)
+            if limit:
+                data = data[:limit - object_count]
+                object_count += len(data)
+                if object_count >= limit:
+                    url = None
+            yield data, url
+
+    def _paginate(self, url, response_key=None, limit=None,
+                  prefetch_depth=None):
+        """Generate the items of each page of a list.
+
+        Once the first page is received, and if there are more pages,
+        the next pages are fetched in a background thread, up to
+        'prefetch_depth' pages ahead of the page being consumed. The
+        second page is requested before the items of the first one are
+        yielded.
+        """
+        if prefetch_depth is None:
+            prefetch_depth = self.prefetch_depth
+
+        pages = self._iter_pages(url, response_key, limit=limit)
+        for data, next_url in pages:
+            if not next_url or prefetch_depth <= 0:
+                yield data
+                continue
+            prefetcher = _PagePrefetcher(pages, prefetch_depth)
+            try:
+                yield data
+                for data, next_url in prefetcher:
+                    yield data
+            finally:
+                prefetcher.stop()
+            break
+
     def _list_pagination(self, url, response_key=None, obj_class=None,
-                         limit=None):
+                         limit=None, fields=None):
         """Retrieve a list of items.
 
         The Ironic API is configured to return a maximum number of
@@ -73,7 +254,8 @@ class Manager(object):
         iterates over the 'next' link (pagination) in the responses,
         to get the number of items specified by 'limit'. If 'limit'
         is None this function will continue pagination until there are
-        no more values to be returned.
+        no more values to be returned. The next page is requested while
+        the current one is being processed, see 'prefetch_depth'.
 
         :param url: a partial URL, e.g. '/nodes'
         :param response_key: the key to be looked up in response
@@ -81,6 +263,7 @@ class Manager(object):
         :param obj_class: class for constructing the returned objects.
         :param limit: maximum number of items to return. If None returns
             everything.
+        :param fields: Optional, the fields to trim the items to.
 
         """
         if obj_class is None:
@@ -90,50 +273,114 @@ class Manager(object):
             limit = int(limit)
 
         object_list = []
-        object_count = 0
-        limit_reached = False
-        while url:
-            resp, body = self.api.json_request('GET', url)
-            data = self._format_body_data(body, response_key)
-            for obj in data:
-                object_list.append(obj_class(self, obj, loaded=True))
-                object_count += 1
-                if limit and object_count >= limit:
-                    # break the for loop
-                    limit_reached = True
-                    break
+        for data in self._paginate(url, response_key, limit=limit):
+            object_list.extend(obj_class(self, _trim(obj, fields),
+                                         loaded=True)
+                               for obj in data)
+        return object_list
 
-            # break the while loop and return
-            if limit_reached:
-                break
+    def _iter_list(self, url, response_key=None, obj_class=None, limit=None,
+                   fields=None):
+        """Generate the items of a list as each page is received.
 
-            url = body.get('next')
-            if url:
-                # NOTE(lucasagomes): We need to edit the URL to remove
-                # the scheme and netloc
-                url_parts = list(urlparse.urlparse(url))
-                url_parts[0] = url_parts[1] = ''
-                url = urlparse.urlunparse(url_parts)
+        Only the page being processed (and the prefetched ones) are kept in
+        memory.
 
-        return object_list
+        :param url: a partial URL, e.g. '/nodes'
+        :param response_key: the key to be looked up in response
+            dictionary, e.g. 'nodes'
+        :param obj_class: class for constructing the returned objects.
+        :param limit: maximum number of items to return. If 0 returns
+            everything, if None only the first page is retrieved.
+        :param fields: Optional, the fields to trim the items to.
+
+        """
+        if obj_class is None:
+            obj_class = self.resource_class
+
+        if limit is None:
+            data, next_url = self._get_page(url, response_key)
+            pages = [data]
+        else:
+            pages = self._paginate(url, response_key, limit=int(limit))
+
+        for data in pages:
+            for obj in data:
+                if obj:
+                    yield obj_class(self, _trim(obj, fields), loaded=True)
 
-    def _list(self, url, response_key=None, obj_class=None, body=None):
-        resp, body = self.api.json_request('GET', url)
+    def _list(self, url, response_key=None, obj_class=None, body=None,
+              fields=None):
+        if response_key:
+            # NOTE: the items are decoded one by one from the response
+            # body, rather than from a copy of the whole body.
+            resp, data = self.api.json_stream_request('GET', url,
+                                                      response_key)
+        else:
+            resp, body = self.api.json_request('GET', url)
+            data = self._format_body_data(body, response_key)
 
         if obj_class is None:
             obj_class = self.resource_class
 
-        data = self._format_body_data(body, response_key)
-        return [obj_class(self, res, loaded=True) for res in data if res]
+        return [obj_class(self, _trim(res, fields), loaded=True)
+                for res in data if res]
+
+    def _get(self, url, fields=None):
+        """Retrieve a single resource, None if the response is empty.
+
+        If the manager has a cache, the resource is returned from it while
+        it is fresh. Once stale, it is revalidated with a conditional
+        request, and returned from the cache again if the server answers
+        304 Not Modified. Only the paths of single resources are cached,
+        not the ones of their sub-resources like /v1/nodes/<id>/states.
+
+        :param url: a partial URL, e.g. '/v1/nodes/<uuid>'
+        :param fields: Optional, the fields to trim the resource to.
+        """
+        if self.resource_cache is None or not cache.is_cacheable(url):
+            try:
+                return self._list(url, fields=fields)[0]
+            except IndexError:
+                return None
+
+        version = getattr(self.api, 'os_ironic_api_version', None)
+        entry = self.resource_cache.get(url, version)
+        if entry is not None and entry.fresh:
+            return self.resource_class(self, _trim(entry.info, fields),
+                                       loaded=True)
+
+        headers = {}
+        if entry is not None:
+            headers = cache.conditional_headers(entry.info, entry.etag)
+        resp, body = self.api.json_request('GET', url, headers=headers)
+        if entry is not None and cache.response_status(resp) == 304:
+            self.resource_cache.refresh(url, version)
+            return self.resource_class(self, _trim(entry.info, fields),
+                                       loaded=True)
+        if not body:
+            return None
+        # NOTE: the version may have been negotiated by the request
+        version = getattr(self.api, 'os_ironic_api_version', None)
+        self.resource_cache.set(url, version, body,
+                                etag=cache.response_header(resp, 'ETag'))
+        return self.resource_class(self, _trim(body, fields), loaded=True)
 
     def _update(self, url, body, method='PATCH', response_key=None):
-        resp, body = self.api.json_request(method, url, body=body)
+        try:
+            resp, body = self.api.json_request(method, url, body=body)
+        finally:
+            # NOTE: even on errors, the request may have changed something
+            self._invalidate(url)
         # PATCH/PUT requests may not return a body
         if body:
             return self.resource_class(self, body)
 
     def _delete(self, url):
-        self.api.raw_request('DELETE', url)
+        try:
+            self.api.raw_request('DELETE', url)
+        finally:
+            self._invalidate(url)
 
 
 class Resource(base.Resource):
@@ -144,3 +391,67 @@ class Resource(base.Resource):
 
     def to_dict(self):
         return copy.deepcopy(self._info)
+
+
+class CompactResource(object):
+    """A read-only resource storing each of its fields only once.
+
+    The fields are kept in slots rather than in both the instance
+    dictionary and the '_info' dictionary as done by Resource, and
+    to_dict() returns a shallow copy. This is meant for listings of many
+    detailed items. Subclasses set '__slots__' to the names of the fields
+    they expect, the other fields of the item are kept in a dictionary.
+    The attributes are accessed the same way as for Resource.
+    """
+
+    __slots__ = ('manager', '_extra')
+
+    def __init__(self, manager, info, loaded=True):
+        self.manager = manager
+        self._extra = None
+        for key, value in six.iteritems(info):
+            try:
+                setattr(self, key, value)
+            except AttributeError:
+                if self._extra is None:
+                    self._extra = {}
+                self._extra[key] = value
+
+    def __getattr__(self, k):
+        # NOTE: only called for unset slots and unknown fields
+        extra = object.__getattribute__(self, '_extra')
+        if extra is not None and k in extra:
+            return extra[k]
+        raise AttributeError(k)
+
+    @property
+    def _info(self):
+        return self.to_dict()
+
+    def to_dict(self):
+        info = {}
+        for name in self.__slots__:
+            try:
+                info[name] = object.__getattribute__(self, name)
+            except AttributeError:
+                pass
+        if self._extra:
+            info.update(self._extra)
+        return info
+
+    def is_loaded(self):
+        return True
+
+    def __eq__(self, other):
+        if not isinstance(other, (CompactResource, base.Resource)):
+            return NotImplemented
+        return self._info == other._info
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        return result if result is NotImplemented else not result
+
+    __hash__ = None
+
+    def __repr__(self):
+        return "<%s %s>" % (self.__class__.__name__, self._info)
@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Run many shell commands in one process, with the same client.
+"""
+
+import collections
+import shlex
+import sys
+import threading
+
+import six
+
+from ironicclient.common import bulk
+from ironicclient.common.i18n import _
+from ironicclient import exc
+
+
+class Command(collections.namedtuple('Command', ['line', 'text', 'args'])):
+    """A command of a batch: its line number and text, and its arguments.
+
+    'args' is the namespace parsed from the text, its 'func' runs it.
+    """
+
+
+def read_commands(fileobj):
+    """Read the command lines of a batch, one per line.
+
+    Blank lines and comments (starting with #) are skipped. The lines are
+    split like in a POSIX shell.
+
+    :param fileobj: the file to read.
+    :returns: a list of (line number, text, argument list).
+    :raises: CommandError if a line can't be split.
+    """
+    commands = []
+    for number, text in enumerate(fileobj, 1):
+        text = text.strip()
+        try:
+            argv = shlex.split(text, comments=True)
+        except ValueError as e:
+            raise exc.CommandError(_('Line %(line)d is invalid: %(error)s')
+                                   % {'line': number, 'error': e})
+        if argv:
+            commands.append((number, text, argv))
+    return commands
+
+
+class _ThreadOutput(object):
+    """A file object sending what each thread writes to its own buffer.
+
+    Threads without a buffer write to the wrapped file object.
+    """
+
+    def __init__(self, stream):
+        self._stream = stream
+        self._local = threading.local()
+
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
+
+    def write(self, data):
+        getattr(self._local, 'buffer', self._stream).write(data)
+
+    def flush(self):
+        if getattr(self._local, 'buffer', None) is None:
+            self._stream.flush()
+
+    def start(self):
+        self._local.buffer = six.StringIO()
+
+    def stop(self):
+        """Stop buffering the output of the thread, and return it."""
+        output = self._local.buffer.getvalue()
+        del self._local.buffer
+        return output
+
+
+def run(client, commands, concurrency=1, stdout=None, stderr=None):
+    """Run the commands of a batch, possibly at the same time.
+
+    The output of each command is written once it is done, in the order of
+    the commands, followed on 'stderr' by the exit status of its line: 0
+    if it succeeded, 1 and the error otherwise.
+
+    A Conflict error (e.g. the node is locked by the conductor) makes the
+    command run again later, as with the bulk commands.
+
+    :param client: the client the commands are run with.
+    :param commands: the list of Command to run.
+    :param concurrency: maximum number of commands running at the same time.
+    :param stdout: the file object the output is written to, sys.stdout
+        by default. sys.stdout is replaced while the commands run.
+    :param stderr: the file object the statuses are written to, sys.stderr
+        by default.
+    :returns: the number of commands which failed.
+    """
+    stdout = stdout or sys.stdout
+    stderr = stderr or sys.stderr
+    output = _ThreadOutput(stdout)
+    outputs = {}
+    results = {}
+    lock = threading.Lock()
+    state = {'next': 0, 'failed': 0}
+
+    def _run(command):
+        output.start()
+        try:
+            command.args.func(client, command.args)
+        except SystemExit as e:
+            # NOTE: a command exiting (e.g. with cliutils.exit()) fails its
+            # line only, rather than the worker running it
+            if e.code:
+                raise exc.CommandError(
+                    e.code if isinstance(e.code, six.string_types) else
+                    _('The command exited with status %s') % e.code)
+        finally:
+            outputs[command.line] = output.stop()
+
+    def _done(index, result):
+        with lock:
+            results[index] = result
+            # NOTE: the outputs are written in order, the ones of the
+            # commands done early wait for the previous ones
+            while state['next'] in results:
+                _write_result(results.pop(state['next']))
+                state['next'] += 1
+
+    def _write_result(result):
+        stdout.write(outputs.pop(result.item.line, ''))
+        if result.ok:
+            status = '%d: 0\n' % result.item.line
+        else:
+            state['failed'] += 1
+            status = '%d: 1: %s\n' % (result.item.line,
+                                      six.text_type(result.error))
+        stderr.write(status)
+        stdout.flush()
+        stderr.flush()
+
+    original_stdout, sys.stdout = sys.stdout, output
+    try:
+        bulk.run(_run, commands, concurrency=concurrency, callback=_done,
+                 max_retries=getattr(client.http_client,
+                                     'conflict_max_retries', None),
+                 retry_interval=getattr(client.http_client,
+                                        'conflict_retry_interval', None),
+                 retry_policy=getattr(client.http_client, 'retry_policy',
+                                      None))
+    finally:
+        sys.stdout = original_stdout
+    return state['failed']
@@ -0,0 +1,195 @@
+# -*- coding: utf-8 -*-
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Run an action over many items on a bounded pool of threads.
+"""
+
+import collections
+import heapq
+import logging
+import sys
+import threading
+import time
+
+import six
+
+from ironicclient.common import http
+from ironicclient import exc
+
+
+LOG = logging.getLogger(__name__)
+
+# NOTE: as many threads as pooled connections, so that each thread keeps
+# reusing a connection.
+DEFAULT_CONCURRENCY = http.DEFAULT_MAX_CONNECTIONS
+
+
+class BulkResult(collections.namedtuple('BulkResult',
+                                        ['item', 'result', 'error'])):
+    """The outcome of an action for one item.
+
+    'error' is the exception raised by the action (None if it succeeded),
+    'result' is what the action returned.
+    """
+
+    @property
+    def ok(self):
+        return self.error is None
+
+
+class _Scheduler(object):
+    """The tasks to run, with the retries waiting for their time."""
+
+    def __init__(self, count):
+        self._cond = threading.Condition()
+        # (not before, index, attempt)
+        self._tasks = [(0, index, 1) for index in range(count)]
+        self._pending = count
+        self._aborted = False
+
+    def get(self):
+        """Wait for a task to be due, returns None once all are done."""
+        with self._cond:
+            while True:
+                if self._aborted or not self._pending:
+                    return None
+                if self._tasks:
+                    delay = self._tasks[0][0] - time.time()
+                    if delay <= 0:
+                        return heapq.heappop(self._tasks)
+                else:
+                    delay = None
+                self._cond.wait(delay)
+
+    def retry(self, index, attempt, delay):
+        with self._cond:
+            heapq.heappush(self._tasks,
+                           (time.time() + delay, index, attempt + 1))
+            self._cond.notify()
+
+    def done(self):
+        with self._cond:
+            self._pending -= 1
+            if not self._pending:
+                self._cond.notify_all()
+
+    def abort(self):
+        with self._cond:
+            self._aborted = True
+            self._cond.notify_all()
+
+
+def run(func, items, concurrency=None, max_retries=None,
+        retry_interval=None, retry_policy=None, callback=None):
+    """Call func(item) for each item, in parallel.
+
+    A Conflict error (e.g. the node is locked by the conductor) does not
+    make the thread sleep: the item is retried once the delay given by the
+    retry policy has passed, and the other items are processed meanwhile.
+
+    :param func: the callable to run for each item.
+    :param items: the items to process.
+    :param concurrency: maximum number of calls running at the same time,
+        defaults to DEFAULT_CONCURRENCY.
+    :param max_retries: maximum number of retries of an item on Conflict
+        errors, defaults to http.DEFAULT_MAX_RETRIES.
+    :param retry_interval: initial number of seconds to wait before
+        retrying an item after a Conflict error, defaults to
+        http.DEFAULT_RETRY_INTERVAL.
+    :param retry_policy: the http.RetryPolicy computing the delays between
+        attempts, e.g. the one of the client.
+    :param callback: Optional, called with the index and the BulkResult of
+        each item as soon as it is processed, from the worker threads.
+    :returns: a list of BulkResult, in the order of 'items'.
+    :raises: the exceptions which are not an Exception, like SystemExit,
+        raised by func(): the other items are not processed then.
+    """
+    items = list(items)
+    if concurrency is None:
+        concurrency = DEFAULT_CONCURRENCY
+    if max_retries is None:
+        max_retries = http.DEFAULT_MAX_RETRIES
+    if retry_interval is None:
+        retry_interval = http.DEFAULT_RETRY_INTERVAL
+    if retry_policy is None:
+        retry_policy = http.RetryPolicy()
+    if concurrency < 1:
+        raise ValueError('concurrency must be at least 1')
+
+    results = [None] * len(items)
+    started = [None] * len(items)
+    scheduler = _Scheduler(len(items))
+    # The exc_info of the error stopping the workers, if any
+    failure = []
+
+    def _worker():
+        with http.conflict_retries_deferred():
+            while True:
+                task = scheduler.get()
+                if task is None:
+                    return
+                not_before, index, attempt = task
+                if started[index] is None:
+                    started[index] = time.time()
+                try:
+                    result = func(items[index])
+                except exc.Conflict as e:
+                    delay = retry_policy.next_delay(attempt, max_retries,
+                                                    retry_interval,
+                                                    started[index])
+                    if delay is not None:
+                        LOG.debug('Conflict for %(item)s, attempt %(attempt)d '
+                                  'of %(total)d, retrying in %(delay).1f '
+                                  'seconds: %(error)s',
+                                  {'item': items[index], 'attempt': attempt,
+                                   'total': max_retries + 1, 'delay': delay,
+                                   'error': e})
+                        scheduler.retry(index, attempt, delay)
+                        continue
+                    results[index] = BulkResult(items[index], None, e)
+                except Exception as e:
+                    results[index] = BulkResult(items[index], None, e)
+                except BaseException:
+                    # NOTE: e.g. SystemExit, the other workers must not
+                    # wait forever for this item to be done
+                    failure.append(sys.exc_info())
+                    scheduler.abort()
+                    return
+                else:
+                    results[index] = BulkResult(items[index], result, None)
+                if callback is not None:
+                    try:
+                        callback(index, results[index])
+                    except Exception:
+                        LOG.exception('Callback failed for %s', items[index])
+                scheduler.done()
+
+    threads = [threading.Thread(target=_worker,
+                                name='ironicclient-bulk-%d' % i)
+               for i in range(min(concurrency, len(items)))]
+    for thread in threads:
+        thread.daemon = True
+        thread.start()
+    try:
+        for thread in threads:
+            # NOTE: a timeout keeps the main thread responsive to ^C
+            while thread.is_alive():
+                thread.join(0.5)
+    except BaseException:
+        scheduler.abort()
+        raise
+    if failure:
+        six.reraise(*failure[0])
+    return results
@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Cache of the resources retrieved by the managers.
+"""
+
+import calendar
+import collections
+import copy
+from email import utils as email_utils
+import threading
+import time
+
+from oslo_utils import timeutils
+
+
+# Seconds during which a resource is returned without asking the server
+DEFAULT_TTL = 5
+DEFAULT_MAX_ENTRIES = 1000
+
+
+CacheEntry = collections.namedtuple('CacheEntry',
+                                    ['info', 'etag', 'fresh'])
+
+
+def _split_path(path):
+    return path.split('?', 1)[0].rstrip('/').split('/')
+
+
+def is_cacheable(path):
+    """Whether a path is the one of a single resource, e.g. /v1/nodes/<id>.
+
+    The sub-resources (like the states of a node) and the lists are never
+    cached.
+    """
+    if '?' in path:
+        return False
+    parts = _split_path(path)
+    # ['', 'v1', 'nodes', '<id>']
+    return len(parts) == 4 and parts[3] not in ('', 'detail')
+
+
+def response_status(resp):
+    return getattr(resp, 'status', None) or getattr(resp, 'status_code', None)
+
+
+def response_header(resp, name):
+    if hasattr(resp, 'getheader'):
+        return resp.getheader(name, None)
+    return resp.headers.get(name)
+
+
+def conditional_headers(info, etag=None):
+    """The headers asking the server whether a resource was modified.
+
+    :param info: the cached representation of the resource.
+    :param etag: Optional, the ETag the server returned with it.
+    """
+    headers = {}
+    if etag:
+        headers['If-None-Match'] = etag
+    modified = info.get('updated_at') or info.get('created_at')
+    if modified:
+        try:
+            modified = timeutils.parse_isotime(modified)
+        except ValueError:
+            pass
+        else:
+            headers['If-Modified-Since'] = email_utils.formatdate(
+                calendar.timegm(modified.utctimetuple()), usegmt=True)
+    return headers
+
+
+class ResourceCache(object):
+    """An LRU cache of the resources retrieved by the managers.
+
+    A resource is returned from the cache during 'ttl' seconds after it
+    was retrieved. Past that, the server is asked whether the resource was
+    modified with a conditional request, using its ETag (if the server
+    sent one) and its 'updated_at' field. The entries are keyed by path and
+    API version, since the fields of a resource depend on the version.
+
+    :param ttl: number of seconds during which a resource is fresh.
+    :param ttls: Optional, a dictionary overriding 'ttl' per resource type,
+                 e.g. {'drivers': 60, 'nodes': 1}.
+    :param max_entries: maximum number of resources kept, the least
+                        recently used ones are evicted first.
+    """
+
+    def __init__(self, ttl=DEFAULT_TTL, ttls=None,
+                 max_entries=DEFAULT_MAX_ENTRIES):
+        self.ttl = ttl
+        self.ttls = ttls or {}
+        self.max_entries = max_entries
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'revalidated': 0,
+                       'invalidated': 0, 'evicted': 0}
+
+    @property
+    def stats(self):
+        """A snapshot of the cache counters.
+
+        * hits: resources returned from the cache without a request
+        * misses: resources not cached or stale
+        * revalidated: stale resources the server reported as unmodified
+        * invalidated: entries dropped after a write
+        * evicted: entries dropped to make room for new ones
+        """
+        with self._lock:
+            return dict(self._stats)
+
+    def ttl_for(self, path):
+        """The TTL of a resource, depending on its type."""
+        parts = _split_path(path)
+        resource_type = parts[2] if len(parts) > 2 else None
+        return self.ttls.get(resource_type, self.ttl)
+
+    def get(self, path, version):
+        """Return the CacheEntry of a resource, None if not cached.
+
+        The 'info' of the entry is a copy, that the caller may modify.
+        """
+        key = (path, version)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats['misses'] += 1
+                return None
+            info, etag, stored_at = entry
+            # NOTE: most recently used last
+            del self._entries[key]
+            self._entries[key] = entry
+            fresh = time.time() - stored_at <= self.ttl_for(path)
+            self._stats['hits' if fresh else 'misses'] += 1
+        return CacheEntry(copy.deepcopy(info), etag, fresh)
+
+    def set(self, path, version, info, etag=None):
+        key = (path, version)
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (copy.deepcopy(info), etag, time.time())
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats['evicted'] += 1
+
+    def refresh(self, path, version):
+        """Mark a cached resource as fresh, the server says it's unchanged."""
+        key = (path, version)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries[key] = entry[:2] + (time.time(),)
+                self._stats['revalidated'] += 1
+
+    def invalidate(self, path):
+        """Drop the resource a path belongs to, in all the API versions.
+
+        The resource is dropped whether it was cached under its UUID or
+        its name.
+
+        :param path: the path of the resource or of one of its
+                     sub-resources, e.g. /v1/nodes/<id>/states/power.
+                     Nothing is dropped for the path of a collection.
+        """
+        parts = _split_path(path)
+        if len(parts) < 4:
+            return
+        collection, ident = '/'.join(parts[:3]), parts[3]
+        with self._lock:
+            keys = [key for key, (info, etag, stored_at)
+                    in self._entries.items()
+                    if key[0].rsplit('/', 1)[0] == collection and
+                    (key[0].rsplit('/', 1)[1] == ident or
+                     ident in (info.get('uuid'), info.get('name')))]
+            for key in keys:
+                del self._entries[key]
+            self._stats['invalidated'] += len(keys)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
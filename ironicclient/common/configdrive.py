@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Config drives built from directories, reused for the same content.
+"""
+
+import collections
+import hashlib
+import os
+import tempfile
+import threading
+
+from ironicclient.common.i18n import _
+from ironicclient.common import jsonstream
+from ironicclient.common import utils
+from ironicclient import exc
+
+
+# Number of config drives kept by the process
+DEFAULT_MAX_ENTRIES = 8
+
+_drives = collections.OrderedDict()
+# The events set once the config drive of a key is built (or failed to)
+_building = {}
+_lock = threading.Lock()
+
+
+class ConfigDrive(jsonstream.FileString):
+    """A config drive, gzipped and base64 encoded, in a temporary file.
+
+    It is sent from its file when used as a JSON value of a request body.
+    The file is deleted once the object is garbage collected.
+
+    :param tmpfile: the NamedTemporaryFile holding the config drive.
+    """
+
+    def __init__(self, tmpfile):
+        super(ConfigDrive, self).__init__(tmpfile.name, escaped=True)
+        self._tmpfile = tmpfile
+
+    def read(self):
+        """Return the whole config drive."""
+        return b''.join(self)
+
+
+def _mode(path):
+    return ('%o' % (os.lstat(path).st_mode & 0o7777)).encode('ascii')
+
+
+def content_hash(path):
+    """A hash of the tree of a directory.
+
+    The names, modes and contents of the files and directories, and the
+    targets of the links, are hashed.
+
+    :param path: the directory.
+    :raises: CommandError if the directory can't be read.
+    """
+    def onerror(error):
+        raise exc.CommandError(_('The directory "%(path)s" is not readable: '
+                                 '%(error)s') % {'path': path, 'error': error})
+
+    digest = hashlib.sha256()
+    for root, dirs, files in os.walk(path, onerror=onerror):
+        dirs.sort()
+        relative = os.path.relpath(root, path)
+        try:
+            mode = _mode(root)
+        except OSError as e:
+            onerror(e)
+        digest.update(b'd' + relative.encode('utf-8') + b'\0' + mode + b'\0')
+        for name in sorted(files + [d for d in dirs
+                                    if os.path.islink(os.path.join(root, d))]):
+            full_path = os.path.join(root, name)
+            entry = os.path.join(relative, name).encode('utf-8')
+            if os.path.islink(full_path):
+                target = os.readlink(full_path).encode('utf-8')
+                digest.update(b'l' + entry + b'\0' + target + b'\0')
+                continue
+            try:
+                digest.update(b'f' + entry + b'\0' + _mode(full_path) + b'\0')
+                with open(full_path, 'rb') as f:
+                    for chunk in iter(lambda: f.read(jsonstream.CHUNK_SIZE),
+                                      b''):
+                        digest.update(chunk)
+            except (IOError, OSError) as e:
+                onerror(e)
+            digest.update(b'\0')
+    return digest.hexdigest()
+
+
+def build(path, genisoimage=False):
+    """Build the config drive of a directory.
+
+    The config drives are kept by the process, so that the one of a
+    directory is built only once as long as its content doesn't change,
+    e.g. when deploying many nodes with it.
+
+    :param path: the directory containing the config drive files.
+    :param genisoimage: whether to build the ISO image with the genisoimage
+                        tool, rather than in-process.
+    :returns: a ConfigDrive.
+    """
+    key = (content_hash(path), genisoimage)
+    while True:
+        with _lock:
+            drive = _drives.pop(key, None)
+            if drive is not None:
+                _drives[key] = drive
+                return drive
+            building = _building.get(key)
+            if building is None:
+                building = _building[key] = threading.Event()
+                break
+        # NOTE: another thread is building the same config drive, use it
+        # once built, or build it if that thread failed.
+        building.wait()
+
+    # NOTE: built without the lock, the config drives of different
+    # directories are built at the same time.
+    drive = None
+    try:
+        tmpfile = tempfile.NamedTemporaryFile(prefix='configdrive-')
+        try:
+            utils.write_configdrive(path, tmpfile, genisoimage=genisoimage)
+            tmpfile.flush()
+        except Exception:
+            tmpfile.close()
+            raise
+        drive = ConfigDrive(tmpfile)
+    finally:
+        with _lock:
+            del _building[key]
+            if drive is not None:
+                _drives[key] = drive
+                while len(_drives) > DEFAULT_MAX_ENTRIES:
+                    _drives.popitem(last=False)
+        building.set()
+    return drive
+
+
+def clear():
+    """Forget the config drives built."""
+    with _lock:
+        _drives.clear()
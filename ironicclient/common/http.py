@@ -15,20 +15,29 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
-import copy
+import collections
+import contextlib
 import functools
 import json
 import logging
 import os
+import random
+import select
 import socket
 import ssl
+import stat
 import textwrap
+import threading
 import time
+import zlib
 
 from keystoneclient import adapter
 import six
 import six.moves.urllib.parse as urlparse
 
+from ironicclient.common import instrumentation
+from ironicclient.common import jsonstream
+from ironicclient.common import version_cache
 from ironicclient import exc
 
 
@@ -43,13 +52,21 @@ DEFAULT_VER = '1.6'
 LOG = logging.getLogger(__name__)
 USER_AGENT = 'python-ironicclient'
 CHUNKSIZE = 1024 * 64  # 64kB
+# The encodings of the response bodies the client can decode
+ACCEPT_ENCODING = 'gzip, deflate'
 
 API_VERSION = '/v1'
-API_VERSION_SELECTED_STATES = ('user', 'negotiated', 'default')
+API_VERSION_SELECTED_STATES = ('user', 'negotiated', 'cached', 'default')
 
 
 DEFAULT_MAX_RETRIES = 5
 DEFAULT_RETRY_INTERVAL = 2
+DEFAULT_RETRY_BACKOFF = 2
+DEFAULT_MAX_RETRY_INTERVAL = 10
+DEFAULT_RETRY_JITTER = 0.5
+
+DEFAULT_MAX_CONNECTIONS = 10
+DEFAULT_CONNECTION_IDLE_TIMEOUT = 60
 
 
 def _trim_endpoint_api_version(url):
@@ -57,6 +74,238 @@ def _trim_endpoint_api_version(url):
     return url.rstrip('/').rstrip(API_VERSION)
 
 
+def _read_body(body_iter):
+    """Read the whole body of a response into a native string."""
+    chunks = list(body_iter)
+    if six.PY3 and chunks and isinstance(chunks[0], bytes):
+        return b''.join(chunks).decode('utf-8')
+    return ''.join(chunks)
+
+
+class _DeflateDecoder(object):
+    """Decode a 'deflate' body, with or without its zlib header.
+
+    Some servers send raw deflate data rather than the zlib format the
+    HTTP specification asks for.
+    """
+
+    def __init__(self):
+        self._obj = zlib.decompressobj()
+        self._data = b''
+
+    def decompress(self, data):
+        if self._data is None:
+            return self._obj.decompress(data)
+        self._data += data
+        try:
+            decompressed = self._obj.decompress(data)
+        except zlib.error:
+            self._obj = zlib.decompressobj(-zlib.MAX_WBITS)
+            data, self._data = self._data, None
+            return self._obj.decompress(data)
+        if decompressed:
+            self._data = None
+        return decompressed
+
+    def flush(self):
+        return self._obj.flush()
+
+
+def _body_decoder(resp):
+    """A decompressor for the body of a response, None if not encoded."""
+    getheader = getattr(resp, 'getheader', None)
+    if getheader is None:
+        return None
+    encoding = (getheader('content-encoding', None) or '').strip().lower()
+    if encoding in ('gzip', 'x-gzip'):
+        return zlib.decompressobj(16 + zlib.MAX_WBITS)
+    if encoding == 'deflate':
+        return _DeflateDecoder()
+    return None
+
+
+def _rewind(body):
+    """Rewind a body sent from a file, before sending it (again)."""
+    if isinstance(body, jsonstream.StreamBody):
+        body.seek(0)
+    elif isinstance(body, _RawBody):
+        body.rewind()
+
+
+class _RawBody(object):
+    """A request body streamed from a file object or an iterable.
+
+    A regular file is sent with its size, the others with the chunked
+    transfer encoding. Only the bodies read from seekable files can be
+    sent again, e.g. on a Conflict error.
+
+    :param source: a binary file object, or an iterable of bytes.
+    :param chunk_size: number of bytes read from a file at once.
+    """
+
+    def __init__(self, source, chunk_size=None):
+        self.source = source
+        self.chunk_size = chunk_size or CHUNKSIZE
+        self.size = None
+        self._start = None
+        self._started = False
+        if hasattr(source, 'read'):
+            try:
+                self._start = source.tell()
+                mode = os.fstat(source.fileno())
+            except (AttributeError, IOError, OSError, ValueError):
+                pass
+            else:
+                if stat.S_ISREG(mode.st_mode):
+                    self.size = mode.st_size - self._start
+
+    @property
+    def resendable(self):
+        return self._start is not None or not self._started
+
+    def rewind(self):
+        if self._start is not None:
+            self.source.seek(self._start)
+        elif self._started:
+            raise exc.InvalidAttribute(
+                'The request body was read from an iterable, it cannot be '
+                'sent again')
+
+    def start(self):
+        """Mark the body as being sent, and return its source."""
+        self._started = True
+        return self.source
+
+    def _read_chunks(self):
+        """Read the source, into the same buffer for a file object."""
+        readinto = getattr(self.source, 'readinto', None)
+        if readinto is None:
+            if hasattr(self.source, 'read'):
+                return iter(functools.partial(self.source.read,
+                                              self.chunk_size), b'')
+            return iter(self.source)
+        return _readinto_chunks(readinto, self.chunk_size)
+
+    def send(self, conn):
+        """Send the body on a connection whose headers were sent."""
+        self.start()
+        sendfile = getattr(conn.sock, 'sendfile', None)
+        if self.size is not None and sendfile is not None:
+            # NOTE: the file is copied by the kernel to plain sockets
+            sendfile(self.source, self._start, self.size)
+            return
+        for chunk in self._read_chunks():
+            if not len(chunk):
+                continue
+            if self.size is None:
+                conn.send(('%x\r\n' % len(chunk)).encode('ascii'))
+                conn.send(chunk)
+                conn.send(b'\r\n')
+            else:
+                conn.send(chunk)
+        if self.size is None:
+            conn.send(b'0\r\n\r\n')
+
+    def __repr__(self):
+        return '<streamed from %r>' % (self.source,)
+
+
+def _readinto_chunks(readinto, chunk_size):
+    """Generate views of a buffer filled with readinto() until EOF."""
+    buf = bytearray(chunk_size)
+    view = memoryview(buf)
+    while True:
+        count = readinto(buf)
+        if not count:
+            return
+        yield view[:count]
+
+
+def _raw_body(body, chunk_size=None):
+    """The body of a raw request, streamed if a file object or iterable."""
+    if (body is None or isinstance(body, (six.binary_type, six.text_type,
+                                          jsonstream.StreamBody))):
+        return body
+    return _RawBody(body, chunk_size=chunk_size)
+
+
+def _send_request(conn, method, url, **kwargs):
+    """Send a request on an httplib connection, streaming a _RawBody."""
+    body = kwargs.get('body')
+    if not isinstance(body, _RawBody):
+        conn.request(method, url, **kwargs)
+        return
+    headers = kwargs.get('headers') or {}
+    names = set(name.lower() for name in headers)
+    conn.putrequest(method, url, skip_host='host' in names,
+                    skip_accept_encoding='accept-encoding' in names)
+    for name, value in headers.items():
+        conn.putheader(name, value)
+    if body.size is None:
+        conn.putheader('Transfer-Encoding', 'chunked')
+    else:
+        conn.putheader('Content-Length', str(body.size))
+    conn.endheaders()
+    body.send(conn)
+
+
+def _body_size(body):
+    """The size of a request body, None if unknown."""
+    if body is None:
+        return 0
+    if isinstance(body, six.text_type):
+        return len(body.encode('utf-8'))
+    if isinstance(body, (six.binary_type, jsonstream.StreamBody)):
+        return len(body)
+    if isinstance(body, _RawBody):
+        return body.size
+    return None
+
+
+def _timed_create_connection(address, timeout=socket._GLOBAL_DEFAULT_TIMEOUT,
+                             source_address=None, timings=None):
+    """Open a socket like socket.create_connection, timing each step.
+
+    The durations of the name resolution and of the connection are stored
+    as 'dns' and 'connect' in the 'timings' dictionary.
+    """
+    host, port = address
+    started = time.time()
+    addresses = socket.getaddrinfo(host, port, 0, socket.SOCK_STREAM)
+    resolved = time.time()
+    timings['dns'] = resolved - started
+    error = None
+    for family, socktype, proto, canonname, sockaddr in addresses:
+        sock = None
+        try:
+            sock = socket.socket(family, socktype, proto)
+            if timeout is not socket._GLOBAL_DEFAULT_TIMEOUT:
+                sock.settimeout(timeout)
+            if source_address:
+                sock.bind(source_address)
+            # NOTE: the whole address, with the flow info and scope id of
+            # the IPv6 ones, e.g. of link-local addresses
+            sock.connect(sockaddr)
+        except socket.error as e:
+            error = e
+            if sock is not None:
+                sock.close()
+            continue
+        timings['connect'] = time.time() - resolved
+        return sock
+    raise error or socket.error('getaddrinfo returns an empty list')
+
+
+def _version_tuple(version):
+    return tuple(int(part) for part in str(version).split('.'))
+
+
+def _pick_version(requested, min_ver, max_ver):
+    """The requested version, or the closest one supported by the server."""
+    versions = sorted([requested, min_ver, max_ver], key=_version_tuple)
+    return versions[1]
+
+
 def _extract_error_json(body):
     """Return  error_message from the HTTP response body."""
     error_json = {}
@@ -72,6 +321,46 @@ def _extract_error_json(body):
 
 
 class VersionNegotiationMixin(object):
+    version_cache = None
+    _version_cache_checked = False
+
+    def _version_cache_key(self):
+        """Return the endpoint identifying the server in the version cache."""
+        raise NotImplementedError()
+
+    def _use_cached_version(self):
+        """Pick a version supported by the server if it was cached before.
+
+        Only done when no version was requested explicitly, and only on
+        the first request of the client.
+        """
+        if self._version_cache_checked:
+            return
+        self._version_cache_checked = True
+        if (self.version_cache is None or
+                self.api_version_select_state != 'default'):
+            return
+        try:
+            versions = self.version_cache.get(self._version_cache_key())
+        except Exception as e:
+            LOG.debug('Cannot look up the cached API version: %s', e)
+            return
+        if versions is not None:
+            self.os_ironic_api_version = _pick_version(
+                self.os_ironic_api_version, *versions)
+            self.api_version_select_state = 'cached'
+            LOG.debug('Using cached API version %s',
+                      self.os_ironic_api_version)
+
+    def _cache_versions(self, min_ver, max_ver):
+        if self.version_cache is None or not max_ver:
+            return
+        try:
+            self.version_cache.set(self._version_cache_key(), min_ver,
+                                   max_ver)
+        except Exception as e:
+            LOG.debug('Cannot cache the API versions: %s', e)
+
     def negotiate_version(self, conn, resp):
         """Negotiate the server version
 
@@ -92,13 +381,10 @@ class VersionNegotiationMixin(object):
         # the supported version range
         if not max_ver:
             LOG.debug('No version header in response, requesting from server')
-            if self.os_ironic_api_version:
-                base_version = ("/v%s" %
-                                str(self.os_ironic_api_version).split('.')[0])
-            else:
-                base_version = API_VERSION
-            resp = self._make_simple_request(conn, 'GET', base_version)
+            resp = self._make_simple_request(conn, 'GET',
+                                             self._version_request_url())
             min_ver, max_ver = self._parse_version_headers(resp)
+        self._cache_versions(min_ver, max_ver)
         # If the user requested an explicit version or we have negotiated a
         # version and still failing then error now.  The server could
         # support the version requested but the requested operation may not
@@ -119,10 +405,8 @@ class VersionNegotiationMixin(object):
                 % {'req': self.os_ironic_api_version,
                    'min': min_ver, 'max': max_ver}))
 
-        # TODO(deva): cache the negotiated version for this server
-        negotiated_ver = min(self.os_ironic_api_version, max_ver)
-        if negotiated_ver < min_ver:
-            negotiated_ver = min_ver
+        negotiated_ver = _pick_version(self.os_ironic_api_version, min_ver,
+                                       max_ver)
         # server handles microversions, but doesn't support
         # the requested version, so try a negotiated version
         self.api_version_select_state = 'negotiated'
@@ -131,6 +415,12 @@ class VersionNegotiationMixin(object):
 
         return negotiated_ver
 
+    def _version_request_url(self):
+        """The URL of the document listing the versions of the major API."""
+        if self.os_ironic_api_version:
+            return "/v%s" % str(self.os_ironic_api_version).split('.')[0]
+        return API_VERSION
+
     def _generic_parse_version_headers(self, accessor_func):
         min_ver = accessor_func('X-OpenStack-Ironic-API-Minimum-Version',
                                 None)
@@ -147,6 +437,146 @@ class VersionNegotiationMixin(object):
         raise NotImplementedError()
 
 
+class RetryBudget(object):
+    """Limit the number of retries of the requests of a client.
+
+    Each retry spends a token, and each successful request gives back
+    'ratio' token, up to 'max_tokens'. Once the tokens are spent, Conflict
+    errors are no longer retried until enough requests succeed, rather than
+    piling retries on a busy service.
+
+    :param max_tokens: the number of tokens initially available.
+    :param ratio: the part of a token given back by a successful request.
+    """
+
+    def __init__(self, max_tokens, ratio=0.1):
+        self.max_tokens = max_tokens
+        self.ratio = ratio
+        self._tokens = float(max_tokens)
+        self._lock = threading.Lock()
+
+    @property
+    def tokens(self):
+        return self._tokens
+
+    def spend(self):
+        """Take a token for a retry, returns False if none is left."""
+        with self._lock:
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+    def refill(self):
+        with self._lock:
+            self._tokens = min(self.max_tokens, self._tokens + self.ratio)
+
+
+class RetryPolicy(object):
+    """Decide when requests failing with a Conflict error are retried.
+
+    The number of retries and the initial interval between attempts are
+    those of the client (max_retries and retry_interval). The interval is
+    multiplied by 'backoff' after each attempt, up to 'max_interval', and
+    shortened by a random part of up to 'jitter' of it, so that clients
+    waiting for the same locked node do not retry all at once.
+
+    :param backoff: the factor applied to the interval after each attempt.
+    :param max_interval: the maximum number of seconds between attempts.
+    :param jitter: the randomized part of the interval, from 0 to 1.
+    :param deadline: Optional, number of seconds after the first attempt
+                     past which a request is not retried anymore.
+    :param budget: Optional, a RetryBudget limiting the retries of all the
+                   requests using this policy.
+    """
+
+    def __init__(self, backoff=DEFAULT_RETRY_BACKOFF,
+                 max_interval=DEFAULT_MAX_RETRY_INTERVAL,
+                 jitter=DEFAULT_RETRY_JITTER, deadline=None, budget=None):
+        self.backoff = backoff
+        self.max_interval = max_interval
+        self.jitter = jitter
+        self.deadline = deadline
+        self.budget = budget
+        self._lock = threading.Lock()
+        self._stats = {'attempts': 0, 'conflicts': 0, 'retries': 0,
+                       'exhausted': 0, 'waited': 0.0}
+
+    @property
+    def stats(self):
+        """Counters of the requests using this policy.
+
+        'attempts' and 'conflicts' count the requests sent and those which
+        failed with a Conflict error, 'retries' and 'exhausted' the
+        requests retried and given up, and 'waited' the number of seconds
+        spent waiting to retry.
+        """
+        with self._lock:
+            return dict(self._stats)
+
+    def _count(self, key, value=1):
+        with self._lock:
+            self._stats[key] += value
+
+    def interval(self, attempt, retry_interval):
+        """Seconds to wait after the failed attempt number 'attempt'."""
+        interval = min(self.max_interval,
+                       retry_interval * self.backoff ** (attempt - 1))
+        return interval * (1 - random.uniform(0, self.jitter))
+
+    def record_attempt(self, conflict=False):
+        self._count('attempts')
+        if conflict:
+            self._count('conflicts')
+        elif self.budget is not None:
+            self.budget.refill()
+
+    def next_delay(self, attempt, max_retries, retry_interval, started):
+        """Decide whether to retry after a Conflict error.
+
+        :param attempt: the number of the attempt that failed, from 1.
+        :param max_retries: the maximum number of retries.
+        :param retry_interval: the initial interval between attempts.
+        :param started: the time of the first attempt.
+        :returns: the number of seconds to wait before retrying, or None
+                  if the request should not be retried.
+        """
+        delay = self.interval(attempt, retry_interval)
+        if (attempt > max_retries or
+                (self.deadline is not None and
+                 time.time() + delay - started > self.deadline) or
+                (self.budget is not None and not self.budget.spend())):
+            self._count('exhausted')
+            return None
+        self._count('retries')
+        self._count('waited', delay)
+        return delay
+
+
+def _get_retry_policy(client):
+    if client.retry_policy is None:
+        client.retry_policy = RetryPolicy()
+    return client.retry_policy
+
+
+_retry_state = threading.local()
+
+
+@contextlib.contextmanager
+def conflict_retries_deferred():
+    """Raise Conflict errors in this thread instead of retrying the requests.
+
+    The caller is then in charge of retrying, e.g. to do something else
+    while waiting rather than sleeping, using RetryPolicy.next_delay().
+    """
+    previous = getattr(_retry_state, 'deferred', False)
+    _retry_state.deferred = True
+    try:
+        yield
+    finally:
+        _retry_state.deferred = previous
+
+
 def with_retries(func):
     """Wrapper for _http_request adding support for retries."""
     @functools.wraps(func)
@@ -156,26 +586,200 @@ def with_retries(func):
         if self.conflict_retry_interval is None:
             self.conflict_retry_interval = DEFAULT_RETRY_INTERVAL
 
+        policy = _get_retry_policy(self)
+        deferred = getattr(_retry_state, 'deferred', False)
+        started = time.time()
         num_attempts = self.conflict_max_retries + 1
-        for attempt in range(1, num_attempts + 1):
-            try:
-                return func(self, url, method, **kwargs)
-            except exc.Conflict as error:
-                msg = ("Error contacting Ironic server: %(error)s. "
-                       "Attempt %(attempt)d of %(total)d" %
-                       {'attempt': attempt,
-                        'total': num_attempts,
-                        'error': error})
-                if attempt == num_attempts:
-                    LOG.error(msg)
-                    raise
+        attempt = 0
+        with instrumentation.track_request(self.instrumentation, method,
+                                           url) as info:
+            while True:
+                attempt += 1
+                try:
+                    result = func(self, url, method, **kwargs)
+                except exc.Conflict as error:
+                    policy.record_attempt(conflict=True)
+                    body = kwargs.get('body', kwargs.get('data'))
+                    if deferred or (isinstance(body, _RawBody) and
+                                    not body.resendable):
+                        raise
+                    msg = ("Error contacting Ironic server: %(error)s. "
+                           "Attempt %(attempt)d of %(total)d" %
+                           {'attempt': attempt,
+                            'total': num_attempts,
+                            'error': error})
+                    delay = policy.next_delay(attempt,
+                                              self.conflict_max_retries,
+                                              self.conflict_retry_interval,
+                                              started)
+                    if delay is None:
+                        LOG.error(msg)
+                        raise
+                    LOG.warn("%(msg)s, retrying in %(delay).1f seconds",
+                             {'msg': msg, 'delay': delay})
+                    time.sleep(delay)
+                    if info is not None:
+                        info.retries += 1
                 else:
-                    LOG.warn(msg)
-                    time.sleep(self.conflict_retry_interval)
+                    policy.record_attempt()
+                    return result
 
     return wrapper
 
 
+def _is_connection_dropped(conn):
+    """Check whether an idle connection was closed by the server.
+
+    An idle keep-alive socket must never be readable: if it is, the server
+    either closed it (EOF) or sent unsolicited data, and it can't be reused.
+    """
+    sock = getattr(conn, 'sock', None)
+    if sock is None:
+        # Not connected yet (or closed by httplib), it will be reopened
+        # on the next request.
+        return False
+    try:
+        readable, _w, _x = select.select([sock], [], [], 0)
+    except (select.error, socket.error, ValueError):
+        return True
+    return bool(readable)
+
+
+class ConnectionPool(object):
+    """A bounded, thread-safe pool of keep-alive connections to an endpoint.
+
+    At most ``max_connections`` connections are in use at the same time:
+    once they are all handed out, get() waits up to ``timeout`` seconds
+    for one to be given back with put() or discard(). Idle connections
+    older than ``idle_timeout`` seconds, or whose socket has been closed
+    by the server, are evicted instead of being handed out.
+
+    :param factory: callable returning a new (unconnected) connection.
+    :param max_connections: maximum number of connections in use.
+    :param idle_timeout: seconds an idle connection may be kept around.
+    :param timeout: seconds get() waits for a connection, None to wait
+                    forever.
+    """
+
+    def __init__(self, factory, max_connections=DEFAULT_MAX_CONNECTIONS,
+                 idle_timeout=DEFAULT_CONNECTION_IDLE_TIMEOUT, timeout=None):
+        self._factory = factory
+        self.max_connections = max_connections
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+        self._idle = collections.deque()
+        self._in_use = 0
+        self._lock = threading.Lock()
+        self._available = threading.Condition(self._lock)
+        self._stats = {'hits': 0, 'misses': 0, 'evicted': 0, 'discarded': 0}
+
+    @property
+    def stats(self):
+        """A snapshot of the pool counters.
+
+        * hits: requests served by an already open connection
+        * misses: requests for which a new connection was created
+        * evicted: idle connections dropped as expired or stale
+        * discarded: connections closed instead of being pooled
+        """
+        with self._lock:
+            return dict(self._stats)
+
+    @property
+    def in_use(self):
+        """The number of connections handed out and not given back."""
+        with self._lock:
+            return self._in_use
+
+    def _count(self, key):
+        with self._lock:
+            self._stats[key] += 1
+
+    def _acquire(self):
+        deadline = (time.time() + self.timeout
+                    if self.timeout is not None else None)
+        with self._lock:
+            while self._in_use >= self.max_connections:
+                if deadline is None:
+                    self._available.wait()
+                    continue
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    raise exc.ConnectionPoolTimeout(
+                        'No connection to the endpoint became available '
+                        'within %s seconds' % self.timeout)
+                self._available.wait(remaining)
+            self._in_use += 1
+
+    def _release(self):
+        with self._lock:
+            self._in_use -= 1
+            self._available.notify()
+
+    def get(self):
+        """Return an idle connection, or a new one if none is usable.
+
+        :raises: ConnectionPoolTimeout if max_connections are in use for
+            longer than the timeout of the pool.
+        """
+        self._acquire()
+        while True:
+            with self._lock:
+                if not self._idle:
+                    self._stats['misses'] += 1
+                    break
+                # NOTE: most recently released first, it is the least
+                # likely to have been timed out by the server.
+                conn, released_at = self._idle.pop()
+            if (time.time() - released_at > self.idle_timeout or
+                    _is_connection_dropped(conn)):
+                self._count('evicted')
+                conn.close()
+                continue
+            self._count('hits')
+            return conn
+        try:
+            return self._factory()
+        except Exception:
+            self._release()
+            raise
+
+    def put(self, conn):
+        """Return a connection whose response has been fully read."""
+        with self._lock:
+            self._idle.append((conn, time.time()))
+            self._in_use -= 1
+            self._available.notify()
+
+    def discard(self, conn):
+        """Close a connection that can't be reused."""
+        self._count('discarded')
+        self._release()
+        conn.close()
+
+    def replace(self, conn):
+        """Close a connection that can't be reused and return a new one.
+
+        The new connection takes the place of the old one in the pool, so
+        there's no wait for it.
+        """
+        self._count('discarded')
+        conn.close()
+        try:
+            return self._factory()
+        except Exception:
+            self._release()
+            raise
+
+    def clear(self):
+        """Close all the idle connections."""
+        with self._lock:
+            idle = list(self._idle)
+            self._idle.clear()
+        for conn, _released_at in idle:
+            conn.close()
+
+
 class HTTPClient(VersionNegotiationMixin):
 
     def __init__(self, endpoint, **kwargs):
@@ -191,7 +795,24 @@ class HTTPClient(VersionNegotiationMixin):
                                                DEFAULT_MAX_RETRIES)
         self.conflict_retry_interval = kwargs.pop('retry_interval',
                                                   DEFAULT_RETRY_INTERVAL)
+        self.retry_policy = kwargs.pop('retry_policy', None) or RetryPolicy()
+        self.version_cache = kwargs.pop('version_cache',
+                                        version_cache.MEMORY_CACHE)
+        self.compression = kwargs.pop('compression', True)
+        self.instrumentation = kwargs.pop('instrumentation', None)
         self.connection_params = self.get_connection_params(endpoint, **kwargs)
+        # NOTE: the SSL context is built on the first HTTPS connection
+        self.tls_context = None
+        self._tls_context_lock = threading.Lock()
+        self.connection_pool = None
+        if kwargs.get('keepalive', True):
+            self.connection_pool = ConnectionPool(
+                self._create_connection,
+                max_connections=kwargs.get('max_connections',
+                                           DEFAULT_MAX_CONNECTIONS),
+                idle_timeout=kwargs.get('connection_idle_timeout',
+                                        DEFAULT_CONNECTION_IDLE_TIMEOUT),
+                timeout=self.connection_params[2]['timeout'])
 
     @staticmethod
     def get_connection_params(endpoint, **kwargs):
@@ -217,15 +838,61 @@ class HTTPClient(VersionNegotiationMixin):
 
         return (_class, _args, _kwargs)
 
-    def get_connection(self):
-        _class = self.connection_params[0]
+    def _get_tls_context(self):
+        with self._tls_context_lock:
+            if self.tls_context is None:
+                _kwargs = self.connection_params[2]
+                ca_file = _kwargs.get('ca_file')
+                if ca_file is None:
+                    ca_file = VerifiedHTTPSConnection.get_system_ca_file()
+                self.tls_context = TLSContext(
+                    ca_file=ca_file,
+                    cert_file=_kwargs.get('cert_file'),
+                    key_file=_kwargs.get('key_file'),
+                    insecure=_kwargs.get('insecure', False))
+            return self.tls_context
+
+    def _create_connection(self):
+        (_class, _args, _kwargs) = self.connection_params
+        if issubclass(_class, VerifiedHTTPSConnection):
+            _kwargs = dict(_kwargs, tls_context=self._get_tls_context())
         try:
-            return _class(*self.connection_params[1][0:2],
-                          **self.connection_params[2])
+            return _class(*_args[0:2], **_kwargs)
         except six.moves.http_client.InvalidURL:
             raise exc.EndpointException()
 
+    def get_connection(self):
+        if self.connection_pool is None:
+            return self._create_connection()
+        return self.connection_pool.get()
+
+    def release_connection(self, conn, resp=None):
+        """Give back a connection once its response has been fully read."""
+        if self.connection_pool is None:
+            conn.close()
+        elif getattr(resp, 'will_close', False):
+            # The server won't keep this connection alive
+            self.connection_pool.discard(conn)
+        else:
+            self.connection_pool.put(conn)
+
+    def discard_connection(self, conn):
+        """Drop a connection left in an unknown state."""
+        if self.connection_pool is None:
+            conn.close()
+        else:
+            self.connection_pool.discard(conn)
+
+    def _reconnect(self, conn):
+        """Replace a connection closed by the server by a new one."""
+        if self.connection_pool is None:
+            conn.close()
+            return self._create_connection()
+        return self.connection_pool.replace(conn)
+
     def log_curl_request(self, method, url, kwargs):
+        if not LOG.isEnabledFor(logging.DEBUG):
+            return
         curl = ['curl -i -X %s' % method]
 
         for (key, value) in kwargs['headers'].items():
@@ -253,6 +920,8 @@ class HTTPClient(VersionNegotiationMixin):
 
     @staticmethod
     def log_http_response(resp, body=None):
+        if not LOG.isEnabledFor(logging.DEBUG):
+            return
         status = (resp.version / 10.0, resp.status, resp.reason)
         dump = ['\nHTTP/%.1f %s %s' % status]
         dump.extend(['%s: %s' % (k, v) for k, v in resp.getheaders()])
@@ -269,33 +938,90 @@ class HTTPClient(VersionNegotiationMixin):
     def _parse_version_headers(self, resp):
         return self._generic_parse_version_headers(resp.getheader)
 
+    def _version_cache_key(self):
+        return self.endpoint_trimmed
+
     def _make_simple_request(self, conn, method, url):
         conn.request(method, self._make_connection_url(url))
         return conn.getresponse()
 
+    @staticmethod
+    def _trace_connection(conn, info):
+        """Record the opening steps of a new connection in a RequestInfo."""
+        info.timings.clear()
+        conn.timings = info.timings
+        if hasattr(conn, '_create_connection'):
+            # NOTE: the socket factory of httplib on Python 3
+            conn._create_connection = functools.partial(
+                _timed_create_connection, timings=info.timings)
+
     @with_retries
     def _http_request(self, url, method, **kwargs):
         """Send an http request with the specified characteristics.
 
         Wrapper around httplib.HTTP(S)Connection.request to handle tasks such
         as setting headers and error handling.
+
+        Unless it is image data, the body is read in full and returned as a
+        file-like object. With the 'stream' keyword argument, the body of a
+        successful response is instead left unread and returned as a
+        ResponseBodyIterator, except in debug mode where it is read to be
+        logged. With stream='raw', it is never read.
         """
-        # Copy the kwargs so we can reuse the original in case of redirects
-        kwargs['headers'] = copy.deepcopy(kwargs.get('headers', {}))
+        stream = kwargs.pop('stream', False)
+        chunk_size = kwargs.pop('chunk_size', None)
+        self._use_cached_version()
+        # Copy the headers so we can reuse the original in case of redirects,
+        # their values are strings so a shallow copy is enough
+        kwargs['headers'] = dict(kwargs.get('headers') or {})
         kwargs['headers'].setdefault('User-Agent', USER_AGENT)
         if self.os_ironic_api_version:
             kwargs['headers'].setdefault('X-OpenStack-Ironic-API-Version',
                                          self.os_ironic_api_version)
         if self.auth_token:
             kwargs['headers'].setdefault('X-Auth-Token', self.auth_token)
+        if self.compression:
+            kwargs['headers'].setdefault('Accept-Encoding', ACCEPT_ENCODING)
 
         self.log_curl_request(method, url, kwargs)
         conn = self.get_connection()
+        # NOTE: a pooled connection already has an open socket
+        reused = getattr(conn, 'sock', None) is not None
+        info = instrumentation.current_request()
+        if info is not None:
+            if not reused:
+                self._trace_connection(conn, info)
+            info.request_bytes = _body_size(kwargs.get('body'))
+            info.api_version = kwargs['headers'].get(
+                'X-OpenStack-Ironic-API-Version')
 
         try:
             conn_url = self._make_connection_url(url)
-            conn.request(method, conn_url, **kwargs)
-            resp = conn.getresponse()
+            sent = time.time()
+            try:
+                _rewind(kwargs.get('body'))
+                _send_request(conn, method, conn_url, **kwargs)
+                resp = conn.getresponse()
+            except (socket.error, six.moves.http_client.BadStatusLine):
+                body = kwargs.get('body')
+                if not reused or (isinstance(body, _RawBody) and
+                                  not body.resendable):
+                    raise
+                # The server closed the idle keep-alive connection before
+                # it saw our request, retry once on a new connection.
+                LOG.debug('Pooled connection to %s was closed by the server, '
+                          'reconnecting', self.endpoint)
+                conn = self._reconnect(conn)
+                if info is not None:
+                    self._trace_connection(conn, info)
+                sent = time.time()
+                _rewind(kwargs.get('body'))
+                _send_request(conn, method, conn_url, **kwargs)
+                resp = conn.getresponse()
+
+            if info is not None:
+                info.timings['ttfb'] = time.time() - sent
+                info.status = resp.status
 
             # TODO(deva): implement graceful client downgrade when connecting
             # to servers that did not support microversions. Details here:
@@ -303,30 +1029,59 @@ class HTTPClient(VersionNegotiationMixin):
 
             if resp.status == 406:
                 negotiated_ver = self.negotiate_version(conn, resp)
-                kwargs['headers']['X-OpenStack-Ironic-API-Version'] = (
-                    negotiated_ver)
-                return self._http_request(url, method, **kwargs)
 
         except socket.gaierror as e:
+            self.discard_connection(conn)
             message = ("Error finding address for %(url)s: %(e)s"
                        % dict(url=url, e=e))
             raise exc.EndpointNotFound(message)
         except (socket.error, socket.timeout) as e:
+            self.discard_connection(conn)
             endpoint = self.endpoint
             message = ("Error communicating with %(endpoint)s %(e)s"
                        % dict(endpoint=endpoint, e=e))
             raise exc.ConnectionRefused(message)
+        except Exception:
+            # NOTE: give back the place of the connection in the pool
+            self.discard_connection(conn)
+            raise
 
-        body_iter = ResponseBodyIterator(resp)
+        if resp.status == 406:
+            self.discard_connection(conn)
+            kwargs['headers']['X-OpenStack-Ironic-API-Version'] = (
+                negotiated_ver)
+            return self._http_request(url, method, stream=stream,
+                                      chunk_size=chunk_size, **kwargs)
 
-        # Read body into string if it isn't obviously image data
+        # Read body into string if it isn't obviously image data, or if
+        # the caller is going to decode it incrementally.
         body_str = None
-        if resp.getheader('content-type', None) != 'application/octet-stream':
-            body_str = ''.join([chunk for chunk in body_iter])
+        streamed = (stream and 200 <= resp.status < 300 and
+                    (stream == 'raw' or not LOG.isEnabledFor(logging.DEBUG)))
+        if (resp.getheader('content-type', None) != 'application/octet-stream'
+                and not streamed):
+            try:
+                body_str = _read_body(ResponseBodyIterator(resp))
+            except Exception:
+                self.discard_connection(conn)
+                raise
+            self.release_connection(conn, resp)
             self.log_http_response(resp, body_str)
             body_iter = six.StringIO(body_str)
+            if info is not None:
+                info.response_bytes = _body_size(body_str)
         else:
+            # The connection can only be reused once the caller has
+            # consumed the whole body.
+            body_iter = ResponseBodyIterator(
+                resp, release=functools.partial(self.release_connection,
+                                                conn, resp),
+                chunk_size=chunk_size,
+                discard=functools.partial(self.discard_connection, conn))
             self.log_http_response(resp)
+            if info is not None:
+                info.response_bytes = _content_length(
+                    resp.getheader('content-length', None))
 
         if 400 <= resp.status < 600:
             LOG.warn("Request returned failure status.")
@@ -336,28 +1091,45 @@ class HTTPClient(VersionNegotiationMixin):
                 error_json.get('debuginfo'), method, url)
         elif resp.status in (301, 302, 305):
             # Redirected. Reissue the request to the new location.
-            return self._http_request(resp['location'], method, **kwargs)
+            return self._http_request(resp['location'], method,
+                                      stream=stream, chunk_size=chunk_size,
+                                      **kwargs)
         elif resp.status == 300:
             raise exc.from_response(resp, method=method, url=url)
 
         return resp, body_iter
 
-    def json_request(self, method, url, **kwargs):
+    def _json_http_request(self, method, url, **kwargs):
         kwargs.setdefault('headers', {})
         kwargs['headers'].setdefault('Content-Type', 'application/json')
         kwargs['headers'].setdefault('Accept', 'application/json')
 
         if 'body' in kwargs:
-            kwargs['body'] = json.dumps(kwargs['body'])
+            kwargs['body'] = jsonstream.dumps(kwargs['body'])
+            if isinstance(kwargs['body'], jsonstream.StreamBody):
+                # NOTE: otherwise httplib would send the body chunked
+                kwargs['headers']['Content-Length'] = str(len(kwargs['body']))
 
-        resp, body_iter = self._http_request(url, method, **kwargs)
+        resp, body_iter = self._http_request(url, method, stream=True,
+                                             **kwargs)
+        content_type = resp.getheader('content-type', None)
+        if (resp.status in (204, 205) or content_type is None or
+                'application/json' not in content_type):
+            # Read what is left so that the connection can be reused
+            for chunk in body_iter:
+                pass
+            body_iter = None
+        return resp, body_iter
+
+    def json_request(self, method, url, **kwargs):
+        resp, body_iter = self._json_http_request(method, url, **kwargs)
         content_type = resp.getheader('content-type', None)
 
         if resp.status == 204 or resp.status == 205 or content_type is None:
             return resp, list()
 
-        if 'application/json' in content_type:
-            body = ''.join([chunk for chunk in body_iter])
+        if body_iter is not None:
+            body = _read_body(body_iter)
             try:
                 body = json.loads(body)
             except ValueError:
@@ -367,12 +1139,147 @@ class HTTPClient(VersionNegotiationMixin):
 
         return resp, body
 
+    def json_stream_request(self, method, url, response_key, **kwargs):
+        """Send a request and decode the list in the response as it comes.
+
+        :param response_key: the key of the list in the response body,
+            e.g. 'nodes'.
+        :returns: a tuple with the response and a
+            :class:`ironicclient.common.jsonstream.ListStream` generating
+            the items of the list.
+        """
+        resp, body_iter = self._json_http_request(method, url, **kwargs)
+        return resp, jsonstream.ListStream(body_iter or [], response_key)
+
     def raw_request(self, method, url, **kwargs):
         kwargs.setdefault('headers', {})
         kwargs['headers'].setdefault('Content-Type',
                                      'application/octet-stream')
+        if 'body' in kwargs:
+            kwargs['body'] = _raw_body(kwargs['body'],
+                                       kwargs.get('chunk_size'))
         return self._http_request(url, method, **kwargs)
 
+    def raw_stream_request(self, method, url, body=None, chunk_size=None,
+                           **kwargs):
+        """Send a request with a binary body and stream the response body.
+
+        Neither body is held in memory: see ResponseBodyIterator for the
+        ways of reading the response.
+
+        :param body: Optional, the request body: bytes, a binary file
+            object or an iterable of bytes. A regular file is sent with
+            its size, the other streams with the chunked transfer encoding.
+        :param chunk_size: Optional, number of bytes read at once from the
+            request and the response bodies. Defaults to CHUNKSIZE.
+        :returns: a tuple with the response and its ResponseBodyIterator.
+        """
+        kwargs.setdefault('headers', {})
+        kwargs['headers'].setdefault('Content-Type',
+                                     'application/octet-stream')
+        if body is not None:
+            kwargs['body'] = _raw_body(body, chunk_size)
+        return self._http_request(url, method, stream='raw',
+                                  chunk_size=chunk_size, **kwargs)
+
+
+class TLSContext(object):
+    """SSL settings shared by all the HTTPS connections of a client.
+
+    The CA bundle and client certificate are loaded once into a single
+    SSLContext, and the last TLS session is kept so that new connections
+    resume it instead of performing a full handshake.
+
+    :param ca_file: CA bundle used to verify the server certificate. The
+                    system default CAs are used if not set.
+    :param cert_file: Optional, client certificate.
+    :param key_file: Optional, private key of the client certificate.
+    :param insecure: If True, don't verify the server certificate.
+    """
+
+    def __init__(self, ca_file=None, cert_file=None, key_file=None,
+                 insecure=False):
+        self.ca_file = ca_file
+        self.cert_file = cert_file
+        self.key_file = key_file
+        self.insecure = insecure
+        self.session = None
+        self._lock = threading.Lock()
+        self._stats = {'full_handshakes': 0, 'resumed_handshakes': 0}
+        self.ssl_context = None
+        if hasattr(ssl, 'SSLContext'):
+            self.ssl_context = self._make_ssl_context()
+
+    def _make_ssl_context(self):
+        protocol = getattr(ssl, 'PROTOCOL_TLS_CLIENT', ssl.PROTOCOL_SSLv23)
+        context = ssl.SSLContext(protocol)
+        context.options |= getattr(ssl, 'OP_NO_SSLv2', 0)
+        context.options |= getattr(ssl, 'OP_NO_SSLv3', 0)
+        # NOTE: like ssl.wrap_socket() used to, only the certificate chain
+        # is verified, not the host name.
+        context.check_hostname = False
+        if self.insecure:
+            context.verify_mode = ssl.CERT_NONE
+        else:
+            context.verify_mode = ssl.CERT_REQUIRED
+            if self.ca_file:
+                context.load_verify_locations(self.ca_file)
+            else:
+                context.load_default_certs()
+        if self.cert_file:
+            context.load_cert_chain(self.cert_file, self.key_file)
+        return context
+
+    @property
+    def stats(self):
+        """Number of full and resumed TLS handshakes."""
+        with self._lock:
+            return dict(self._stats)
+
+    def wrap_socket(self, sock, server_hostname=None):
+        """Establish a TLS session over ``sock``, resuming one if possible."""
+        if self.ssl_context is None:
+            # NOTE: Python < 2.7.9 has no SSLContext
+            kwargs = {'cert_reqs': (ssl.CERT_NONE if self.insecure
+                                    else ssl.CERT_REQUIRED)}
+            if not self.insecure:
+                kwargs['ca_certs'] = self.ca_file
+            if self.cert_file:
+                kwargs['certfile'] = self.cert_file
+                if self.key_file:
+                    kwargs['keyfile'] = self.key_file
+            sslsock = ssl.wrap_socket(sock, **kwargs)
+            self._count('full_handshakes')
+            return sslsock
+
+        kwargs = {}
+        session = self.session
+        if session is not None:
+            kwargs['session'] = session
+        try:
+            sslsock = self.ssl_context.wrap_socket(
+                sock, server_hostname=server_hostname, **kwargs)
+        except ssl.SSLError:
+            # Don't offer a session the server may have rejected again.
+            self.session = None
+            raise
+        if getattr(sslsock, 'session_reused', False):
+            self._count('resumed_handshakes')
+        else:
+            self._count('full_handshakes')
+        self.save_session(sslsock)
+        return sslsock
+
+    def save_session(self, sslsock):
+        """Remember the TLS session of ``sslsock`` for future connections."""
+        session = getattr(sslsock, 'session', None)
+        if session is not None:
+            self.session = session
+
+    def _count(self, key):
+        with self._lock:
+            self._stats[key] += 1
+
 
 class VerifiedHTTPSConnection(six.moves.http_client.HTTPSConnection):
     """httplib-compatibile connection using client-side SSL authentication
@@ -382,46 +1289,61 @@ class VerifiedHTTPSConnection(six.moves.http_client.HTTPSConnection):
     """
 
     def __init__(self, host, port, key_file=None, cert_file=None,
-                 ca_file=None, timeout=None, insecure=False):
+                 ca_file=None, timeout=None, insecure=False,
+                 tls_context=None):
+        if tls_context is None:
+            if ca_file is None:
+                ca_file = self.get_system_ca_file()
+            tls_context = TLSContext(ca_file=ca_file,
+                                     cert_file=cert_file,
+                                     key_file=key_file,
+                                     insecure=insecure)
+        if tls_context.ssl_context is not None:
+            # NOTE: passing our context stops httplib from building (and
+            # loading the CA bundle into) a new one for every connection.
+            kwargs = {'context': tls_context.ssl_context}
+        else:
+            kwargs = {'key_file': key_file, 'cert_file': cert_file}
         six.moves.http_client.HTTPSConnection.__init__(self, host, port,
-                                                       key_file=key_file,
-                                                       cert_file=cert_file)
+                                                       **kwargs)
         self.key_file = key_file
         self.cert_file = cert_file
-        if ca_file is not None:
-            self.ca_file = ca_file
-        else:
-            self.ca_file = self.get_system_ca_file()
+        self.ca_file = tls_context.ca_file
         self.timeout = timeout
         self.insecure = insecure
+        self.tls_context = tls_context
+        # The durations of the connection steps, see _trace_connection
+        self.timings = None
 
     def connect(self):
         """Connect to a host on a given (SSL) port.
 
-        If ca_file is pointing somewhere, use it to check Server Certificate.
+        The server certificate is checked against the CA file of the
+        shared TLSContext, unless insecure is set, and the TLS session of
+        a previous connection is resumed when possible.
 
         Redefined/copied and extended from httplib.py:1105 (Python 2.6.x).
-        This is needed to pass cert_reqs=ssl.CERT_REQUIRED as parameter to
-        ssl.wrap_socket(), which forces SSL to check server certificate against
-        our client certificate.
         """
-        sock = socket.create_connection((self.host, self.port), self.timeout)
+        create_connection = getattr(self, '_create_connection',
+                                    socket.create_connection)
+        sock = create_connection((self.host, self.port), self.timeout)
 
         if self._tunnel_host:
             self.sock = sock
             self._tunnel()
 
-        if self.insecure is True:
-            kwargs = {'cert_reqs': ssl.CERT_NONE}
-        else:
-            kwargs = {'cert_reqs': ssl.CERT_REQUIRED, 'ca_certs': self.ca_file}
-
-        if self.cert_file:
-            kwargs['certfile'] = self.cert_file
-            if self.key_file:
-                kwargs['keyfile'] = self.key_file
+        started = time.time()
+        self.sock = self.tls_context.wrap_socket(sock,
+                                                 server_hostname=self.host)
+        if self.timings is not None:
+            self.timings['tls'] = time.time() - started
 
-        self.sock = ssl.wrap_socket(sock, **kwargs)
+    def close(self):
+        # NOTE: with TLS 1.3 the session ticket is only received after the
+        # handshake, so save the session again before closing.
+        if self.sock is not None:
+            self.tls_context.save_session(self.sock)
+        six.moves.http_client.HTTPSConnection.close(self)
 
     @staticmethod
     def get_system_ca_file():
@@ -443,10 +1365,16 @@ class SessionClient(VersionNegotiationMixin, adapter.LegacyJsonAdapter):
 
     conflict_max_retries = DEFAULT_MAX_RETRIES
     conflict_retry_interval = DEFAULT_RETRY_INTERVAL
+    retry_policy = None
+    compression = True
+    instrumentation = None
 
     def _parse_version_headers(self, resp):
         return self._generic_parse_version_headers(resp.headers.get)
 
+    def _version_cache_key(self):
+        return _trim_endpoint_api_version(self.get_endpoint())
+
     def _make_simple_request(self, conn, method, url):
         # NOTE: conn is self.session for this class
         return conn.request(url, method, raise_exc=False)
@@ -455,17 +1383,36 @@ class SessionClient(VersionNegotiationMixin, adapter.LegacyJsonAdapter):
     def _http_request(self, url, method, **kwargs):
         kwargs.setdefault('user_agent', USER_AGENT)
         kwargs.setdefault('auth', self.auth)
+        self._use_cached_version()
+        # NOTE: the body may have been sent by a previous attempt
+        _rewind(kwargs.get('data'))
         if getattr(self, 'os_ironic_api_version', None):
             kwargs['headers'].setdefault('X-OpenStack-Ironic-API-Version',
                                          self.os_ironic_api_version)
+        # NOTE: requests decodes the compressed bodies by itself
+        kwargs['headers'].setdefault(
+            'Accept-Encoding',
+            ACCEPT_ENCODING if self.compression else 'identity')
 
         endpoint_filter = kwargs.setdefault('endpoint_filter', {})
         endpoint_filter.setdefault('interface', self.interface)
         endpoint_filter.setdefault('service_type', self.service_type)
         endpoint_filter.setdefault('region_name', self.region_name)
 
+        info = instrumentation.current_request()
+        if info is not None:
+            info.request_bytes = _body_size(kwargs.get('data'))
+            info.api_version = kwargs['headers'].get(
+                'X-OpenStack-Ironic-API-Version')
+
+        request_kwargs = kwargs
+        if isinstance(kwargs.get('data'), _RawBody):
+            # NOTE: requests streams file objects and iterables by itself
+            request_kwargs = dict(kwargs, data=kwargs['data'].start())
         resp = self.session.request(url, method,
-                                    raise_exc=False, **kwargs)
+                                    raise_exc=False, **request_kwargs)
+        if info is not None:
+            _trace_session_response(info, resp, kwargs.get('stream'))
         if resp.status_code == 406:
             negotiated_ver = self.negotiate_version(self.session, resp)
             kwargs['headers']['X-OpenStack-Ironic-API-Version'] = (
@@ -489,7 +1436,7 @@ class SessionClient(VersionNegotiationMixin, adapter.LegacyJsonAdapter):
         kwargs['headers'].setdefault('Accept', 'application/json')
 
         if 'body' in kwargs:
-            kwargs['data'] = json.dumps(kwargs.pop('body'))
+            kwargs['data'] = jsonstream.dumps(kwargs.pop('body'))
 
         resp = self._http_request(url, method, **kwargs)
         body = resp.content
@@ -507,29 +1454,194 @@ class SessionClient(VersionNegotiationMixin, adapter.LegacyJsonAdapter):
 
         return resp, body
 
+    def json_stream_request(self, method, url, response_key, **kwargs):
+        """Send a request and decode the list in the response as it comes.
+
+        :param response_key: the key of the list in the response body,
+            e.g. 'nodes'.
+        :returns: a tuple with the response and a
+            :class:`ironicclient.common.jsonstream.ListStream` generating
+            the items of the list.
+        """
+        kwargs.setdefault('headers', {})
+        kwargs['headers'].setdefault('Content-Type', 'application/json')
+        kwargs['headers'].setdefault('Accept', 'application/json')
+
+        if 'body' in kwargs:
+            kwargs['data'] = jsonstream.dumps(kwargs.pop('body'))
+
+        resp = self._http_request(url, method, stream=True, **kwargs)
+        content_type = resp.headers.get('content-type', None)
+        if (resp.status_code in (204, 205) or content_type is None or
+                'application/json' not in content_type):
+            resp.close()
+            chunks = []
+        else:
+            chunks = resp.iter_content(CHUNKSIZE)
+        return resp, jsonstream.ListStream(chunks, response_key)
+
     def raw_request(self, method, url, **kwargs):
         kwargs.setdefault('headers', {})
         kwargs['headers'].setdefault('Content-Type',
                                      'application/octet-stream')
         return self._http_request(url, method, **kwargs)
 
+    def raw_stream_request(self, method, url, body=None, chunk_size=None,
+                           **kwargs):
+        """Send a request with a binary body and stream the response body.
+
+        See HTTPClient.raw_stream_request. The chunk size only applies to
+        the response body, requests reads the request body by itself.
+        """
+        kwargs.setdefault('headers', {})
+        kwargs['headers'].setdefault('Content-Type',
+                                     'application/octet-stream')
+        if body is not None:
+            kwargs['data'] = _raw_body(body, chunk_size)
+        resp = self._http_request(url, method, stream=True, **kwargs)
+        # NOTE: the raw body, ResponseBodyIterator decodes it like the
+        # ones of httplib
+        return resp, ResponseBodyIterator(resp.raw, release=resp.close,
+                                          chunk_size=chunk_size)
+
+
+def _content_length(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _trace_session_response(info, resp, stream=False):
+    """Record a response of requests in a RequestInfo."""
+    info.status = resp.status_code
+    elapsed = getattr(resp, 'elapsed', None)
+    if elapsed is not None:
+        # NOTE: requests measures the time until the headers are parsed
+        info.timings['ttfb'] = elapsed.total_seconds()
+    if stream:
+        info.response_bytes = _content_length(
+            resp.headers.get('content-length'))
+    else:
+        info.response_bytes = len(resp.content or b'')
+
 
 class ResponseBodyIterator(object):
     """A class that acts as an iterator over an HTTP response."""
 
-    def __init__(self, resp):
+    def __init__(self, resp, release=None, chunk_size=None, discard=None):
+        """Iterate over the body of ``resp``.
+
+        A body compressed with gzip or deflate (see the Content-Encoding
+        header of the response) is decompressed as it is read.
+
+        :param resp: the response to read from.
+        :param release: Optional, callable invoked once the whole body
+                        has been read, e.g. to give back the connection.
+        :param chunk_size: Optional, number of bytes read at once.
+                           Defaults to CHUNKSIZE.
+        :param discard: Optional, callable invoked instead of release if
+                        the iterator is closed, or garbage collected,
+                        before the whole body is read.
+        """
         self.resp = resp
+        self.chunk_size = chunk_size or CHUNKSIZE
+        self._release = release
+        self._discard = discard
+        self._decoder = _body_decoder(resp)
+        # Decoded data not returned yet by readinto()
+        self._pending = b''
 
     def __iter__(self):
         while True:
-            yield self.next()
+            try:
+                yield self.next()
+            except StopIteration:
+                return
 
     def next(self):
-        chunk = self.resp.read(CHUNKSIZE)
+        if self._pending:
+            chunk, self._pending = self._pending, b''
+            return chunk
+        chunk = self.resp.read(self.chunk_size)
+        while chunk and self._decoder is not None:
+            # NOTE: a compressed chunk may not decode to anything yet
+            decoded = self._decoder.decompress(chunk)
+            if decoded:
+                return decoded
+            chunk = self.resp.read(self.chunk_size)
         if chunk:
             return chunk
-        else:
-            raise StopIteration()
+        if self._decoder is not None:
+            chunk, self._decoder = self._decoder.flush(), None
+            if chunk:
+                return chunk
+        self._done()
+        raise StopIteration()
+
+    def _done(self):
+        self._discard = None
+        if self._release is not None:
+            release, self._release = self._release, None
+            release()
+
+    def close(self):
+        """Stop reading the body, dropping the connection if unfinished."""
+        self._release = None
+        if self._discard is not None:
+            discard, self._discard = self._discard, None
+            discard()
+
+    def __del__(self):
+        self.close()
+
+    def readinto(self, buffer):
+        """Read the body into a writable buffer, e.g. a bytearray.
+
+        An uncompressed body is read directly into the buffer.
+
+        :returns: the number of bytes read, 0 once the body is read.
+        """
+        readinto = getattr(self.resp, 'readinto', None)
+        if (self._decoder is None and not self._pending and
+                readinto is not None):
+            count = readinto(buffer)
+            if not count:
+                self._done()
+            return count
+        if not self._pending:
+            try:
+                self._pending = self.next()
+            except StopIteration:
+                return 0
+        view = memoryview(buffer)
+        count = min(len(view), len(self._pending))
+        view[:count] = self._pending[:count]
+        self._pending = self._pending[count:]
+        return count
+
+    def write_to(self, target):
+        """Write the rest of the body to a file object or descriptor.
+
+        The body is read into a single buffer of chunk_size bytes.
+
+        :param target: a binary file object, or a file descriptor.
+        :returns: the number of bytes written.
+        """
+        buf = bytearray(self.chunk_size)
+        view = memoryview(buf)
+        total = 0
+        while True:
+            count = self.readinto(buf)
+            if not count:
+                return total
+            if isinstance(target, six.integer_types):
+                written = 0
+                while written < count:
+                    written += os.write(target, view[written:count])
+            else:
+                target.write(view[:count])
+            total += count
 
 
 def _construct_http_client(*args, **kwargs):
@@ -555,6 +1667,12 @@ def _construct_http_client(*args, **kwargs):
             kwargs.pop('api_version_select_state', 'default'))
         session_client.conflict_max_retries = kwargs.get('max_retries')
         session_client.conflict_retry_interval = kwargs.get('retry_interval')
+        session_client.retry_policy = (kwargs.get('retry_policy') or
+                                       RetryPolicy())
+        session_client.version_cache = kwargs.get('version_cache',
+                                                  version_cache.MEMORY_CACHE)
+        session_client.compression = kwargs.get('compression', True)
+        session_client.instrumentation = kwargs.get('instrumentation')
         return session_client
     else:
         return HTTPClient(*args, **kwargs)
@@ -0,0 +1,267 @@
+# -*- coding: utf-8 -*-
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Timing and tracing of the requests sent by the HTTP clients.
+
+A hook is a callable receiving the RequestInfo of each request, when the
+request starts and once it is done, e.g. to export metrics::
+
+    def export(info):
+        statsd.timing('ironic.%s' % info.method, info.duration)
+
+    client.instrumentation.add_hooks(end=export)
+"""
+
+import collections
+import contextlib
+import logging
+import re
+import threading
+import time
+
+import six.moves.urllib.parse as urlparse
+
+
+LOG = logging.getLogger(__name__)
+
+# Number of requests whose timings are kept by default
+DEFAULT_MAX_TIMINGS = 1000
+
+# The placeholders of the identifiers following these path segments
+_COLLECTIONS = {
+    'chassis': '{chassis}',
+    'drivers': '{driver}',
+    'nodes': '{node}',
+    'ports': '{port}',
+}
+# Path segments following a collection which are not identifiers
+_NOT_IDENTIFIERS = frozenset(['detail'])
+_UUID_RE = re.compile('^[0-9a-f]{8}-?[0-9a-f]{4}-?[0-9a-f]{4}-?[0-9a-f]{4}'
+                      '-?[0-9a-f]{12}$', re.IGNORECASE)
+
+_local = threading.local()
+
+
+def url_template(url):
+    """The path of a URL with its resource identifiers replaced.
+
+    For example '/v1/nodes/{node}/states/power' for the power state of any
+    node, so that the requests can be grouped by API call. The query
+    string is dropped.
+    """
+    parts = urlparse.urlsplit(url).path.split('/')
+    for index in range(1, len(parts)):
+        part = parts[index]
+        placeholder = _COLLECTIONS.get(parts[index - 1])
+        if placeholder and part and part not in _NOT_IDENTIFIERS:
+            parts[index] = placeholder
+        elif _UUID_RE.match(part):
+            parts[index] = '{uuid}'
+    return '/'.join(parts)
+
+
+class RequestInfo(object):
+    """What is known of a request, passed to the hooks.
+
+    The request is the call of the client: it includes its retries after a
+    Conflict error, and the requests following a redirection or a version
+    negotiation.
+
+    :ivar method: the HTTP method.
+    :ivar url: the URL requested, as given to the client.
+    :ivar url_template: the URL with its identifiers replaced, see
+        url_template().
+    :ivar started: the time.time() at which the request started.
+    :ivar finished: the time.time() at which the response was received,
+        None until then.
+    :ivar status: the HTTP status of the response, None if there was none.
+    :ivar error: the exception raised by the request, if any.
+    :ivar request_bytes: the size of the request body, None if unknown
+        (e.g. streamed from an iterable).
+    :ivar response_bytes: the size of the response body read by the client,
+        or its Content-Length if the body is streamed to the caller. None if
+        unknown.
+    :ivar retries: the number of times the request was sent again after a
+        Conflict error.
+    :ivar api_version: the API version sent with the last attempt, e.g. the
+        negotiated one.
+    :ivar timings: the durations in seconds of the steps of the last attempt:
+        'dns', 'connect' and 'tls' when a new connection was opened (only
+        'tls' with Python 2), and 'ttfb' from the sending of the request to
+        the reception of the response headers.
+    """
+
+    def __init__(self, method, url):
+        self.method = method
+        self.url = url
+        self.url_template = url_template(url)
+        self.started = time.time()
+        self.finished = None
+        self.status = None
+        self.error = None
+        self.request_bytes = None
+        self.response_bytes = None
+        self.retries = 0
+        self.api_version = None
+        self.timings = {}
+
+    @property
+    def duration(self):
+        """The number of seconds the request took, None if not done."""
+        if self.finished is None:
+            return None
+        return self.finished - self.started
+
+    def __repr__(self):
+        return '<RequestInfo %s %s: %s>' % (self.method, self.url,
+                                            self.status)
+
+
+class TimingBuffer(object):
+    """The RequestInfo of the last requests of a client.
+
+    :param max_timings: the number of requests kept, the oldest ones are
+                        dropped first.
+    """
+
+    def __init__(self, max_timings=DEFAULT_MAX_TIMINGS):
+        self._records = collections.deque(maxlen=max_timings)
+
+    def append(self, info):
+        self._records.append(info)
+
+    def records(self):
+        """Return the RequestInfo kept, oldest first."""
+        return list(self._records)
+
+    def get_timings(self):
+        """Return the ('METHOD url', start time, end time) of the requests.
+
+        It is the format of the other clients for 'openstack --timing'.
+        """
+        return [('%s %s' % (info.method, info.url), info.started,
+                 info.finished) for info in self.records()]
+
+    def clear(self):
+        self._records.clear()
+
+
+class Instrumentation(object):
+    """The hooks called on the requests of a client.
+
+    Nothing is recorded while there is no hook and no timing buffer.
+
+    :param timings: whether to keep the timings of the last requests, e.g.
+                    to display them with 'openstack --timing'.
+    :param max_timings: the number of requests whose timings are kept.
+    """
+
+    def __init__(self, timings=False, max_timings=DEFAULT_MAX_TIMINGS):
+        self._start_hooks = []
+        self._end_hooks = []
+        self.timing_buffer = TimingBuffer(max_timings) if timings else None
+
+    @property
+    def enabled(self):
+        return bool(self._start_hooks or self._end_hooks or
+                    self.timing_buffer is not None)
+
+    def add_hooks(self, start=None, end=None):
+        """Add hooks called with the RequestInfo of each request.
+
+        The hooks are called from the thread sending the request, and
+        should be fast. Their exceptions are logged and ignored.
+
+        :param start: Optional, called when a request starts.
+        :param end: Optional, called once a request is done, successful or
+                    not.
+        """
+        if start is not None:
+            self._start_hooks.append(start)
+        if end is not None:
+            self._end_hooks.append(end)
+
+    def remove_hooks(self, start=None, end=None):
+        """Remove hooks added by add_hooks()."""
+        if start is not None:
+            self._start_hooks.remove(start)
+        if end is not None:
+            self._end_hooks.remove(end)
+
+    def get_timings(self):
+        """Return the timings of the last requests, see TimingBuffer."""
+        if self.timing_buffer is None:
+            return []
+        return self.timing_buffer.get_timings()
+
+    def reset_timings(self):
+        if self.timing_buffer is not None:
+            self.timing_buffer.clear()
+
+    def _call(self, hooks, info):
+        for hook in hooks:
+            try:
+                hook(info)
+            except Exception:
+                LOG.exception('Request hook %(hook)r failed for %(info)r',
+                              {'hook': hook, 'info': info})
+
+    def start(self, method, url):
+        """Call the start hooks of a new request and return its RequestInfo.
+        """
+        info = RequestInfo(method, url)
+        self._call(self._start_hooks, info)
+        return info
+
+    def finish(self, info):
+        """Record a request once it is done, and call the end hooks."""
+        info.finished = time.time()
+        if self.timing_buffer is not None:
+            self.timing_buffer.append(info)
+        self._call(self._end_hooks, info)
+
+
+def current_request():
+    """The RequestInfo of the request sent by this thread, None if none."""
+    return getattr(_local, 'request', None)
+
+
+@contextlib.contextmanager
+def track_request(instrumentation, method, url):
+    """Track a request sent in the context, if instrumented.
+
+    The requests started within the context (e.g. after a redirection) are
+    part of the same request.
+
+    :param instrumentation: the Instrumentation of the client, or None.
+    :returns: the RequestInfo of the request, None if it isn't tracked.
+    """
+    info = current_request()
+    if (info is not None or instrumentation is None or
+            not instrumentation.enabled):
+        yield info
+        return
+    info = instrumentation.start(method, url)
+    _local.request = info
+    try:
+        yield info
+    except Exception as e:
+        info.error = e
+        if info.status is None:
+            info.status = getattr(e, 'http_status', None)
+        raise
+    finally:
+        _local.request = None
+        instrumentation.finish(info)
@@ -0,0 +1,637 @@
+# -*- coding: utf-8 -*-
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Writer of ISO 9660 images with the Joliet and Rock Ridge extensions.
+
+It builds the images of the config drives in-process, laid out like the
+ones of "genisoimage -J -r -l -ldots -allow-lowercase -allow-multidot":
+the volume descriptors, the path tables, the directories of the ISO 9660
+and Joliet hierarchies, then the data of the files, shared by both.
+"""
+
+import os
+import stat
+import string
+import struct
+import time
+
+import six
+
+from ironicclient.common.i18n import _
+from ironicclient import exc
+
+
+SECTOR_SIZE = 2048
+
+# genisoimage pads the images with 150 sectors, for the read-ahead of some
+# drives
+PADDING_SECTORS = 150
+
+# Sectors before the volume descriptors
+_SYSTEM_AREA_SECTORS = 16
+
+# Maximum lengths of the names, "-l" allows 31 characters
+_MAX_ISO_NAME = 31
+_MAX_JOLIET_NAME = 64
+
+_ISO_CHARS = frozenset(string.ascii_letters + string.digits + '_.')
+_JOLIET_FORBIDDEN_CHARS = frozenset('*/:;?\\')
+
+# Escape sequence of the Joliet volume descriptor: UCS-2 level 3
+_JOLIET_ESCAPE = b'%/E'
+
+_MAX_RECORD = 254
+_CE_LENGTH = 28
+_MAX_ENTRY_DATA = 250
+
+_RR_ID = b'RRIP_1991A'
+_RR_DESCRIPTION = (b'THE ROCK RIDGE INTERCHANGE PROTOCOL PROVIDES SUPPORT '
+                   b'FOR POSIX FILE SYSTEM SEMANTICS')
+_RR_SOURCE = (b'PLEASE CONTACT DISC PUBLISHER FOR SPECIFICATION SOURCE.  '
+              b'SEE PUBLISHER IDENTIFIER IN PRIMARY VOLUME DESCRIPTOR FOR '
+              b'CONTACT INFORMATION.')
+
+# Flags of the RR entry, telling the Rock Ridge entries of a record
+_RR_PX = 0x01
+_RR_SL = 0x04
+_RR_NM = 0x08
+_RR_TF = 0x80
+
+# Flag of the NM and SL entries continued by the next one, also used by
+# the components of the SL entries
+_CONTINUE = 0x01
+
+# Flags of the components of the SL entries
+_SL_CURRENT = 0x02
+_SL_PARENT = 0x04
+_SL_ROOT = 0x08
+
+
+def _both16(value):
+    return struct.pack('<H', value) + struct.pack('>H', value)
+
+
+def _both32(value):
+    return struct.pack('<I', value) + struct.pack('>I', value)
+
+
+def _sectors(size):
+    return (size + SECTOR_SIZE - 1) // SECTOR_SIZE
+
+
+def _record_date(timestamp):
+    t = time.gmtime(timestamp)
+    return struct.pack('7B', t.tm_year - 1900, t.tm_mon, t.tm_mday,
+                       t.tm_hour, t.tm_min, t.tm_sec, 0)
+
+
+def _volume_date(timestamp):
+    if timestamp is None:
+        return b'0' * 16 + b'\x00'
+    return time.strftime('%Y%m%d%H%M%S00', time.gmtime(timestamp)).encode(
+        'ascii') + b'\x00'
+
+
+def _encode_name(name):
+    if isinstance(name, bytes):
+        return name
+    return name.encode('utf-8', 'surrogateescape' if six.PY3 else 'strict')
+
+
+def _unique(base, suffix, max_length, taken):
+    """Shorten a name and number it until it's not taken."""
+    name = base[:max_length - len(suffix)] + suffix
+    counter = 0
+    while name in taken:
+        tag = '%03d' % counter
+        name = base[:max_length - len(suffix) - len(tag)] + tag + suffix
+        counter += 1
+    taken.add(name)
+    return name
+
+
+def _split_extension(name, max_length):
+    base, dot, extension = name.rpartition('.')
+    if not dot or not base:
+        return name, '.'
+    return base, '.' + extension[:max_length // 2]
+
+
+def _iso_name(node, taken):
+    name = ''.join(c if c in _ISO_CHARS else '_' for c in node.name)
+    if node.is_dir:
+        return _unique(name, '', _MAX_ISO_NAME, taken).encode('ascii')
+    base, extension = _split_extension(name, _MAX_ISO_NAME)
+    name = _unique(base, extension, _MAX_ISO_NAME, taken)
+    return name.encode('ascii') + b';1'
+
+
+def _joliet_name(node, taken):
+    name = ''.join('_' if c in _JOLIET_FORBIDDEN_CHARS or ord(c) > 0xFFFF
+                   else c for c in node.name)
+    if node.is_dir:
+        name = _unique(name, '', _MAX_JOLIET_NAME, taken)
+        return name.encode('utf-16-be')
+    base, extension = _split_extension(name, _MAX_JOLIET_NAME)
+    if extension == '.':
+        base, extension = name, ''
+    name = _unique(base, extension, _MAX_JOLIET_NAME, taken)
+    return (name + ';1').encode('utf-16-be')
+
+
+class _Node(object):
+    """A file, directory or symbolic link of the image."""
+
+    def __init__(self, path, name, st):
+        self.path = path
+        self.name = name
+        self.st = st
+        self.parent = self
+        self.children = [] if stat.S_ISDIR(st.st_mode) else None
+        self.target = os.readlink(path) if stat.S_ISLNK(st.st_mode) else None
+        # Extent of the file, or of the directory in the ISO 9660 hierarchy
+        self.extent = 0
+        self.size = 0 if self.children is not None else st.st_size
+        # Records of a directory in the ISO 9660 and Joliet hierarchies
+        self.records = []
+        self.joliet_records = []
+        self.joliet_children = []
+        self.joliet_extent = 0
+        self.joliet_size = 0
+        self.number = self.joliet_number = 1
+        self.iso_id = self.joliet_id = None
+        self.continuation = None
+
+    @property
+    def is_dir(self):
+        return self.children is not None
+
+    @property
+    def is_link(self):
+        return self.target is not None
+
+
+def _scan(path, name=None):
+    """The tree of nodes of a directory."""
+    try:
+        # NOTE: the links are put in the image, but the directory itself
+        # may be a link
+        node = _Node(path, name,
+                     os.stat(path) if name is None else os.lstat(path))
+        if not node.is_dir:
+            if not (node.is_link or stat.S_ISREG(node.st.st_mode)):
+                raise exc.CommandError(
+                    _('"%s" is neither a file, a directory nor a symbolic '
+                      'link') % path)
+            if node.size >= 2 ** 32:
+                raise exc.CommandError(
+                    _('The file "%s" is too large for an ISO 9660 image')
+                    % path)
+            return node
+        names = sorted(os.listdir(path))
+    except (IOError, OSError) as e:
+        raise exc.CommandError(_('Error reading "%(path)s": %(error)s') %
+                               {'path': path, 'error': e})
+    for child_name in names:
+        child = _scan(os.path.join(path, child_name), child_name)
+        child.parent = node
+        node.children.append(child)
+    return node
+
+
+def _susp(signature, data, version=1):
+    return signature + struct.pack('BB', 4 + len(data), version) + data
+
+
+def _split_susp(signature, pieces):
+    """Entries holding pieces of data, which may not fit in one entry.
+
+    :param pieces: (flags, data) of the pieces, the first byte of the
+                   entries being the flags.
+    """
+    entries = []
+    for index, (flags, data) in enumerate(pieces):
+        last = index == len(pieces) - 1
+        entries.append(_susp(signature, struct.pack(
+            'B', flags if last else flags | _CONTINUE) + data))
+    return entries
+
+
+def _nm(name):
+    name = _encode_name(name)
+    chunks = [name[i:i + _MAX_ENTRY_DATA - 1]
+              for i in range(0, len(name), _MAX_ENTRY_DATA - 1)]
+    return _split_susp(b'NM', [(0, chunk) for chunk in chunks])
+
+
+def _sl(target):
+    target = _encode_name(target)
+    components = []
+    if target.startswith(b'/'):
+        components.append((_SL_ROOT, b''))
+    for part in target.split(b'/'):
+        if part == b'.':
+            components.append((_SL_CURRENT, b''))
+        elif part == b'..':
+            components.append((_SL_PARENT, b''))
+        elif part:
+            components.append((0, part))
+
+    pieces = [b'']
+    for flags, content in components:
+        while True:
+            room = _MAX_ENTRY_DATA - 1 - len(pieces[-1]) - 2
+            if len(content) <= room:
+                pieces[-1] += struct.pack('BB', flags, len(content)) + content
+                break
+            if content and room > 0:
+                # NOTE: the components are continued in the next entry,
+                # since readers don't agree on the separators between
+                # the entries
+                pieces[-1] += (struct.pack('BB', flags | _CONTINUE, room) +
+                               content[:room])
+                content = content[room:]
+            pieces.append(b'')
+    return _split_susp(b'SL', [(0, piece) for piece in pieces])
+
+
+def _rationalized_mode(node):
+    """The mode of a file, as set by the "-r" option of genisoimage.
+
+    Everyone can read the files and nobody can write them, the files
+    executable by someone are executable by everyone.
+    """
+    mode = node.st.st_mode
+    if node.is_link:
+        return mode
+    permissions = 0o444
+    if node.is_dir or mode & 0o111:
+        permissions |= 0o111
+    return stat.S_IFMT(mode) | permissions
+
+
+def _rock_ridge(node, name=True):
+    """The Rock Ridge entries of the record of a node."""
+    nlink = 1
+    if node.is_dir:
+        nlink = 2 + sum(1 for child in node.children if child.is_dir)
+    entries = [
+        _susp(b'PX', _both32(_rationalized_mode(node)) + _both32(nlink) +
+              _both32(0) + _both32(0)),
+        _susp(b'TF', b'\x0e' + _record_date(node.st.st_mtime) +
+              _record_date(node.st.st_atime) +
+              _record_date(node.st.st_ctime)),
+    ]
+    flags = _RR_PX | _RR_TF
+    if name:
+        entries.extend(_nm(node.name))
+        flags |= _RR_NM
+    if node.is_link:
+        entries.extend(_sl(node.target))
+        flags |= _RR_SL
+    return [_susp(b'RR', struct.pack('B', flags))] + entries
+
+
+class _ContinuationArea(object):
+    """The sectors holding the entries not fitting in the records."""
+
+    def __init__(self, start):
+        self.start = start
+        self.data = bytearray()
+
+    def add(self, entries):
+        """Store entries, and return the CE entry pointing to them."""
+        data = b''.join(entries)
+        if len(data) > SECTOR_SIZE:
+            raise exc.CommandError(
+                _('The names of a file are too long for an ISO 9660 image'))
+        if len(self.data) % SECTOR_SIZE + len(data) > SECTOR_SIZE:
+            self.data.extend(b'\x00' * (-len(self.data) % SECTOR_SIZE))
+        sector, offset = divmod(len(self.data), SECTOR_SIZE)
+        self.data.extend(data)
+        return _susp(b'CE', _both32(self.start + sector) + _both32(offset) +
+                     _both32(len(data)))
+
+    @property
+    def sectors(self):
+        return _sectors(len(self.data))
+
+
+def _system_use(identifier, entries, continuation):
+    """The system use field of a record, its entries moved if too long."""
+    room = _MAX_RECORD - 33 - len(identifier) - (1 - len(identifier) % 2)
+    if sum(len(entry) for entry in entries) > room:
+        used = 0
+        for index, entry in enumerate(entries):
+            if used + len(entry) + _CE_LENGTH > room:
+                break
+            used += len(entry)
+        entries = entries[:index] + [continuation.add(entries[index:])]
+    system_use = b''.join(entries)
+    if len(system_use) % 2:
+        system_use += b'\x00'
+    return system_use
+
+
+def _record(identifier, extent, size, node, system_use=b''):
+    padding = b'' if len(identifier) % 2 else b'\x00'
+    return (struct.pack('BB', 33 + len(identifier) + len(padding) +
+                        len(system_use), 0) +
+            _both32(extent) + _both32(size) +
+            _record_date(node.st.st_mtime) +
+            struct.pack('BBB', 2 if node.is_dir else 0, 0, 0) + _both16(1) +
+            struct.pack('B', len(identifier)) + identifier + padding +
+            system_use)
+
+
+def _extent_size(records):
+    """The size of a directory, whose records don't cross sectors."""
+    size = 0
+    for length in records:
+        if size % SECTOR_SIZE + length > SECTOR_SIZE:
+            size += -size % SECTOR_SIZE
+        size += length
+    return _sectors(size) * SECTOR_SIZE
+
+
+def _directories(root, children):
+    """The directories, in the order of the path tables."""
+    directories = [root]
+    for directory in directories:
+        directories.extend(child for child in children(directory)
+                           if child.is_dir)
+    return directories
+
+
+def _path_table(directories, joliet, big_endian):
+    fmt = '>BBIH' if big_endian else '<BBIH'
+    entries = []
+    for directory in directories:
+        if directory.parent is directory:
+            identifier = b'\x00'
+        else:
+            identifier = directory.joliet_id if joliet else directory.iso_id
+        if joliet:
+            extent = directory.joliet_extent
+            parent = directory.parent.joliet_number
+        else:
+            extent = directory.extent
+            parent = directory.parent.number
+        entries.append(struct.pack(fmt, len(identifier), 0, extent, parent) +
+                       identifier + b'\x00' * (len(identifier) % 2))
+    return b''.join(entries)
+
+
+def _text(value, length, joliet):
+    if joliet:
+        value = value.encode('utf-16-be')[:length]
+        padding = b'\x00 ' * length
+    else:
+        value = value.encode('ascii', 'replace')[:length]
+        padding = b' ' * length
+    return value + padding[:length - len(value)]
+
+
+def _volume_descriptor(joliet, volume_id, publisher, volume_sectors,
+                       path_table_size, path_tables, root, timestamp):
+    vd = bytearray(SECTOR_SIZE)
+    vd[0:7] = struct.pack('B', 2 if joliet else 1) + b'CD001\x01'
+    vd[8:40] = _text('', 32, joliet)
+    vd[40:72] = _text(volume_id, 32, joliet)
+    vd[80:88] = _both32(volume_sectors)
+    if joliet:
+        vd[88:91] = _JOLIET_ESCAPE
+    vd[120:124] = _both16(1)
+    vd[124:128] = _both16(1)
+    vd[128:132] = _both16(SECTOR_SIZE)
+    vd[132:140] = _both32(path_table_size)
+    vd[140:144] = struct.pack('<I', path_tables[0])
+    vd[148:152] = struct.pack('>I', path_tables[1])
+    if joliet:
+        vd[156:190] = _record(b'\x00', root.joliet_extent, root.joliet_size,
+                              root)
+    else:
+        vd[156:190] = _record(b'\x00', root.extent, root.size, root)
+    vd[190:318] = _text('', 128, joliet)
+    vd[318:446] = _text(publisher, 128, joliet)
+    vd[446:574] = _text('', 128, joliet)
+    vd[574:702] = _text('', 128, joliet)
+    vd[702:813] = _text('', 111, joliet)
+    vd[813:830] = _volume_date(timestamp)
+    vd[830:847] = _volume_date(timestamp)
+    vd[847:864] = _volume_date(None)
+    vd[864:881] = _volume_date(None)
+    vd[881] = 1
+    return bytes(vd)
+
+
+class _Image(object):
+    """The layout of an image, computed before any of it is written."""
+
+    def __init__(self, path, volume_id, publisher, timestamp):
+        self.volume_id = volume_id
+        self.publisher = publisher
+        self.timestamp = timestamp
+        self.root = _scan(path)
+        if not self.root.is_dir:
+            raise exc.CommandError(_('"%s" is not a directory') % path)
+        self._name(self.root)
+        self.directories = _directories(self.root, lambda d: d.children)
+        self.joliet_directories = _directories(
+            self.root, lambda d: d.joliet_children)
+        for number, directory in enumerate(self.directories, 1):
+            directory.number = number
+        for number, directory in enumerate(self.joliet_directories, 1):
+            directory.joliet_number = number
+
+        # The path tables of both hierarchies follow the volume descriptors
+        self.path_table_size = len(
+            _path_table(self.directories, False, False))
+        self.joliet_path_table_size = len(
+            _path_table(self.joliet_directories, True, False))
+        sector = _SYSTEM_AREA_SECTORS + 3
+        self.path_tables = []
+        for size in (self.path_table_size, self.path_table_size,
+                     self.joliet_path_table_size,
+                     self.joliet_path_table_size):
+            self.path_tables.append(sector)
+            sector += _sectors(size)
+
+        # Then the directories, each followed by the Rock Ridge entries not
+        # fitting in its records, which is where readers like libarchive
+        # expect them. The records are built once to know their sizes, then
+        # again once the continuation area is placed.
+        for directory in self.directories:
+            self._build_records(directory, 0)
+            directory.extent = sector
+            directory.size = _extent_size(len(r[0]) for r in
+                                          directory.records)
+            sector += directory.size // SECTOR_SIZE
+            self._build_records(directory, sector)
+            sector += directory.continuation.sectors
+        for directory in self.joliet_directories:
+            directory.joliet_extent = sector
+            directory.joliet_size = _extent_size(
+                33 + len(r[0]) + (1 - len(r[0]) % 2)
+                for r in directory.joliet_records)
+            sector += directory.joliet_size // SECTOR_SIZE
+
+        # Then the data of the files
+        self.files = []
+        for directory in self.directories:
+            for child in directory.children:
+                if not child.is_dir and not child.is_link:
+                    child.extent = sector
+                    sector += _sectors(child.size)
+                    self.files.append(child)
+        self.sectors = sector + PADDING_SECTORS
+
+    def _name(self, directory):
+        taken = set()
+        joliet_taken = set()
+        for child in directory.children:
+            child.iso_id = _iso_name(child, taken)
+            if not child.is_link:
+                # NOTE: Joliet can't represent symbolic links
+                child.joliet_id = _joliet_name(child, joliet_taken)
+                directory.joliet_children.append(child)
+            if child.is_dir:
+                self._name(child)
+        directory.children.sort(key=lambda child: child.iso_id)
+        directory.joliet_children.sort(key=lambda child: child.joliet_id)
+
+    def _build_records(self, directory, continuation_start):
+        """The records of a directory, and the nodes they point to."""
+        directory.continuation = _ContinuationArea(continuation_start)
+        system_use = _rock_ridge(directory, name=False)
+        if directory is self.root:
+            # NOTE: the SP entry must come first, and the ER entry tells
+            # that Rock Ridge is used
+            system_use = ([_susp(b'SP', b'\xbe\xef\x00')] + system_use +
+                          [_susp(b'ER', struct.pack(
+                              'BBBB', len(_RR_ID), len(_RR_DESCRIPTION),
+                              len(_RR_SOURCE), 1) +
+                              _RR_ID + _RR_DESCRIPTION + _RR_SOURCE)])
+        records = [
+            (b'\x00', directory, system_use),
+            (b'\x01', directory.parent,
+             _rock_ridge(directory.parent, name=False)),
+        ]
+        records.extend((child.iso_id, child, _rock_ridge(child))
+                       for child in directory.children)
+        directory.records = [
+            (_record(identifier, 0, 0, node,
+                     _system_use(identifier, entries,
+                                 directory.continuation)),
+             node) for identifier, node, entries in records]
+
+        directory.joliet_records = [(b'\x00', directory),
+                                    (b'\x01', directory.parent)]
+        directory.joliet_records.extend(
+            (child.joliet_id, child) for child in directory.joliet_children)
+
+    def _directory(self, records, size):
+        data = bytearray()
+        for record in records:
+            if len(data) % SECTOR_SIZE + len(record) > SECTOR_SIZE:
+                data.extend(b'\x00' * (-len(data) % SECTOR_SIZE))
+            data.extend(record)
+        return bytes(data) + b'\x00' * (size - len(data))
+
+    def _with_extent(self, record, node, joliet):
+        if node.is_dir and joliet:
+            extent, size = node.joliet_extent, node.joliet_size
+        elif node.is_link:
+            extent, size = 0, 0
+        else:
+            extent, size = node.extent, node.size
+        return record[:2] + _both32(extent) + _both32(size) + record[18:]
+
+    def write(self, fileobj):
+        fileobj.write(b'\x00' * SECTOR_SIZE * _SYSTEM_AREA_SECTORS)
+        fileobj.write(_volume_descriptor(
+            False, self.volume_id, self.publisher, self.sectors,
+            self.path_table_size, self.path_tables[0:2], self.root,
+            self.timestamp))
+        fileobj.write(_volume_descriptor(
+            True, self.volume_id, self.publisher, self.sectors,
+            self.joliet_path_table_size, self.path_tables[2:4], self.root,
+            self.timestamp))
+        fileobj.write(b'\xff' + b'CD001\x01' + b'\x00' * (SECTOR_SIZE - 7))
+
+        for joliet, directories in ((False, self.directories),
+                                    (True, self.joliet_directories)):
+            for big_endian in (False, True):
+                table = _path_table(directories, joliet, big_endian)
+                fileobj.write(table + b'\x00' * (-len(table) % SECTOR_SIZE))
+        for directory in self.directories:
+            fileobj.write(self._directory(
+                [self._with_extent(record, node, False)
+                 for record, node in directory.records],
+                directory.size))
+            continuation = directory.continuation.data
+            fileobj.write(bytes(continuation) +
+                          b'\x00' * (-len(continuation) % SECTOR_SIZE))
+        for directory in self.joliet_directories:
+            fileobj.write(self._directory(
+                [self._with_extent(_record(identifier, 0, 0, node), node,
+                                   True)
+                 for identifier, node in directory.joliet_records],
+                directory.joliet_size))
+
+        for node in self.files:
+            self._write_file(node, fileobj)
+        fileobj.write(b'\x00' * SECTOR_SIZE * PADDING_SECTORS)
+
+    def _write_file(self, node, fileobj):
+        remaining = node.size
+        try:
+            with open(node.path, 'rb') as f:
+                while remaining:
+                    chunk = f.read(min(remaining, SECTOR_SIZE * 32))
+                    if not chunk:
+                        break
+                    fileobj.write(chunk)
+                    remaining -= len(chunk)
+                changed = remaining or f.read(1)
+        except (IOError, OSError) as e:
+            raise exc.CommandError(_('Error reading "%(path)s": %(error)s') %
+                                   {'path': node.path, 'error': e})
+        if changed:
+            raise exc.CommandError(
+                _('The file "%s" changed while the image was written')
+                % node.path)
+        fileobj.write(b'\x00' * (-node.size % SECTOR_SIZE))
+
+
+def write_image(path, fileobj, volume_id='', publisher='', timestamp=None):
+    """Write the ISO 9660 image of a directory.
+
+    The image has the Joliet and Rock Ridge extensions, the permissions
+    and ownership of the files being rationalized like genisoimage does
+    with its "-r" option. The content of the files is copied in chunks.
+
+    :param path: the directory.
+    :param fileobj: the binary file to write the image to. It is written
+                    sequentially, so it can be a GzipFile.
+    :param volume_id: the volume identifier, e.g. 'config-2'.
+    :param publisher: the publisher identifier.
+    :param timestamp: the creation time of the volume, defaults to now.
+    :raises: CommandError if the directory can't be read, or if a file
+             can't be put in an image.
+    """
+    if timestamp is None:
+        timestamp = time.time()
+    _Image(path, volume_id, publisher, timestamp).write(fileobj)
@@ -0,0 +1,295 @@
+# -*- coding: utf-8 -*-
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Incremental decoding of JSON list responses, and encoding of JSON request
+bodies holding large strings.
+"""
+
+import abc
+import codecs
+import json
+import os
+import uuid
+
+import six
+
+
+_WHITESPACE = ' \t\n\r'
+
+# Size of the chunks read from the files of the streamed strings
+CHUNK_SIZE = 1024 * 64  # 64kB
+
+# Stands for the streamed strings in the JSON documents, until replaced
+_PLACEHOLDER = u'\x00ironicclient-stream-%s\x00' % uuid.uuid4().hex
+_ENCODED_PLACEHOLDER = json.dumps(_PLACEHOLDER)[1:-1]
+
+
+class ListStream(object):
+    """Decode the list of a JSON response body as the body is received.
+
+    Ironic returns collections as a JSON object holding the list of items
+    under a key named after the resource (e.g. ``{"nodes": [...],
+    "next": "..."}``). Iterating over a ListStream yields the items of that
+    list one at a time, decoding them straight from the body chunks, so the
+    whole body never needs to be held in memory as a string. The other
+    members of the object (like 'next') are available in ``extra`` once
+    the iteration is over.
+
+    :param chunks: iterable of the body chunks (bytes or text).
+    :param key: name of the member holding the list, e.g. 'nodes'.
+    """
+
+    def __init__(self, chunks, key):
+        self.key = key
+        self.extra = {}
+        self._chunks = iter(chunks)
+        self._utf8 = codecs.getincrementaldecoder('utf-8')()
+        self._decoder = json.JSONDecoder()
+        self._buf = u''
+        self._pos = 0
+        self._eof = False
+        self._started = False
+
+    def _read(self):
+        """Append the next chunk to the buffer, return False at the end."""
+        if self._eof:
+            return False
+        try:
+            chunk = next(self._chunks)
+        except StopIteration:
+            self._eof = True
+            self._buf += self._utf8.decode(b'', final=True)
+            return False
+        if not isinstance(chunk, six.text_type):
+            chunk = self._utf8.decode(chunk)
+        # NOTE: drop what has already been decoded
+        self._buf = self._buf[self._pos:] + chunk
+        self._pos = 0
+        return True
+
+    def _peek(self):
+        """Skip whitespaces and return the next character (None at EOF)."""
+        while True:
+            while (self._pos < len(self._buf) and
+                   self._buf[self._pos] in _WHITESPACE):
+                self._pos += 1
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if not self._read():
+                return None
+
+    def _expect(self, chars):
+        char = self._peek()
+        if char is None or char not in chars:
+            raise ValueError('Expecting one of "%s" at offset %d, got %r' %
+                             (chars, self._pos, char))
+        self._pos += 1
+        return char
+
+    def _value(self):
+        """Decode the next JSON value, reading more chunks if needed."""
+        self._peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buf, self._pos)
+            except ValueError:
+                if not self._read():
+                    raise
+                continue
+            if end == len(self._buf) and self._read():
+                # NOTE: a number may continue in the next chunk
+                continue
+            self._pos = end
+            return value
+
+    def __iter__(self):
+        if self._started:
+            raise RuntimeError('A ListStream can only be iterated once')
+        self._started = True
+
+        char = self._peek()
+        if char is None:
+            # Empty body
+            return
+        if char != '{':
+            # Not a collection, nothing to list
+            self._value()
+            self._drain()
+            return
+
+        self._pos += 1
+        if self._peek() == '}':
+            self._pos += 1
+        else:
+            while True:
+                member = self._value()
+                self._expect(':')
+                if member == self.key:
+                    if self._peek() == '[':
+                        self._pos += 1
+                        if self._peek() == ']':
+                            self._pos += 1
+                        else:
+                            while True:
+                                yield self._value()
+                                if self._expect(',]') == ']':
+                                    break
+                    else:
+                        yield self._value()
+                else:
+                    self.extra[member] = self._value()
+                if self._expect(',}') == '}':
+                    break
+        self._drain()
+
+    def _drain(self):
+        """Read the body until the end, only whitespaces may remain."""
+        if self._peek() is not None:
+            raise ValueError('Extra data at offset %d' % self._pos)
+
+
+@six.add_metaclass(abc.ABCMeta)
+class StreamedString(object):
+    """A JSON string value which is read when the request body is sent.
+
+    Iterating over it yields the content of the string, already escaped
+    for JSON, as bytes; 'size' is the length of this content.
+    """
+
+    size = 0
+
+    @abc.abstractmethod
+    def __iter__(self):
+        """Yield the content of the string, escaped for JSON, as bytes."""
+
+
+class FileString(StreamedString):
+    """A JSON string value read from a file.
+
+    :param path: the path of the file, holding UTF-8 text.
+    :param escaped: whether the content of the file can be put in a JSON
+                    string as is (like base64 data). Otherwise it is
+                    escaped, and read once more to compute its size.
+    """
+
+    def __init__(self, path, escaped=False):
+        self.path = path
+        self.escaped = escaped
+        if escaped:
+            self.size = os.path.getsize(path)
+        else:
+            self.size = sum(len(chunk) for chunk in self)
+
+    def __iter__(self):
+        utf8 = codecs.getincrementaldecoder('utf-8')()
+        with open(self.path, 'rb') as f:
+            while True:
+                chunk = f.read(CHUNK_SIZE)
+                if self.escaped:
+                    if not chunk:
+                        return
+                    yield chunk
+                    continue
+                text = utf8.decode(chunk, final=not chunk)
+                if text:
+                    yield json.dumps(text)[1:-1].encode('ascii')
+                if not chunk:
+                    return
+
+    def __repr__(self):
+        return '<%s %s>' % (self.__class__.__name__, self.path)
+
+
+class StreamBody(object):
+    """A JSON request body, holding streamed strings.
+
+    It behaves as a read-only binary file of a known length, so that it can
+    be sent by httplib and requests without being built in memory, and
+    rewound with seek(0) to be sent again.
+
+    :param parts: the bytes of the document, and the StreamedString in
+                  between.
+    """
+
+    def __init__(self, parts):
+        self._parts = parts
+        self._size = sum(len(part) if isinstance(part, bytes) else part.size
+                         for part in parts)
+        self.seek(0)
+
+    def __len__(self):
+        return self._size
+
+    def _iter_chunks(self):
+        for part in self._parts:
+            if isinstance(part, bytes):
+                yield part
+            else:
+                for chunk in part:
+                    yield chunk
+
+    def read(self, size=-1):
+        while size < 0 or len(self._buf) < size:
+            try:
+                self._buf += next(self._chunks)
+            except StopIteration:
+                break
+        if size < 0:
+            data, self._buf = self._buf, b''
+        else:
+            data, self._buf = self._buf[:size], self._buf[size:]
+        self._pos += len(data)
+        return data
+
+    def tell(self):
+        return self._pos
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        if offset != 0 or whence != os.SEEK_SET:
+            raise IOError('A StreamBody can only be rewound')
+        self._chunks = self._iter_chunks()
+        self._buf = b''
+        self._pos = 0
+
+    def __repr__(self):
+        return ''.join(part.decode('utf-8') if isinstance(part, bytes)
+                       else '<%d bytes from %r>' % (part.size, part)
+                       for part in self._parts)
+
+
+def dumps(obj):
+    """Encode a request body, which may hold StreamedString values.
+
+    :returns: the JSON document as a string, or as a StreamBody if it
+        holds StreamedString values.
+    """
+    streams = []
+
+    def default(value):
+        if isinstance(value, StreamedString):
+            streams.append(value)
+            return _PLACEHOLDER
+        raise TypeError('%r is not JSON serializable' % (value,))
+
+    text = json.dumps(obj, default=default)
+    if not streams:
+        return text
+
+    parts = []
+    for index, piece in enumerate(text.split(_ENCODED_PLACEHOLDER)):
+        if index:
+            parts.append(streams[index - 1])
+        parts.append(piece.encode('utf-8'))
+    return StreamBody(parts)
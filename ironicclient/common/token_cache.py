@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Cache of the Keystone tokens and Ironic endpoints used by the shell.
+"""
+
+import calendar
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+
+from ironicclient.common import version_cache
+
+
+LOG = logging.getLogger(__name__)
+
+# Seconds before their expiration from which the tokens are not used
+DEFAULT_EXPIRY_MARGIN = 60
+
+CACHE_DIR_NAME = 'tokens'
+
+
+def cache_key(**credentials):
+    """A key identifying the token of some credentials.
+
+    The key names the file of the token, so it must not be derived from
+    any secret: a hash of the password would let anyone listing the cache
+    directory check guesses of the password offline.
+
+    :param credentials: the auth URL, user, project, region, etc., but no
+                        secret. None values are ignored.
+    """
+    digest = hashlib.sha256()
+    for name in sorted(credentials):
+        value = credentials[name]
+        if value is None:
+            continue
+        digest.update(('%s=%s\0' % (name, value)).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def expiration_time(expires):
+    """Return the timestamp of an aware datetime, e.g. of a token expiry."""
+    return calendar.timegm(expires.utctimetuple())
+
+
+def _is_private(stat_result):
+    """Whether a file belongs to the user and is only accessible to them."""
+    if hasattr(os, 'getuid') and stat_result.st_uid != os.getuid():
+        return False
+    return not stat_result.st_mode & 0o077
+
+
+class TokenCache(object):
+    """Tokens and endpoints kept between the invocations of the shell.
+
+    Each entry is a JSON file only readable by its owner, in a directory
+    only accessible to them. The entries are used until the expiration of
+    their token.
+
+    :param path: path of the directory storing the cache.
+    :param expiry_margin: number of seconds before the expiration of a token
+                          from which it isn't used anymore.
+    """
+
+    def __init__(self, path, expiry_margin=DEFAULT_EXPIRY_MARGIN):
+        self.path = path
+        self.expiry_margin = expiry_margin
+
+    def _entry_path(self, key):
+        return os.path.join(self.path, key + '.json')
+
+    def get(self, key):
+        """Return the (token, endpoint) of a key, None if unknown."""
+        path = self._entry_path(key)
+        try:
+            with open(path) as f:
+                if not _is_private(os.fstat(f.fileno())):
+                    LOG.debug('Ignoring token cache %s, it is accessible '
+                              'to other users', path)
+                    return None
+                entry = json.load(f)
+            token = entry['token']
+            endpoint = entry['endpoint']
+            expires = entry['expires']
+        except (IOError, OSError, ValueError, KeyError, TypeError) as e:
+            if os.path.exists(path):
+                LOG.debug('Cannot read token cache %(path)s: %(err)s',
+                          {'path': path, 'err': e})
+            return None
+        if expires - self.expiry_margin <= time.time():
+            self.invalidate(key)
+            return None
+        return token, endpoint
+
+    def set(self, key, token, endpoint, expires):
+        """Store a token and the endpoint to use it with.
+
+        :param key: the key of the credentials, from cache_key().
+        :param token: the token.
+        :param endpoint: the Ironic endpoint.
+        :param expires: the expiration timestamp of the token.
+        """
+        try:
+            if not os.path.isdir(self.path):
+                os.makedirs(self.path, 0o700)
+            # NOTE: mkstemp creates the file with the 0600 mode
+            fd, tmp_path = tempfile.mkstemp(dir=self.path, prefix='.token')
+            with os.fdopen(fd, 'w') as f:
+                json.dump({'token': token, 'endpoint': endpoint,
+                           'expires': expires}, f)
+            os.rename(tmp_path, self._entry_path(key))
+        except (IOError, OSError) as e:
+            LOG.debug('Cannot write token cache %(path)s: %(err)s',
+                      {'path': self.path, 'err': e})
+
+    def invalidate(self, key):
+        """Forget the token of a key, e.g. once it is rejected."""
+        try:
+            os.remove(self._entry_path(key))
+        except OSError:
+            pass
+
+
+def get_disk_cache(expiry_margin=DEFAULT_EXPIRY_MARGIN):
+    """Return a cache stored in the cache directory of the user."""
+    return TokenCache(os.path.join(version_cache.default_cache_dir(),
+                                   CACHE_DIR_NAME),
+                      expiry_margin=expiry_margin)
@@ -30,9 +30,15 @@ import tempfile
 from oslo_utils import importutils
 
 from ironicclient.common.i18n import _
+from ironicclient.common import iso9660
 from ironicclient import exc
 
 
+# Volume label and publisher of the config drives
+CONFIGDRIVE_LABEL = 'config-2'
+CONFIGDRIVE_PUBLISHER = 'ironicclient-configdrive 0.1'
+
+
 class HelpFormatter(argparse.HelpFormatter):
     def start_section(self, heading):
         # Title-case the headings
@@ -171,13 +177,39 @@ def common_params_for_list(args, fields, field_labels):
     return params
 
 
-def common_filters(marker=None, limit=None, sort_key=None, sort_dir=None):
+def select_fields(requested, fields, field_labels):
+    """Validate the fields given with --fields and return their labels.
+
+    :param requested: the value of the --fields arguments, a list of lists
+        of field names, or None if --fields wasn't specified.
+    :param fields: the fields that can be requested.
+    :param field_labels: the labels of these fields.
+    :raises: CommandError if some of the requested fields are unknown.
+    :returns: a tuple with the list of the requested fields and the list
+        of their labels, or (None, None) if no field was requested.
+    """
+    requested = [field for group in requested or () for field in group]
+    if not requested:
+        return None, None
+    invalid = [field for field in requested if field not in fields]
+    if invalid:
+        raise exc.CommandError(
+            _('Invalid field(s) requested: %(invalid)s. Valid fields are: '
+              '%(valid)s.') % {'invalid': ', '.join(invalid),
+                               'valid': ', '.join(fields)})
+    labels = dict(zip(fields, field_labels))
+    return requested, [labels[field] for field in requested]
+
+
+def common_filters(marker=None, limit=None, sort_key=None, sort_dir=None,
+                   fields=None):
     """Generate common filters for any list request.
 
     :param marker: entity ID from which to start returning entities.
     :param limit: maximum number of entities to return.
     :param sort_key: field to use for sorting.
     :param sort_dir: direction of sorting: 'asc' or 'desc'.
+    :param fields: a list with the fields of the entities to return.
     :returns: list of string filters.
     """
     filters = []
@@ -189,6 +221,8 @@ def common_filters(marker=None, limit=None, sort_key=None, sort_dir=None):
         filters.append('sort_key=%s' % sort_key)
     if sort_dir is not None:
         filters.append('sort_dir=%s' % sort_dir)
+    if fields:
+        filters.append('fields=%s' % ','.join(fields))
     return filters
 
 
@@ -201,47 +235,94 @@ def tempdir(*args, **kwargs):
         shutil.rmtree(dirname)
 
 
-def make_configdrive(path):
-    """Make the config drive file.
+class _Base64Writer(object):
+    """A binary file encoding what is written in base64 to another one."""
+
+    def __init__(self, fileobj):
+        self._file = fileobj
+        self._buf = b''
+
+    def write(self, data):
+        data = self._buf + bytes(data)
+        # NOTE: base64 encodes groups of 3 bytes
+        end = len(data) - len(data) % 3
+        self._file.write(base64.b64encode(data[:end]))
+        self._buf = data[end:]
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self._file.write(base64.b64encode(self._buf))
+        self._buf = b''
+
+
+def _genisoimage(path, fileobj):
+    """Write the ISO image of a directory with the genisoimage tool."""
+    with tempfile.NamedTemporaryFile() as tmpfile:
+        try:
+            p = subprocess.Popen(['genisoimage', '-o', tmpfile.name,
+                                  '-ldots', '-allow-lowercase',
+                                  '-allow-multidot', '-l',
+                                  '-publisher', CONFIGDRIVE_PUBLISHER,
+                                  '-quiet', '-J',
+                                  '-r', '-V', CONFIGDRIVE_LABEL,
+                                  path],
+                                 stdout=subprocess.PIPE,
+                                 stderr=subprocess.PIPE)
+        except OSError as e:
+            raise exc.CommandError(
+                _('Error generating the config drive. Make sure the '
+                  '"genisoimage" tool is installed. Error: %s') % e)
+
+        stdout, stderr = p.communicate()
+        if p.returncode != 0:
+            raise exc.CommandError(
+                _('Error generating the config drive.'
+                  'Stdout: "%(stdout)s". Stderr: %(stderr)s') %
+                {'stdout': stdout, 'stderr': stderr})
+
+        tmpfile.seek(0)
+        shutil.copyfileobj(tmpfile, fileobj)
+
+
+def write_configdrive(path, fileobj, genisoimage=False):
+    """Write the config drive of a directory, gzipped and base64 encoded.
+
+    The ISO image is compressed and encoded as it is written, so that only
+    a chunk of it is held in memory at a time.
 
     :param path: The directory containing the config drive files.
-    :returns: A gzipped and base64 encoded configdrive string.
+    :param fileobj: The binary file to write the config drive to.
+    :param genisoimage: Whether to build the ISO image with the genisoimage
+                        tool, rather than in-process.
 
     """
     # Make sure path it's readable
     if not os.access(path, os.R_OK):
         raise exc.CommandError(_('The directory "%s" is not readable') % path)
 
-    with tempfile.NamedTemporaryFile() as tmpfile:
-        with tempfile.NamedTemporaryFile() as tmpzipfile:
-            publisher = 'ironicclient-configdrive 0.1'
-            try:
-                p = subprocess.Popen(['genisoimage', '-o', tmpfile.name,
-                                      '-ldots', '-allow-lowercase',
-                                      '-allow-multidot', '-l',
-                                      '-publisher', publisher,
-                                      '-quiet', '-J',
-                                      '-r', '-V', 'config-2',
-                                      path],
-                                     stdout=subprocess.PIPE,
-                                     stderr=subprocess.PIPE)
-            except OSError as e:
-                raise exc.CommandError(
-                    _('Error generating the config drive. Make sure the '
-                      '"genisoimage" tool is installed. Error: %s') % e)
-
-            stdout, stderr = p.communicate()
-            if p.returncode != 0:
-                raise exc.CommandError(
-                    _('Error generating the config drive.'
-                      'Stdout: "%(stdout)s". Stderr: %(stderr)s') %
-                    {'stdout': stdout, 'stderr': stderr})
-
-            # Compress file
-            tmpfile.seek(0)
-            g = gzip.GzipFile(fileobj=tmpzipfile, mode='wb')
-            shutil.copyfileobj(tmpfile, g)
-            g.close()
-
-            tmpzipfile.seek(0)
-            return base64.b64encode(tmpzipfile.read())
+    encoder = _Base64Writer(fileobj)
+    g = gzip.GzipFile(fileobj=encoder, mode='wb')
+    if genisoimage:
+        _genisoimage(path, g)
+    else:
+        iso9660.write_image(path, g, volume_id=CONFIGDRIVE_LABEL,
+                            publisher=CONFIGDRIVE_PUBLISHER)
+    g.close()
+    encoder.close()
+
+
+def make_configdrive(path, genisoimage=False):
+    """Make the config drive file.
+
+    :param path: The directory containing the config drive files.
+    :param genisoimage: Whether to build the ISO image with the genisoimage
+                        tool, rather than in-process.
+    :returns: A gzipped and base64 encoded configdrive string.
+
+    """
+    with tempfile.TemporaryFile() as f:
+        write_configdrive(path, f, genisoimage=genisoimage)
+        f.seek(0)
+        return f.read()
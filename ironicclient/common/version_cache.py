@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Cache of the API versions supported by the Ironic endpoints.
+"""
+
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+
+
+LOG = logging.getLogger(__name__)
+
+# Seconds during which the versions supported by an endpoint are trusted
+DEFAULT_TTL = 3600
+
+CACHE_FILE_NAME = 'api_versions.json'
+
+
+def default_cache_dir():
+    """The directory of the cache files of the client for this user."""
+    cache_home = (os.environ.get('XDG_CACHE_HOME') or
+                  os.path.join(os.path.expanduser('~'), '.cache'))
+    return os.path.join(cache_home, 'python-ironicclient')
+
+
+class VersionCache(object):
+    """The minimum and maximum API versions supported by endpoints.
+
+    Clients remember the versions of the server they negotiated with, so
+    that the next clients of the same endpoint can send a version it
+    supports from their first request. The versions are kept in memory,
+    and in a JSON file if 'path' is set so that they outlive the process
+    (e.g. between CLI invocations).
+
+    :param path: Optional, path of the file storing the cache.
+    :param ttl: number of seconds after which the versions of an endpoint
+                are ignored.
+    """
+
+    def __init__(self, path=None, ttl=DEFAULT_TTL):
+        self.path = path
+        self.ttl = ttl
+        self._versions = {}
+        self._loaded = path is None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        self._loaded = True
+        try:
+            with open(self.path) as f:
+                versions = json.load(f)
+        except (IOError, OSError, ValueError) as e:
+            if os.path.exists(self.path):
+                LOG.debug('Cannot read API version cache %(path)s: %(err)s',
+                          {'path': self.path, 'err': e})
+            return
+        if isinstance(versions, dict):
+            for endpoint, entry in versions.items():
+                self._versions.setdefault(endpoint, entry)
+
+    def _save(self):
+        directory = os.path.dirname(self.path)
+        try:
+            if not os.path.isdir(directory):
+                os.makedirs(directory, 0o700)
+            fd, tmp_path = tempfile.mkstemp(dir=directory,
+                                            prefix='.api_versions')
+            with os.fdopen(fd, 'w') as f:
+                json.dump(self._versions, f)
+            # NOTE: atomic, readers never see a partial file
+            os.rename(tmp_path, self.path)
+        except (IOError, OSError) as e:
+            LOG.debug('Cannot write API version cache %(path)s: %(err)s',
+                      {'path': self.path, 'err': e})
+
+    def get(self, endpoint):
+        """Return the (min, max) versions of an endpoint, None if unknown."""
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            entry = self._versions.get(endpoint)
+        if entry is None or time.time() - entry['time'] > self.ttl:
+            return None
+        return entry['min'], entry['max']
+
+    def set(self, endpoint, min_ver, max_ver):
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            now = time.time()
+            # Drop the expired entries, they would otherwise pile up
+            self._versions = dict(
+                (k, v) for k, v in self._versions.items()
+                if now - v['time'] <= self.ttl)
+            self._versions[endpoint] = {'min': min_ver, 'max': max_ver,
+                                        'time': now}
+            if self.path is not None:
+                self._save()
+
+    def invalidate(self, endpoint):
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            if self._versions.pop(endpoint, None) and self.path is not None:
+                self._save()
+
+
+# NOTE: shared by the clients of the process which are not given a cache
+MEMORY_CACHE = VersionCache()
+
+
+def get_disk_cache(ttl=DEFAULT_TTL):
+    """Return a cache stored in the cache directory of the user."""
+    return VersionCache(os.path.join(default_cache_dir(), CACHE_FILE_NAME),
+                        ttl=ttl)
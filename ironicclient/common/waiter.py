@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Polling of resources until they reach a state.
+"""
+
+import logging
+import time
+
+from ironicclient.common.i18n import _
+from ironicclient import exc
+
+
+LOG = logging.getLogger(__name__)
+
+# Seconds between the first polls, and at most between later ones
+DEFAULT_POLL_INTERVAL = 2
+DEFAULT_MAX_POLL_INTERVAL = 30
+# Factor applied to the interval after each poll where nothing changed
+DEFAULT_POLL_BACKOFF = 1.5
+
+
+class PollInterval(object):
+    """Intervals between polls, longer and longer while nothing changes.
+
+    A state which just changed (e.g. a node going from "deploying" to
+    "wait call-back") is likely to change again soon, while a long
+    operation like the deployment of an image only needs to be checked
+    now and then.
+
+    :param interval: the number of seconds between the first polls, and
+                     after a change.
+    :param max_interval: the maximum number of seconds between polls.
+    :param backoff: the factor applied to the interval after each poll
+                    where nothing changed.
+    """
+
+    def __init__(self, interval=DEFAULT_POLL_INTERVAL,
+                 max_interval=DEFAULT_MAX_POLL_INTERVAL,
+                 backoff=DEFAULT_POLL_BACKOFF):
+        self.interval = interval
+        self.max_interval = max(interval, max_interval)
+        self.backoff = backoff
+        self._current = interval
+
+    def next(self, changed):
+        """Seconds to wait before the next poll.
+
+        :param changed: whether the last poll saw a change.
+        """
+        if changed:
+            self._current = self.interval
+        delay = self._current
+        self._current = min(self.max_interval, self._current * self.backoff)
+        return delay
+
+
+def wait(poll, description, timeout=0, interval=None):
+    """Call poll() until it's done.
+
+    :param poll: a callable returning (done, result, state). 'state' is
+                 compared with the one of the previous poll, to poll more
+                 often after a change. It may raise StateTransitionFailed
+                 to stop waiting.
+    :param description: what is waited for, for the messages, e.g.
+                        'node X to reach provision state "active"'.
+    :param timeout: the number of seconds to wait, 0 to wait forever.
+    :param interval: Optional, the PollInterval to use.
+    :returns: the result of the last poll.
+    :raises: StateTransitionTimeout if still not done after 'timeout'
+             seconds.
+    """
+    if interval is None:
+        interval = PollInterval()
+    deadline = time.time() + timeout if timeout else None
+    previous = changed = None
+    while True:
+        done, result, state = poll()
+        if done:
+            return result
+        if previous is not None:
+            changed = state != previous
+        previous = state
+
+        delay = interval.next(changed)
+        if deadline is not None:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                raise exc.StateTransitionTimeout(
+                    _('Timed out after %(timeout)s seconds waiting for '
+                      '%(description)s') %
+                    {'timeout': timeout, 'description': description})
+            delay = min(delay, remaining)
+        LOG.debug('Still waiting for %(description)s, polling again in '
+                  '%(delay).1f seconds', {'description': description,
+                                          'delay': delay})
+        time.sleep(delay)
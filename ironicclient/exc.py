@@ -38,6 +38,21 @@ class InvalidAttribute(ClientException):
     pass
 
 
+class StateTransitionFailed(ClientException):
+    """A resource went to an error state while waiting for another one."""
+    pass
+
+
+class StateTransitionTimeout(ClientException):
+    """A resource didn't reach a state in time."""
+    pass
+
+
+class ConnectionPoolTimeout(ConnectionRefused):
+    """No connection to the endpoint became available in time."""
+    pass
+
+
 def from_response(response, message=None, traceback=None, method=None,
                   url=None):
     """Return an HttpError instance based on response from httplib/requests."""
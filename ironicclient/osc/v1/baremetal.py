@@ -87,6 +87,17 @@ class ListBaremetal(lister.Lister):
             help="Show detailed information about the nodes. "
                  "Alias for --detail.",
         )
+        parser.add_argument(
+            '--fields',
+            nargs='+',
+            dest='fields',
+            metavar='<field>',
+            action='append',
+            default=None,
+            help="One or more node fields. Only these fields will be fetched "
+                 "from the server. Can not be used when '--detail' is "
+                 "specified.",
+        )
         return parser
 
     def take_action(self, parsed_args):
@@ -105,7 +116,16 @@ class ListBaremetal(lister.Lister):
         params['associated'] = parsed_args.associated
         params['maintenance'] = parsed_args.maintenance
 
-        if parsed_args.detail:
+        if parsed_args.fields and parsed_args.detail:
+            raise exc.CommandError(
+                _("'--fields' can not be used with '--detail'."))
+        if parsed_args.fields:
+            fields, labels = utils.select_fields(
+                parsed_args.fields, res_fields.NODE_FIELDS,
+                res_fields.NODE_FIELD_LABELS)
+            columns = tuple(labels)
+            params['fields'] = fields
+        elif parsed_args.detail:
             columns = tuple(res_fields.NODE_FIELD_LABELS)
         params['detail'] = parsed_args.detail
 
@@ -146,8 +166,8 @@ class ShowBaremetal(show.ShowOne):
             node = baremetal_client.node.get_by_instance_uuid(
                 parsed_args.node)._info
         else:
-            node = oscutils.find_resource(baremetal_client.node,
-                                          parsed_args.node)._info
+            # NOTE: the API accepts a name as well as a UUID
+            node = baremetal_client.node.get(parsed_args.node)._info
         node.pop("links", None)
 
         return zip(*sorted(six.iteritems(node)))
@@ -172,9 +192,7 @@ class DeleteBaremetal(command.Command):
 
         baremetal_client = self.app.client_manager.baremetal
 
-        node = oscutils.find_resource(baremetal_client.node,
-                                      parsed_args.node)
-        baremetal_client.node.delete(node.uuid)
+        baremetal_client.node.delete(parsed_args.node)
 
 
 class CreateBaremetal(show.ShowOne):
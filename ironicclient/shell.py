@@ -21,22 +21,21 @@ from __future__ import print_function
 import argparse
 import getpass
 import logging
+import os
 import sys
 
-import httplib2
-from keystoneclient.auth.identity import v2 as v2_auth
-from keystoneclient.auth.identity import v3 as v3_auth
-from keystoneclient import discover
-from keystoneclient.openstack.common.apiclient import exceptions as ks_exc
 from keystoneclient import session as kssession
 import six.moves.urllib.parse as urlparse
 
 
 import ironicclient
 from ironicclient import client as iroclient
+from ironicclient.common import batch
 from ironicclient.common import http
 from ironicclient.common.i18n import _
+from ironicclient.common import token_cache
 from ironicclient.common import utils
+from ironicclient.common import version_cache
 from ironicclient import exc
 from ironicclient.openstack.common import cliutils
 
@@ -241,6 +240,34 @@ class IronicShell(object):
                                 'IRONIC_RETRY_INTERVAL',
                                 default=str(http.DEFAULT_RETRY_INTERVAL)))
 
+        parser.add_argument('--no-version-cache',
+                            action='store_true',
+                            default=False,
+                            help='Do not cache the API versions supported '
+                            'by the Ironic service. They are otherwise kept '
+                            'for %d seconds in %s, to send a supported '
+                            'version from the first request.'
+                            % (version_cache.DEFAULT_TTL,
+                               version_cache.default_cache_dir()))
+
+        parser.add_argument('--token-cache',
+                            action='store_true',
+                            default=bool(cliutils.env('IRONIC_TOKEN_CACHE')),
+                            help='Keep the Keystone token and the Ironic '
+                            'endpoint obtained with a username and a '
+                            'password in %s until the token expires, to '
+                            'authenticate the next invocations without '
+                            'contacting Keystone. Defaults to '
+                            'env[IRONIC_TOKEN_CACHE].'
+                            % os.path.join(version_cache.default_cache_dir(),
+                                           token_cache.CACHE_DIR_NAME))
+
+        parser.add_argument('--no-compression',
+                            action='store_true',
+                            default=False,
+                            help='Do not ask the Ironic service to compress '
+                            'the responses with gzip or deflate.')
+
         # FIXME(gyee): this method should come from python-keystoneclient.
         # Will refactor this code once it is available.
         # https://bugs.launchpad.net/python-keystoneclient/+bug/1332337
@@ -249,22 +276,49 @@ class IronicShell(object):
 
         return parser
 
-    def get_subcommand_parser(self, version):
+    def get_subcommand_parser(self, version, commands=None):
+        """Build the parser of the subcommands.
+
+        :param version: the major API version.
+        :param commands: the names of the subcommands to define with their
+            arguments, the others are only listed. All of them are defined
+            if None.
+        """
         parser = self.get_base_parser()
 
         self.subcommands = {}
         subparsers = parser.add_subparsers(metavar='<subcommand>')
         submodule = utils.import_versioned_module(version, 'shell')
-        submodule.enhance_parser(parser, subparsers, self.subcommands)
+        submodule.enhance_parser(parser, subparsers, self.subcommands,
+                                 commands=commands)
         utils.define_commands_from_module(subparsers, self, self.subcommands)
         return parser
 
+    def _get_commands(self, args):
+        """The subcommands needed to run a command line.
+
+        :param args: the arguments left once the global options are parsed.
+        :returns: the names of the subcommands to define with their
+            arguments, or None for all of them.
+        """
+        positionals = [arg for arg in args if not arg.startswith('-')]
+        if not positionals:
+            return []
+        if positionals[0] == 'help':
+            return positionals[1:2]
+        if positionals[0] in ('bash-completion', 'batch'):
+            return None
+        return positionals[:1]
+
     def _setup_debugging(self, debug):
         if debug:
             logging.basicConfig(
                 format="%(levelname)s (%(module)s:%(lineno)d) %(message)s",
                 level=logging.DEBUG)
 
+            # NOTE: imported here, as are the keystone modules only needed
+            # to authenticate, to keep the startup of the shell fast
+            import httplib2
             httplib2.debuglevel = 1
         else:
             logging.basicConfig(
@@ -284,6 +338,10 @@ class IronicShell(object):
         print(' '.join(commands | options))
 
     def _discover_auth_versions(self, session, auth_url):
+        from keystoneclient import discover
+        from keystoneclient.openstack.common.apiclient import (
+            exceptions as ks_exc)
+
         # discover the API versions the server is supporting base on the
         # given URL
         v2_auth_url = None
@@ -314,6 +372,8 @@ class IronicShell(object):
         return (v2_auth_url, v3_auth_url)
 
     def _get_keystone_v3_auth(self, v3_auth_url, **kwargs):
+        from keystoneclient.auth.identity import v3 as v3_auth
+
         auth_token = kwargs.pop('auth_token', None)
         if auth_token:
             return v3_auth.Token(v3_auth_url, auth_token)
@@ -321,6 +381,8 @@ class IronicShell(object):
             return v3_auth.Password(v3_auth_url, **kwargs)
 
     def _get_keystone_v2_auth(self, v2_auth_url, **kwargs):
+        from keystoneclient.auth.identity import v2 as v2_auth
+
         auth_token = kwargs.pop('auth_token', None)
         if auth_token:
             return v2_auth.Token(v2_auth_url, auth_token,
@@ -411,7 +473,10 @@ class IronicShell(object):
         (api_major_version, os_ironic_api_version) = (
             self._check_version(options.ironic_api_version))
 
-        subcommand_parser = self.get_subcommand_parser(api_major_version)
+        # only the subcommand run is built with its arguments, which
+        # avoids importing the modules of all the others
+        subcommand_parser = self.get_subcommand_parser(
+            api_major_version, commands=self._get_commands(args))
         self.parser = subcommand_parser
 
         # Handle top-level --help/-h before attempting to parse
@@ -472,9 +537,36 @@ class IronicShell(object):
         project_id = args.os_project_id or args.os_tenant_id
         project_name = args.os_project_name or args.os_tenant_name
 
+        token = None
+        cache = cache_key = None
         if (args.os_auth_token and (args.ironic_url or args.os_endpoint)):
+            token = args.os_auth_token
+        elif (args.os_username and
+              args.os_password and
+              args.os_auth_url and
+              (project_id or project_name)):
+            if args.token_cache:
+                cache = token_cache.get_disk_cache()
+                cache_key = token_cache.cache_key(
+                    auth_url=args.os_auth_url,
+                    username=args.os_username,
+                    user_domain_id=args.os_user_domain_id,
+                    user_domain_name=args.os_user_domain_name,
+                    project_id=project_id,
+                    project_name=project_name,
+                    project_domain_id=args.os_project_domain_id,
+                    project_domain_name=args.os_project_domain_name,
+                    service_type=service_type,
+                    endpoint_type=args.os_endpoint_type,
+                    region_name=args.os_region_name,
+                    endpoint=endpoint)
+                cached = cache.get(cache_key)
+                if cached is not None:
+                    token, endpoint = cached
+
+        if token is not None:
             kwargs = {
-                'token': args.os_auth_token,
+                'token': token,
                 'insecure': args.insecure,
                 'timeout': args.timeout,
                 'ca_file': args.os_cacert,
@@ -511,6 +603,10 @@ class IronicShell(object):
                                                       region_name=region_name)
 
             endpoint_type = args.os_endpoint_type or 'publicURL'
+            if cache is not None:
+                self._cache_token(cache, cache_key, keystone_session,
+                                  keystone_auth, service_type,
+                                  endpoint_type, args)
             kwargs = {
                 'auth_url': args.os_auth_url,
                 'session': keystone_session,
@@ -530,13 +626,88 @@ class IronicShell(object):
                                      "--retry-interval"))
         kwargs['max_retries'] = args.max_retries
         kwargs['retry_interval'] = args.retry_interval
+        if not args.no_version_cache:
+            kwargs['version_cache'] = version_cache.get_disk_cache()
+        if args.no_compression:
+            kwargs['compression'] = False
         client = iroclient.Client(api_major_version, endpoint, **kwargs)
 
         try:
             args.func(client, args)
         except exc.Unauthorized:
+            if cache is not None:
+                # NOTE: e.g. the token was revoked, the next invocation
+                # authenticates again
+                cache.invalidate(cache_key)
             raise exc.CommandError(_("Invalid OpenStack Identity credentials"))
 
+    def _cache_token(self, cache, cache_key, session, auth, service_type,
+                     endpoint_type, args):
+        """Keep the token of a session for the next invocations."""
+        endpoint = args.ironic_url or args.os_endpoint
+        if not endpoint:
+            endpoint = auth.get_endpoint(session,
+                                         service_type=service_type,
+                                         interface=endpoint_type,
+                                         region_name=args.os_region_name)
+        access = auth.get_access(session)
+        if endpoint and access.expires is not None:
+            cache.set(cache_key, access.auth_token, endpoint,
+                      token_cache.expiration_time(access.expires))
+
+    @cliutils.arg('--file', metavar='<file>', default='-',
+                  help='File of the commands, one per line, without '
+                       '"ironic" nor global options. Blank lines and '
+                       'comments starting with # are skipped. "-" reads '
+                       'them from stdin, which is the default.')
+    @cliutils.arg('--concurrency', metavar='<concurrency>', type=int,
+                  default=1,
+                  help='Maximum number of commands running at the same '
+                       'time. Default is 1, the commands run one after '
+                       'the other.')
+    def do_batch(self, client, args):
+        """Run many commands with the same client.
+
+        The commands are authenticated once, and reuse the connections to
+        the Ironic service. Their output is printed in the order of the
+        commands. The exit status of each command is printed on stderr
+        after its output, as "<line number>: <status>": 0 if it succeeded,
+        1 followed by the error otherwise.
+        """
+        if args.concurrency < 1:
+            raise exc.CommandError(_("You must provide value >= 1 for "
+                                     "--concurrency"))
+        if args.file == '-':
+            lines = batch.read_commands(sys.stdin)
+        else:
+            try:
+                with open(args.file) as f:
+                    lines = batch.read_commands(f)
+            except (IOError, OSError) as e:
+                raise exc.CommandError(_('Cannot read %(file)s: %(error)s')
+                                       % {'file': args.file, 'error': e})
+
+        commands = []
+        for line, text, argv in lines:
+            try:
+                command_args = self.parser.parse_args(argv)
+            except SystemExit:
+                raise exc.CommandError(_('Line %(line)d is not a valid '
+                                         'command: %(text)s')
+                                       % {'line': line, 'text': text})
+            if getattr(command_args.func, '__self__', None) is self:
+                raise exc.CommandError(_('Line %(line)d: "%(command)s" '
+                                         'cannot be run in a batch')
+                                       % {'line': line, 'command': argv[0]})
+            commands.append(batch.Command(line, text, command_args))
+
+        failed = batch.run(client, commands, concurrency=args.concurrency)
+        if failed:
+            raise exc.CommandError(_('%(failed)d command(s) out of '
+                                     '%(total)d failed.')
+                                   % {'failed': failed,
+                                      'total': len(commands)})
+
     @cliutils.arg('command', metavar='<subcommand>', nargs='?',
                   help='Display help for <subcommand>')
     def do_help(self, args):
@@ -0,0 +1,1042 @@
+# -*- coding: utf-8 -*-
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+A fake Ironic v1 API, to test and measure the client without a deployment.
+
+It serves nodes, ports, chassis and drivers, with the pagination of the
+lists ('limit', 'marker' and 'next' links), the negotiation of the API
+version (406 errors), Conflict errors on locked nodes and an optional
+latency. The resources are generated from their index when requested, and
+only the ones changed by requests are stored, so that fleets of hundreds
+of thousands of nodes can be served.
+
+In a test::
+
+    with fakeserver.FakeServer(nodes=1000) as server:
+        client = get_client('1', ironic_url=server.endpoint,
+                            os_auth_token='fake')
+
+Standalone, the address of the server is printed on the first line::
+
+    python -m ironicclient.tests.fakeserver --nodes 100000 --port 6385
+"""
+
+from __future__ import print_function
+
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+import uuid as uuidlib
+
+import six
+from six.moves import BaseHTTPServer
+from six.moves import socketserver
+import six.moves.urllib.parse as urlparse
+
+
+DEFAULT_MAX_LIMIT = 1000
+DEFAULT_MIN_VERSION = '1.1'
+DEFAULT_MAX_VERSION = '1.9'
+# The first version letting the clients select the fields of the resources
+FIELDS_VERSION = (1, 8)
+
+VERSION_HEADER = 'X-OpenStack-Ironic-API-Version'
+MIN_VERSION_HEADER = 'X-OpenStack-Ironic-API-Minimum-Version'
+MAX_VERSION_HEADER = 'X-OpenStack-Ironic-API-Maximum-Version'
+
+CONDUCTOR = 'fake-conductor'
+
+DRIVERS = ['fake', 'agent_ipmitool', 'pxe_ipmitool']
+
+DRIVER_PROPERTIES = {
+    'ipmi_address': 'IP address or hostname of the node. Required.',
+    'ipmi_password': 'password. Optional.',
+    'ipmi_username': 'username; default is NULL user. Optional.',
+    'deploy_kernel': 'UUID (from Glance) of the deployment kernel. '
+                     'Required.',
+    'deploy_ramdisk': 'UUID (from Glance) of the ramdisk. Required.',
+}
+
+SUPPORTED_BOOT_DEVICES = ['pxe', 'disk', 'cdrom', 'bios', 'safe']
+
+# The fields of the resources returned without 'detail'
+NODE_LIST_FIELDS = ['uuid', 'name', 'instance_uuid', 'power_state',
+                    'provision_state', 'maintenance']
+PORT_LIST_FIELDS = ['uuid', 'address']
+CHASSIS_LIST_FIELDS = ['uuid', 'description']
+
+# The provision states reached at once with each target
+PROVISION_TARGETS = {
+    'active': 'active',
+    'rebuild': 'active',
+    'deleted': 'available',
+    'manage': 'manageable',
+    'provide': 'available',
+    'inspect': 'manageable',
+}
+POWER_TARGETS = {
+    'power on': 'power on',
+    'power off': 'power off',
+    'rebooting': 'power on',
+}
+
+_UUID_FORMAT = '%08x-0000-4000-8000-%012x'
+_NODE_PREFIX = 0x1be26c0b
+_PORT_PREFIX = 0x2be26c0b
+_CHASSIS_PREFIX = 0x3be26c0b
+_TIMESTAMP = '2015-06-01T12:00:00+00:00'
+
+
+def node_uuid(index):
+    """The UUID of a generated node."""
+    return _UUID_FORMAT % (_NODE_PREFIX, index)
+
+
+def port_uuid(index):
+    """The UUID of a generated port."""
+    return _UUID_FORMAT % (_PORT_PREFIX, index)
+
+
+def chassis_uuid(index):
+    """The UUID of a generated chassis."""
+    return _UUID_FORMAT % (_CHASSIS_PREFIX, index)
+
+
+def port_address(index):
+    """The MAC address of a generated port."""
+    return '52:54:%02x:%02x:%02x:%02x' % (index >> 24 & 255,
+                                          index >> 16 & 255,
+                                          index >> 8 & 255, index & 255)
+
+
+def _generated_index(prefix, ident):
+    """The index in a UUID of generated resource, None if not one."""
+    try:
+        head, tail = ident.rsplit('-', 1)
+        index = int(tail, 16)
+    except (AttributeError, ValueError):
+        return None
+    if _UUID_FORMAT % (prefix, index) != ident:
+        return None
+    return index
+
+
+def _parse_version(version):
+    try:
+        major, minor = version.split('.')
+        return int(major), int(minor)
+    except (AttributeError, ValueError):
+        return None
+
+
+class HTTPError(Exception):
+    """An error response of the fake API."""
+
+    def __init__(self, status, message):
+        super(HTTPError, self).__init__(message)
+        self.status = status
+        self.message = message
+
+
+class _Collection(object):
+    """Resources generated from their index, and the changes made to them.
+
+    The resources are identified by their index, which is also their
+    order in the lists. The created ones get the next indexes, the deleted
+    ones leave an empty slot.
+
+    :param count: the number of generated resources.
+    :param factory: the callable generating the resource of an index.
+    :param prefix: the prefix of the UUIDs of the generated resources.
+    :param name_format: Optional, the format of the names of the generated
+                        resources, e.g. 'node-%d'.
+    """
+
+    def __init__(self, count, factory, prefix, name_format=None):
+        self.size = count
+        self._generated = count
+        self._factory = factory
+        self._prefix = prefix
+        self._name_format = name_format
+        # The resources changed by requests, None once deleted
+        self._changed = {}
+        # The indexes of the UUIDs and names not generated
+        self._uuids = {}
+        self._names = {}
+
+    def get(self, index):
+        """The resource of an index, None if there is none."""
+        if index in self._changed:
+            return self._changed[index]
+        if 0 <= index < self._generated:
+            return self._factory(index)
+        return None
+
+    def lookup(self, ident):
+        """The index of a resource from its UUID or name, None if unknown."""
+        index = self._uuids.get(ident)
+        if index is None:
+            index = _generated_index(self._prefix, ident)
+        if index is None:
+            index = self._names.get(ident)
+        if index is None and self._name_format:
+            prefix = self._name_format.split('%')[0]
+            if ident.startswith(prefix) and ident[len(prefix):].isdigit():
+                index = int(ident[len(prefix):])
+        info = self.get(index) if index is not None else None
+        if info is None or ident not in (info['uuid'], info.get('name')):
+            return None
+        return index
+
+    def changed(self):
+        """The indexes of the resources changed or created by requests."""
+        return sorted(index for index, info in self._changed.items()
+                      if info is not None)
+
+    def add(self, info):
+        index = self.size
+        self.size += 1
+        self._changed[index] = info
+        self._uuids[info['uuid']] = index
+        if info.get('name'):
+            self._names[info['name']] = index
+        return index
+
+    def update(self, index, info):
+        old = self.get(index)
+        if old.get('name') != info.get('name'):
+            self._names.pop(old.get('name'), None)
+            if info.get('name'):
+                self._names[info['name']] = index
+        self._changed[index] = info
+
+    def delete(self, index):
+        info = self.get(index)
+        self._names.pop(info.get('name'), None)
+        self._uuids.pop(info['uuid'], None)
+        self._changed[index] = None
+
+
+def _apply_patch(info, patch, read_only=('uuid', 'created_at')):
+    """Apply a JSON patch to a copy of a resource."""
+    info = json.loads(json.dumps(info))
+    if not isinstance(patch, list):
+        raise HTTPError(400, 'Invalid patch')
+    for operation in patch:
+        try:
+            op = operation['op']
+            path = operation['path'].strip('/').split('/')
+        except (KeyError, TypeError, AttributeError):
+            raise HTTPError(400, 'Invalid patch operation %s' % operation)
+        if path[0] in read_only or path[0] not in info:
+            raise HTTPError(400, "Can't patch %s" % operation['path'])
+        target = info
+        for key in path[:-1]:
+            target = target.get(key) if isinstance(target, dict) else None
+            if target is None:
+                raise HTTPError(400, 'Invalid path %s' % operation['path'])
+        if op in ('add', 'replace'):
+            if 'value' not in operation:
+                raise HTTPError(400, 'No value for %s' % operation['path'])
+            target[path[-1]] = operation['value']
+        elif op == 'remove':
+            if len(path) == 1:
+                target[path[-1]] = None
+            elif target.pop(path[-1], None) is None:
+                raise HTTPError(400, 'No %s to remove' % operation['path'])
+        else:
+            raise HTTPError(400, 'Unknown patch operation %s' % op)
+    return info
+
+
+class FakeIronic(object):
+    """The state and the request handling of a fake Ironic API.
+
+    :param nodes: the number of nodes generated.
+    :param ports: the number of ports generated, one per node by default.
+                  The port N belongs to the node N modulo the number of
+                  nodes.
+    :param chassis: the number of chassis generated. The node N belongs to
+                    the chassis N modulo the number of chassis, if any.
+    :param max_limit: the maximum number of resources in a page.
+    :param min_version: the minimum API version supported.
+    :param max_version: the maximum API version supported.
+    :param latency: number of seconds added to each request.
+    :param jitter: maximum random number of seconds added to the latency.
+    :param conflict_rate: probability that a request changing a node fails
+                          with a Conflict error, as if it was locked.
+    :param seed: Optional, the seed of the random choices.
+    """
+
+    def __init__(self, nodes=0, ports=None, chassis=0,
+                 max_limit=DEFAULT_MAX_LIMIT,
+                 min_version=DEFAULT_MIN_VERSION,
+                 max_version=DEFAULT_MAX_VERSION, latency=0, jitter=0,
+                 conflict_rate=0, seed=None):
+        if ports is None:
+            ports = nodes
+        self.nodes = _Collection(nodes, self._make_node, _NODE_PREFIX,
+                                 'node-%d')
+        self.ports = _Collection(ports if nodes else 0, self._make_port,
+                                 _PORT_PREFIX)
+        self.chassis = _Collection(chassis, self._make_chassis,
+                                   _CHASSIS_PREFIX)
+        self._generated_nodes = nodes
+        self._generated_chassis = chassis
+        self.max_limit = max_limit
+        self.min_version = min_version
+        self.max_version = max_version
+        self.latency = latency
+        self.jitter = jitter
+        self.conflict_rate = conflict_rate
+        self._random = random.Random(seed)
+        self._locks = {}
+        self._boot_devices = {}
+        self._lock = threading.RLock()
+        # Number of requests received, by method
+        self.requests = {}
+
+    # Generated resources
+
+    def _make_node(self, index):
+        address = '10.%d.%d.%d' % (index >> 16 & 255, index >> 8 & 255,
+                                   index & 255)
+        chassis = (chassis_uuid(index % self._generated_chassis)
+                   if self._generated_chassis else None)
+        return {
+            'uuid': node_uuid(index),
+            'name': 'node-%d' % index,
+            'chassis_uuid': chassis,
+            'console_enabled': False,
+            'created_at': _TIMESTAMP,
+            'updated_at': None,
+            'driver': 'pxe_ipmitool',
+            'driver_info': {'ipmi_address': address,
+                            'ipmi_username': 'admin',
+                            'ipmi_password': '******'},
+            'driver_internal_info': {},
+            'extra': {},
+            'inspection_finished_at': None,
+            'inspection_started_at': None,
+            'instance_info': {},
+            'instance_uuid': None,
+            'last_error': None,
+            'maintenance': False,
+            'maintenance_reason': None,
+            'power_state': 'power off',
+            'properties': {'cpus': 8, 'memory_mb': 16384, 'local_gb': 100,
+                           'cpu_arch': 'x86_64'},
+            'provision_state': 'available',
+            'reservation': None,
+            'target_power_state': None,
+            'target_provision_state': None,
+        }
+
+    def _make_port(self, index):
+        return {
+            'uuid': port_uuid(index),
+            'address': port_address(index),
+            'node_uuid': node_uuid(index % self._generated_nodes),
+            'extra': {},
+            'created_at': _TIMESTAMP,
+            'updated_at': None,
+        }
+
+    def _make_chassis(self, index):
+        return {
+            'uuid': chassis_uuid(index),
+            'description': 'chassis-%d' % index,
+            'extra': {},
+            'created_at': _TIMESTAMP,
+            'updated_at': None,
+        }
+
+    # Rendering
+
+    def render(self, kind, index, base_url='', detail=True, fields=None):
+        """The representation of a resource returned by the API.
+
+        :param kind: 'nodes', 'ports' or 'chassis'.
+        :param index: the index of the resource.
+        :param base_url: the URL of the API, for the links.
+        :param detail: whether to return all the fields.
+        :param fields: Optional, the only fields to return.
+        """
+        info = getattr(self, kind).get(index)
+        if fields is not None:
+            return dict((field, info.get(field)) for field in fields)
+        if detail:
+            info = dict(info)
+        else:
+            list_fields = {'nodes': NODE_LIST_FIELDS,
+                           'ports': PORT_LIST_FIELDS,
+                           'chassis': CHASSIS_LIST_FIELDS}[kind]
+            info = dict((field, info.get(field)) for field in list_fields)
+        info['links'] = self._links(base_url, kind, info['uuid'])
+        if detail and kind == 'nodes':
+            info['ports'] = self._links(base_url, kind, info['uuid'],
+                                        'ports')
+        elif detail and kind == 'chassis':
+            info['nodes'] = self._links(base_url, kind, info['uuid'],
+                                        'nodes')
+        return info
+
+    @staticmethod
+    def _links(base_url, kind, ident, sub=None):
+        path = '%s/%s' % (kind, ident)
+        if sub:
+            path += '/' + sub
+        return [{'href': '%s/v1/%s' % (base_url, path), 'rel': 'self'},
+                {'href': '%s/%s' % (base_url, path), 'rel': 'bookmark'}]
+
+    # Locks
+
+    def lock(self, node, conflicts=1):
+        """Make the next requests changing a node fail with a Conflict.
+
+        :param node: the UUID or name of the node.
+        :param conflicts: the number of requests failing.
+        """
+        with self._lock:
+            index = self._node_index(node)
+            self._locks[index] = self._locks.get(index, 0) + conflicts
+
+    def _check_lock(self, index):
+        count = self._locks.get(index, 0)
+        if count:
+            self._locks[index] = count - 1
+        elif not (self.conflict_rate and
+                  self._random.random() < self.conflict_rate):
+            return
+        raise HTTPError(409, 'Node %s is locked by host %s, please retry '
+                             'after the current operation is completed.'
+                        % (self.nodes.get(index)['uuid'], CONDUCTOR))
+
+    # Request handling
+
+    def handle(self, method, path, headers=None, body=None, base_url=''):
+        """Answer a request.
+
+        :param method: the HTTP method.
+        :param path: the path of the request, with its query string.
+        :param headers: the headers of the request.
+        :param body: the decoded JSON body of the request, if any.
+        :param base_url: the URL of the server, for the links.
+        :returns: a tuple with the status, the headers and the body of the
+            response, None if empty.
+        """
+        delay = self.latency
+        if self.jitter:
+            delay += self._random.uniform(0, self.jitter)
+        if delay:
+            time.sleep(delay)
+
+        headers = dict((key.lower(), value)
+                       for key, value in (headers or {}).items())
+        response_headers = {MIN_VERSION_HEADER: self.min_version,
+                            MAX_VERSION_HEADER: self.max_version}
+        with self._lock:
+            self.requests[method] = self.requests.get(method, 0) + 1
+            try:
+                version = self._negotiate(headers.get(VERSION_HEADER.lower()))
+                response_headers[VERSION_HEADER] = '%d.%d' % version
+                status, response = self._route(method, path, body, version,
+                                               base_url)
+            except HTTPError as e:
+                status = e.status
+                response = {'error_message': json.dumps(
+                    {'faultstring': e.message, 'debuginfo': None})}
+        return status, response_headers, response
+
+    def _negotiate(self, requested):
+        min_version = _parse_version(self.min_version)
+        max_version = _parse_version(self.max_version)
+        if requested is None:
+            return min_version
+        version = _parse_version(requested)
+        if version is None:
+            raise HTTPError(400, 'Invalid value for %s header: %s'
+                            % (VERSION_HEADER, requested))
+        if not min_version <= version <= max_version:
+            raise HTTPError(406, 'Version %s was requested but the minor '
+                                 'version is not supported by this service. '
+                                 'The supported version range is: [%s, %s].'
+                            % (requested, self.min_version,
+                               self.max_version))
+        return version
+
+    def _route(self, method, path, body, version, base_url):
+        url = urlparse.urlsplit(path)
+        query = dict((key, values[-1]) for key, values
+                     in urlparse.parse_qs(url.query).items())
+        parts = [part for part in url.path.split('/') if part]
+        if not parts:
+            return 200, {'versions': [{'id': 'v1', 'links': [
+                {'href': '%s/v1/' % base_url, 'rel': 'self'}]}],
+                'default_version': {'id': 'v1'}}
+        if parts[0] != 'v1':
+            raise HTTPError(404, 'Not found')
+        parts = parts[1:]
+        if not parts:
+            return 200, {'id': 'v1', 'media_types': [
+                {'base': 'application/json',
+                 'type': 'application/vnd.openstack.ironic.v1+json'}]}
+        handler = {'nodes': self._nodes, 'ports': self._ports,
+                   'chassis': self._chassis_,
+                   'drivers': self._drivers}.get(parts[0])
+        if handler is None:
+            raise HTTPError(404, 'Not found')
+        return handler(method, parts[1:], query, body, version, base_url)
+
+    # Lists
+
+    def _list(self, kind, query, version, base_url, path, detail=False,
+              match=None, indexes=None):
+        """A page of a list, with the link to the next one.
+
+        :param match: Optional, a callable telling whether a resource is
+                      part of the list.
+        :param indexes: Optional, the indexes of the only resources which
+                        can be part of the list.
+        """
+        collection = getattr(self, kind)
+        fields = query.get('fields')
+        if fields is not None:
+            if version < FIELDS_VERSION:
+                raise HTTPError(406, 'The fields parameter requires API '
+                                     'version 1.8')
+            if detail:
+                raise HTTPError(400, "Can't fetch a subset of fields with "
+                                     "'detail' set")
+            fields = fields.split(',')
+        try:
+            limit = int(query.get('limit') or 0)
+        except ValueError:
+            raise HTTPError(400, 'Invalid limit %s' % query['limit'])
+        if limit < 0:
+            raise HTTPError(400, 'Limit must be positive')
+        limit = min(limit or self.max_limit, self.max_limit)
+
+        start = 0
+        marker = query.get('marker')
+        if marker is not None:
+            index = collection.lookup(marker)
+            if index is None:
+                raise HTTPError(400, 'Marker %s not found' % marker)
+            start = index + 1
+
+        sort_dir = query.get('sort_dir', 'asc')
+        if sort_dir not in ('asc', 'desc'):
+            raise HTTPError(400, 'Invalid sort direction %s' % sort_dir)
+        if query.get('sort_key', 'id') not in ('id', 'uuid'):
+            raise HTTPError(400, 'Unsupported sort key %s'
+                            % query['sort_key'])
+        if indexes is None:
+            if sort_dir == 'asc':
+                indexes = six.moves.range(start, collection.size)
+            else:
+                end = start - 2 if marker is not None else collection.size - 1
+                indexes = six.moves.range(end, -1, -1)
+        else:
+            indexes = [index for index in sorted(indexes,
+                                                 reverse=sort_dir == 'desc')
+                       if marker is None or
+                       (index >= start if sort_dir == 'asc'
+                        else index < start - 1)]
+
+        items = []
+        more = False
+        for index in indexes:
+            info = collection.get(index)
+            if info is None or (match is not None and not match(info)):
+                continue
+            if len(items) == limit:
+                more = True
+                break
+            items.append(self.render(kind, index, base_url, detail=detail,
+                                     fields=fields))
+        body = {kind: items}
+        if more:
+            params = dict(query, limit=limit, marker=items[-1]['uuid'])
+            body['next'] = '%s/v1/%s?%s' % (
+                base_url, path, urlparse.urlencode(sorted(params.items())))
+        return 200, body
+
+    # Nodes
+
+    def _node_index(self, ident):
+        index = self.nodes.lookup(ident)
+        if index is None:
+            raise HTTPError(404, 'Node %s could not be found.' % ident)
+        return index
+
+    def _nodes(self, method, parts, query, body, version, base_url):
+        if not parts or parts == ['detail']:
+            if method == 'POST' and not parts:
+                return self._create_node(body, base_url)
+            if method != 'GET':
+                raise HTTPError(405, 'Method not allowed')
+            return self._list_nodes(query, version, base_url,
+                                    detail=bool(parts))
+        index = self._node_index(parts[0])
+        sub = parts[1:]
+        if not sub:
+            if method == 'GET':
+                return 200, self.render('nodes', index, base_url,
+                                        fields=self._fields(query, version))
+            if method == 'PATCH':
+                self._check_lock(index)
+                info = _apply_patch(self.nodes.get(index), body)
+                self._check_name(info, index)
+                self.nodes.update(index, info)
+                return 200, self.render('nodes', index, base_url)
+            if method == 'DELETE':
+                self._check_lock(index)
+                self.nodes.delete(index)
+                return 204, None
+        elif sub[0] == 'ports' and method == 'GET' and len(sub) <= 2:
+            uuid = self.nodes.get(index)['uuid']
+            return self._list_ports(
+                query, version, base_url, detail=sub[1:] == ['detail'],
+                path='nodes/%s/%s' % (parts[0], '/'.join(sub)),
+                node=uuid)
+        else:
+            return self._node_action(method, index, sub, body)
+        raise HTTPError(405, 'Method not allowed')
+
+    def _fields(self, query, version):
+        fields = query.get('fields')
+        if fields is None:
+            return None
+        if version < FIELDS_VERSION:
+            raise HTTPError(406, 'The fields parameter requires API version '
+                                 '1.8')
+        return fields.split(',')
+
+    def _list_nodes(self, query, version, base_url, detail=False,
+                    path=None, chassis=None):
+        filters = {}
+        for name in ('instance_uuid', 'driver'):
+            if query.get(name) is not None:
+                filters[name] = query[name]
+        for name in ('associated', 'maintenance'):
+            value = query.get(name)
+            if value is not None:
+                if value.lower() not in ('true', 'false'):
+                    raise HTTPError(400, 'Invalid %s %s' % (name, value))
+                filters[name] = value.lower() == 'true'
+        if chassis is not None:
+            filters['chassis_uuid'] = chassis
+
+        def _match(info):
+            for name, value in filters.items():
+                if name == 'associated':
+                    if (info['instance_uuid'] is not None) != value:
+                        return False
+                elif info.get(name) != value:
+                    return False
+            return True
+
+        indexes = None
+        if filters.get('instance_uuid') or filters.get('associated'):
+            # NOTE: the generated nodes have no instance
+            indexes = self.nodes.changed()
+        path = path or ('nodes/detail' if detail else 'nodes')
+        return self._list('nodes', query, version, base_url, path,
+                          detail=detail, indexes=indexes,
+                          match=_match if filters else None)
+
+    def _check_name(self, info, index=None):
+        name = info.get('name')
+        if name:
+            existing = self.nodes.lookup(name)
+            if existing is not None and existing != index:
+                raise HTTPError(409, 'A node with name %s already exists.'
+                                % name)
+
+    def _create_node(self, body, base_url):
+        if not isinstance(body, dict) or not body.get('driver'):
+            raise HTTPError(400, 'Mandatory field missing: driver')
+        if body['driver'] not in DRIVERS:
+            raise HTTPError(400, 'The driver %s is unknown.' % body['driver'])
+        info = self._make_node(0)
+        info.update({'uuid': body.get('uuid') or str(uuidlib.uuid4()),
+                     'name': None, 'chassis_uuid': None, 'driver_info': {},
+                     'properties': {}, 'power_state': None,
+                     'updated_at': None})
+        for key, value in body.items():
+            if key not in info:
+                raise HTTPError(400, 'Unknown attribute %s' % key)
+            info[key] = value
+        if self.nodes.lookup(info['uuid']) is not None:
+            raise HTTPError(409, 'A node with UUID %s already exists.'
+                            % info['uuid'])
+        self._check_name(info)
+        index = self.nodes.add(info)
+        return 201, self.render('nodes', index, base_url)
+
+    def _node_action(self, method, index, sub, body):
+        info = self.nodes.get(index)
+        if sub == ['states'] and method == 'GET':
+            return 200, dict((key, info[key]) for key in (
+                'console_enabled', 'last_error', 'power_state',
+                'provision_state', 'target_power_state',
+                'target_provision_state'))
+        if sub == ['validate'] and method == 'GET':
+            result = {'result': True}
+            return 200, dict((interface, result) for interface in (
+                'boot', 'console', 'deploy', 'inspect', 'management',
+                'power'))
+        if sub == ['states', 'console'] and method == 'GET':
+            return 200, {'console_enabled': info['console_enabled'],
+                         'console_info': None}
+        if sub == ['management', 'boot_device'] and method == 'GET':
+            return 200, self._boot_devices.get(
+                index, {'boot_device': 'pxe', 'persistent': False})
+        if (sub == ['management', 'boot_device', 'supported'] and
+                method == 'GET'):
+            return 200, {'supported_boot_devices': SUPPORTED_BOOT_DEVICES}
+
+        changes = None
+        body = body if isinstance(body, dict) else {}
+        if sub == ['states', 'power'] and method == 'PUT':
+            target = body.get('target')
+            if target not in POWER_TARGETS:
+                raise HTTPError(400, 'Invalid power state %s' % target)
+            changes = {'power_state': POWER_TARGETS[target]}
+        elif sub == ['states', 'provision'] and method == 'PUT':
+            target = body.get('target')
+            if target not in PROVISION_TARGETS:
+                raise HTTPError(400, 'Invalid provision state %s' % target)
+            changes = {'provision_state': PROVISION_TARGETS[target]}
+        elif sub == ['states', 'console'] and method == 'PUT':
+            changes = {'console_enabled': bool(body.get('enabled'))}
+        elif sub == ['maintenance'] and method == 'PUT':
+            changes = {'maintenance': True,
+                       'maintenance_reason': body.get('reason')}
+        elif sub == ['maintenance'] and method == 'DELETE':
+            changes = {'maintenance': False, 'maintenance_reason': None}
+        elif sub == ['management', 'boot_device'] and method == 'PUT':
+            if body.get('boot_device') not in SUPPORTED_BOOT_DEVICES:
+                raise HTTPError(400, 'Invalid boot device %s'
+                                % body.get('boot_device'))
+            self._check_lock(index)
+            self._boot_devices[index] = {
+                'boot_device': body['boot_device'],
+                'persistent': bool(body.get('persistent'))}
+            return 204, None
+        if changes is None:
+            raise HTTPError(404, 'Not found')
+        self._check_lock(index)
+        info = dict(info, updated_at=_TIMESTAMP, **changes)
+        self.nodes.update(index, info)
+        return 202, None
+
+    # Ports
+
+    def _port_index(self, ident):
+        index = self.ports.lookup(ident)
+        if index is None:
+            raise HTTPError(404, 'Port %s could not be found.' % ident)
+        return index
+
+    def _address_index(self, address):
+        """The index of the port of a MAC address, None if unknown."""
+        for index in self.ports.changed():
+            if self.ports.get(index)['address'] == address:
+                return index
+        try:
+            index = int(address.replace(':', '')[4:], 16)
+        except ValueError:
+            return None
+        info = self.ports.get(index)
+        if info is not None and info['address'] == address:
+            return index
+        return None
+
+    def _list_ports(self, query, version, base_url, detail=False, path=None,
+                    node=None):
+        indexes = None
+        match = None
+        if node is not None:
+            def _match(info):
+                return info['node_uuid'] == node
+            match = _match
+            node_index = _generated_index(_NODE_PREFIX, node)
+            if node_index is not None:
+                # NOTE: the generated ports of a node, and the others
+                indexes = set(self.ports.changed())
+                indexes.update(six.moves.range(
+                    node_index, self.ports.size if self._generated_nodes
+                    else 0, self._generated_nodes or 1))
+        elif query.get('address') is not None:
+            index = self._address_index(query['address'].lower())
+            indexes = [index] if index is not None else []
+        path = path or ('ports/detail' if detail else 'ports')
+        return self._list('ports', query, version, base_url, path,
+                          detail=detail, match=match, indexes=indexes)
+
+    def _ports(self, method, parts, query, body, version, base_url):
+        if not parts or parts == ['detail']:
+            if method == 'POST' and not parts:
+                return self._create_port(body, base_url)
+            if method != 'GET':
+                raise HTTPError(405, 'Method not allowed')
+            return self._list_ports(query, version, base_url,
+                                    detail=bool(parts))
+        if len(parts) > 1:
+            raise HTTPError(404, 'Not found')
+        index = self._port_index(parts[0])
+        if method == 'GET':
+            return 200, self.render('ports', index, base_url,
+                                    fields=self._fields(query, version))
+        if method == 'PATCH':
+            info = _apply_patch(self.ports.get(index), body)
+            self._check_port(info, index)
+            self.ports.update(index, info)
+            return 200, self.render('ports', index, base_url)
+        if method == 'DELETE':
+            self.ports.delete(index)
+            return 204, None
+        raise HTTPError(405, 'Method not allowed')
+
+    def _check_port(self, info, index=None):
+        if self.nodes.lookup(info.get('node_uuid') or '') is None:
+            raise HTTPError(400, 'Node %s could not be found.'
+                            % info.get('node_uuid'))
+        existing = self._address_index((info.get('address') or '').lower())
+        if existing is not None and existing != index:
+            raise HTTPError(409, 'A port with MAC address %s already exists.'
+                            % info['address'])
+
+    def _create_port(self, body, base_url):
+        if not isinstance(body, dict) or not body.get('address'):
+            raise HTTPError(400, 'Mandatory field missing: address')
+        info = {'uuid': body.get('uuid') or str(uuidlib.uuid4()),
+                'address': body['address'].lower(),
+                'node_uuid': body.get('node_uuid'),
+                'extra': body.get('extra') or {},
+                'created_at': _TIMESTAMP, 'updated_at': None}
+        self._check_port(info)
+        index = self.ports.add(info)
+        return 201, self.render('ports', index, base_url)
+
+    # Chassis
+
+    def _chassis_(self, method, parts, query, body, version, base_url):
+        if not parts or parts == ['detail']:
+            if method == 'POST' and not parts:
+                info = {'uuid': str(uuidlib.uuid4()), 'description': None,
+                        'extra': {}, 'created_at': _TIMESTAMP,
+                        'updated_at': None}
+                for key, value in (body or {}).items():
+                    if key not in info:
+                        raise HTTPError(400, 'Unknown attribute %s' % key)
+                    info[key] = value
+                index = self.chassis.add(info)
+                return 201, self.render('chassis', index, base_url)
+            if method != 'GET':
+                raise HTTPError(405, 'Method not allowed')
+            path = 'chassis/detail' if parts else 'chassis'
+            return self._list('chassis', query, version, base_url, path,
+                              detail=bool(parts))
+        index = self.chassis.lookup(parts[0])
+        if index is None:
+            raise HTTPError(404, 'Chassis %s could not be found.' % parts[0])
+        if parts[1:2] == ['nodes'] and method == 'GET' and len(parts) <= 3:
+            detail = parts[2:] == ['detail']
+            return self._list_nodes(
+                query, version, base_url, detail=detail,
+                path='chassis/%s' % '/'.join(parts),
+                chassis=self.chassis.get(index)['uuid'])
+        if len(parts) > 1:
+            raise HTTPError(404, 'Not found')
+        if method == 'GET':
+            return 200, self.render('chassis', index, base_url,
+                                    fields=self._fields(query, version))
+        if method == 'PATCH':
+            info = _apply_patch(self.chassis.get(index), body)
+            self.chassis.update(index, info)
+            return 200, self.render('chassis', index, base_url)
+        if method == 'DELETE':
+            self.chassis.delete(index)
+            return 204, None
+        raise HTTPError(405, 'Method not allowed')
+
+    # Drivers
+
+    def _drivers(self, method, parts, query, body, version, base_url):
+        if method != 'GET':
+            raise HTTPError(405, 'Method not allowed')
+        if not parts:
+            return 200, {'drivers': [self._driver(name, base_url)
+                                     for name in DRIVERS]}
+        if parts[0] not in DRIVERS:
+            raise HTTPError(404, 'Driver %s could not be found.' % parts[0])
+        if len(parts) == 1:
+            return 200, self._driver(parts[0], base_url)
+        if parts[1:] == ['properties']:
+            return 200, DRIVER_PROPERTIES
+        raise HTTPError(404, 'Not found')
+
+    def _driver(self, name, base_url):
+        return {'name': name, 'hosts': [CONDUCTOR],
+                'links': self._links(base_url, 'drivers', name)}
+
+
+class _Handler(BaseHTTPServer.BaseHTTPRequestHandler):
+
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def _handle(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        body = None
+        if length:
+            data = self.rfile.read(length)
+            try:
+                body = json.loads(data.decode('utf-8'))
+            except ValueError:
+                body = None
+        base_url = 'http://%s:%d' % self.server.server_address[:2]
+        status, headers, response = self.server.api.handle(
+            self.command, self.path, dict(self.headers.items()), body,
+            base_url)
+
+        data = b''
+        if response is not None:
+            data = json.dumps(response).encode('utf-8')
+        self.send_response(status)
+        if response is not None:
+            self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = _handle
+
+
+class _HTTPServer(socketserver.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+
+    daemon_threads = True
+    # NOTE: the clients may open many connections at the same time
+    request_queue_size = 128
+
+    def __init__(self, address, api):
+        BaseHTTPServer.HTTPServer.__init__(self, address, _Handler)
+        self.api = api
+
+
+class FakeServer(object):
+    """A fake Ironic API served from a thread.
+
+    :param api: Optional, the FakeIronic to serve, else one is created with
+                the other keyword arguments.
+    :param host: the address to listen on.
+    :param port: the port to listen on, any free one by default.
+    """
+
+    def __init__(self, api=None, host='127.0.0.1', port=0, **kwargs):
+        self.api = api if api is not None else FakeIronic(**kwargs)
+        self._server = _HTTPServer((host, port), self.api)
+        self._thread = None
+
+    @property
+    def endpoint(self):
+        return 'http://%s:%d' % self._server.server_address[:2]
+
+    def start(self):
+        # NOTE: a short poll interval, for stop() to return quickly
+        self._thread = threading.Thread(target=self._server.serve_forever,
+                                        kwargs={'poll_interval': 0.05},
+                                        name='ironic-fakeserver')
+        self._thread.daemon = True
+        self._thread.start()
+
+    def serve_forever(self):
+        self._server.serve_forever()
+
+    def stop(self):
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._server.server_close()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Serve a fake Ironic v1 API.')
+    parser.add_argument('--host', default='127.0.0.1',
+                        help='Address to listen on.')
+    parser.add_argument('--port', type=int, default=0,
+                        help='Port to listen on, any free one by default.')
+    parser.add_argument('--nodes', type=int, default=1000,
+                        help='Number of nodes generated.')
+    parser.add_argument('--ports', type=int,
+                        help='Number of ports generated, one per node by '
+                             'default.')
+    parser.add_argument('--chassis', type=int, default=0,
+                        help='Number of chassis generated.')
+    parser.add_argument('--max-limit', type=int, default=DEFAULT_MAX_LIMIT,
+                        help='Maximum number of resources in a page.')
+    parser.add_argument('--min-version', default=DEFAULT_MIN_VERSION,
+                        help='Minimum API version supported.')
+    parser.add_argument('--max-version', default=DEFAULT_MAX_VERSION,
+                        help='Maximum API version supported.')
+    parser.add_argument('--latency', type=float, default=0,
+                        help='Seconds added to each request.')
+    parser.add_argument('--jitter', type=float, default=0,
+                        help='Maximum random seconds added to the latency.')
+    parser.add_argument('--conflict-rate', type=float, default=0,
+                        help='Probability that a request changing a node '
+                             'fails with a Conflict error.')
+    parser.add_argument('--seed', type=int,
+                        help='Seed of the random choices.')
+    args = parser.parse_args()
+
+    server = FakeServer(host=args.host, port=args.port, nodes=args.nodes,
+                        ports=args.ports, chassis=args.chassis,
+                        max_limit=args.max_limit,
+                        min_version=args.min_version,
+                        max_version=args.max_version, latency=args.latency,
+                        jitter=args.jitter, conflict_rate=args.conflict_rate,
+                        seed=args.seed)
+    print(server.endpoint)
+    sys.stdout.flush()
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -89,6 +89,40 @@ class TestBaremetalList(TestBaremetal):
         ), )
         self.assertEqual(datalist, tuple(data))
 
+    def test_baremetal_list_fields(self):
+        arglist = [
+            '--fields', 'uuid', 'power_state',
+        ]
+        verifylist = [
+            ('fields', [['uuid', 'power_state']]),
+        ]
+
+        parsed_args = self.check_parser(self.cmd, arglist, verifylist)
+
+        # DisplayCommandBase.take_action() returns two tuples
+        columns, data = self.cmd.take_action(parsed_args)
+
+        # Set expected values
+        kwargs = {
+            'associated': False,
+            'detail': False,
+            'maintenance': False,
+            'marker': None,
+            'limit': None,
+            'fields': ['uuid', 'power_state'],
+        }
+
+        self.baremetal_mock.node.list.assert_called_with(
+            **kwargs
+        )
+
+        self.assertEqual(("UUID", "Power State"), columns)
+        datalist = ((
+            baremetal_fakes.baremetal_uuid,
+            baremetal_fakes.baremetal_power_state,
+        ), )
+        self.assertEqual(datalist, tuple(data))
+
     def test_baremetal_list_long(self):
         arglist = [
             '--long',
@@ -188,6 +222,9 @@ class TestBaremetalShow(TestBaremetal):
         self.baremetal_mock.node.get.assert_called_with(
             *args
         )
+        # The API resolves the name, one request is enough
+        self.assertEqual(1, self.baremetal_mock.node.get.call_count)
+        self.assertFalse(self.baremetal_mock.node.list.called)
 
         collist = (
             'instance_uuid',
@@ -259,6 +296,7 @@ class TestBaremetalDelete(TestBaremetal):
         self.baremetal_mock.node.delete.assert_called_with(
             *args
         )
+        self.assertFalse(self.baremetal_mock.node.get.called)
 
 
 class TestBaremetalCreate(TestBaremetal):
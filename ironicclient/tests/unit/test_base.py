@@ -0,0 +1,285 @@
+# -*- coding: utf-8 -*-
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import threading
+
+import mock
+
+from ironicclient.common import base
+from ironicclient.common import cache
+from ironicclient import exc
+from ironicclient.tests.unit import utils
+
+
+THINGS = [{'uuid': 'uuid-%d' % i} for i in range(5)]
+
+fake_responses_pagination = {
+    '/v1/things?sort_key=uuid':
+    {
+        'GET': (
+            {},
+            {'things': THINGS[0:2],
+             'next': 'http://127.0.0.1:6385/v1/things?sort_key=uuid&'
+                     'marker=uuid-1'}
+        ),
+    },
+    '/v1/things?sort_key=uuid&marker=uuid-1':
+    {
+        'GET': (
+            {},
+            {'things': THINGS[2:4],
+             'next': 'http://127.0.0.1:6385/v1/things?sort_key=uuid&'
+                     'marker=uuid-3'}
+        ),
+    },
+    '/v1/things?sort_key=uuid&marker=uuid-3':
+    {
+        'GET': (
+            {},
+            {'things': THINGS[4:5]}
+        ),
+    },
+}
+
+ALL_CALLS = [('GET', '/v1/things?sort_key=uuid', {}, None),
+             ('GET', '/v1/things?sort_key=uuid&marker=uuid-1', {}, None),
+             ('GET', '/v1/things?sort_key=uuid&marker=uuid-3', {}, None)]
+
+
+class Thing(base.Resource):
+    pass
+
+
+class ThingManager(base.Manager):
+    resource_class = Thing
+
+
+class CompactThing(base.CompactResource):
+    __slots__ = ('uuid', 'name', 'properties')
+
+
+class CompactResourceTest(utils.BaseTestCase):
+
+    def setUp(self):
+        super(CompactResourceTest, self).setUp()
+        self.info = {'uuid': 'uuid-0', 'properties': {'cpus': 4},
+                     'links': [{'rel': 'self'}]}
+        self.thing = CompactThing(ThingManager(None), self.info)
+
+    def test_attributes(self):
+        self.assertEqual('uuid-0', self.thing.uuid)
+        self.assertIs(self.info['properties'], self.thing.properties)
+        self.assertEqual([{'rel': 'self'}], self.thing.links)
+        self.assertRaises(AttributeError, getattr, self.thing, 'name')
+        self.assertRaises(AttributeError, getattr, self.thing, 'driver')
+        self.assertFalse(hasattr(self.thing, '__dict__'))
+
+    def test_no_extra(self):
+        thing = CompactThing(None, {'uuid': 'uuid-0'})
+        self.assertIsNone(thing._extra)
+        self.assertEqual({'uuid': 'uuid-0'}, thing.to_dict())
+
+    def test_to_dict(self):
+        self.assertEqual(self.info, self.thing.to_dict())
+        self.assertEqual(self.info, self.thing._info)
+        self.assertIsNot(self.info, self.thing.to_dict())
+
+    def test_eq(self):
+        self.assertEqual(Thing(None, dict(self.info)), self.thing)
+        self.assertEqual(self.thing, CompactThing(None, self.info))
+        self.assertNotEqual(self.thing, CompactThing(None, {'uuid': 'x'}))
+
+    def test_repr(self):
+        self.assertIn('CompactThing', repr(self.thing))
+
+
+class ManagerPaginationTest(utils.BaseTestCase):
+
+    def setUp(self):
+        super(ManagerPaginationTest, self).setUp()
+        self.api = utils.FakeAPI(fake_responses_pagination)
+        self.mgr = ThingManager(self.api)
+
+    def _list(self, limit=0, prefetch_depth=1):
+        self.mgr.prefetch_depth = prefetch_depth
+        return self.mgr._list_pagination('/v1/things?sort_key=uuid',
+                                         'things', limit=limit)
+
+    def test_list_pagination(self):
+        things = self._list()
+        self.assertEqual(ALL_CALLS, self.api.calls)
+        self.assertEqual(THINGS, [t.to_dict() for t in things])
+
+    def test_list_pagination_no_prefetch(self):
+        things = self._list(prefetch_depth=0)
+        self.assertEqual(ALL_CALLS, self.api.calls)
+        self.assertEqual(THINGS, [t.to_dict() for t in things])
+
+    def test_list_pagination_deep_prefetch(self):
+        things = self._list(prefetch_depth=5)
+        self.assertEqual(ALL_CALLS, self.api.calls)
+        self.assertEqual(THINGS, [t.to_dict() for t in things])
+
+    def test_list_pagination_limit_first_page(self):
+        things = self._list(limit=1)
+        self.assertEqual(ALL_CALLS[:1], self.api.calls)
+        self.assertEqual(THINGS[:1], [t.to_dict() for t in things])
+
+    def test_list_pagination_limit(self):
+        things = self._list(limit=3)
+        self.assertEqual(ALL_CALLS[:2], self.api.calls)
+        self.assertEqual(THINGS[:3], [t.to_dict() for t in things])
+
+    def test_list_pagination_limit_page_boundary(self):
+        things = self._list(limit=4)
+        self.assertEqual(ALL_CALLS[:2], self.api.calls)
+        self.assertEqual(THINGS[:4], [t.to_dict() for t in things])
+
+    def test_list_pagination_prefetch_thread(self):
+        thread_names = []
+        json_stream_request = self.api.json_stream_request
+
+        def _json_stream_request(*args, **kwargs):
+            thread_names.append(threading.current_thread().name)
+            return json_stream_request(*args, **kwargs)
+
+        self.api.json_stream_request = _json_stream_request
+        self._list()
+        main = threading.current_thread().name
+        self.assertEqual(main, thread_names[0])
+        self.assertNotIn(main, thread_names[1:])
+
+    def test_paginate_prefetch_during_first_page(self):
+        second_page = threading.Event()
+        json_stream_request = self.api.json_stream_request
+
+        def _json_stream_request(method, url, *args, **kwargs):
+            if url == ALL_CALLS[1][1]:
+                second_page.set()
+            return json_stream_request(method, url, *args, **kwargs)
+
+        self.api.json_stream_request = _json_stream_request
+        self.mgr.prefetch_depth = 1
+        things = self.mgr._iter_list('/v1/things?sort_key=uuid', 'things',
+                                     limit=0)
+        self.assertEqual(THINGS[0], next(things).to_dict())
+        # NOTE: the second page is requested while the first one is
+        # still being consumed
+        self.assertTrue(second_page.wait(5))
+        self.assertEqual(THINGS[1:], [t.to_dict() for t in things])
+
+    def test_list_pagination_prefetch_error(self):
+        json_stream_request = self.api.json_stream_request
+        self.api.json_stream_request = mock.Mock(
+            side_effect=[json_stream_request('GET', ALL_CALLS[0][1],
+                                             'things'),
+                         exc.InternalServerError()])
+        self.assertRaises(exc.InternalServerError, self._list)
+
+    def test_paginate_stop_early(self):
+        self.mgr.prefetch_depth = 1
+        pages = self.mgr._paginate('/v1/things?sort_key=uuid', 'things')
+        self.assertEqual(THINGS[0:2], next(pages))
+        self.assertEqual(THINGS[2:4], next(pages))
+        pages.close()
+        self.assertLessEqual(len(self.api.calls), 3)
+
+
+THING = {'uuid': 'uuid-0', 'updated_at': '2015-04-02T10:22:33+00:00'}
+
+
+@mock.patch.object(cache.time, 'time', autospec=True, return_value=100.0)
+class ManagerCacheTest(utils.BaseTestCase):
+
+    def setUp(self):
+        super(ManagerCacheTest, self).setUp()
+        self.api = mock.Mock(spec=['json_request', 'raw_request'],
+                             os_ironic_api_version='1.6')
+        self.api.json_request.return_value = (
+            utils.FakeResponse({'ETag': '"abc"'}, status=200), dict(THING))
+        self.mgr = ThingManager(self.api)
+        self.mgr.resource_cache = cache.ResourceCache(ttl=5)
+
+    def test_get_no_cache(self, mock_time):
+        self.mgr.resource_cache = None
+        self.mgr._get('/v1/things/uuid-0')
+        self.mgr._get('/v1/things/uuid-0')
+        self.assertEqual(2, self.api.json_request.call_count)
+
+    def test_get_cached(self, mock_time):
+        thing = self.mgr._get('/v1/things/uuid-0')
+        thing.uuid = 'modified'
+        thing = self.mgr._get('/v1/things/uuid-0')
+        self.assertEqual(THING, thing.to_dict())
+        self.api.json_request.assert_called_once_with(
+            'GET', '/v1/things/uuid-0', headers={})
+
+    def test_get_sub_resource_not_cached(self, mock_time):
+        self.mgr._get('/v1/things/uuid-0/states')
+        self.mgr._get('/v1/things/uuid-0/states')
+        self.assertEqual(2, self.api.json_request.call_count)
+
+    def test_get_other_version(self, mock_time):
+        self.mgr._get('/v1/things/uuid-0')
+        self.api.os_ironic_api_version = '1.1'
+        self.mgr._get('/v1/things/uuid-0')
+        self.assertEqual(2, self.api.json_request.call_count)
+
+    def test_get_not_modified(self, mock_time):
+        self.mgr._get('/v1/things/uuid-0')
+        mock_time.return_value = 110.0
+        self.api.json_request.return_value = (
+            utils.FakeResponse({}, status=304), [])
+        thing = self.mgr._get('/v1/things/uuid-0')
+        self.assertEqual(THING, thing.to_dict())
+        self.api.json_request.assert_called_with(
+            'GET', '/v1/things/uuid-0',
+            headers={'If-None-Match': '"abc"',
+                     'If-Modified-Since': 'Thu, 02 Apr 2015 10:22:33 GMT'})
+        # Fresh again
+        self.mgr._get('/v1/things/uuid-0')
+        self.assertEqual(2, self.api.json_request.call_count)
+
+    def test_get_modified(self, mock_time):
+        self.mgr._get('/v1/things/uuid-0')
+        mock_time.return_value = 110.0
+        new_thing = dict(THING, name='new')
+        self.api.json_request.return_value = (
+            utils.FakeResponse({}, status=200), new_thing)
+        self.assertEqual(new_thing,
+                         self.mgr._get('/v1/things/uuid-0').to_dict())
+        self.assertEqual(new_thing,
+                         self.mgr._get('/v1/things/uuid-0').to_dict())
+        self.assertEqual(2, self.api.json_request.call_count)
+
+    def test_update_invalidates(self, mock_time):
+        self.mgr._get('/v1/things/uuid-0')
+        self.mgr._update('/v1/things/uuid-0/states/power', {'target': 'on'},
+                         method='PUT')
+        self.mgr._get('/v1/things/uuid-0')
+        self.assertEqual(3, self.api.json_request.call_count)
+
+    def test_failed_update_invalidates(self, mock_time):
+        self.mgr._get('/v1/things/uuid-0')
+        self.api.json_request.side_effect = exc.Conflict()
+        self.assertRaises(exc.Conflict, self.mgr._update,
+                          '/v1/things/uuid-0', [])
+        self.assertIsNone(self.mgr.resource_cache.get('/v1/things/uuid-0',
+                                                      '1.6'))
+
+    def test_delete_invalidates(self, mock_time):
+        self.mgr._get('/v1/things/uuid-0')
+        self.mgr._delete('/v1/things/uuid-0')
+        self.assertIsNone(self.mgr.resource_cache.get('/v1/things/uuid-0',
+                                                      '1.6'))
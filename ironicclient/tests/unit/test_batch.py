@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from __future__ import print_function
+
+import argparse
+import sys
+import time
+
+import mock
+import six
+
+from ironicclient.common import batch
+from ironicclient import exc
+from ironicclient.tests.unit import utils
+
+
+class ReadCommandsTest(utils.BaseTestCase):
+
+    def test_read_commands(self):
+        lines = six.StringIO('node-show node1\n'
+                             '\n'
+                             '# a comment\n'
+                             '  node-update node2 add "extra/a=b c"  # x\n')
+        self.assertEqual(
+            [(1, 'node-show node1', ['node-show', 'node1']),
+             (4, 'node-update node2 add "extra/a=b c"  # x',
+              ['node-update', 'node2', 'add', 'extra/a=b c'])],
+            batch.read_commands(lines))
+
+    def test_read_commands_invalid(self):
+        lines = six.StringIO('node-list\nnode-show "node1\n')
+        error = self.assertRaises(exc.CommandError, batch.read_commands,
+                                  lines)
+        self.assertIn('Line 2', str(error))
+
+
+class RunTest(utils.BaseTestCase):
+
+    def setUp(self):
+        super(RunTest, self).setUp()
+        self.client = mock.Mock(spec=['http_client'])
+        self.client.http_client = mock.Mock(conflict_max_retries=2,
+                                            conflict_retry_interval=0,
+                                            retry_policy=None)
+        self.stdout = six.StringIO()
+        self.stderr = six.StringIO()
+
+    def _command(self, line, func):
+        return batch.Command(line, 'command %d' % line,
+                             argparse.Namespace(func=func))
+
+    def _run(self, commands, concurrency=1):
+        return batch.run(self.client, commands, concurrency=concurrency,
+                         stdout=self.stdout, stderr=self.stderr)
+
+    def test_run(self):
+        def _print(delay, text):
+            def _func(client, args):
+                self.assertIs(self.client, client)
+                time.sleep(delay)
+                print(text)
+            return _func
+
+        commands = [self._command(1, _print(0.03, 'one')),
+                    self._command(3, _print(0, 'three')),
+                    self._command(4, _print(0.01, 'four'))]
+        stdout = sys.stdout
+        self.assertEqual(0, self._run(commands, concurrency=3))
+        self.assertIs(stdout, sys.stdout)
+        self.assertEqual('one\nthree\nfour\n', self.stdout.getvalue())
+        self.assertEqual('1: 0\n3: 0\n4: 0\n', self.stderr.getvalue())
+
+    def test_run_failed(self):
+        def _fail(client, args):
+            print('partial')
+            raise exc.CommandError('boom')
+
+        commands = [self._command(1, _fail),
+                    self._command(2, lambda client, args: print('ok'))]
+        self.assertEqual(1, self._run(commands))
+        self.assertEqual('partial\nok\n', self.stdout.getvalue())
+        self.assertEqual('1: 1: boom\n2: 0\n', self.stderr.getvalue())
+
+    def test_run_exit(self):
+        def _exit(code):
+            def _func(client, args):
+                sys.exit(code)
+            return _func
+
+        commands = [self._command(1, _exit(1)),
+                    self._command(2, _exit('no such node')),
+                    self._command(3, _exit(0))]
+        self.assertEqual(2, self._run(commands, concurrency=2))
+        self.assertEqual('1: 1: The command exited with status 1\n'
+                         '2: 1: no such node\n3: 0\n',
+                         self.stderr.getvalue())
+
+    def test_run_conflict(self):
+        attempts = []
+
+        def _conflict(client, args):
+            attempts.append(1)
+            print('attempt %d' % len(attempts))
+            if len(attempts) < 2:
+                raise exc.Conflict()
+
+        self.assertEqual(0, self._run([self._command(1, _conflict)]))
+        self.assertEqual('attempt 2\n', self.stdout.getvalue())
+        self.assertEqual('1: 0\n', self.stderr.getvalue())
@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import threading
+import time
+
+from ironicclient.common import bulk
+from ironicclient.common import http
+from ironicclient import exc
+from ironicclient.tests.unit import utils
+
+
+class BulkRunTest(utils.BaseTestCase):
+
+    def test_results_in_order(self):
+        def _func(item):
+            time.sleep(0.01 * (5 - item))
+            return item * 2
+
+        results = bulk.run(_func, range(5), concurrency=5)
+        self.assertEqual([0, 1, 2, 3, 4], [r.item for r in results])
+        self.assertEqual([0, 2, 4, 6, 8], [r.result for r in results])
+        self.assertTrue(all(r.ok for r in results))
+
+    def test_errors(self):
+        error = exc.NotFound()
+
+        def _func(item):
+            if item == 'b':
+                raise error
+            return item
+
+        results = bulk.run(_func, ['a', 'b', 'c'])
+        self.assertEqual([True, False, True], [r.ok for r in results])
+        self.assertIs(error, results[1].error)
+        self.assertIsNone(results[1].result)
+
+    def test_exit(self):
+        def _func(item):
+            if item == 1:
+                raise SystemExit(1)
+            time.sleep(0.01)
+            return item
+
+        self.assertRaises(SystemExit, bulk.run, _func, range(10),
+                          concurrency=2)
+
+    def test_callback(self):
+        done = []
+
+        def _callback(index, result):
+            done.append((index, result.item, result.ok))
+            if index == 1:
+                raise RuntimeError('ignored')
+
+        results = bulk.run(lambda item: 1 / item, [1, 0, 2], concurrency=1,
+                           callback=_callback)
+        self.assertEqual([(0, 1, True), (1, 0, False), (2, 2, True)], done)
+        self.assertEqual([True, False, True], [r.ok for r in results])
+
+    def test_concurrency(self):
+        lock = threading.Lock()
+        running = [0]
+        peak = [0]
+
+        def _func(item):
+            with lock:
+                running[0] += 1
+                peak[0] = max(peak[0], running[0])
+            time.sleep(0.01)
+            with lock:
+                running[0] -= 1
+
+        bulk.run(_func, range(12), concurrency=3)
+        self.assertLessEqual(peak[0], 3)
+
+    def test_conflict_does_not_block(self):
+        calls = []
+
+        def _func(item):
+            calls.append(item)
+            if item == 'locked' and calls.count(item) == 1:
+                raise exc.Conflict()
+            return item
+
+        results = bulk.run(_func, ['locked', 'a', 'b'], concurrency=1,
+                           retry_interval=0.05)
+        self.assertEqual(['locked', 'a', 'b', 'locked'], calls)
+        self.assertTrue(all(r.ok for r in results))
+
+    def test_conflict_max_retries(self):
+        calls = []
+
+        def _func(item):
+            calls.append(item)
+            raise exc.Conflict()
+
+        results = bulk.run(_func, ['locked'], max_retries=2,
+                           retry_interval=0)
+        self.assertEqual(3, len(calls))
+        self.assertIsInstance(results[0].error, exc.Conflict)
+
+    def test_conflict_retry_policy(self):
+        policy = http.RetryPolicy(budget=http.RetryBudget(1))
+
+        def _func(item):
+            raise exc.Conflict()
+
+        results = bulk.run(_func, ['a', 'b'], retry_interval=0,
+                           retry_policy=policy)
+        self.assertEqual([False, False], [r.ok for r in results])
+        self.assertEqual(1, policy.stats['retries'])
+        self.assertEqual(2, policy.stats['exhausted'])
+
+    def test_conflict_retries_deferred(self):
+        def _func(item):
+            return http._retry_state.deferred
+
+        self.assertEqual([True], [r.result for r in bulk.run(_func, [1])])
+        self.assertFalse(getattr(http._retry_state, 'deferred', False))
+
+    def test_no_items(self):
+        self.assertEqual([], bulk.run(lambda item: item, []))
+
+    def test_bad_concurrency(self):
+        self.assertRaises(ValueError, bulk.run, lambda item: item, [1],
+                          concurrency=0)
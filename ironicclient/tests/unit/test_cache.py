@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import mock
+
+from ironicclient.common import cache
+from ironicclient.tests.unit import utils
+
+
+NODE = {'uuid': 'node-uuid', 'name': 'node1',
+        'updated_at': '2015-04-02T10:22:33+00:00'}
+
+
+class CacheUtilsTest(utils.BaseTestCase):
+
+    def test_is_cacheable(self):
+        self.assertTrue(cache.is_cacheable('/v1/nodes/node-uuid'))
+        self.assertTrue(cache.is_cacheable('/v1/drivers/fake/'))
+
+    def test_is_cacheable_not_single_resource(self):
+        for path in ('/v1/nodes', '/v1/nodes/', '/v1/nodes/detail',
+                     '/v1/nodes/node-uuid/states',
+                     '/v1/nodes/node-uuid?fields=uuid'):
+            self.assertFalse(cache.is_cacheable(path), path)
+
+    def test_conditional_headers(self):
+        self.assertEqual(
+            {'If-None-Match': '"abc"',
+             'If-Modified-Since': 'Thu, 02 Apr 2015 10:22:33 GMT'},
+            cache.conditional_headers(NODE, etag='"abc"'))
+
+    def test_conditional_headers_created_at(self):
+        self.assertEqual(
+            {'If-Modified-Since': 'Thu, 02 Apr 2015 08:22:33 GMT'},
+            cache.conditional_headers(
+                {'updated_at': None,
+                 'created_at': '2015-04-02T10:22:33+02:00'}))
+
+    def test_conditional_headers_no_validator(self):
+        self.assertEqual({}, cache.conditional_headers({'uuid': 'uuid'}))
+        self.assertEqual({}, cache.conditional_headers(
+            {'updated_at': 'yesterday'}))
+
+    def test_response_accessors(self):
+        resp = utils.FakeResponse({'ETag': '"abc"'}, status=304)
+        self.assertEqual(304, cache.response_status(resp))
+        self.assertEqual('"abc"', cache.response_header(resp, 'ETag'))
+        resp = utils.FakeSessionResponse({'ETag': '"abc"'}, status_code=304)
+        self.assertEqual(304, cache.response_status(resp))
+        self.assertEqual('"abc"', cache.response_header(resp, 'ETag'))
+
+
+@mock.patch.object(cache.time, 'time', autospec=True, return_value=100.0)
+class ResourceCacheTest(utils.BaseTestCase):
+
+    def setUp(self):
+        super(ResourceCacheTest, self).setUp()
+        self.cache = cache.ResourceCache(ttl=5)
+
+    def test_get_fresh(self, mock_time):
+        self.cache.set('/v1/nodes/node-uuid', '1.6', NODE, etag='"abc"')
+        mock_time.return_value = 105.0
+        self.assertEqual(cache.CacheEntry(NODE, '"abc"', True),
+                         self.cache.get('/v1/nodes/node-uuid', '1.6'))
+        self.assertEqual(1, self.cache.stats['hits'])
+
+    def test_get_stale(self, mock_time):
+        self.cache.set('/v1/nodes/node-uuid', '1.6', NODE)
+        mock_time.return_value = 105.1
+        self.assertEqual(cache.CacheEntry(NODE, None, False),
+                         self.cache.get('/v1/nodes/node-uuid', '1.6'))
+        self.assertEqual(1, self.cache.stats['misses'])
+
+    def test_get_other_version(self, mock_time):
+        self.cache.set('/v1/nodes/node-uuid', '1.6', NODE)
+        self.assertIsNone(self.cache.get('/v1/nodes/node-uuid', '1.1'))
+
+    def test_get_copy(self, mock_time):
+        self.cache.set('/v1/nodes/node-uuid', '1.6', NODE)
+        self.cache.get('/v1/nodes/node-uuid', '1.6').info['name'] = 'other'
+        self.assertEqual(
+            'node1', self.cache.get('/v1/nodes/node-uuid', '1.6').info['name'])
+
+    def test_ttl_per_type(self, mock_time):
+        self.cache = cache.ResourceCache(ttl=5, ttls={'drivers': 60})
+        self.cache.set('/v1/nodes/node-uuid', '1.6', NODE)
+        self.cache.set('/v1/drivers/fake', '1.6', {'name': 'fake'})
+        mock_time.return_value = 130.0
+        self.assertFalse(self.cache.get('/v1/nodes/node-uuid', '1.6').fresh)
+        self.assertTrue(self.cache.get('/v1/drivers/fake', '1.6').fresh)
+
+    def test_refresh(self, mock_time):
+        self.cache.set('/v1/nodes/node-uuid', '1.6', NODE)
+        mock_time.return_value = 110.0
+        self.cache.refresh('/v1/nodes/node-uuid', '1.6')
+        self.assertTrue(self.cache.get('/v1/nodes/node-uuid', '1.6').fresh)
+        self.assertEqual(1, self.cache.stats['revalidated'])
+
+    def test_lru_eviction(self, mock_time):
+        self.cache = cache.ResourceCache(max_entries=2)
+        self.cache.set('/v1/nodes/1', '1.6', {})
+        self.cache.set('/v1/nodes/2', '1.6', {})
+        self.cache.get('/v1/nodes/1', '1.6')
+        self.cache.set('/v1/nodes/3', '1.6', {})
+        self.assertIsNotNone(self.cache.get('/v1/nodes/1', '1.6'))
+        self.assertIsNone(self.cache.get('/v1/nodes/2', '1.6'))
+        self.assertIsNotNone(self.cache.get('/v1/nodes/3', '1.6'))
+        self.assertEqual(1, self.cache.stats['evicted'])
+
+    def _set_nodes(self):
+        self.cache.set('/v1/nodes/node-uuid', '1.6', NODE)
+        self.cache.set('/v1/nodes/node-uuid', '1.1', NODE)
+        self.cache.set('/v1/nodes/node1', '1.6', NODE)
+        self.cache.set('/v1/nodes/other', '1.6', {'uuid': 'other'})
+        self.cache.set('/v1/ports/node-uuid', '1.6', {})
+
+    def _assert_invalidated(self):
+        self.assertIsNone(self.cache.get('/v1/nodes/node-uuid', '1.6'))
+        self.assertIsNone(self.cache.get('/v1/nodes/node-uuid', '1.1'))
+        self.assertIsNone(self.cache.get('/v1/nodes/node1', '1.6'))
+        self.assertIsNotNone(self.cache.get('/v1/nodes/other', '1.6'))
+        self.assertIsNotNone(self.cache.get('/v1/ports/node-uuid', '1.6'))
+        self.assertEqual(3, self.cache.stats['invalidated'])
+
+    def test_invalidate(self, mock_time):
+        self._set_nodes()
+        self.cache.invalidate('/v1/nodes/node-uuid')
+        self._assert_invalidated()
+
+    def test_invalidate_by_name(self, mock_time):
+        self._set_nodes()
+        self.cache.invalidate('/v1/nodes/node1')
+        self._assert_invalidated()
+
+    def test_invalidate_sub_resource(self, mock_time):
+        self._set_nodes()
+        self.cache.invalidate('/v1/nodes/node-uuid/states/power')
+        self._assert_invalidated()
+
+    def test_invalidate_collection(self, mock_time):
+        self._set_nodes()
+        self.cache.invalidate('/v1/nodes')
+        self.assertIsNotNone(self.cache.get('/v1/nodes/node-uuid', '1.6'))
+        self.assertEqual(0, self.cache.stats['invalidated'])
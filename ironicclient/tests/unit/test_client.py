@@ -15,6 +15,8 @@
 import fixtures
 
 from ironicclient.client import get_client
+from ironicclient.common import cache
+from ironicclient.common import instrumentation
 from ironicclient import exc
 from ironicclient.tests.unit import utils
 from ironicclient.v1 import client as v1
@@ -171,3 +173,41 @@ class ClientTest(utils.BaseTestCase):
 
         self.assertEqual(v1.DEFAULT_VER,
                          client.http_client.os_ironic_api_version)
+
+    def test_get_client_with_resource_cache(self):
+        resource_cache = cache.ResourceCache()
+        kwargs = {
+            'ironic_url': 'http://ironic.example.org:6385/',
+            'os_auth_token': 'USER_AUTH_TOKEN',
+            'resource_cache': resource_cache,
+        }
+        client = get_client('1', **kwargs)
+
+        for manager in (client.node, client.port, client.chassis,
+                        client.driver):
+            self.assertIs(resource_cache, manager.resource_cache)
+
+    def test_get_client_with_timings(self):
+        kwargs = {
+            'ironic_url': 'http://ironic.example.org:6385/',
+            'os_auth_token': 'USER_AUTH_TOKEN',
+            'timings': True,
+        }
+        client = get_client('1', **kwargs)
+
+        self.assertIs(client.instrumentation,
+                      client.http_client.instrumentation)
+        self.assertIsNotNone(client.instrumentation.timing_buffer)
+        self.assertEqual([], client.get_timings())
+
+    def test_get_client_with_instrumentation(self):
+        instr = instrumentation.Instrumentation()
+        kwargs = {
+            'ironic_url': 'http://ironic.example.org:6385/',
+            'os_auth_token': 'USER_AUTH_TOKEN',
+            'instrumentation': instr,
+        }
+        client = get_client('1', **kwargs)
+
+        self.assertIs(instr, client.instrumentation)
+        self.assertIs(instr, client.http_client.instrumentation)
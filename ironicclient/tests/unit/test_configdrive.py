@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import os
+import threading
+
+import mock
+
+from ironicclient.common import configdrive
+from ironicclient.common import utils as common_utils
+from ironicclient import exc
+from ironicclient.tests.unit import utils
+
+
+def _write(path, content):
+    with open(path, 'w') as f:
+        f.write(content)
+
+
+class ContentHashTest(utils.BaseTestCase):
+
+    def setUp(self):
+        super(ContentHashTest, self).setUp()
+        self.tempdir = common_utils.tempdir()
+        self.dirname = self.tempdir.__enter__()
+        self.addCleanup(self.tempdir.__exit__, None, None, None)
+        os.makedirs(os.path.join(self.dirname, 'openstack', 'latest'))
+        self.meta_data = os.path.join(self.dirname, 'openstack', 'latest',
+                                      'meta_data.json')
+        _write(self.meta_data, '{"uuid": "1"}')
+
+    def test_same_content(self):
+        self.assertEqual(configdrive.content_hash(self.dirname),
+                         configdrive.content_hash(self.dirname))
+
+    def test_content_changed(self):
+        digest = configdrive.content_hash(self.dirname)
+        _write(self.meta_data, '{"uuid": "2"}')
+        self.assertNotEqual(digest, configdrive.content_hash(self.dirname))
+
+    def test_file_renamed(self):
+        digest = configdrive.content_hash(self.dirname)
+        os.rename(self.meta_data, self.meta_data + '.old')
+        self.assertNotEqual(digest, configdrive.content_hash(self.dirname))
+
+    def test_empty_directory_added(self):
+        digest = configdrive.content_hash(self.dirname)
+        os.mkdir(os.path.join(self.dirname, 'ec2'))
+        self.assertNotEqual(digest, configdrive.content_hash(self.dirname))
+
+    def test_mode_changed(self):
+        digest = configdrive.content_hash(self.dirname)
+        os.chmod(self.meta_data, 0o600)
+        other = configdrive.content_hash(self.dirname)
+        os.chmod(self.meta_data, 0o644)
+        self.assertNotEqual(other, configdrive.content_hash(self.dirname))
+        self.assertNotEqual(digest, other)
+
+    @mock.patch.object(configdrive, 'open', create=True,
+                       side_effect=IOError('denied'))
+    def test_not_readable(self, mock_open):
+        self.assertRaises(exc.CommandError, configdrive.content_hash,
+                          self.dirname)
+
+
+@mock.patch.object(common_utils, 'write_configdrive', autospec=True)
+class BuildTest(utils.BaseTestCase):
+
+    def setUp(self):
+        super(BuildTest, self).setUp()
+        configdrive.clear()
+        self.addCleanup(configdrive.clear)
+
+    def _write_drive(self, path, fileobj, genisoimage=False):
+        fileobj.write(b'H4sIAAAA')
+
+    def test_build(self, mock_write):
+        mock_write.side_effect = self._write_drive
+        with common_utils.tempdir() as dirname:
+            drive = configdrive.build(dirname)
+            mock_write.assert_called_once_with(dirname, mock.ANY,
+                                               genisoimage=False)
+        self.assertEqual(b'H4sIAAAA', drive.read())
+        self.assertEqual(8, drive.size)
+
+    def test_build_not_a_directory(self, mock_write):
+        self.assertRaises(exc.CommandError, configdrive.build, '/nonexistent')
+        self.assertFalse(mock_write.called)
+
+    def test_build_reused(self, mock_write):
+        mock_write.side_effect = self._write_drive
+        with common_utils.tempdir() as dirname:
+            drive = configdrive.build(dirname)
+            self.assertIs(drive, configdrive.build(dirname))
+            _write(os.path.join(dirname, 'user_data'), 'data')
+            self.assertIsNot(drive, configdrive.build(dirname))
+        self.assertEqual(2, mock_write.call_count)
+
+    def test_build_genisoimage(self, mock_write):
+        mock_write.side_effect = self._write_drive
+        with common_utils.tempdir() as dirname:
+            drive = configdrive.build(dirname)
+            self.assertIsNot(drive,
+                             configdrive.build(dirname, genisoimage=True))
+            mock_write.assert_called_with(dirname, mock.ANY,
+                                          genisoimage=True)
+        self.assertEqual(2, mock_write.call_count)
+
+    def test_build_evicted(self, mock_write):
+        mock_write.side_effect = self._write_drive
+        with mock.patch.object(configdrive, 'DEFAULT_MAX_ENTRIES', 1):
+            with common_utils.tempdir() as dirname:
+                configdrive.build(dirname)
+                with common_utils.tempdir() as other:
+                    _write(os.path.join(other, 'user_data'), 'data')
+                    configdrive.build(other)
+                configdrive.build(dirname)
+        self.assertEqual(3, mock_write.call_count)
+
+    def test_build_error(self, mock_write):
+        mock_write.side_effect = exc.CommandError('boom')
+        with common_utils.tempdir() as dirname:
+            self.assertRaises(exc.CommandError, configdrive.build, dirname)
+            self.assertRaises(exc.CommandError, configdrive.build, dirname)
+        self.assertEqual(2, mock_write.call_count)
+
+    def _build_in_threads(self, dirnames):
+        drives = []
+        threads = [threading.Thread(
+            target=lambda d: drives.append(configdrive.build(d)), args=(d,))
+            for d in dirnames]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(5)
+        return drives
+
+    def test_build_concurrent(self, mock_write):
+        started = []
+        both_started = threading.Event()
+
+        def _write_drive(path, fileobj, genisoimage=False):
+            # NOTE: only returns if the other build runs at the same time
+            started.append(path)
+            if len(started) == 2:
+                both_started.set()
+            both_started.wait(5)
+            fileobj.write(b'H4sIAAAA')
+
+        mock_write.side_effect = _write_drive
+        with common_utils.tempdir() as dirname:
+            with common_utils.tempdir() as other:
+                _write(os.path.join(other, 'user_data'), 'data')
+                drives = self._build_in_threads([dirname, other])
+        self.assertTrue(both_started.is_set())
+        self.assertEqual(2, len(drives))
+
+    def test_build_concurrent_same_directory(self, mock_write):
+        event = threading.Event()
+
+        def _write_drive(path, fileobj, genisoimage=False):
+            event.wait(5)
+            fileobj.write(b'H4sIAAAA')
+
+        mock_write.side_effect = _write_drive
+        with common_utils.tempdir() as dirname:
+            timer = threading.Timer(0.1, event.set)
+            timer.start()
+            drives = self._build_in_threads([dirname, dirname])
+            timer.join()
+        self.assertEqual(1, mock_write.call_count)
+        self.assertIs(drives[0], drives[1])
@@ -0,0 +1,216 @@
+# -*- coding: utf-8 -*-
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import json
+
+import mock
+
+from ironicclient import exc
+from ironicclient.tests import fakeserver
+from ironicclient.tests.unit import utils
+from ironicclient.v1 import client
+
+
+class FakeIronicTest(utils.BaseTestCase):
+
+    def setUp(self):
+        super(FakeIronicTest, self).setUp()
+        self.api = fakeserver.FakeIronic(nodes=100000, chassis=10,
+                                         max_limit=100)
+
+    def _get(self, path, version=None):
+        headers = {}
+        if version:
+            headers[fakeserver.VERSION_HEADER] = version
+        return self.api.handle('GET', path, headers)
+
+    def _faultstring(self, body):
+        return json.loads(body['error_message'])['faultstring']
+
+    def test_pagination(self):
+        status, headers, body = self._get('/v1/nodes?limit=10')
+        self.assertEqual(200, status)
+        self.assertEqual([fakeserver.node_uuid(i) for i in range(10)],
+                         [node['uuid'] for node in body['nodes']])
+        self.assertIn('marker=%s' % fakeserver.node_uuid(9), body['next'])
+        self.assertNotIn('driver', body['nodes'][0])
+
+        marker = fakeserver.node_uuid(99997)
+        status, headers, body = self._get(
+            '/v1/nodes/detail?marker=%s' % marker)
+        self.assertEqual(['node-99998', 'node-99999'],
+                         [node['name'] for node in body['nodes']])
+        self.assertEqual('pxe_ipmitool', body['nodes'][0]['driver'])
+        self.assertNotIn('next', body)
+
+    def test_max_limit(self):
+        status, headers, body = self._get('/v1/nodes?limit=1000')
+        self.assertEqual(100, len(body['nodes']))
+        self.assertIn('limit=100&', body['next'])
+
+    def test_sort_desc(self):
+        status, headers, body = self._get(
+            '/v1/ports?sort_dir=desc&limit=2&marker=%s'
+            % fakeserver.port_uuid(5))
+        self.assertEqual([fakeserver.port_uuid(4), fakeserver.port_uuid(3)],
+                         [port['uuid'] for port in body['ports']])
+
+    def test_invalid_marker(self):
+        status, headers, body = self._get('/v1/nodes?marker=unknown')
+        self.assertEqual(400, status)
+        self.assertIn('unknown', self._faultstring(body))
+
+    def test_version_headers(self):
+        status, headers, body = self._get('/v1/nodes/node-1', '1.6')
+        self.assertEqual('1.6', headers[fakeserver.VERSION_HEADER])
+        self.assertEqual('1.1', headers[fakeserver.MIN_VERSION_HEADER])
+        self.assertEqual('1.9', headers[fakeserver.MAX_VERSION_HEADER])
+
+    def test_version_not_acceptable(self):
+        status, headers, body = self._get('/v1/nodes', '1.10')
+        self.assertEqual(406, status)
+        self.assertEqual('1.9', headers[fakeserver.MAX_VERSION_HEADER])
+
+    def test_fields(self):
+        status, headers, body = self._get('/v1/nodes?fields=uuid', '1.7')
+        self.assertEqual(406, status)
+        status, headers, body = self._get('/v1/nodes?fields=uuid&limit=1',
+                                          '1.8')
+        self.assertEqual([{'uuid': fakeserver.node_uuid(0)}], body['nodes'])
+
+    def test_chassis_nodes(self):
+        status, headers, body = self._get(
+            '/v1/chassis/%s/nodes?limit=3' % fakeserver.chassis_uuid(2))
+        self.assertEqual(['node-2', 'node-12', 'node-22'],
+                         [node['name'] for node in body['nodes']])
+        self.assertIn('/v1/chassis/%s/nodes?' % fakeserver.chassis_uuid(2),
+                      body['next'])
+
+    def test_node_ports(self):
+        status, headers, body = self._get('/v1/nodes/node-7/ports')
+        self.assertEqual([fakeserver.port_uuid(7)],
+                         [port['uuid'] for port in body['ports']])
+
+    def test_port_by_address(self):
+        status, headers, body = self._get(
+            '/v1/ports/detail?address=%s' % fakeserver.port_address(42))
+        self.assertEqual([fakeserver.node_uuid(42)],
+                         [port['node_uuid'] for port in body['ports']])
+
+    def test_not_found(self):
+        status, headers, body = self._get('/v1/nodes/node-100000')
+        self.assertEqual(404, status)
+        status, headers, body = self._get('/v1/unknown')
+        self.assertEqual(404, status)
+
+    @mock.patch.object(fakeserver.time, 'sleep', autospec=True)
+    def test_latency(self, mock_sleep):
+        api = fakeserver.FakeIronic(nodes=1, latency=0.5)
+        api.handle('GET', '/v1/nodes')
+        mock_sleep.assert_called_once_with(0.5)
+
+    def test_conflict_rate(self):
+        api = fakeserver.FakeIronic(nodes=1, conflict_rate=1)
+        status, headers, body = api.handle('PUT', '/v1/nodes/node-0/'
+                                           'states/power', {},
+                                           {'target': 'power on'})
+        self.assertEqual(409, status)
+        status, headers, body = api.handle('GET', '/v1/nodes/node-0')
+        self.assertEqual(200, status)
+
+
+class FakeServerTest(utils.BaseTestCase):
+
+    def setUp(self):
+        super(FakeServerTest, self).setUp()
+        self.server = fakeserver.FakeServer(nodes=2500, chassis=2)
+        self.server.start()
+        self.addCleanup(self.server.stop)
+        self.client = client.Client(self.server.endpoint, token='token',
+                                    version_cache=None, retry_interval=0)
+
+    def test_list_nodes(self):
+        nodes = self.client.node.list(limit=0)
+        self.assertEqual(2500, len(nodes))
+        self.assertEqual('node-2499', nodes[-1].name)
+
+    def test_get_node(self):
+        node = self.client.node.get('node-10')
+        self.assertEqual(fakeserver.node_uuid(10), node.uuid)
+        self.assertEqual(fakeserver.chassis_uuid(0), node.chassis_uuid)
+        self.assertRaises(exc.NotFound, self.client.node.get, 'node-2500')
+
+    def test_node_lifecycle(self):
+        node = self.client.node.create(driver='fake', name='new')
+        self.assertEqual(node.uuid, self.client.node.get('new').uuid)
+
+        patch = [{'op': 'replace', 'path': '/name', 'value': 'renamed'},
+                 {'op': 'add', 'path': '/extra/key', 'value': 'value'}]
+        node = self.client.node.update(node.uuid, patch)
+        self.assertEqual('renamed', node.name)
+        self.assertEqual({'key': 'value'}, node.extra)
+        self.assertRaises(exc.NotFound, self.client.node.get, 'new')
+
+        nodes = self.client.node.list(marker='node-2499')
+        self.assertEqual([node.uuid], [n.uuid for n in nodes])
+
+        self.client.node.delete(node.uuid)
+        self.assertRaises(exc.NotFound, self.client.node.get, node.uuid)
+
+    def test_states(self):
+        self.client.node.set_power_state('node-1', 'on')
+        self.client.node.set_provision_state('node-1', 'active')
+        self.client.node.set_maintenance('node-1', 'true',
+                                         maint_reason='broken')
+        node = self.client.node.get('node-1')
+        self.assertEqual('power on', node.power_state)
+        self.assertEqual('active', node.provision_state)
+        self.assertEqual('broken', node.maintenance_reason)
+
+    def test_conflict_retried(self):
+        self.server.api.lock('node-1', conflicts=2)
+        self.client.node.set_power_state('node-1', 'on')
+        self.assertEqual(3, self.server.api.requests['PUT'])
+
+        self.server.api.lock('node-1', conflicts=10)
+        self.assertRaises(exc.Conflict, self.client.node.set_power_state,
+                          'node-1', 'off')
+
+    def test_version_negotiation(self):
+        self.server.api.max_version = '1.5'
+        self.client.node.get('node-1')
+        self.assertEqual('1.5',
+                         self.client.http_client.os_ironic_api_version)
+
+    def test_ports_chassis_drivers(self):
+        ports = self.client.node.list_ports('node-3')
+        self.assertEqual([fakeserver.port_address(3)],
+                         [port.address for port in ports])
+        port = self.client.port.create(address='52:54:FF:00:00:01',
+                                       node_uuid=fakeserver.node_uuid(3))
+        self.assertEqual(port.uuid,
+                         self.client.port.get_by_address(port.address).uuid)
+        self.assertRaises(exc.Conflict, self.client.port.create,
+                          address=fakeserver.port_address(4),
+                          node_uuid=fakeserver.node_uuid(3))
+
+        self.assertEqual(2, len(self.client.chassis.list()))
+        nodes = self.client.chassis.list_nodes(fakeserver.chassis_uuid(1),
+                                               limit=2)
+        self.assertEqual(['node-1', 'node-3'], [n.name for n in nodes])
+
+        self.assertEqual(fakeserver.DRIVERS,
+                         [d.name for d in self.client.driver.list()])
+        self.assertIn('ipmi_address',
+                      self.client.driver.properties('pxe_ipmitool'))
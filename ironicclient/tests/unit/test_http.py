@@ -16,11 +16,19 @@
 #    under the License.
 
 import json
+import socket
+import tempfile
+import threading
+import time
+import zlib
 
 import mock
 import six
 
 from ironicclient.common import http
+from ironicclient.common import instrumentation
+from ironicclient.common import jsonstream
+from ironicclient.common import version_cache
 from ironicclient import exc
 from ironicclient.tests.unit import utils
 
@@ -139,6 +147,83 @@ class VersionNegotiationMixinTest(utils.BaseTestCase):
             mock_conn, self.response)
         self.assertEqual(1, mock_pvh.call_count)
 
+    @mock.patch.object(http.VersionNegotiationMixin, '_parse_version_headers',
+                       autospec=True)
+    def test_negotiate_version_cached_state(self, mock_pvh):
+        # the server changed since the versions were cached
+        mock_pvh.return_value = ('1.1', '1.4')
+        self.test_object.api_version_select_state = 'cached'
+        self.test_object.os_ironic_api_version = '1.5'
+        result = self.test_object.negotiate_version(mock.MagicMock(),
+                                                    self.response)
+        self.assertEqual('1.4', result)
+        self.assertEqual('negotiated',
+                         self.test_object.api_version_select_state)
+
+    @mock.patch.object(http.VersionNegotiationMixin, '_parse_version_headers',
+                       autospec=True)
+    def test_negotiate_version_caches_versions(self, mock_pvh):
+        mock_pvh.return_value = ('1.1', '1.4')
+        self.test_object.version_cache = mock.Mock()
+        self.test_object._version_cache_key = lambda: 'http://ironic'
+        self.test_object.negotiate_version(mock.MagicMock(), self.response)
+        self.test_object.version_cache.set.assert_called_once_with(
+            'http://ironic', '1.1', '1.4')
+
+    def test_pick_version(self):
+        self.assertEqual('1.6', http._pick_version('1.6', '1.1', '1.10'))
+        self.assertEqual('1.10', http._pick_version('1.11', '1.1', '1.10'))
+        self.assertEqual('1.2', http._pick_version('1.1', '1.2', '1.10'))
+
+
+class HttpClientVersionCacheTest(utils.BaseTestCase):
+
+    def _resp(self, status, body=''):
+        return utils.FakeResponse(
+            {'X-OpenStack-Ironic-API-Minimum-Version': '1.1',
+             'X-OpenStack-Ironic-API-Maximum-Version': '1.4',
+             'content-type': 'text/plain'},
+            six.StringIO(body), version=1, status=status)
+
+    def _request(self, client, responses):
+        conns = [utils.FakeConnection(r) for r in responses]
+        with mock.patch.object(http.HTTPClient, 'get_connection',
+                               autospec=True, side_effect=conns):
+            client._http_request('/v1/resources', 'GET')
+        # NOTE: the version sent by the last request
+        return conns[-1]._last_request[2]['headers'][
+            'X-OpenStack-Ironic-API-Version']
+
+    def test_negotiated_version_reused(self):
+        client = http.HTTPClient('http://localhost/')
+        self.assertEqual('1.4', self._request(
+            client, [self._resp(406, _get_error_body()), self._resp(200)]))
+        self.assertEqual('negotiated', client.api_version_select_state)
+        client = http.HTTPClient('http://localhost/v1')
+        self.assertEqual('1.4', self._request(client, [self._resp(200)]))
+        self.assertEqual('cached', client.api_version_select_state)
+
+    def test_other_endpoint(self):
+        cache = version_cache.VersionCache()
+        cache.set('http://other', '1.1', '1.4')
+        client = http.HTTPClient('http://localhost/', version_cache=cache)
+        self.assertEqual('1.6', self._request(client, [self._resp(200)]))
+
+    def test_user_version_not_changed(self):
+        cache = version_cache.VersionCache()
+        cache.set('http://localhost', '1.1', '1.4')
+        client = http.HTTPClient('http://localhost/', version_cache=cache,
+                                 os_ironic_api_version='1.5',
+                                 api_version_select_state='user')
+        self.assertEqual('1.5', self._request(client, [self._resp(200)]))
+
+    def test_disabled(self):
+        client = http.HTTPClient('http://localhost/', version_cache=None)
+        self._request(client, [self._resp(406, _get_error_body()),
+                               self._resp(200)])
+        client = http.HTTPClient('http://localhost/')
+        self.assertEqual('1.6', self._request(client, [self._resp(200)]))
+
 
 class HttpClientTest(utils.BaseTestCase):
 
@@ -332,6 +417,46 @@ class HttpClientTest(utils.BaseTestCase):
         self.assertRaises(exc.Unauthorized, client.json_request,
                           'GET', '/v1/resources')
 
+    def test_request_headers_not_modified(self):
+        fake_resp = utils.FakeResponse({'content-type': 'text/plain'},
+                                       six.StringIO('meow'), version=1,
+                                       status=200)
+        client = http.HTTPClient('http://localhost/', token='token')
+        conn = utils.FakeConnection(fake_resp)
+        client.get_connection = lambda *a, **kw: conn
+        headers = {'X-Header': 'value'}
+        client._http_request('/v1/resources', 'GET', headers=headers)
+        self.assertEqual({'X-Header': 'value'}, headers)
+        sent = conn._last_request[2]['headers']
+        self.assertEqual('value', sent['X-Header'])
+        self.assertEqual('token', sent['X-Auth-Token'])
+
+    @mock.patch.object(http, 'LOG', autospec=True)
+    def test_log_not_formatted_without_debug(self, mock_log):
+        mock_log.isEnabledFor.return_value = False
+        resp = mock.Mock(spec=['version', 'status', 'reason'])
+        client = http.HTTPClient('http://localhost/')
+        client.log_curl_request('GET', '/v1/resources',
+                                {'headers': {'X-Header': 'value'},
+                                 'body': mock.sentinel.body})
+        client.log_http_response(resp, 'body')
+        self.assertFalse(mock_log.debug.called)
+
+    @mock.patch.object(http, 'LOG', autospec=True)
+    def test_log_with_debug(self, mock_log):
+        mock_log.isEnabledFor.return_value = True
+        resp = utils.FakeResponse({'content-type': 'text/plain'},
+                                  version=11, status=200, reason='OK')
+        client = http.HTTPClient('http://localhost/')
+        client.log_curl_request('GET', '/v1/resources',
+                                {'headers': {'X-Header': 'value'}})
+        client.log_http_response(resp, 'body')
+        mock_log.debug.assert_has_calls([
+            mock.call("curl -i -X GET -H 'X-Header: value' "
+                      "http://localhost/v1/resources"),
+            mock.call('\nHTTP/1.1 200 OK\ncontent-type: text/plain\n\n'
+                      'body\n')])
+
     def test__parse_version_headers(self):
         # Test parsing of version headers from HTTPClient
         error_body = _get_error_body()
@@ -468,6 +593,21 @@ class SessionClientTest(utils.BaseTestCase):
         result = client._parse_version_headers(fake_session)
         self.assertEqual(expected_result, result)
 
+    def _check_accept_encoding(self, expected, **kwargs):
+        fake_session = utils.FakeSession({}, None, 204)
+        client = http._construct_http_client(session=fake_session, **kwargs)
+        with mock.patch.object(fake_session, 'request',
+                               wraps=fake_session.request) as mock_request:
+            client.json_request('DELETE', '/v1/resources')
+        headers = mock_request.call_args[1]['headers']
+        self.assertEqual(expected, headers['Accept-Encoding'])
+
+    def test_accept_encoding(self):
+        self._check_accept_encoding('gzip, deflate')
+
+    def test_accept_encoding_no_compression(self):
+        self._check_accept_encoding('identity', compression=False)
+
 
 class RetriesTestCase(utils.BaseTestCase):
     def setUp(self):
@@ -494,6 +634,21 @@ class RetriesTestCase(utils.BaseTestCase):
                           '/v1/resources', 'GET')
         self.assertEqual(1, mock_getcon.call_count)
 
+    @mock.patch.object(http.HTTPClient, 'get_connection', autospec=True)
+    def test_http_retries_deferred(self, mock_getcon):
+        error_body = _get_error_body()
+        bad_resp = utils.FakeResponse(
+            {'content-type': 'text/plain'},
+            six.StringIO(error_body),
+            version=1,
+            status=409)
+        client = http.HTTPClient('http://localhost/')
+        mock_getcon.return_value = utils.FakeConnection(bad_resp)
+        with http.conflict_retries_deferred():
+            self.assertRaises(exc.Conflict, client._http_request,
+                              '/v1/resources', 'GET')
+        self.assertEqual(1, mock_getcon.call_count)
+
     @mock.patch.object(http.HTTPClient, 'get_connection', autospec=True)
     def test_http_retry(self, mock_getcon):
         error_body = _get_error_body()
@@ -557,6 +712,43 @@ class RetriesTestCase(utils.BaseTestCase):
                           '/v1/resources', 'GET')
         self.assertEqual(http.DEFAULT_MAX_RETRIES + 2, mock_getcon.call_count)
 
+    @mock.patch.object(http.time, 'sleep', autospec=True)
+    @mock.patch.object(http.HTTPClient, 'get_connection', autospec=True)
+    def test_http_retry_backoff(self, mock_getcon, mock_sleep):
+        error_body = _get_error_body()
+        bad_resp = utils.FakeResponse(
+            {'content-type': 'text/plain'},
+            six.StringIO(error_body),
+            version=1,
+            status=409)
+        policy = http.RetryPolicy(jitter=0)
+        client = http.HTTPClient('http://localhost/', max_retries=4,
+                                 retry_interval=1, retry_policy=policy)
+        mock_getcon.return_value = utils.FakeConnection(bad_resp)
+        self.assertRaises(exc.Conflict, client._http_request,
+                          '/v1/resources', 'GET')
+        self.assertEqual([mock.call(1), mock.call(2), mock.call(4),
+                          mock.call(8)], mock_sleep.call_args_list)
+        self.assertEqual({'attempts': 5, 'conflicts': 5, 'retries': 4,
+                          'exhausted': 1, 'waited': 15.0}, policy.stats)
+
+    @mock.patch.object(http.HTTPClient, 'get_connection', autospec=True)
+    def test_http_retry_budget(self, mock_getcon):
+        error_body = _get_error_body()
+        bad_resp = utils.FakeResponse(
+            {'content-type': 'text/plain'},
+            six.StringIO(error_body),
+            version=1,
+            status=409)
+        budget = http.RetryBudget(2)
+        client = http.HTTPClient('http://localhost/',
+                                 retry_policy=http.RetryPolicy(budget=budget))
+        mock_getcon.return_value = utils.FakeConnection(bad_resp)
+        self.assertRaises(exc.Conflict, client._http_request,
+                          '/v1/resources', 'GET')
+        self.assertEqual(3, mock_getcon.call_count)
+        self.assertEqual(0, budget.tokens)
+
     def test_session_retry(self):
         error_body = _get_error_body()
 
@@ -580,6 +772,7 @@ class RetriesTestCase(utils.BaseTestCase):
 
         client.json_request('GET', '/v1/resources')
         self.assertEqual(2, fake_session.request.call_count)
+        self.assertEqual(1, client.retry_policy.stats['retries'])
 
     def test_session_retry_fail(self):
         error_body = _get_error_body()
@@ -648,3 +841,725 @@ class RetriesTestCase(utils.BaseTestCase):
                           'GET', '/v1/resources')
         self.assertEqual(http.DEFAULT_MAX_RETRIES + 2,
                          fake_session.request.call_count)
+
+
+class RetryPolicyTest(utils.BaseTestCase):
+
+    def test_interval_backoff(self):
+        policy = http.RetryPolicy(backoff=3, max_interval=20, jitter=0)
+        self.assertEqual([2, 6, 18, 20],
+                         [policy.interval(a, 2) for a in range(1, 5)])
+
+    @mock.patch.object(http.random, 'uniform', autospec=True)
+    def test_interval_jitter(self, mock_uniform):
+        mock_uniform.return_value = 0.25
+        policy = http.RetryPolicy(jitter=0.5)
+        self.assertEqual(3, policy.interval(2, 2))
+        mock_uniform.assert_called_once_with(0, 0.5)
+
+    def test_next_delay_max_retries(self):
+        policy = http.RetryPolicy(jitter=0)
+        self.assertEqual(1, policy.next_delay(1, 1, 1, time.time()))
+        self.assertIsNone(policy.next_delay(2, 1, 1, time.time()))
+        self.assertEqual(1, policy.stats['exhausted'])
+
+    def test_next_delay_deadline(self):
+        policy = http.RetryPolicy(jitter=0, deadline=10)
+        now = time.time()
+        self.assertEqual(4, policy.next_delay(3, 5, 1, now - 5))
+        self.assertIsNone(policy.next_delay(3, 5, 1, now - 7))
+
+    def test_budget(self):
+        budget = http.RetryBudget(1, ratio=0.5)
+        policy = http.RetryPolicy(budget=budget)
+        self.assertIsNotNone(policy.next_delay(1, 5, 1, time.time()))
+        self.assertIsNone(policy.next_delay(1, 5, 1, time.time()))
+        policy.record_attempt()
+        policy.record_attempt()
+        self.assertEqual(1, budget.tokens)
+        policy.record_attempt()
+        self.assertEqual(1, budget.tokens)
+
+    def test_record_attempt(self):
+        policy = http.RetryPolicy()
+        policy.record_attempt()
+        policy.record_attempt(conflict=True)
+        self.assertEqual({'attempts': 2, 'conflicts': 1, 'retries': 0,
+                          'exhausted': 0, 'waited': 0.0}, policy.stats)
+
+
+class ConnectionPoolTest(utils.BaseTestCase):
+
+    def setUp(self):
+        super(ConnectionPoolTest, self).setUp()
+        self.factory = mock.Mock(side_effect=lambda: mock.Mock(sock=None))
+        self.pool = http.ConnectionPool(self.factory, max_connections=2,
+                                        idle_timeout=60)
+
+    def test_get_miss(self):
+        conn = self.pool.get()
+        self.assertEqual(1, self.factory.call_count)
+        self.assertEqual(1, self.pool.stats['misses'])
+        self.assertEqual(0, self.pool.stats['hits'])
+        self.assertIsNotNone(conn)
+
+    def test_get_hit(self):
+        conn = self.pool.get()
+        self.pool.put(conn)
+        self.assertIs(conn, self.pool.get())
+        self.assertEqual(1, self.factory.call_count)
+        self.assertEqual(1, self.pool.stats['hits'])
+
+    def test_put_pool_full(self):
+        conns = [self.pool.get() for i in range(2)]
+        self.assertEqual(2, self.pool.in_use)
+        for conn in conns:
+            self.pool.put(conn)
+        self.assertEqual(0, self.pool.in_use)
+        self.assertEqual(0, self.pool.stats['discarded'])
+        self.assertFalse(conns[0].close.called)
+        self.assertEqual(set(conns), set([self.pool.get(), self.pool.get()]))
+        self.assertEqual(2, self.factory.call_count)
+
+    def test_get_waits_for_put(self):
+        conns = [self.pool.get() for i in range(2)]
+        timer = threading.Timer(0.05, self.pool.put, [conns[0]])
+        timer.start()
+        self.addCleanup(timer.join)
+        self.assertIs(conns[0], self.pool.get())
+        self.assertEqual(2, self.pool.in_use)
+
+    def test_get_waits_for_discard(self):
+        conns = [self.pool.get() for i in range(2)]
+        timer = threading.Timer(0.05, self.pool.discard, [conns[0]])
+        timer.start()
+        self.addCleanup(timer.join)
+        self.assertNotIn(self.pool.get(), conns)
+        self.assertEqual(3, self.factory.call_count)
+
+    def test_get_timeout(self):
+        self.pool.timeout = 0.01
+        [self.pool.get() for i in range(2)]
+        self.assertRaises(exc.ConnectionPoolTimeout, self.pool.get)
+        self.assertEqual(2, self.pool.in_use)
+
+    def test_get_factory_error(self):
+        self.factory.side_effect = exc.EndpointException()
+        self.assertRaises(exc.EndpointException, self.pool.get)
+        self.assertEqual(0, self.pool.in_use)
+
+    def test_replace(self):
+        conn = self.pool.get()
+        new_conn = self.pool.replace(conn)
+        conn.close.assert_called_once_with()
+        self.assertIsNot(conn, new_conn)
+        self.assertEqual(1, self.pool.in_use)
+
+    @mock.patch.object(http.time, 'time', autospec=True)
+    def test_get_idle_timeout(self, mock_time):
+        mock_time.return_value = 100
+        conn = self.pool.get()
+        self.pool.put(conn)
+        mock_time.return_value = 161
+        self.assertIsNot(conn, self.pool.get())
+        conn.close.assert_called_once_with()
+        self.assertEqual(1, self.pool.stats['evicted'])
+        self.assertEqual(2, self.pool.stats['misses'])
+
+    @mock.patch.object(http, '_is_connection_dropped', autospec=True)
+    def test_get_dropped_connection(self, mock_dropped):
+        mock_dropped.return_value = True
+        conn = self.pool.get()
+        self.pool.put(conn)
+        self.assertIsNot(conn, self.pool.get())
+        conn.close.assert_called_once_with()
+        self.assertEqual(1, self.pool.stats['evicted'])
+
+    def test_discard(self):
+        conn = self.pool.get()
+        self.pool.discard(conn)
+        conn.close.assert_called_once_with()
+        self.pool.get()
+        self.assertEqual(2, self.factory.call_count)
+
+    def test_clear(self):
+        conn = self.pool.get()
+        self.pool.put(conn)
+        self.pool.clear()
+        conn.close.assert_called_once_with()
+        self.assertIsNot(conn, self.pool.get())
+
+    def test_is_connection_dropped_not_connected(self):
+        self.assertFalse(http._is_connection_dropped(mock.Mock(sock=None)))
+
+
+class HttpClientKeepaliveTest(utils.BaseTestCase):
+
+    def _fake_resp(self, will_close=False):
+        resp = utils.FakeResponse({'content-type': 'text/plain'},
+                                  six.StringIO('meow'), version=1,
+                                  status=200)
+        resp.will_close = will_close
+        return resp
+
+    @mock.patch.object(http.HTTPClient, '_create_connection', autospec=True)
+    def test_connection_reused(self, mock_create):
+        conn = utils.FakeConnection(self._fake_resp())
+        mock_create.return_value = conn
+        client = http.HTTPClient('http://localhost/')
+        client._http_request('/v1/resources', 'GET')
+        conn.setresponse(self._fake_resp())
+        client._http_request('/v1/resources', 'GET')
+        self.assertEqual(1, mock_create.call_count)
+        self.assertEqual({'hits': 1, 'misses': 1, 'evicted': 0,
+                          'discarded': 0}, client.connection_pool.stats)
+
+    @mock.patch.object(http.HTTPClient, '_create_connection', autospec=True)
+    def test_connection_will_close(self, mock_create):
+        mock_create.side_effect = lambda self: utils.FakeConnection(
+            responses.pop(0))
+        responses = [self._fake_resp(will_close=True), self._fake_resp()]
+        client = http.HTTPClient('http://localhost/')
+        client._http_request('/v1/resources', 'GET')
+        client._http_request('/v1/resources', 'GET')
+        self.assertEqual(2, mock_create.call_count)
+        self.assertEqual(1, client.connection_pool.stats['discarded'])
+
+    @mock.patch.object(http.HTTPClient, '_create_connection', autospec=True)
+    def test_keepalive_disabled(self, mock_create):
+        mock_create.side_effect = lambda self: utils.FakeConnection(
+            responses.pop(0))
+        responses = [self._fake_resp(), self._fake_resp()]
+        client = http.HTTPClient('http://localhost/', keepalive=False)
+        client._http_request('/v1/resources', 'GET')
+        client._http_request('/v1/resources', 'GET')
+        self.assertIsNone(client.connection_pool)
+        self.assertEqual(2, mock_create.call_count)
+
+    @mock.patch.object(http.HTTPClient, '_create_connection', autospec=True)
+    def test_stale_connection_retried(self, mock_create):
+        stale = mock.Mock(sock=mock.sentinel.sock)
+        stale.request.side_effect = socket.error('broken pipe')
+        good = utils.FakeConnection(self._fake_resp())
+        mock_create.return_value = good
+        client = http.HTTPClient('http://localhost/')
+        client.get_connection = lambda: stale
+        resp, body_iter = client._http_request('/v1/resources', 'GET')
+        self.assertEqual(200, resp.status)
+        stale.close.assert_called_once_with()
+        self.assertEqual(1, mock_create.call_count)
+
+    def test_octet_stream_released_after_read(self):
+        resp = utils.FakeResponse({'content-type':
+                                   'application/octet-stream'},
+                                  six.StringIO('meow'), version=1,
+                                  status=200)
+        conn = utils.FakeConnection(resp)
+        client = http.HTTPClient('http://localhost/')
+        client.get_connection = lambda: conn
+        with mock.patch.object(client.connection_pool, 'put',
+                               autospec=True) as mock_put:
+            resp, body_iter = client._http_request('/v1/resources', 'GET')
+            self.assertFalse(mock_put.called)
+            self.assertEqual('meow', ''.join(body_iter))
+            mock_put.assert_called_once_with(conn)
+
+    @mock.patch.object(http.HTTPClient, '_create_connection', autospec=True)
+    def test_connection_given_back_on_error(self, mock_create):
+        conn = mock.Mock(sock=None)
+        conn.getresponse.side_effect = ValueError()
+        mock_create.return_value = conn
+        client = http.HTTPClient('http://localhost/', max_connections=1)
+        self.assertRaises(ValueError, client._http_request,
+                          '/v1/resources', 'GET')
+        self.assertEqual(0, client.connection_pool.in_use)
+        conn.close.assert_called_once_with()
+
+    @mock.patch.object(http.HTTPClient, '_create_connection', autospec=True)
+    def test_unfinished_stream_discarded(self, mock_create):
+        resp = utils.FakeResponse({'content-type':
+                                   'application/octet-stream'},
+                                  six.StringIO('meow'), version=1,
+                                  status=200)
+        conn = utils.FakeConnection(resp)
+        conn.close = mock.Mock()
+        mock_create.return_value = conn
+        client = http.HTTPClient('http://localhost/', max_connections=1)
+        resp, body_iter = client._http_request('/v1/resources', 'GET')
+        self.assertEqual(1, client.connection_pool.in_use)
+        body_iter.close()
+        self.assertEqual(0, client.connection_pool.in_use)
+        conn.close.assert_called_once_with()
+        self.assertEqual(1, client.connection_pool.stats['discarded'])
+
+
+class HttpClientJsonTest(utils.BaseTestCase):
+
+    def setUp(self):
+        super(HttpClientJsonTest, self).setUp()
+        self.client = http.HTTPClient('http://localhost/')
+
+    def _request(self, body, content_type='application/json', status=200,
+                 headers=None):
+        headers = dict(headers or {}, **{'content-type': content_type})
+        resp = utils.FakeResponse(headers, six.BytesIO(body), version=1,
+                                  status=status)
+        conn = utils.FakeConnection(resp)
+        self.client.get_connection = lambda: conn
+        return conn
+
+    def test_json_request_bytes(self):
+        conn = self._request(b'{"name": "caf\xc3\xa9"}')
+        with mock.patch.object(self.client.connection_pool, 'put',
+                               autospec=True) as mock_put:
+            resp, body = self.client.json_request('GET', '/v1/resources')
+            mock_put.assert_called_once_with(conn)
+        self.assertEqual({'name': u'caf\xe9'}, body)
+
+    def test_json_request_no_content(self):
+        conn = self._request(b'', status=204)
+        with mock.patch.object(self.client.connection_pool, 'put',
+                               autospec=True) as mock_put:
+            resp, body = self.client.json_request('DELETE', '/v1/resources')
+            mock_put.assert_called_once_with(conn)
+        self.assertEqual([], body)
+
+    def test_json_stream_request(self):
+        conn = self._request(b'{"resources": [{"uuid": "1"}, {"uuid": "2"}],'
+                             b' "next": "http://localhost/v1/resources?m=2"}')
+        with mock.patch.object(self.client.connection_pool, 'put',
+                               autospec=True) as mock_put:
+            resp, items = self.client.json_stream_request(
+                'GET', '/v1/resources', 'resources')
+            self.assertFalse(mock_put.called)
+            self.assertEqual([{'uuid': '1'}, {'uuid': '2'}], list(items))
+            mock_put.assert_called_once_with(conn)
+        self.assertEqual({'next': 'http://localhost/v1/resources?m=2'},
+                         items.extra)
+
+    def test_json_request_accept_encoding(self):
+        conn = self._request(b'{}')
+        self.client.json_request('GET', '/v1/resources')
+        self.assertEqual('gzip, deflate',
+                         conn._last_request[2]['headers']['Accept-Encoding'])
+
+    def test_json_request_no_compression(self):
+        self.client = http.HTTPClient('http://localhost/', compression=False)
+        conn = self._request(b'{}')
+        self.client.json_request('GET', '/v1/resources')
+        self.assertNotIn('Accept-Encoding', conn._last_request[2]['headers'])
+
+    def _compress(self, data, wbits):
+        compressor = zlib.compressobj(9, zlib.DEFLATED, wbits)
+        return compressor.compress(data) + compressor.flush()
+
+    def test_json_request_gzip(self):
+        body = json.dumps({'resources': [{'uuid': str(i)}
+                                         for i in range(1000)]})
+        self._request(self._compress(body.encode('utf-8'),
+                                     16 + zlib.MAX_WBITS),
+                      headers={'content-encoding': 'gzip'})
+        with mock.patch.object(http, 'CHUNKSIZE', 64):
+            resp, body = self.client.json_request('GET', '/v1/resources')
+        self.assertEqual(1000, len(body['resources']))
+
+    def test_json_stream_request_deflate(self):
+        data = b'{"resources": [{"uuid": "1"}, {"uuid": "2"}]}'
+        for wbits in (zlib.MAX_WBITS, -zlib.MAX_WBITS):
+            self._request(self._compress(data, wbits),
+                          headers={'content-encoding': 'deflate'})
+            with mock.patch.object(http, 'CHUNKSIZE', 4):
+                resp, items = self.client.json_stream_request(
+                    'GET', '/v1/resources', 'resources')
+                self.assertEqual([{'uuid': '1'}, {'uuid': '2'}], list(items))
+
+    def test_json_request_stream_body(self):
+        conn = self._request(b'{}')
+        with tempfile.NamedTemporaryFile() as f:
+            f.write(b'H4sIAAAA')
+            f.flush()
+            self.client.json_request(
+                'PUT', '/v1/resources',
+                body={'data': jsonstream.FileString(f.name, escaped=True)})
+            body = conn._last_request[2]['body']
+            self.assertIsInstance(body, jsonstream.StreamBody)
+            self.assertEqual(
+                str(len(b'{"data": "H4sIAAAA"}')),
+                conn._last_request[2]['headers']['Content-Length'])
+            self.assertEqual(b'{"data": "H4sIAAAA"}', body.read())
+
+    def test_json_stream_request_not_json(self):
+        self._request(b'meow', content_type='text/plain')
+        resp, items = self.client.json_stream_request(
+            'GET', '/v1/resources', 'resources')
+        self.assertEqual([], list(items))
+
+    def test_json_stream_request_error(self):
+        self._request(_get_error_body('oops').encode('utf-8'), status=500)
+        self.assertRaises(exc.InternalServerError,
+                          self.client.json_stream_request,
+                          'GET', '/v1/resources', 'resources')
+
+
+class FakeStreamingConnection(utils.FakeConnection):
+    """A connection recording the requests sent piece by piece."""
+
+    def __init__(self, response=None):
+        super(FakeStreamingConnection, self).__init__(response)
+        self.sock = None
+        self.sent = []
+
+    def putrequest(self, method, url, **kwargs):
+        self._last_request = (method, url, kwargs)
+        self.headers = {}
+
+    def putheader(self, name, value):
+        self.headers[name] = value
+
+    def endheaders(self):
+        pass
+
+    def send(self, data):
+        self.sent.append(bytes(data))
+
+
+class HttpClientRawStreamTest(utils.BaseTestCase):
+
+    def setUp(self):
+        super(HttpClientRawStreamTest, self).setUp()
+        self.client = http.HTTPClient('http://localhost/')
+
+    def _request(self, body=b'', status=200, headers=None):
+        headers = dict({'content-type': 'application/octet-stream'},
+                       **(headers or {}))
+        resp = utils.FakeResponse(headers, six.BytesIO(body), version=1,
+                                  status=status)
+        conn = FakeStreamingConnection(resp)
+        self.client.get_connection = lambda: conn
+        return conn
+
+    def test_upload_iterable_chunked(self):
+        conn = self._request()
+        self.client.raw_stream_request('PUT', '/v1/images',
+                                       body=iter([b'abc', b'', b'defgh']))
+        self.assertEqual('chunked', conn.headers['Transfer-Encoding'])
+        self.assertNotIn('Content-Length', conn.headers)
+        self.assertEqual('application/octet-stream',
+                         conn.headers['Content-Type'])
+        self.assertEqual(b'3\r\nabc\r\n5\r\ndefgh\r\n0\r\n\r\n',
+                         b''.join(conn.sent))
+
+    def test_upload_file(self):
+        conn = self._request()
+        with tempfile.TemporaryFile() as f:
+            f.write(b'0123456789')
+            f.seek(2)
+            self.client.raw_stream_request('PUT', '/v1/images', body=f,
+                                           chunk_size=3)
+        self.assertEqual('8', conn.headers['Content-Length'])
+        self.assertNotIn('Transfer-Encoding', conn.headers)
+        self.assertEqual([b'234', b'567', b'89'], conn.sent)
+
+    def test_upload_file_sendfile(self):
+        conn = self._request()
+        conn.sock = mock.Mock(spec=['sendfile'])
+        with tempfile.TemporaryFile() as f:
+            f.write(b'0123456789')
+            f.seek(0)
+            self.client.raw_stream_request('PUT', '/v1/images', body=f)
+            conn.sock.sendfile.assert_called_once_with(f, 0, 10)
+        self.assertEqual([], conn.sent)
+
+    def test_upload_file_conflict_retried(self):
+        conn = self._request()
+        responses = [
+            utils.FakeResponse(
+                {'content-type': 'application/json'},
+                six.BytesIO(_get_error_body('locked').encode('utf-8')),
+                version=1, status=409),
+            conn.getresponse()]
+        conn.getresponse = lambda: responses.pop(0)
+        self.client.conflict_retry_interval = 0
+        with tempfile.TemporaryFile() as f:
+            f.write(b'data')
+            f.seek(0)
+            self.client.raw_stream_request('PUT', '/v1/images', body=f)
+        # NOTE: the file is sent again from the start
+        self.assertEqual([b'data', b'data'], conn.sent)
+
+    def test_upload_iterable_conflict_not_retried(self):
+        self._request(_get_error_body('locked').encode('utf-8'), status=409,
+                      headers={'content-type': 'application/json'})
+        self.client.conflict_retry_interval = 0
+        self.assertRaises(exc.Conflict, self.client.raw_stream_request,
+                          'PUT', '/v1/images', body=iter([b'data']))
+
+    def test_raw_request_bytes_unchanged(self):
+        conn = self._request()
+        self.client.raw_request('PUT', '/v1/images', body=b'data')
+        self.assertEqual(b'data', conn._last_request[2]['body'])
+
+    def test_readinto(self):
+        conn = self._request(b'0123456789')
+        with mock.patch.object(self.client.connection_pool, 'put',
+                               autospec=True) as mock_put:
+            resp, body_iter = self.client.raw_stream_request('GET',
+                                                             '/v1/images')
+            buf = bytearray(4)
+            chunks = []
+            count = body_iter.readinto(buf)
+            while count:
+                chunks.append(bytes(buf[:count]))
+                count = body_iter.readinto(buf)
+            mock_put.assert_called_once_with(conn)
+        self.assertEqual([b'0123', b'4567', b'89'], chunks)
+
+    def test_readinto_gzip(self):
+        compressor = zlib.compressobj(9, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        data = b'meow' * 1000
+        self._request(compressor.compress(data) + compressor.flush(),
+                      headers={'content-encoding': 'gzip'})
+        resp, body_iter = self.client.raw_stream_request(
+            'GET', '/v1/images', chunk_size=16)
+        buf = bytearray(100)
+        result = bytearray()
+        count = body_iter.readinto(buf)
+        while count:
+            self.assertLessEqual(count, 100)
+            result += buf[:count]
+            count = body_iter.readinto(buf)
+        self.assertEqual(data, bytes(result))
+
+    def test_write_to_file(self):
+        self._request(b'0123456789')
+        resp, body_iter = self.client.raw_stream_request(
+            'GET', '/v1/images', chunk_size=3)
+        target = six.BytesIO()
+        self.assertEqual(10, body_iter.write_to(target))
+        self.assertEqual(b'0123456789', target.getvalue())
+
+    def test_write_to_fd(self):
+        self._request(b'0123456789')
+        resp, body_iter = self.client.raw_stream_request('GET', '/v1/images')
+        with tempfile.TemporaryFile() as f:
+            self.assertEqual(10, body_iter.write_to(f.fileno()))
+            f.seek(0)
+            self.assertEqual(b'0123456789', f.read())
+
+    @mock.patch.object(http, 'LOG', autospec=True)
+    def test_not_read_in_debug_mode(self, mock_log):
+        mock_log.isEnabledFor.return_value = True
+        self._request(b'0123456789', headers={'content-type': 'text/plain'})
+        resp, body_iter = self.client.raw_stream_request('GET', '/v1/images')
+        self.assertEqual(b'0123456789', b''.join(body_iter))
+
+    def test_session_client(self):
+        session = mock.Mock(spec=['request'])
+        resp = session.request.return_value
+        resp.status_code = 200
+        resp.headers = {'Content-Type': 'application/octet-stream'}
+        resp.raw = utils.FakeResponse({}, six.BytesIO(b'data'))
+        client = http.SessionClient(session=session, auth=None,
+                                    interface=None, service_type='baremetal',
+                                    region_name='', service_name=None)
+        source = iter([b'data'])
+        result, body_iter = client.raw_stream_request('PUT', '/v1/images',
+                                                      body=source)
+        self.assertIs(resp, result)
+        self.assertIs(source, session.request.call_args[1]['data'])
+        self.assertTrue(session.request.call_args[1]['stream'])
+        self.assertEqual(b'data', b''.join(body_iter))
+        resp.close.assert_called_once_with()
+
+
+class HttpClientInstrumentationTest(utils.BaseTestCase):
+
+    def setUp(self):
+        super(HttpClientInstrumentationTest, self).setUp()
+        self.instr = instrumentation.Instrumentation()
+        self.end = mock.Mock()
+        self.instr.add_hooks(end=self.end)
+        self.client = http.HTTPClient('http://localhost/',
+                                      instrumentation=self.instr,
+                                      retry_interval=0)
+
+    def _response(self, body, status=200, headers=None):
+        headers = dict({'content-type': 'application/json'},
+                       **(headers or {}))
+        return utils.FakeResponse(headers, six.BytesIO(body), version=1,
+                                  status=status)
+
+    def _info(self):
+        self.end.assert_called_once_with(mock.ANY)
+        return self.end.call_args[0][0]
+
+    def test_json_request(self):
+        conn = utils.FakeConnection(self._response(
+            b'{"name": "node"}', headers={'content-length': '16'}))
+        self.client.get_connection = lambda: conn
+        self.client.json_request('PATCH', '/v1/nodes/node-1?x=1',
+                                 body={'a': 1})
+        info = self._info()
+        self.assertEqual('PATCH', info.method)
+        self.assertEqual('/v1/nodes/{node}', info.url_template)
+        self.assertEqual(200, info.status)
+        self.assertEqual(len(b'{"a": 1}'), info.request_bytes)
+        self.assertEqual(len(b'{"name": "node"}'), info.response_bytes)
+        self.assertEqual(http.DEFAULT_VER, info.api_version)
+        self.assertEqual(0, info.retries)
+        self.assertIsNone(info.error)
+        self.assertIn('ttfb', info.timings)
+
+    def test_retries(self):
+        conflict = self._response(_get_error_body('locked').encode('utf-8'),
+                                  status=409)
+        conn = utils.FakeConnection(conflict)
+        responses = [conflict, self._response(b'{}')]
+        conn.getresponse = lambda: responses.pop(0)
+        self.client.get_connection = lambda: conn
+        self.client.json_request('GET', '/v1/nodes')
+        info = self._info()
+        self.assertEqual(1, info.retries)
+        self.assertEqual(200, info.status)
+
+    def test_error(self):
+        resp = self._response(_get_error_body('oops').encode('utf-8'),
+                              status=500)
+        self.client.get_connection = lambda: utils.FakeConnection(resp)
+        self.assertRaises(exc.InternalServerError, self.client.json_request,
+                          'GET', '/v1/nodes')
+        info = self._info()
+        self.assertEqual(500, info.status)
+        self.assertIsInstance(info.error, exc.InternalServerError)
+
+    def test_streamed_response(self):
+        resp = self._response(b'0123', headers={
+            'content-type': 'application/octet-stream',
+            'content-length': '4'})
+        self.client.get_connection = lambda: utils.FakeConnection(resp)
+        self.client.raw_stream_request('GET', '/v1/images')
+        self.assertEqual(4, self._info().response_bytes)
+
+    @mock.patch.object(http.socket, 'socket', autospec=True)
+    @mock.patch.object(http.socket, 'getaddrinfo', autospec=True)
+    def test_new_connection(self, mock_getaddrinfo, mock_socket):
+        mock_getaddrinfo.return_value = [
+            (socket.AF_INET6, socket.SOCK_STREAM, 6, '',
+             ('fe80::1', 80, 0, 2)),
+            (socket.AF_INET, socket.SOCK_STREAM, 6, '', ('10.0.0.1', 80))]
+        failed, sock = mock.Mock(), mock.Mock()
+        failed.connect.side_effect = socket.error('unreachable')
+        mock_socket.side_effect = [failed, sock]
+        conn = utils.FakeConnection(self._response(b'{}'))
+        conn.sock = None
+        conn._create_connection = None
+        self.client.get_connection = lambda: conn
+
+        def _request(method, url, **kwargs):
+            conn.sock = conn._create_connection(('localhost', 80), 60)
+
+        conn.request = _request
+        self.client.json_request('GET', '/v1/nodes')
+        info = self._info()
+        self.assertEqual(set(['dns', 'connect', 'ttfb']), set(info.timings))
+        self.assertIs(info.timings, conn.timings)
+        mock_getaddrinfo.assert_called_once_with('localhost', 80, 0,
+                                                 socket.SOCK_STREAM)
+        self.assertEqual([mock.call(socket.AF_INET6, socket.SOCK_STREAM, 6),
+                          mock.call(socket.AF_INET, socket.SOCK_STREAM, 6)],
+                         mock_socket.call_args_list)
+        # NOTE: the scope id of the link-local address is kept
+        failed.connect.assert_called_once_with(('fe80::1', 80, 0, 2))
+        failed.close.assert_called_once_with()
+        sock.settimeout.assert_called_once_with(60)
+        sock.connect.assert_called_once_with(('10.0.0.1', 80))
+        self.assertFalse(sock.bind.called)
+        self.assertIs(sock, conn.sock)
+
+    def test_disabled(self):
+        self.instr.remove_hooks(end=self.end)
+        conn = utils.FakeConnection(self._response(b'{}'))
+        conn.sock = None
+        self.client.get_connection = lambda: conn
+        self.client.json_request('GET', '/v1/nodes')
+        self.assertFalse(hasattr(conn, 'timings'))
+
+    def test_session_client(self):
+        session = utils.FakeSession({'Content-Type': 'application/json'},
+                                    b'{"name": "node"}', 200)
+        client = http.SessionClient(session=session, auth=None,
+                                    interface=None, service_type='baremetal',
+                                    region_name='', service_name=None)
+        client.instrumentation = self.instr
+        client.os_ironic_api_version = '1.6'
+        client.json_request('GET', '/v1/nodes')
+        info = self._info()
+        self.assertEqual(200, info.status)
+        self.assertEqual(len(b'{"name": "node"}'), info.response_bytes)
+        self.assertEqual('1.6', info.api_version)
+
+
+@mock.patch.object(http.ssl, 'SSLContext', autospec=True)
+class TLSContextTest(utils.BaseTestCase):
+
+    def test_verified(self, mock_context):
+        tls = http.TLSContext(ca_file='/path/to/ca_file')
+        context = mock_context.return_value
+        context.load_verify_locations.assert_called_once_with(
+            '/path/to/ca_file')
+        self.assertEqual(http.ssl.CERT_REQUIRED, context.verify_mode)
+        self.assertFalse(context.load_cert_chain.called)
+        self.assertIs(context, tls.ssl_context)
+
+    def test_insecure(self, mock_context):
+        http.TLSContext(insecure=True)
+        context = mock_context.return_value
+        self.assertEqual(http.ssl.CERT_NONE, context.verify_mode)
+        self.assertFalse(context.load_verify_locations.called)
+
+    def test_client_cert(self, mock_context):
+        http.TLSContext(ca_file='/path/to/ca_file',
+                        cert_file='/path/to/cert_file',
+                        key_file='/path/to/key_file')
+        mock_context.return_value.load_cert_chain.assert_called_once_with(
+            '/path/to/cert_file', '/path/to/key_file')
+
+    def test_wrap_socket_resumes_session(self, mock_context):
+        tls = http.TLSContext(ca_file='/path/to/ca_file')
+        wrap = mock_context.return_value.wrap_socket
+        wrap.side_effect = [
+            mock.Mock(session=mock.sentinel.session, session_reused=False),
+            mock.Mock(session=mock.sentinel.session, session_reused=True)]
+
+        tls.wrap_socket(mock.sentinel.sock1, server_hostname='ironic')
+        tls.wrap_socket(mock.sentinel.sock2, server_hostname='ironic')
+
+        wrap.assert_has_calls([
+            mock.call(mock.sentinel.sock1, server_hostname='ironic'),
+            mock.call(mock.sentinel.sock2, server_hostname='ironic',
+                      session=mock.sentinel.session)])
+        self.assertEqual({'full_handshakes': 1, 'resumed_handshakes': 1},
+                         tls.stats)
+
+    def test_wrap_socket_error_forgets_session(self, mock_context):
+        tls = http.TLSContext(ca_file='/path/to/ca_file')
+        tls.session = mock.sentinel.session
+        mock_context.return_value.wrap_socket.side_effect = (
+            http.ssl.SSLError())
+        self.assertRaises(http.ssl.SSLError, tls.wrap_socket,
+                          mock.sentinel.sock)
+        self.assertIsNone(tls.session)
+
+    @mock.patch.object(http.socket, 'create_connection', autospec=True)
+    def test_connections_share_context(self, mock_create, mock_context):
+        client = http.HTTPClient('https://localhost:6385',
+                                 ca_file='/path/to/ca_file')
+        conn1 = client._create_connection()
+        conn2 = client._create_connection()
+        self.assertEqual(1, mock_context.call_count)
+        self.assertIs(conn1.tls_context, conn2.tls_context)
+        self.assertIs(client.tls_context, conn1.tls_context)
+
+        conn1.connect()
+        mock_context.return_value.wrap_socket.assert_called_once_with(
+            mock_create.return_value, server_hostname='localhost')
@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import mock
+
+from ironicclient.common import instrumentation
+from ironicclient import exc
+from ironicclient.tests.unit import utils
+
+
+UUID = '1be26c0b-03f2-4d2e-ae87-c02d7f33c123'
+
+
+class UrlTemplateTest(utils.BaseTestCase):
+
+    def test_resources(self):
+        self.assertEqual('/v1/nodes/{node}/states/power',
+                         instrumentation.url_template(
+                             '/v1/nodes/%s/states/power' % UUID))
+        self.assertEqual('/v1/nodes/{node}',
+                         instrumentation.url_template('/v1/nodes/node-1'))
+        self.assertEqual('/v1/drivers/{driver}/properties',
+                         instrumentation.url_template(
+                             '/v1/drivers/fake/properties'))
+        self.assertEqual('/v1/chassis/{chassis}/nodes',
+                         instrumentation.url_template(
+                             '/v1/chassis/%s/nodes' % UUID))
+
+    def test_collections(self):
+        self.assertEqual('/v1/nodes',
+                         instrumentation.url_template('/v1/nodes?limit=10'))
+        self.assertEqual('/v1/ports/detail',
+                         instrumentation.url_template(
+                             'http://ironic:6385/v1/ports/detail?marker=%s'
+                             % UUID))
+        self.assertEqual('/v1/nodes/', instrumentation.url_template(
+            '/v1/nodes/'))
+
+    def test_uuid(self):
+        self.assertEqual('/v1/other/{uuid}',
+                         instrumentation.url_template('/v1/other/%s' % UUID))
+
+
+class InstrumentationTest(utils.BaseTestCase):
+
+    def test_disabled(self):
+        instr = instrumentation.Instrumentation()
+        self.assertFalse(instr.enabled)
+        with instrumentation.track_request(instr, 'GET', '/v1/nodes') as info:
+            self.assertIsNone(info)
+        with instrumentation.track_request(None, 'GET', '/v1/nodes') as info:
+            self.assertIsNone(info)
+        self.assertEqual([], instr.get_timings())
+
+    def test_hooks(self):
+        start = mock.Mock()
+        end = mock.Mock()
+        instr = instrumentation.Instrumentation()
+        instr.add_hooks(start=start, end=end)
+        self.assertTrue(instr.enabled)
+        with instrumentation.track_request(instr, 'GET', '/v1/nodes') as info:
+            start.assert_called_once_with(info)
+            self.assertFalse(end.called)
+            self.assertIs(info, instrumentation.current_request())
+            info.status = 200
+        end.assert_called_once_with(info)
+        self.assertIsNone(instrumentation.current_request())
+        self.assertEqual('/v1/nodes', info.url_template)
+        self.assertGreaterEqual(info.duration, 0)
+
+        instr.remove_hooks(start=start, end=end)
+        self.assertFalse(instr.enabled)
+
+    def test_nested(self):
+        end = mock.Mock()
+        instr = instrumentation.Instrumentation()
+        instr.add_hooks(end=end)
+        with instrumentation.track_request(instr, 'GET', '/v1/nodes') as info:
+            with instrumentation.track_request(instr, 'GET',
+                                               '/v1/nodes/1') as nested:
+                self.assertIs(info, nested)
+        end.assert_called_once_with(info)
+
+    def test_error(self):
+        end = mock.Mock()
+        instr = instrumentation.Instrumentation()
+        instr.add_hooks(end=end)
+        error = exc.Conflict()
+        with instrumentation.track_request(instr, 'PUT', '/v1/nodes') as info:
+            self.assertRaises(exc.Conflict, self._raise, error)
+        self.assertIsNone(info.error)
+
+        try:
+            with instrumentation.track_request(instr, 'PUT',
+                                               '/v1/nodes') as info:
+                raise error
+        except exc.Conflict:
+            pass
+        self.assertIs(error, info.error)
+        self.assertEqual(409, info.status)
+        self.assertEqual(2, end.call_count)
+
+    def _raise(self, error):
+        raise error
+
+    def test_hook_failure_ignored(self):
+        end = mock.Mock()
+        instr = instrumentation.Instrumentation()
+        instr.add_hooks(end=mock.Mock(side_effect=RuntimeError()))
+        instr.add_hooks(end=end)
+        with instrumentation.track_request(instr, 'GET', '/v1/nodes'):
+            pass
+        self.assertTrue(end.called)
+
+    @mock.patch.object(instrumentation.time, 'time', autospec=True)
+    def test_timings(self, mock_time):
+        mock_time.side_effect = [10.0, 11.0, 20.0, 22.0, 30.0, 33.0]
+        instr = instrumentation.Instrumentation(timings=True, max_timings=2)
+        self.assertTrue(instr.enabled)
+        for url in ('/v1/nodes', '/v1/ports', '/v1/chassis'):
+            with instrumentation.track_request(instr, 'GET', url):
+                pass
+        self.assertEqual([('GET /v1/ports', 20.0, 22.0),
+                          ('GET /v1/chassis', 30.0, 33.0)],
+                         instr.get_timings())
+        self.assertEqual(['/v1/ports', '/v1/chassis'],
+                         [info.url for info in
+                          instr.timing_buffer.records()])
+        instr.reset_timings()
+        self.assertEqual([], instr.get_timings())
@@ -0,0 +1,268 @@
+# -*- coding: utf-8 -*-
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import io
+import os
+import stat
+import struct
+
+from ironicclient.common import iso9660
+from ironicclient.common import utils as common_utils
+from ironicclient import exc
+from ironicclient.tests.unit import utils
+
+
+SECTOR = iso9660.SECTOR_SIZE
+
+
+class _Reader(object):
+    """Reads the hierarchies of an image, to check what is written."""
+
+    def __init__(self, image):
+        self.image = image
+
+    def sector(self, number, count=1):
+        return self.image[number * SECTOR:(number + count) * SECTOR]
+
+    def descriptor(self, joliet=False):
+        return self.sector(17 if joliet else 16)
+
+    def _records(self, extent, size):
+        data = self.sector(extent, size // SECTOR)
+        pos = 0
+        while pos < len(data):
+            length = struct.unpack('B', data[pos:pos + 1])[0]
+            if not length:
+                # NOTE: the records don't cross sectors
+                pos += -pos % SECTOR or SECTOR
+                continue
+            yield data[pos:pos + length]
+            pos += length
+
+    def _system_use(self, data):
+        entries = []
+        areas = [data]
+        while areas:
+            data = areas.pop(0)
+            while len(data) >= 4:
+                signature = data[:2]
+                length = struct.unpack('B', data[2:3])[0]
+                if signature == b'CE':
+                    block, offset, size = struct.unpack('<I4xI4xI4x',
+                                                        data[4:length])
+                    pos = block * SECTOR + offset
+                    areas.append(self.image[pos:pos + size])
+                else:
+                    entries.append((signature, data[4:length]))
+                data = data[length:]
+        return entries
+
+    def list(self, extent, size, joliet=False):
+        """The entries of a directory: name -> (record, system use)."""
+        entries = {}
+        for record in self._records(extent, size):
+            name_length = struct.unpack('B', record[32:33])[0]
+            name = record[33:33 + name_length]
+            if name in (b'\x00', b'\x01'):
+                continue
+            system_use = record[33 + name_length + (1 - name_length % 2):]
+            if joliet:
+                name = name.decode('utf-16-be')
+            else:
+                system_use = self._system_use(system_use)
+                rr_name = b''.join(data[1:] for signature, data in system_use
+                                   if signature == b'NM')
+                name = (name, rr_name.decode('utf-8'))
+            entries[name] = (record, system_use)
+        return entries
+
+    def root(self, joliet=False):
+        record = self.descriptor(joliet)[156:190]
+        return struct.unpack('<I', record[2:6])[0], struct.unpack(
+            '<I', record[10:14])[0]
+
+    def content(self, record):
+        extent = struct.unpack('<I', record[2:6])[0]
+        size = struct.unpack('<I', record[10:14])[0]
+        return self.image[extent * SECTOR:extent * SECTOR + size]
+
+    def rock_ridge_tree(self, extent=None, size=None):
+        """The files and links of the Rock Ridge hierarchy, by path."""
+        if extent is None:
+            extent, size = self.root()
+        tree = {}
+        for (iso_name, name), (record, system_use) in self.list(
+                extent, size).items():
+            entries = dict(system_use)
+            mode = struct.unpack('<I', entries[b'PX'][:4])[0]
+            if stat.S_ISDIR(mode):
+                for path, value in self.rock_ridge_tree(
+                        struct.unpack('<I', record[2:6])[0],
+                        struct.unpack('<I', record[10:14])[0]).items():
+                    tree[name + '/' + path] = value
+                tree[name] = (stat.S_IMODE(mode), None)
+            elif stat.S_ISLNK(mode):
+                tree[name] = (stat.S_IMODE(mode), self._link(system_use))
+            else:
+                tree[name] = (stat.S_IMODE(mode), self.content(record))
+        return tree
+
+    def _link(self, system_use):
+        target = b''
+        for signature, data in system_use:
+            if signature != b'SL':
+                continue
+            data = data[1:]
+            while data:
+                flags, length = struct.unpack('BB', data[:2])
+                if flags & 0x08:
+                    target += b'/'
+                elif flags & 0x04:
+                    target += b'../'
+                elif flags & 0x02:
+                    target += b'./'
+                else:
+                    target += data[2:2 + length]
+                    if not flags & 0x01:
+                        target += b'/'
+                data = data[2 + length:]
+        return target.rstrip(b'/').decode('utf-8')
+
+
+class WriteImageTest(utils.BaseTestCase):
+
+    def setUp(self):
+        super(WriteImageTest, self).setUp()
+        self.tempdir = common_utils.tempdir()
+        self.dirname = self.tempdir.__enter__()
+        self.addCleanup(self.tempdir.__exit__, None, None, None)
+        self._write('openstack/latest/meta_data.json', b'{"uuid": "1"}')
+        self._write('openstack/latest/user_data', b'#!/bin/sh\n', 0o700)
+        self._write('openstack/content/0000', b'x' * (SECTOR * 2 + 1))
+        os.mkdir(os.path.join(self.dirname, 'ec2'))
+        os.symlink('openstack/latest', os.path.join(self.dirname, 'current'))
+
+    def _write(self, path, content, mode=0o644):
+        path = os.path.join(self.dirname, path)
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        with open(path, 'wb') as f:
+            f.write(content)
+        os.chmod(path, mode)
+
+    def _image(self):
+        output = io.BytesIO()
+        iso9660.write_image(self.dirname, output, volume_id='config-2',
+                            publisher='publisher', timestamp=0)
+        return _Reader(output.getvalue())
+
+    def test_volume_descriptors(self):
+        reader = self._image()
+        self.assertEqual(0, len(reader.image) % SECTOR)
+        sectors = len(reader.image) // SECTOR
+        self.assertEqual(b'\x00' * SECTOR * 16, reader.image[:SECTOR * 16])
+
+        pvd = reader.descriptor()
+        self.assertEqual(b'\x01CD001\x01', pvd[:7])
+        self.assertEqual(b'config-2'.ljust(32), pvd[40:72])
+        self.assertEqual(sectors, struct.unpack('<I', pvd[80:84])[0])
+        self.assertEqual(sectors, struct.unpack('>I', pvd[84:88])[0])
+        self.assertEqual(b'publisher'.ljust(128), pvd[318:446])
+        self.assertEqual(b'1970010100000000\x00', pvd[813:830])
+
+        svd = reader.descriptor(joliet=True)
+        self.assertEqual(b'\x02CD001\x01', svd[:7])
+        self.assertEqual(u'config-2'.ljust(16).encode('utf-16-be'),
+                         svd[40:72])
+        self.assertEqual(b'%/E', svd[88:91])
+        self.assertEqual(b'\xffCD001\x01', reader.sector(18)[:7])
+
+    def test_rock_ridge(self):
+        tree = self._image().rock_ridge_tree()
+        self.assertEqual({
+            'openstack': (0o555, None),
+            'openstack/latest': (0o555, None),
+            'openstack/latest/meta_data.json': (0o444, b'{"uuid": "1"}'),
+            'openstack/latest/user_data': (0o555, b'#!/bin/sh\n'),
+            'openstack/content': (0o555, None),
+            'openstack/content/0000': (0o444, b'x' * (SECTOR * 2 + 1)),
+            'ec2': (0o555, None),
+            'current': (0o777, 'openstack/latest'),
+        }, tree)
+
+    def test_rock_ridge_root(self):
+        reader = self._image()
+        extent, size = reader.root()
+        dot = next(reader._records(extent, size))
+        entries = reader._system_use(dot[34:])
+        self.assertEqual((b'SP', b'\xbe\xef\x00'), entries[0])
+        er = dict(entries)[b'ER']
+        self.assertEqual(b'RRIP_1991A', er[4:14])
+
+    def test_iso_names(self):
+        self._write('a-b', b'1')
+        self._write('a_b', b'2')
+        self._write('%s.json' % ('n' * 40), b'3')
+        reader = self._image()
+        names = dict((name, iso_name) for iso_name, name in
+                     reader.list(*reader.root()))
+        self.assertEqual(b'openstack', names['openstack'])
+        self.assertEqual(b'current.;1', names['current'])
+        self.assertEqual(set([b'a_b.;1', b'a_b000.;1']),
+                         set([names['a-b'], names['a_b']]))
+        self.assertEqual(b'n' * 26 + b'.json;1', names['n' * 40 + '.json'])
+
+    def test_joliet(self):
+        self._write(u'caf\xe9:menu.txt', b'menu')
+        reader = self._image()
+        root = reader.list(*reader.root(joliet=True), joliet=True)
+        self.assertEqual(set([u'openstack', u'ec2', u'caf\xe9_menu.txt;1']),
+                         set(root))
+        self.assertEqual(b'menu',
+                         reader.content(root[u'caf\xe9_menu.txt;1'][0]))
+
+        record = root[u'openstack'][0]
+        openstack = reader.list(struct.unpack('<I', record[2:6])[0],
+                                struct.unpack('<I', record[10:14])[0],
+                                joliet=True)
+        self.assertEqual(set([u'latest', u'content']), set(openstack))
+
+    def test_long_names(self):
+        name = u'\xe9' * 120
+        self._write(name, b'long')
+        link = '/'.join(['d' * 200] * 3)
+        os.symlink(link, os.path.join(self.dirname, 'link'))
+        tree = self._image().rock_ridge_tree()
+        self.assertEqual((0o444, b'long'), tree[name])
+        self.assertEqual((0o777, link), tree['link'])
+
+    def test_many_files(self):
+        for i in range(200):
+            self._write('many/file-%03d-with-a-long-name' % i, b'%d' % i)
+        tree = self._image().rock_ridge_tree()
+        for i in range(200):
+            self.assertEqual(
+                (0o444, b'%d' % i),
+                tree['many/file-%03d-with-a-long-name' % i])
+
+    def test_not_a_directory(self):
+        self.assertRaises(
+            exc.CommandError, iso9660.write_image,
+            os.path.join(self.dirname, 'openstack/latest/user_data'),
+            io.BytesIO())
+
+    def test_special_file(self):
+        os.mkfifo(os.path.join(self.dirname, 'fifo'))
+        self.assertRaises(exc.CommandError, iso9660.write_image,
+                          self.dirname, io.BytesIO())
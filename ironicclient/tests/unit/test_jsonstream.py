@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import json
+import tempfile
+
+from ironicclient.common import jsonstream
+from ironicclient.tests.unit import utils
+
+
+BODY = {
+    'next': 'http://127.0.0.1:6385/v1/nodes?marker=2',
+    'nodes': [{'uuid': '1', 'name': u'n\xf6de', 'extra': {'a': [1, 2.5]}},
+              {'uuid': '2', 'name': None, 'maintenance': True}],
+    'count': 12345,
+}
+
+
+def _chunks(data, size):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+class ListStreamTest(utils.BaseTestCase):
+
+    def _decode(self, chunks, key='nodes'):
+        stream = jsonstream.ListStream(chunks, key)
+        return list(stream), stream.extra
+
+    def test_single_chunk(self):
+        items, extra = self._decode([json.dumps(BODY).encode('utf-8')])
+        self.assertEqual(BODY['nodes'], items)
+        self.assertEqual({'next': BODY['next'], 'count': 12345}, extra)
+
+    def test_small_chunks(self):
+        # NOTE: splits numbers, strings and multi-byte characters
+        data = json.dumps(BODY, indent=2, ensure_ascii=False).encode('utf-8')
+        for size in (1, 2, 3, 7):
+            items, extra = self._decode(_chunks(data, size))
+            self.assertEqual(BODY['nodes'], items)
+            self.assertEqual(12345, extra['count'])
+
+    def test_text_chunks(self):
+        items, extra = self._decode(_chunks(json.dumps(BODY), 5))
+        self.assertEqual(BODY['nodes'], items)
+
+    def test_lazy(self):
+        data = json.dumps({'nodes': [{'uuid': '1'}, {'uuid': '2'}]})
+        chunks = iter(_chunks(data.encode('utf-8'), 4))
+        stream = iter(jsonstream.ListStream(chunks, 'nodes'))
+        self.assertEqual({'uuid': '1'}, next(stream))
+        self.assertNotEqual([], list(chunks))
+
+    def test_empty_list(self):
+        self.assertEqual(([], {'next': None}),
+                         self._decode([b'{"nodes": [ ], "next": null}']))
+
+    def test_empty_object(self):
+        self.assertEqual(([], {}), self._decode([b' { } ']))
+
+    def test_empty_body(self):
+        self.assertEqual(([], {}), self._decode([]))
+
+    def test_missing_key(self):
+        self.assertEqual(([], {'ports': []}),
+                         self._decode([b'{"ports": []}']))
+
+    def test_not_a_list(self):
+        self.assertEqual(([{'uuid': '1'}], {}),
+                         self._decode([b'{"nodes": {"uuid": "1"}}']))
+
+    def test_not_an_object(self):
+        self.assertEqual(([], {}), self._decode([b'[1, 2]']))
+
+    def test_invalid(self):
+        self.assertRaises(ValueError, self._decode,
+                          [b'{"nodes": [{"uuid": "1"} {"uuid": "2"}]}'])
+
+    def test_truncated(self):
+        self.assertRaises(ValueError, self._decode,
+                          [b'{"nodes": [{"uuid": "1"}, {"uu'])
+
+    def test_extra_data(self):
+        self.assertRaises(ValueError, self._decode,
+                          [b'{"nodes": []} {}'])
+
+    def test_iterate_twice(self):
+        stream = jsonstream.ListStream([b'{"nodes": []}'], 'nodes')
+        list(stream)
+        self.assertRaises(RuntimeError, list, stream)
+
+
+class DumpsTest(utils.BaseTestCase):
+
+    def setUp(self):
+        super(DumpsTest, self).setUp()
+        self.file = tempfile.NamedTemporaryFile()
+        self.addCleanup(self.file.close)
+
+    def _string(self, content, **kwargs):
+        self.file.write(content)
+        self.file.flush()
+        return jsonstream.FileString(self.file.name, **kwargs)
+
+    def test_no_stream(self):
+        self.assertEqual(json.dumps(BODY), jsonstream.dumps(BODY))
+
+    def test_file_string(self):
+        content = u'l\xefne 1\n"quoted"\tl\xefne 2'
+        body = jsonstream.dumps({'target': 'active',
+                                 'configdrive': self._string(
+                                     content.encode('utf-8'))})
+        data = body.read()
+        self.assertEqual(len(data), len(body))
+        self.assertEqual({'target': 'active', 'configdrive': content},
+                         json.loads(data.decode('utf-8')))
+
+    def test_file_string_escaped(self):
+        string = self._string(b'H4sIAAAA', escaped=True)
+        self.assertEqual(8, string.size)
+        body = jsonstream.dumps([string, 'a'])
+        self.assertEqual(b'["H4sIAAAA", "a"]', body.read())
+
+    def test_file_string_split_character(self):
+        content = u'\xe9' * jsonstream.CHUNK_SIZE
+        string = self._string(content.encode('utf-8'))
+        self.assertEqual(content, json.loads(
+            '"%s"' % b''.join(string).decode('ascii')))
+
+    def test_streamed_string_abstract(self):
+        class NoIter(jsonstream.StreamedString):
+            size = 1
+
+        self.assertRaises(TypeError, NoIter)
+
+    def test_read_chunks(self):
+        body = jsonstream.dumps({'a': self._string(b'abcdef', escaped=True)})
+        chunks = list(iter(lambda: body.read(4), b''))
+        self.assertEqual([b'{"a"', b': "a', b'bcde', b'f"}'], chunks)
+        self.assertEqual(len(body), body.tell())
+
+    def test_rewind(self):
+        body = jsonstream.dumps({'a': self._string(b'abc', escaped=True)})
+        data = body.read()
+        body.seek(0)
+        self.assertEqual(0, body.tell())
+        self.assertEqual(data, body.read())
+        self.assertRaises(IOError, body.seek, 2)
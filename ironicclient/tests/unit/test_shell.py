@@ -12,6 +12,7 @@
 #   License for the specific language governing permissions and limitations
 #   under the License.
 
+import datetime
 import json
 import os
 import re
@@ -117,6 +118,148 @@ class ShellTest(utils.BaseTestCase):
                 self.assertThat(help_text,
                                 matchers.MatchesRegex(r, self.re_options))
 
+    def test_get_commands(self):
+        _shell = ironic_shell.IronicShell()
+        self.assertEqual([], _shell._get_commands([]))
+        self.assertEqual(['node-list'],
+                         _shell._get_commands(['node-list', '--detail']))
+        self.assertEqual([], _shell._get_commands(['help']))
+        self.assertEqual(['node-show'],
+                         _shell._get_commands(['help', 'node-show']))
+        self.assertIsNone(_shell._get_commands(['bash-completion']))
+
+    def test_help_lazy(self):
+        import_module = ironic_shell.utils.import_versioned_module
+        with mock.patch.object(ironic_shell.utils, 'import_versioned_module',
+                               wraps=import_module) as mock_import:
+            self.shell('help node-show')
+        self.assertEqual([mock.call(1, 'shell'), mock.call('1', 'node_shell')],
+                         mock_import.call_args_list)
+
+    @mock.patch.object(ironic_shell.iroclient, 'Client', autospec=True)
+    @mock.patch.object(ironic_shell.IronicShell, '_get_keystone_auth',
+                       autospec=True)
+    @mock.patch.object(ironic_shell.kssession.Session,
+                       'load_from_cli_options')
+    def test_token_cache(self, mock_session, mock_auth, mock_client):
+        self.make_env()
+        tempdir = self.useFixture(fixtures.TempDir()).path
+        self.useFixture(fixtures.EnvironmentVariable('XDG_CACHE_HOME',
+                                                     tempdir))
+        auth = mock_auth.return_value
+        auth.get_endpoint.return_value = 'http://ironic'
+        auth.get_access.return_value.auth_token = 'token'
+        auth.get_access.return_value.expires = (
+            datetime.datetime.utcnow() + datetime.timedelta(hours=1))
+
+        self.shell('--token-cache node-list')
+        self.assertEqual(mock_session.return_value,
+                         mock_client.call_args[1]['session'])
+
+        mock_session.reset_mock()
+        mock_auth.reset_mock()
+        mock_client.reset_mock()
+        self.shell('--token-cache node-list')
+        self.assertFalse(mock_auth.called)
+        self.assertFalse(mock_session.called)
+        self.assertEqual((1, 'http://ironic'), mock_client.call_args[0])
+        self.assertEqual('token', mock_client.call_args[1]['token'])
+
+        # a rejected token is forgotten
+        mock_client.return_value.node.list.side_effect = exc.Unauthorized
+        self.assertRaises(exc.CommandError, self.shell,
+                          '--token-cache node-list')
+        mock_client.return_value.node.list.side_effect = None
+        self.shell('--token-cache node-list')
+        self.assertTrue(mock_auth.called)
+
+    @mock.patch.object(ironic_shell.iroclient, 'Client', autospec=True)
+    @mock.patch.object(ironic_shell.IronicShell, '_get_keystone_auth',
+                       autospec=True)
+    @mock.patch.object(ironic_shell.kssession.Session,
+                       'load_from_cli_options')
+    def test_token_cache_key_without_password(self, mock_session, mock_auth,
+                                              mock_client):
+        self.make_env()
+        self.useFixture(fixtures.EnvironmentVariable(
+            'XDG_CACHE_HOME', self.useFixture(fixtures.TempDir()).path))
+        auth = mock_auth.return_value
+        auth.get_endpoint.return_value = 'http://ironic'
+        auth.get_access.return_value.auth_token = 'token'
+        auth.get_access.return_value.expires = (
+            datetime.datetime.utcnow() + datetime.timedelta(hours=1))
+        with mock.patch.object(ironic_shell.token_cache, 'cache_key',
+                               autospec=True) as mock_key:
+            mock_key.return_value = 'key'
+            self.shell('--token-cache node-list')
+        self.assertNotIn('password', mock_key.call_args[1])
+        self.assertNotIn(FAKE_ENV['OS_PASSWORD'],
+                         mock_key.call_args[1].values())
+
+    @mock.patch.object(ironic_shell.iroclient, 'Client', autospec=True)
+    @mock.patch.object(ironic_shell.IronicShell, '_get_keystone_auth',
+                       autospec=True)
+    @mock.patch.object(ironic_shell.kssession.Session,
+                       'load_from_cli_options')
+    def test_no_token_cache(self, mock_session, mock_auth, mock_client):
+        self.make_env()
+        with mock.patch.object(ironic_shell.token_cache, 'get_disk_cache',
+                               autospec=True) as mock_cache:
+            self.shell('node-list')
+            self.shell('node-list')
+        self.assertFalse(mock_cache.called)
+        self.assertEqual(2, mock_auth.call_count)
+
+    def _batch_file(self, content):
+        path = os.path.join(self.useFixture(fixtures.TempDir()).path,
+                            'commands')
+        with open(path, 'w') as f:
+            f.write(content)
+        return path
+
+    @mock.patch.object(ironic_shell.iroclient, 'Client', autospec=True)
+    def test_batch(self, mock_client):
+        path = self._batch_file('node-delete node1 node2\n'
+                                '# comment\n'
+                                'port-delete port1\n')
+        stderr = self.useFixture(fixtures.MonkeyPatch('sys.stderr',
+                                                      six.StringIO()))
+        out = self.shell('--os-auth-token token --ironic-url http://ironic '
+                         'batch --file %s --concurrency 2' % path)
+        self.assertEqual(1, mock_client.call_count)
+        client = mock_client.return_value
+        client.node.delete.assert_has_calls([mock.call('node1'),
+                                             mock.call('node2')])
+        client.port.delete.assert_called_once_with('port1')
+        self.assertEqual('Deleted node node1\nDeleted node node2\n'
+                         'Deleted port port1\n', out)
+        self.assertEqual('1: 0\n3: 0\n', stderr.new_value.getvalue())
+
+    @mock.patch.object(ironic_shell.iroclient, 'Client', autospec=True)
+    def test_batch_failed(self, mock_client):
+        mock_client.return_value.node.delete.side_effect = exc.NotFound
+        path = self._batch_file('node-delete node1\nport-delete port1\n')
+        self.useFixture(fixtures.MonkeyPatch('sys.stderr', six.StringIO()))
+        error = self.assertRaises(
+            exc.CommandError, self.shell,
+            '--os-auth-token token --ironic-url http://ironic '
+            'batch --file %s' % path)
+        self.assertIn('1 command(s) out of 2 failed', str(error))
+        mock_client.return_value.port.delete.assert_called_once_with('port1')
+
+    @mock.patch.object(ironic_shell.iroclient, 'Client', autospec=True)
+    def test_batch_invalid(self, mock_client):
+        self.useFixture(fixtures.MonkeyPatch('sys.stderr', six.StringIO()))
+        for content in ('node-delete node1\nnode-foo\n',
+                        'node-delete node1\nhelp\n'):
+            path = self._batch_file(content)
+            error = self.assertRaises(
+                exc.CommandError, self.shell,
+                '--os-auth-token token --ironic-url http://ironic '
+                'batch --file %s' % path)
+            self.assertIn('Line 2', str(error))
+        self.assertFalse(mock_client.return_value.node.delete.called)
+
     def test_auth_param(self):
         self.make_env(exclude='OS_USERNAME')
         self.test_help()
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import datetime
+import os
+import stat
+import time
+
+import fixtures
+import mock
+
+from ironicclient.common import token_cache
+from ironicclient.tests.unit import utils
+
+
+class CacheKeyTest(utils.BaseTestCase):
+
+    def test_cache_key(self):
+        key = token_cache.cache_key(auth_url='http://ks', username='user',
+                                    project_id=None)
+        self.assertEqual(key, token_cache.cache_key(
+            username='user', auth_url='http://ks'))
+        self.assertNotEqual(key, token_cache.cache_key(
+            auth_url='http://ks', username='other'))
+        self.assertNotEqual(key, token_cache.cache_key(
+            auth_url='http://ks', username='user', project_id='project'))
+
+    def test_expiration_time(self):
+        expires = datetime.datetime(2015, 1, 1, 0, 0, 10)
+        self.assertEqual(1420070410, token_cache.expiration_time(expires))
+
+
+class TokenCacheTest(utils.BaseTestCase):
+
+    def setUp(self):
+        super(TokenCacheTest, self).setUp()
+        self.tempdir = self.useFixture(fixtures.TempDir()).path
+        self.path = os.path.join(self.tempdir, 'ironic', 'tokens')
+        self.cache = token_cache.TokenCache(self.path)
+        self.expires = time.time() + 3600
+
+    def test_get_set(self):
+        self.assertIsNone(self.cache.get('key'))
+        self.cache.set('key', 'token', 'http://ironic', self.expires)
+        self.assertEqual(('token', 'http://ironic'),
+                         token_cache.TokenCache(self.path).get('key'))
+        self.assertIsNone(self.cache.get('other'))
+
+    def test_permissions(self):
+        self.cache.set('key', 'token', 'http://ironic', self.expires)
+        self.assertEqual(0o700, stat.S_IMODE(os.stat(self.path).st_mode))
+        mode = os.stat(os.path.join(self.path, 'key.json')).st_mode
+        self.assertEqual(0o600, stat.S_IMODE(mode))
+
+    def test_ignore_accessible_to_others(self):
+        self.cache.set('key', 'token', 'http://ironic', self.expires)
+        os.chmod(os.path.join(self.path, 'key.json'), 0o644)
+        self.assertIsNone(self.cache.get('key'))
+
+    def test_expired(self):
+        self.cache.set('key', 'token', 'http://ironic', 1000)
+        with mock.patch.object(token_cache.time, 'time', autospec=True,
+                               return_value=939):
+            self.assertEqual(('token', 'http://ironic'),
+                             self.cache.get('key'))
+        with mock.patch.object(token_cache.time, 'time', autospec=True,
+                               return_value=940):
+            self.assertIsNone(self.cache.get('key'))
+        self.assertFalse(os.path.exists(os.path.join(self.path, 'key.json')))
+
+    def test_invalidate(self):
+        self.cache.set('key', 'token', 'http://ironic', self.expires)
+        self.cache.invalidate('key')
+        self.assertIsNone(self.cache.get('key'))
+        self.cache.invalidate('key')
+
+    def test_corrupted(self):
+        os.makedirs(self.path, 0o700)
+        with open(os.path.join(self.path, 'key.json'), 'w') as f:
+            f.write('{not json')
+        os.chmod(os.path.join(self.path, 'key.json'), 0o600)
+        self.assertIsNone(self.cache.get('key'))
+
+    def test_not_writable(self):
+        cache = token_cache.TokenCache('/proc/nope/tokens')
+        cache.set('key', 'token', 'http://ironic', self.expires)
+        self.assertIsNone(cache.get('key'))
+
+    def test_disk_cache(self):
+        self.useFixture(fixtures.EnvironmentVariable('XDG_CACHE_HOME',
+                                                     self.tempdir))
+        self.assertEqual(
+            os.path.join(self.tempdir, 'python-ironicclient', 'tokens'),
+            token_cache.get_disk_cache().path)
@@ -15,11 +15,15 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import base64
+import gzip
+import io
 import os
 import subprocess
 
 import mock
 
+from ironicclient.common import iso9660
 from ironicclient.common import utils
 from ironicclient import exc
 from ironicclient.tests.unit import utils as test_utils
@@ -177,6 +181,27 @@ class CommonFiltersTest(test_utils.BaseTestCase):
             result = utils.common_filters(**{key: 'test'})
             self.assertEqual(['%s=test' % key], result)
 
+    def test_fields(self):
+        result = utils.common_filters(fields=['uuid', 'name'])
+        self.assertEqual(['fields=uuid,name'], result)
+
+
+class SelectFieldsTest(test_utils.BaseTestCase):
+    def test_select_fields(self):
+        self.assertEqual(
+            (['name', 'uuid', 'extra'], ['Name', 'UUID', 'Extra']),
+            utils.select_fields([['name', 'uuid'], ['extra']],
+                                ['uuid', 'name', 'extra'],
+                                ['UUID', 'Name', 'Extra']))
+
+    def test_select_fields_none(self):
+        self.assertEqual((None, None),
+                         utils.select_fields(None, ['uuid'], ['UUID']))
+
+    def test_select_fields_invalid(self):
+        self.assertRaises(exc.CommandError, utils.select_fields,
+                          [['uuid', 'foo']], ['uuid'], ['UUID'])
+
 
 @mock.patch.object(subprocess, 'Popen')
 class MakeConfigDriveTest(test_utils.BaseTestCase):
@@ -197,17 +222,51 @@ class MakeConfigDriveTest(test_utils.BaseTestCase):
         mock_popen.return_value = fake_process
 
         with utils.tempdir() as dirname:
-            utils.make_configdrive(dirname)
+            utils.make_configdrive(dirname, genisoimage=True)
 
         mock_popen.assert_called_once_with(self.genisoimage_cmd,
                                            stderr=subprocess.PIPE,
                                            stdout=subprocess.PIPE)
         fake_process.communicate.assert_called_once_with()
 
+    def test_write_configdrive(self, mock_popen):
+        iso = b'fake iso image ' * 10000
+
+        def fake_popen(cmd, **kwargs):
+            with open(cmd[2], 'wb') as f:
+                f.write(iso)
+            fake_process = mock.Mock(returncode=0)
+            fake_process.communicate.return_value = ('', '')
+            return fake_process
+
+        mock_popen.side_effect = fake_popen
+        output = io.BytesIO()
+        with utils.tempdir() as dirname:
+            utils.write_configdrive(dirname, output, genisoimage=True)
+
+        compressed = base64.b64decode(output.getvalue())
+        self.assertEqual(
+            iso, gzip.GzipFile(fileobj=io.BytesIO(compressed)).read())
+
+    @mock.patch.object(iso9660, 'write_image', autospec=True)
+    def test_make_configdrive_builtin(self, mock_write, mock_popen):
+        mock_write.side_effect = lambda path, f, **kwargs: f.write(b'iso')
+        with utils.tempdir() as dirname:
+            configdrive = utils.make_configdrive(dirname)
+            mock_write.assert_called_once_with(
+                dirname, mock.ANY, volume_id='config-2',
+                publisher='ironicclient-configdrive 0.1')
+
+        compressed = base64.b64decode(configdrive)
+        self.assertEqual(
+            b'iso', gzip.GzipFile(fileobj=io.BytesIO(compressed)).read())
+        self.assertFalse(mock_popen.called)
+
     @mock.patch.object(os, 'access')
     def test_make_configdrive_non_readable_dir(self, mock_access, mock_popen):
         mock_access.return_value = False
-        self.assertRaises(exc.CommandError, utils.make_configdrive, 'fake-dir')
+        self.assertRaises(exc.CommandError, utils.make_configdrive, 'fake-dir',
+                          genisoimage=True)
         mock_access.assert_called_once_with('fake-dir', os.R_OK)
         self.assertFalse(mock_popen.called)
 
@@ -216,7 +275,8 @@ class MakeConfigDriveTest(test_utils.BaseTestCase):
         mock_access.return_value = True
         mock_popen.side_effect = OSError('boom')
 
-        self.assertRaises(exc.CommandError, utils.make_configdrive, 'fake-dir')
+        self.assertRaises(exc.CommandError, utils.make_configdrive, 'fake-dir',
+                          genisoimage=True)
         mock_access.assert_called_once_with('fake-dir', os.R_OK)
         mock_popen.assert_called_once_with(self.genisoimage_cmd,
                                            stderr=subprocess.PIPE,
@@ -229,9 +289,21 @@ class MakeConfigDriveTest(test_utils.BaseTestCase):
         fake_process.communicate.return_value = ('', '')
         mock_popen.return_value = fake_process
 
-        self.assertRaises(exc.CommandError, utils.make_configdrive, 'fake-dir')
+        self.assertRaises(exc.CommandError, utils.make_configdrive, 'fake-dir',
+                          genisoimage=True)
         mock_access.assert_called_once_with('fake-dir', os.R_OK)
         mock_popen.assert_called_once_with(self.genisoimage_cmd,
                                            stderr=subprocess.PIPE,
                                            stdout=subprocess.PIPE)
         fake_process.communicate.assert_called_once_with()
+
+
+class Base64WriterTest(test_utils.BaseTestCase):
+
+    def test_write(self):
+        output = io.BytesIO()
+        writer = utils._Base64Writer(output)
+        for chunk in (b'a', b'bcde', b'', b'fghij', b'k'):
+            writer.write(chunk)
+        writer.close()
+        self.assertEqual(base64.b64encode(b'abcdefghijk'), output.getvalue())
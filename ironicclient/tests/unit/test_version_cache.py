@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import os
+import stat
+import time
+
+import fixtures
+import mock
+
+from ironicclient.common import version_cache
+from ironicclient.tests.unit import utils
+
+
+class VersionCacheTest(utils.BaseTestCase):
+
+    def setUp(self):
+        super(VersionCacheTest, self).setUp()
+        self.tempdir = self.useFixture(fixtures.TempDir()).path
+        self.path = os.path.join(self.tempdir, 'ironic', 'versions.json')
+
+    def test_memory(self):
+        cache = version_cache.VersionCache()
+        self.assertIsNone(cache.get('http://ironic'))
+        cache.set('http://ironic', '1.1', '1.9')
+        self.assertEqual(('1.1', '1.9'), cache.get('http://ironic'))
+        self.assertIsNone(cache.get('http://other'))
+
+    @mock.patch.object(version_cache.time, 'time', autospec=True)
+    def test_ttl(self, mock_time):
+        cache = version_cache.VersionCache(ttl=10)
+        mock_time.return_value = 100
+        cache.set('http://ironic', '1.1', '1.9')
+        mock_time.return_value = 110
+        self.assertEqual(('1.1', '1.9'), cache.get('http://ironic'))
+        mock_time.return_value = 111
+        self.assertIsNone(cache.get('http://ironic'))
+
+    def test_invalidate(self):
+        cache = version_cache.VersionCache()
+        cache.set('http://ironic', '1.1', '1.9')
+        cache.invalidate('http://ironic')
+        self.assertIsNone(cache.get('http://ironic'))
+
+    def test_disk(self):
+        version_cache.VersionCache(self.path).set('http://ironic', '1.1',
+                                                  '1.9')
+        self.assertEqual(('1.1', '1.9'),
+                         version_cache.VersionCache(self.path).get(
+                             'http://ironic'))
+        mode = os.stat(self.path).st_mode
+        self.assertEqual(0, mode & (stat.S_IRWXG | stat.S_IRWXO))
+
+    def test_disk_merge(self):
+        version_cache.VersionCache(self.path).set('http://ironic', '1.1',
+                                                  '1.9')
+        version_cache.VersionCache(self.path).set('http://other', '1.1',
+                                                  '1.4')
+        cache = version_cache.VersionCache(self.path)
+        self.assertEqual(('1.1', '1.9'), cache.get('http://ironic'))
+        self.assertEqual(('1.1', '1.4'), cache.get('http://other'))
+
+    def test_disk_drops_expired(self):
+        cache = version_cache.VersionCache(self.path, ttl=10)
+        cache.set('http://ironic', '1.1', '1.9')
+        with mock.patch.object(version_cache.time, 'time', autospec=True,
+                               return_value=time.time() + 60):
+            cache.set('http://other', '1.1', '1.4')
+        with open(self.path) as f:
+            self.assertNotIn('http://ironic', f.read())
+
+    def test_disk_corrupted(self):
+        os.makedirs(os.path.dirname(self.path))
+        with open(self.path, 'w') as f:
+            f.write('{not json')
+        cache = version_cache.VersionCache(self.path)
+        self.assertIsNone(cache.get('http://ironic'))
+        cache.set('http://ironic', '1.1', '1.9')
+        self.assertEqual(('1.1', '1.9'),
+                         version_cache.VersionCache(self.path).get(
+                             'http://ironic'))
+
+    def test_disk_not_writable(self):
+        cache = version_cache.VersionCache('/proc/nope/versions.json')
+        cache.set('http://ironic', '1.1', '1.9')
+        self.assertEqual(('1.1', '1.9'), cache.get('http://ironic'))
+
+    def test_default_cache_dir(self):
+        self.useFixture(fixtures.EnvironmentVariable('XDG_CACHE_HOME',
+                                                     self.tempdir))
+        self.assertEqual(os.path.join(self.tempdir, 'python-ironicclient'),
+                         version_cache.default_cache_dir())
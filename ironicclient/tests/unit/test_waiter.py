@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import mock
+
+from ironicclient.common import waiter
+from ironicclient import exc
+from ironicclient.tests.unit import utils
+
+
+class PollIntervalTest(utils.BaseTestCase):
+
+    def test_backoff(self):
+        interval = waiter.PollInterval(2, 10, 2)
+        self.assertEqual([2, 4, 8, 10, 10],
+                         [interval.next(False) for i in range(5)])
+
+    def test_reset_on_change(self):
+        interval = waiter.PollInterval(2, 10, 2)
+        interval.next(False)
+        interval.next(False)
+        self.assertEqual(2, interval.next(True))
+        self.assertEqual(4, interval.next(False))
+
+
+@mock.patch.object(waiter.time, 'sleep', autospec=True)
+@mock.patch.object(waiter.time, 'time', autospec=True, return_value=100.0)
+class WaitTest(utils.BaseTestCase):
+
+    def test_done(self, mock_time, mock_sleep):
+        poll = mock.Mock(side_effect=[(False, None, 'a'), (False, None, 'a'),
+                                      (True, 'result', 'b')])
+        self.assertEqual('result', waiter.wait(
+            poll, 'test', interval=waiter.PollInterval(1, 10, 2)))
+        self.assertEqual([mock.call(1), mock.call(2)],
+                         mock_sleep.call_args_list)
+
+    def test_faster_after_change(self, mock_time, mock_sleep):
+        poll = mock.Mock(side_effect=[(False, None, 'a'), (False, None, 'a'),
+                                      (False, None, 'b'), (True, None, 'c')])
+        waiter.wait(poll, 'test', interval=waiter.PollInterval(1, 10, 2))
+        self.assertEqual([mock.call(1), mock.call(2), mock.call(1)],
+                         mock_sleep.call_args_list)
+
+    def test_timeout(self, mock_time, mock_sleep):
+        mock_time.side_effect = [100.0, 101.0, 104.0, 105.0]
+        poll = mock.Mock(return_value=(False, None, 'a'))
+        error = self.assertRaises(
+            exc.StateTransitionTimeout, waiter.wait, poll, 'the test',
+            timeout=5, interval=waiter.PollInterval(3, 10, 2))
+        self.assertIn('the test', str(error))
+        self.assertEqual([mock.call(3), mock.call(1.0)],
+                         mock_sleep.call_args_list)
+        self.assertEqual(3, poll.call_count)
+
+    def test_failed(self, mock_time, mock_sleep):
+        poll = mock.Mock(side_effect=exc.StateTransitionFailed('boom'))
+        self.assertRaises(exc.StateTransitionFailed, waiter.wait, poll,
+                          'test')
+        self.assertFalse(mock_sleep.called)
@@ -17,6 +17,7 @@
 
 import copy
 import datetime
+import json
 import os
 
 import fixtures
@@ -25,6 +26,8 @@ import six
 import testtools
 
 from ironicclient.common import http
+from ironicclient.common import jsonstream
+from ironicclient.common import version_cache
 
 
 class BaseTestCase(testtools.TestCase):
@@ -32,6 +35,9 @@ class BaseTestCase(testtools.TestCase):
     def setUp(self):
         super(BaseTestCase, self).setUp()
         self.useFixture(fixtures.FakeLogger())
+        self.useFixture(fixtures.MonkeyPatch(
+            'ironicclient.common.version_cache.MEMORY_CACHE',
+            version_cache.VersionCache()))
 
         # If enabled, stdout and/or stderr is captured and will appear in
         # test results if that test fails.
@@ -62,6 +68,12 @@ class FakeAPI(object):
         response = self._request(*args, **kwargs)
         return FakeResponse(response[0]), response[1]
 
+    def json_stream_request(self, method, url, response_key, **kwargs):
+        response = self._request(method, url, **kwargs)
+        body_iter = six.StringIO(json.dumps(response[1]))
+        return (FakeResponse(response[0]),
+                jsonstream.ListStream(body_iter, response_key))
+
 
 class FakeConnection(object):
     def __init__(self, response=None):
@@ -77,6 +89,9 @@ class FakeConnection(object):
     def getresponse(self):
         return self._response
 
+    def close(self):
+        pass
+
     def __repr__(self):
         return ("FakeConnection(response=%s)" % (self._response))
 
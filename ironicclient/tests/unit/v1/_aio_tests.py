@@ -0,0 +1,343 @@
+# -*- coding: utf-8 -*-
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Tests of ironicclient.v1.aio, imported by test_aio on Python 3.5 or newer.
+"""
+
+import asyncio
+import gzip
+import json
+
+from ironicclient.common import http
+from ironicclient import exc
+from ironicclient.tests.unit import utils
+from ironicclient.v1 import aio
+
+
+NODE1 = {'uuid': '66666666-7777-8888-9999-000000000000',
+         'name': 'node1'}
+NODE2 = {'uuid': '66666666-7777-8888-9999-111111111111',
+         'name': 'node2'}
+
+
+class FakeServer(object):
+    """A HTTP/1.1 server sending the queued responses.
+
+    Each response is a (status, headers, body, mode) tuple; mode is
+    'length' to send a Content-Length, 'chunked', 'close' to end the body
+    by closing the connection, or 'drop' to close it without answering.
+    """
+
+    def __init__(self):
+        self.responses = []
+        self.requests = []
+        self.connections = 0
+        self.server = None
+        self.port = None
+
+    def add(self, status=200, body=None, headers=None, mode='length'):
+        headers = dict(headers or {})
+        if body is not None:
+            headers.setdefault('Content-Type', 'application/json')
+            body = json.dumps(body).encode('utf-8')
+            if headers.get('Content-Encoding') == 'gzip':
+                body = gzip.compress(body)
+        self.responses.append((status, headers, body or b'', mode))
+
+    async def start(self):
+        self.server = await asyncio.start_server(self._handle, '127.0.0.1',
+                                                 0)
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    def stop(self):
+        self.server.close()
+
+    async def _handle(self, reader, writer):
+        self.connections += 1
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            method, path, _version = line.decode('latin-1').split()
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b''):
+                    break
+                key, value = line.decode('latin-1').split(':', 1)
+                headers[key.strip().lower()] = value.strip()
+            body = await reader.readexactly(
+                int(headers.get('content-length', 0)))
+            self.requests.append((method, path, headers, body))
+
+            status, resp_headers, resp_body, mode = self.responses.pop(0)
+            if mode == 'drop':
+                break
+            lines = ['HTTP/1.1 %d Reason' % status]
+            lines.extend('%s: %s' % item for item in resp_headers.items())
+            if mode == 'length':
+                lines.append('Content-Length: %d' % len(resp_body))
+            elif mode == 'chunked':
+                lines.append('Transfer-Encoding: chunked')
+                half = len(resp_body) // 2
+                resp_body = b''.join(
+                    b'%x\r\n%s\r\n' % (len(chunk), chunk)
+                    for chunk in (resp_body[:half], resp_body[half:])
+                    if chunk) + b'0\r\n\r\n'
+            writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1'))
+            writer.write(resp_body)
+            await writer.drain()
+            if mode == 'close':
+                break
+        writer.close()
+
+
+class AsyncClientTest(utils.BaseTestCase):
+
+    def setUp(self):
+        super(AsyncClientTest, self).setUp()
+        self.loop = asyncio.new_event_loop()
+        self.addCleanup(self.loop.close)
+        self.server = FakeServer()
+        self._run(self.server.start())
+        self.addCleanup(self.server.stop)
+        self.client = self.make_client()
+
+    def make_client(self, **kwargs):
+        kwargs.setdefault('max_retries', 2)
+        kwargs.setdefault('retry_interval', 0)
+        client = aio.Client('http://127.0.0.1:%d/v1' % self.server.port,
+                            token='fake-token', **kwargs)
+        self.addCleanup(client.close)
+        return client
+
+    def _run(self, coro):
+        return self.loop.run_until_complete(coro)
+
+    def test_get(self):
+        self.server.add(body=NODE1)
+        node = self._run(self.client.node.get(NODE1['uuid']))
+        self.assertEqual(NODE1['name'], node.name)
+        method, path, headers, body = self.server.requests[0]
+        self.assertEqual(('GET', '/v1/nodes/%s' % NODE1['uuid']),
+                         (method, path))
+        self.assertEqual(http.DEFAULT_VER,
+                         headers['x-openstack-ironic-api-version'])
+        self.assertEqual('fake-token', headers['x-auth-token'])
+        self.assertEqual('127.0.0.1:%d' % self.server.port, headers['host'])
+
+    def test_connection_reused(self):
+        self.server.add(body=NODE1)
+        self.server.add(body=NODE2)
+        self._run(self.client.node.get(NODE1['uuid']))
+        node = self._run(self.client.node.get(NODE2['uuid']))
+        self.assertEqual(NODE2['name'], node.name)
+        self.assertEqual(1, self.server.connections)
+
+    def test_chunked_response(self):
+        self.server.add(body=NODE1, mode='chunked')
+        self.server.add(body=NODE2)
+        self.assertEqual(NODE1, self._run(
+            self.client.node.get(NODE1['uuid'])).to_dict())
+        self._run(self.client.node.get(NODE2['uuid']))
+        self.assertEqual(1, self.server.connections)
+
+    def test_gzip_response(self):
+        self.server.add(body=NODE1, headers={'Content-Encoding': 'gzip'},
+                        mode='chunked')
+        self.assertEqual(NODE1, self._run(
+            self.client.node.get(NODE1['uuid'])).to_dict())
+        self.assertEqual('gzip, deflate',
+                         self.server.requests[0][2]['accept-encoding'])
+
+    def test_no_compression(self):
+        self.client = self.make_client(compression=False)
+        self.server.add(body=NODE1)
+        self._run(self.client.node.get(NODE1['uuid']))
+        self.assertNotIn('accept-encoding', self.server.requests[0][2])
+
+    def test_response_ended_by_close(self):
+        self.server.add(body=NODE1, mode='close')
+        self.server.add(body=NODE2)
+        self.assertEqual(NODE1, self._run(
+            self.client.node.get(NODE1['uuid'])).to_dict())
+        self._run(self.client.node.get(NODE2['uuid']))
+        self.assertEqual(2, self.server.connections)
+
+    def test_dropped_connection_reopened(self):
+        self.server.add(body=NODE1)
+        self.server.add(mode='drop')
+        self.server.add(body=NODE2)
+        self._run(self.client.node.get(NODE1['uuid']))
+        node = self._run(self.client.node.get(NODE2['uuid']))
+        self.assertEqual(NODE2['name'], node.name)
+        self.assertEqual(2, self.server.connections)
+
+    def test_dropped_new_connection(self):
+        self.server.add(mode='drop')
+        self.assertRaises(exc.ConnectionRefused, self._run,
+                          self.client.node.get(NODE1['uuid']))
+
+    def test_connection_refused(self):
+        client = aio.Client('http://127.0.0.1:%d/v1' % self.server.port)
+        self.server.stop()
+        self._run(self.server.server.wait_closed())
+        self.assertRaises(exc.ConnectionRefused, self._run,
+                          client.node.get(NODE1['uuid']))
+
+    def test_unsupported_scheme(self):
+        self.assertRaises(exc.EndpointException, aio.Client,
+                          'ftp://localhost/v1')
+
+    def test_error(self):
+        error_body = {'error_message': json.dumps(
+            {'faultstring': 'Node not found', 'debuginfo': None})}
+        self.server.add(status=404, body=error_body)
+        error = self.assertRaises(exc.NotFound, self._run,
+                                  self.client.node.get(NODE1['uuid']))
+        self.assertIn('Node not found', str(error))
+
+    def test_conflict_retried(self):
+        self.server.add(status=409, body={})
+        self.server.add(body=NODE1)
+        node = self._run(self.client.node.get(NODE1['uuid']))
+        self.assertEqual(NODE1['name'], node.name)
+        self.assertEqual(2, len(self.server.requests))
+        self.assertEqual(1, self.client.http_client.retry_policy.stats[
+            'retries'])
+
+    def test_conflict_retries_exhausted(self):
+        for i in range(3):
+            self.server.add(status=409, body={})
+        self.assertRaises(exc.Conflict, self._run,
+                          self.client.node.set_power_state(NODE1['uuid'],
+                                                           'on'))
+        self.assertEqual(3, len(self.server.requests))
+
+    def test_version_negotiated(self):
+        self.server.add(status=406, body={}, headers={
+            'X-OpenStack-Ironic-API-Minimum-Version': '1.1',
+            'X-OpenStack-Ironic-API-Maximum-Version': '1.4'})
+        self.server.add(body=NODE1)
+        self._run(self.client.node.get(NODE1['uuid']))
+        self.assertEqual('1.4', self.server.requests[1][2][
+            'x-openstack-ironic-api-version'])
+        self.assertEqual('negotiated',
+                         self.client.http_client.api_version_select_state)
+
+    def test_version_negotiated_without_headers(self):
+        self.server.add(status=406, body={})
+        self.server.add(body={}, headers={
+            'X-OpenStack-Ironic-API-Minimum-Version': '1.1',
+            'X-OpenStack-Ironic-API-Maximum-Version': '1.4'})
+        self.server.add(body=NODE1)
+        self._run(self.client.node.get(NODE1['uuid']))
+        self.assertEqual(('GET', '/v1'), self.server.requests[1][:2])
+        self.assertEqual('1.4', self.server.requests[2][2][
+            'x-openstack-ironic-api-version'])
+
+    def test_user_version_not_negotiated(self):
+        client = self.make_client(os_ironic_api_version='1.6')
+        self.server.add(status=406, body={}, headers={
+            'X-OpenStack-Ironic-API-Minimum-Version': '1.1',
+            'X-OpenStack-Ironic-API-Maximum-Version': '1.4'})
+        self.assertRaises(exc.UnsupportedVersion, self._run,
+                          client.node.get(NODE1['uuid']))
+
+    def test_list_pagination(self):
+        self.server.add(body={'nodes': [NODE1],
+                              'next': 'http://127.0.0.1/v1/nodes/?limit=1'
+                                      '&marker=%s' % NODE1['uuid']})
+        self.server.add(body={'nodes': [NODE2]})
+        nodes = self._run(self.client.node.list(limit=0))
+        self.assertEqual([NODE1['name'], NODE2['name']],
+                         [n.name for n in nodes])
+        self.assertEqual('/v1/nodes/?limit=1&marker=%s' % NODE1['uuid'],
+                         self.server.requests[1][1])
+
+    def test_list_limit(self):
+        self.server.add(body={'nodes': [NODE1, NODE2],
+                              'next': 'http://127.0.0.1/v1/nodes/?limit=2'})
+        nodes = self._run(self.client.node.list(limit=1))
+        self.assertEqual([NODE1['name']], [n.name for n in nodes])
+        self.assertEqual(1, len(self.server.requests))
+
+    def test_list_first_page(self):
+        self.server.add(body={'nodes': [NODE1],
+                              'next': 'http://127.0.0.1/v1/nodes/?limit=1'})
+        nodes = self._run(self.client.node.list())
+        self.assertEqual([NODE1['name']], [n.name for n in nodes])
+        self.assertEqual(1, len(self.server.requests))
+
+    def test_iter_list(self):
+        self.server.add(body={'nodes': [NODE1],
+                              'next': 'http://127.0.0.1/v1/nodes/?limit=1'})
+        self.server.add(body={'nodes': [NODE2]})
+
+        async def _collect():
+            names = []
+            async for node in self.client.node.iter_list(limit=0,
+                                                         compact=True):
+                names.append(node.name)
+            return names
+
+        self.assertEqual([NODE1['name'], NODE2['name']],
+                         self._run(_collect()))
+
+    def test_concurrent_requests(self):
+        client = self.make_client(max_connections=2)
+        for i in range(5):
+            self.server.add(body=NODE1)
+
+        async def _get_all():
+            return await asyncio.gather(*[client.node.get(NODE1['uuid'])
+                                          for i in range(5)])
+
+        self.assertEqual(5, len(self._run(_get_all())))
+        self.assertEqual(2, self.server.connections)
+
+    def test_create(self):
+        self.server.add(status=201, body=NODE1)
+        node = self._run(self.client.node.create(name='node1'))
+        self.assertEqual(NODE1['uuid'], node.uuid)
+        method, path, headers, body = self.server.requests[0]
+        self.assertEqual(('POST', '/v1/nodes'), (method, path))
+        self.assertEqual({'name': 'node1'}, json.loads(body.decode()))
+
+    def test_create_invalid_attribute(self):
+        self.assertRaises(exc.InvalidAttribute, self._run,
+                          self.client.node.create(foo='bar'))
+
+    def test_set_power_state(self):
+        self.server.add(status=202)
+        self.assertIsNone(self._run(
+            self.client.node.set_power_state(NODE1['uuid'], 'off')))
+        method, path, headers, body = self.server.requests[0]
+        self.assertEqual(('PUT', '/v1/nodes/%s/states/power' % NODE1['uuid']),
+                         (method, path))
+        self.assertEqual({'target': 'power off'}, json.loads(body.decode()))
+
+    def test_delete(self):
+        self.server.add(status=204)
+        self._run(self.client.port.delete('port-uuid'))
+        self.assertEqual(('DELETE', '/v1/ports/port-uuid'),
+                         self.server.requests[0][:2])
+
+    def test_driver_properties(self):
+        self.server.add(body={'prop': 'desc'})
+        self.assertEqual({'prop': 'desc'}, self._run(
+            self.client.driver.properties('fake')))
+        self.assertEqual('/v1/drivers/fake/properties',
+                         self.server.requests[0][1])
@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import sys
+
+from ironicclient.tests.unit import utils
+
+# NOTE: the tests of ironicclient.v1.aio use the async/await syntax, they
+# are only imported by the versions of Python able to compile them.
+if sys.version_info >= (3, 5):
+    from ironicclient.tests.unit.v1._aio_tests import *  # noqa
+
+
+class AioImportTest(utils.BaseTestCase):
+
+    def test_import(self):
+        if sys.version_info >= (3, 5):
+            from ironicclient.v1 import aio
+            self.assertTrue(hasattr(aio, 'Client'))
+        else:
+            self.assertRaises(ImportError, __import__,
+                              'ironicclient.v1.aio')
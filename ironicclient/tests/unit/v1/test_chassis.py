@@ -69,6 +69,13 @@ fake_responses = {
             {"chassis": [CHASSIS]},
         ),
     },
+    '/v1/chassis/%s?fields=uuid' % CHASSIS['uuid']:
+    {
+        'GET': (
+            {},
+            {'uuid': CHASSIS['uuid']},
+        ),
+    },
     '/v1/chassis/%s' % CHASSIS['uuid']:
     {
         'GET': (
@@ -186,6 +193,13 @@ class ChassisManagerTest(testtools.TestCase):
         self.assertEqual(expect, self.api.calls)
         self.assertEqual(1, len(chassis))
 
+    def test_chassis_list_compact(self):
+        chassis = self.mgr.list(compact=True)
+        self.assertIsInstance(chassis[0],
+                              ironicclient.v1.chassis.CompactChassis)
+        self.assertEqual(CHASSIS, chassis[0].to_dict())
+        self.assertEqual(CHASSIS['description'], chassis[0].description)
+
     def test_chassis_list_limit(self):
         self.api = utils.FakeAPI(fake_responses_pagination)
         self.mgr = ironicclient.v1.chassis.ChassisManager(self.api)
@@ -217,6 +231,17 @@ class ChassisManagerTest(testtools.TestCase):
         self.assertEqual(expect, self.api.calls)
         self.assertThat(chassis, HasLength(2))
 
+    def test_chassis_iter_list_pagination_no_limit(self):
+        self.api = utils.FakeAPI(fake_responses_pagination)
+        self.mgr = ironicclient.v1.chassis.ChassisManager(self.api)
+        chassis_list = list(self.mgr.iter_list(limit=0))
+        expect = [
+            ('GET', '/v1/chassis', {}, None),
+            ('GET', '/v1/chassis/?limit=1', {}, None)
+        ]
+        self.assertEqual(expect, self.api.calls)
+        self.assertThat(chassis_list, HasLength(2))
+
     def test_chassis_list_sort_key(self):
         self.api = utils.FakeAPI(fake_responses_sorting)
         self.mgr = ironicclient.v1.chassis.ChassisManager(self.api)
@@ -254,6 +279,24 @@ class ChassisManagerTest(testtools.TestCase):
         self.assertEqual(CHASSIS['uuid'], chassis.uuid)
         self.assertEqual(CHASSIS['description'], chassis.description)
 
+    def test_chassis_list_fields_trimmed(self):
+        chassis = self.mgr.list(fields=['uuid'])
+        expect = [
+            ('GET', '/v1/chassis/detail', {}, None),
+        ]
+        self.assertEqual(expect, self.api.calls)
+        self.assertEqual({'uuid': CHASSIS['uuid']}, chassis[0].to_dict())
+
+    def test_chassis_show_fields(self):
+        self.api.os_ironic_api_version = '1.8'
+        chassis = self.mgr.get(CHASSIS['uuid'], fields=['uuid'])
+        expect = [
+            ('GET', '/v1/chassis/%s?fields=uuid' % CHASSIS['uuid'], {},
+             None),
+        ]
+        self.assertEqual(expect, self.api.calls)
+        self.assertEqual(CHASSIS['uuid'], chassis.uuid)
+
     def test_create(self):
         chassis = self.mgr.create(**CREATE_CHASSIS)
         expect = [
@@ -290,6 +333,11 @@ class ChassisManagerTest(testtools.TestCase):
         self.assertEqual(1, len(nodes))
         self.assertEqual(NODE['uuid'], nodes[0].uuid)
 
+    def test_chassis_node_list_compact(self):
+        nodes = self.mgr.list_nodes(CHASSIS['uuid'], compact=True)
+        self.assertIsInstance(nodes[0], ironicclient.v1.node.CompactNode)
+        self.assertEqual(NODE['uuid'], nodes[0].uuid)
+
     def test_chassis_node_list_detail(self):
         nodes = self.mgr.list_nodes(CHASSIS['uuid'], detail=True)
         expect = [
@@ -311,6 +359,17 @@ class ChassisManagerTest(testtools.TestCase):
         self.assertThat(nodes, HasLength(1))
         self.assertEqual(NODE['uuid'], nodes[0].uuid)
 
+    def test_chassis_iter_list_nodes_limit(self):
+        self.api = utils.FakeAPI(fake_responses_pagination)
+        self.mgr = ironicclient.v1.chassis.ChassisManager(self.api)
+        nodes = list(self.mgr.iter_list_nodes(CHASSIS['uuid'], limit=1))
+        expect = [
+            ('GET',
+             '/v1/chassis/%s/nodes?limit=1' % CHASSIS['uuid'], {}, None),
+        ]
+        self.assertEqual(expect, self.api.calls)
+        self.assertThat(nodes, HasLength(1))
+
     def test_chassis_node_list_sort_key(self):
         self.api = utils.FakeAPI(fake_responses_sorting)
         self.mgr = ironicclient.v1.chassis.ChassisManager(self.api)
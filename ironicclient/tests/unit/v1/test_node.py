@@ -21,10 +21,14 @@ import mock
 import testtools
 from testtools.matchers import HasLength
 
+from ironicclient.common import cache
+from ironicclient.common import configdrive as configdrive_utils
 from ironicclient.common import utils as common_utils
+from ironicclient.common import waiter
 from ironicclient import exc
 from ironicclient.tests.unit import utils
 from ironicclient.v1 import node
+from ironicclient.v1 import port
 
 NODE1 = {'id': 123,
          'uuid': '66666666-7777-8888-9999-000000000000',
@@ -138,6 +142,20 @@ fake_responses = {
             {"nodes": [NODE2]},
         )
     },
+    '/v1/nodes/?fields=uuid,extra':
+    {
+        'GET': (
+            {},
+            {"nodes": [{'uuid': NODE1['uuid'], 'extra': {}}]},
+        )
+    },
+    '/v1/nodes/%s?fields=uuid,extra' % NODE1['uuid']:
+    {
+        'GET': (
+            {},
+            {'uuid': NODE1['uuid'], 'extra': {}},
+        )
+    },
     '/v1/nodes/detail?instance_uuid=%s' % NODE2['instance_uuid']:
     {
         'GET': (
@@ -386,6 +404,49 @@ class NodeManagerTest(testtools.TestCase):
         self.assertEqual(expect, self.api.calls)
         self.assertEqual(2, len(nodes))
 
+    def test_node_list_compact(self):
+        nodes = self.mgr.list(compact=True)
+        self.assertIsInstance(nodes[0], node.CompactNode)
+        self.assertEqual(NODE1, nodes[0].to_dict())
+        self.assertEqual(NODE1['driver_info'], nodes[0].driver_info)
+        self.assertEqual(NODE1['id'], nodes[0].id)
+        self.assertIsNone(getattr(nodes[0], 'instance_uuid', None))
+        self.assertEqual(NODE2['instance_uuid'], nodes[1].instance_uuid)
+
+    def test_node_iter_list(self):
+        nodes = self.mgr.iter_list()
+        self.assertEqual([], self.api.calls)
+        self.assertEqual(NODE1['uuid'], next(nodes).uuid)
+        expect = [
+            ('GET', '/v1/nodes', {}, None),
+        ]
+        self.assertEqual(expect, self.api.calls)
+        self.assertEqual([NODE2['uuid']], [n.uuid for n in nodes])
+
+    def test_node_iter_list_pagination_no_limit(self):
+        self.api = utils.FakeAPI(fake_responses_pagination)
+        self.mgr = node.NodeManager(self.api)
+        nodes = self.mgr.iter_list(limit=0)
+        self.assertEqual(NODE1['uuid'], next(nodes).uuid)
+        self.assertEqual([('GET', '/v1/nodes', {}, None)],
+                         self.api.calls[:1])
+        self.assertEqual([NODE2['uuid']], [n.uuid for n in nodes])
+        expect = [
+            ('GET', '/v1/nodes', {}, None),
+            ('GET', '/v1/nodes/?limit=1', {}, None)
+        ]
+        self.assertEqual(expect, self.api.calls)
+
+    def test_node_iter_list_limit(self):
+        self.api = utils.FakeAPI(fake_responses_pagination)
+        self.mgr = node.NodeManager(self.api)
+        nodes = list(self.mgr.iter_list(limit=1))
+        expect = [
+            ('GET', '/v1/nodes/?limit=1', {}, None)
+        ]
+        self.assertEqual(expect, self.api.calls)
+        self.assertThat(nodes, HasLength(1))
+
     def test_node_list_sort_key(self):
         self.api = utils.FakeAPI(fake_responses_sorting)
         self.mgr = node.NodeManager(self.api)
@@ -477,6 +538,49 @@ class NodeManagerTest(testtools.TestCase):
         self.assertEqual(expect, self.api.calls)
         self.assertEqual(NODE2['uuid'], node.uuid)
 
+    def test_node_list_fields(self):
+        self.api.os_ironic_api_version = '1.8'
+        nodes = self.mgr.list(fields=['uuid', 'extra'])
+        expect = [
+            ('GET', '/v1/nodes/?fields=uuid,extra', {}, None),
+        ]
+        self.assertEqual(expect, self.api.calls)
+        self.assertEqual(1, len(nodes))
+
+    def test_node_list_fields_trimmed(self):
+        self.api.os_ironic_api_version = '1.6'
+        nodes = self.mgr.list(fields=['uuid', 'name'])
+        expect = [
+            ('GET', '/v1/nodes/detail', {}, None),
+        ]
+        self.assertEqual(expect, self.api.calls)
+        self.assertEqual({'uuid': NODE1['uuid'], 'name': NODE1['name']},
+                         nodes[0].to_dict())
+        self.assertEqual({'uuid': NODE2['uuid']}, nodes[1].to_dict())
+
+    def test_node_list_fields_detail(self):
+        self.assertRaises(exc.InvalidAttribute, self.mgr.list,
+                          fields=['uuid'], detail=True)
+
+    def test_node_show_fields(self):
+        self.api.os_ironic_api_version = '1.8'
+        node = self.mgr.get(NODE1['uuid'], fields=['uuid', 'extra'])
+        expect = [
+            ('GET', '/v1/nodes/%s?fields=uuid,extra' % NODE1['uuid'], {},
+             None),
+        ]
+        self.assertEqual(expect, self.api.calls)
+        self.assertEqual(NODE1['uuid'], node.uuid)
+
+    def test_node_show_fields_trimmed(self):
+        node = self.mgr.get(NODE1['uuid'], fields=['uuid', 'extra'])
+        expect = [
+            ('GET', '/v1/nodes/%s' % NODE1['uuid'], {}, None),
+        ]
+        self.assertEqual(expect, self.api.calls)
+        self.assertEqual({'uuid': NODE1['uuid'], 'extra': {}},
+                         node.to_dict())
+
     def test_node_show_by_name(self):
         node = self.mgr.get(NODE1['name'])
         expect = [
@@ -553,6 +657,22 @@ class NodeManagerTest(testtools.TestCase):
         self.assertEqual(expect, self.api.calls)
         self.assertThat(ports, HasLength(1))
 
+    def test_node_iter_list_ports_limit(self):
+        self.api = utils.FakeAPI(fake_responses_pagination)
+        self.mgr = node.NodeManager(self.api)
+        ports = list(self.mgr.iter_list_ports(NODE1['uuid'], limit=1))
+        expect = [
+            ('GET', '/v1/nodes/%s/ports?limit=1' % NODE1['uuid'], {}, None),
+        ]
+        self.assertEqual(expect, self.api.calls)
+        self.assertThat(ports, HasLength(1))
+        self.assertEqual(PORT['uuid'], ports[0].uuid)
+
+    def test_node_port_list_compact(self):
+        ports = self.mgr.list_ports(NODE1['uuid'], compact=True)
+        self.assertIsInstance(ports[0], port.CompactPort)
+        self.assertEqual(PORT['address'], ports[0].address)
+
     def test_node_port_list_sort_key(self):
         self.api = utils.FakeAPI(fake_responses_sorting)
         self.mgr = node.NodeManager(self.api)
@@ -623,6 +743,25 @@ class NodeManagerTest(testtools.TestCase):
         self.assertEqual(expect, self.api.calls)
         self.assertEqual(None, maintenance)
 
+    def test_node_show_cached(self):
+        self.mgr.resource_cache = cache.ResourceCache()
+        self.mgr.get(NODE1['uuid'])
+        self.mgr.states(NODE1['uuid'])
+        self.mgr.states(NODE1['uuid'])
+        node = self.mgr.get(NODE1['uuid'])
+        self.mgr.set_power_state(NODE1['uuid'], "on")
+        self.mgr.get(NODE1['uuid'])
+        expect = [
+            ('GET', '/v1/nodes/%s' % NODE1['uuid'], {}, None),
+            ('GET', '/v1/nodes/%s/states' % NODE1['uuid'], {}, None),
+            ('GET', '/v1/nodes/%s/states' % NODE1['uuid'], {}, None),
+            ('PUT', '/v1/nodes/%s/states/power' % NODE1['uuid'], {},
+             {'target': 'power on'}),
+            ('GET', '/v1/nodes/%s' % NODE1['uuid'], {}, None),
+        ]
+        self.assertEqual(expect, self.api.calls)
+        self.assertEqual(NODE1['uuid'], node.uuid)
+
     def test_node_set_power_state(self):
         power_state = self.mgr.set_power_state(NODE1['uuid'], "on")
         body = {'target': 'power on'}
@@ -632,6 +771,28 @@ class NodeManagerTest(testtools.TestCase):
         self.assertEqual(expect, self.api.calls)
         self.assertEqual('power on', power_state.target_power_state)
 
+    def test_node_bulk_set_power_state(self):
+        results = self.mgr.bulk('set_power_state', [NODE1['uuid'], 'other'],
+                                args=('on',))
+        body = {'target': 'power on'}
+        self.assertIn(('PUT', '/v1/nodes/%s/states/power' % NODE1['uuid'],
+                       {}, body), self.api.calls)
+        self.assertEqual([NODE1['uuid'], 'other'],
+                         [r.item for r in results])
+        self.assertEqual('power on', results[0].result.target_power_state)
+        self.assertIsNone(results[0].error)
+        self.assertIsInstance(results[1].error, KeyError)
+
+    def test_node_bulk_callable(self):
+        results = self.mgr.bulk(lambda node_id: node_id.upper(), ['a', 'b'])
+        self.assertEqual(['A', 'B'], [r.result for r in results])
+
+    def test_node_bulk_unknown_action(self):
+        self.assertRaises(exc.InvalidAttribute, self.mgr.bulk, 'explode',
+                          [NODE1['uuid']])
+        self.assertRaises(exc.InvalidAttribute, self.mgr.bulk, '_list',
+                          [NODE1['uuid']])
+
     def test_node_validate(self):
         ifaces = self.mgr.validate(NODE1['uuid'])
         expect = [
@@ -672,13 +833,16 @@ class NodeManagerTest(testtools.TestCase):
             self.mgr.set_provision_state(NODE1['uuid'], target_state,
                                          configdrive=f.name)
 
-        body = {'target': target_state, 'configdrive': file_content}
-        expect = [
-            ('PUT', '/v1/nodes/%s/states/provision' % NODE1['uuid'], {}, body),
-        ]
-        self.assertEqual(expect, self.api.calls)
+            (method, url, headers, body), = self.api.calls
+            self.assertEqual('PUT', method)
+            self.assertEqual(
+                '/v1/nodes/%s/states/provision' % NODE1['uuid'], url)
+            self.assertEqual(target_state, body['target'])
+            # NOTE: the file is read when the request body is sent
+            self.assertEqual(file_content, b''.join(body['configdrive']))
+            self.assertEqual(len(file_content), body['configdrive'].size)
 
-    @mock.patch.object(common_utils, 'make_configdrive')
+    @mock.patch.object(configdrive_utils, 'build', autospec=True)
     def test_node_set_provision_state_with_configdrive_dir(self,
                                                            mock_configdrive):
         mock_configdrive.return_value = 'fake-configdrive'
@@ -687,7 +851,8 @@ class NodeManagerTest(testtools.TestCase):
         with common_utils.tempdir() as dirname:
             self.mgr.set_provision_state(NODE1['uuid'], target_state,
                                          configdrive=dirname)
-            mock_configdrive.assert_called_once_with(dirname)
+            mock_configdrive.assert_called_once_with(dirname,
+                                                     genisoimage=False)
 
         body = {'target': target_state, 'configdrive': 'fake-configdrive'}
         expect = [
@@ -695,6 +860,18 @@ class NodeManagerTest(testtools.TestCase):
         ]
         self.assertEqual(expect, self.api.calls)
 
+    @mock.patch.object(configdrive_utils, 'build', autospec=True)
+    def test_node_set_provision_state_with_configdrive_dir_genisoimage(
+            self, mock_configdrive):
+        mock_configdrive.return_value = 'fake-configdrive'
+
+        with common_utils.tempdir() as dirname:
+            self.mgr.set_provision_state(NODE1['uuid'], 'active',
+                                         configdrive=dirname,
+                                         genisoimage=True)
+            mock_configdrive.assert_called_once_with(dirname,
+                                                     genisoimage=True)
+
     def test_node_states(self):
         states = self.mgr.states(NODE1['uuid'])
         expect = [
@@ -817,3 +994,185 @@ class NodeManagerTest(testtools.TestCase):
         ]
         self.assertEqual(expect, self.api.calls)
         self.assertEqual(SUPPORTED_BOOT_DEVICE, boot_device)
+
+
+@mock.patch.object(waiter.time, 'sleep', autospec=True)
+class NodeManagerWaitTest(testtools.TestCase):
+
+    def setUp(self):
+        super(NodeManagerWaitTest, self).setUp()
+        self.mgr = node.NodeManager(utils.FakeAPI({}))
+
+    def _node(self, uuid='uuid1', name='node1', **states):
+        info = dict({'uuid': uuid, 'name': name, 'last_error': None,
+                     'target_power_state': None}, **states)
+        return node.Node(self.mgr, info, loaded=True)
+
+    @mock.patch.object(node.NodeManager, 'states', autospec=True)
+    def test_wait_for_provision_state(self, mock_states, mock_sleep):
+        mock_states.side_effect = [
+            self._node(provision_state='deploying'),
+            self._node(provision_state='wait call-back'),
+            self._node(provision_state='active'),
+        ]
+        states = self.mgr.wait_for_provision_state('node1', 'active')
+        self.assertEqual('active', states.provision_state)
+        mock_states.assert_called_with(self.mgr, 'node1')
+        self.assertEqual(2, mock_sleep.call_count)
+
+    @mock.patch.object(node.NodeManager, 'states', autospec=True)
+    def test_wait_for_provision_state_failed(self, mock_states, mock_sleep):
+        mock_states.side_effect = [
+            self._node(provision_state='deploying'),
+            self._node(provision_state='deploy failed', last_error='boom'),
+        ]
+        error = self.assertRaises(exc.StateTransitionFailed,
+                                  self.mgr.wait_for_provision_state,
+                                  'node1', 'active')
+        self.assertIn('boom', str(error))
+
+    @mock.patch.object(node.NodeManager, 'states', autospec=True)
+    def test_wait_for_provision_state_timeout(self, mock_states, mock_sleep):
+        mock_states.return_value = self._node(provision_state='deploying')
+        with mock.patch.object(waiter.time, 'time', autospec=True,
+                               side_effect=[100.0, 101.0, 110.0]):
+            self.assertRaises(exc.StateTransitionTimeout,
+                              self.mgr.wait_for_provision_state,
+                              'node1', 'active', timeout=5)
+
+    @mock.patch.object(node.NodeManager, 'states', autospec=True)
+    def test_wait_for_power_state(self, mock_states, mock_sleep):
+        mock_states.side_effect = [
+            self._node(power_state='power off',
+                       target_power_state='power on'),
+            self._node(power_state='power on'),
+        ]
+        states = self.mgr.wait_for_power_state('node1', 'on')
+        self.assertEqual('power on', states.power_state)
+
+    @mock.patch.object(node.NodeManager, 'states', autospec=True)
+    def test_wait_for_power_state_failed(self, mock_states, mock_sleep):
+        mock_states.return_value = self._node(power_state='power off',
+                                              last_error='no power')
+        self.assertRaises(exc.StateTransitionFailed,
+                          self.mgr.wait_for_power_state, 'node1',
+                          'power on')
+
+    def _states_of(self, polls):
+        """A side effect for states(), from the states polled by node."""
+        polls = dict((node_id, list(states))
+                     for node_id, states in polls.items())
+
+        def _states(mgr, node_id):
+            if node_id not in polls:
+                raise exc.NotFound()
+            states = polls[node_id]
+            return states.pop(0) if len(states) > 1 else states[0]
+        return _states
+
+    @mock.patch.object(node.NodeManager, 'list', autospec=True)
+    @mock.patch.object(node.NodeManager, 'states', autospec=True)
+    def test_wait_for_nodes(self, mock_states, mock_list, mock_sleep):
+        mock_states.side_effect = self._states_of({
+            'node1': [self._node(provision_state='deploying'),
+                      self._node(provision_state='active')],
+            'uuid2': [self._node(provision_state='deploying'),
+                      self._node(provision_state='deploy failed')],
+            'uuid3': [self._node(provision_state='deploying'),
+                      self._node(provision_state='deploying'),
+                      self._node(provision_state='active')],
+        })
+        results = self.mgr.wait_for_nodes(['node1', 'uuid2', 'uuid3'],
+                                          provision_state='active')
+        self.assertEqual(['node1', 'uuid2', 'uuid3'],
+                         [r.item for r in results])
+        self.assertEqual([True, False, True], [r.ok for r in results])
+        self.assertIsInstance(results[1].error, exc.StateTransitionFailed)
+        self.assertEqual('active', results[2].result.provision_state)
+        self.assertEqual(7, mock_states.call_count)
+        self.assertFalse(mock_list.called)
+
+    @mock.patch.object(node, 'WAIT_FOR_NODES_LIST_THRESHOLD', 1)
+    @mock.patch.object(node.NodeManager, 'list', autospec=True)
+    @mock.patch.object(node.NodeManager, 'states', autospec=True)
+    def test_wait_for_nodes_list(self, mock_states, mock_list, mock_sleep):
+        self.mgr.api.os_ironic_api_version = '1.8'
+        mock_list.side_effect = [
+            [self._node('uuid1', 'node1', provision_state='deploying'),
+             self._node('uuid2', 'node2', provision_state='deploying'),
+             self._node('uuid3', None, provision_state='deploying')],
+            [self._node('uuid1', 'node1', provision_state='active'),
+             self._node('uuid2', 'node2', provision_state='deploy failed'),
+             self._node('uuid3', None, provision_state='deploying')],
+        ]
+        mock_states.return_value = self._node('uuid3', None,
+                                              provision_state='active')
+        results = self.mgr.wait_for_nodes(['node1', 'uuid2', 'uuid3'],
+                                          provision_state='active')
+        self.assertEqual([True, False, True], [r.ok for r in results])
+        self.assertIsInstance(results[1].error, exc.StateTransitionFailed)
+        self.assertEqual(2, mock_list.call_count)
+        mock_list.assert_called_with(
+            self.mgr, limit=0, fields=['uuid', 'name', 'provision_state',
+                                       'target_provision_state',
+                                       'power_state', 'target_power_state',
+                                       'last_error'])
+        mock_states.assert_called_once_with(self.mgr, 'uuid3')
+
+    @mock.patch.object(node, 'WAIT_FOR_NODES_LIST_THRESHOLD', 1)
+    @mock.patch.object(node.NodeManager, 'list', autospec=True)
+    @mock.patch.object(node.NodeManager, 'states', autospec=True)
+    def test_wait_for_nodes_list_old_version(self, mock_states, mock_list,
+                                             mock_sleep):
+        # The nodes listed without details lack the target power state
+        listed = [self._node('uuid1', 'node1', power_state='power off'),
+                  self._node('uuid2', 'node2', power_state='power off'),
+                  self._node('uuid3', 'node3', power_state='power off')]
+        for n in listed:
+            del n.target_power_state
+            del n.last_error
+        mock_list.side_effect = [
+            listed,
+            [self._node('uuid1', 'node1', power_state='power on')] +
+            listed[1:],
+        ]
+        mock_states.side_effect = [
+            self._node('uuid1', 'node1', power_state='power off',
+                       target_power_state='power on'),
+            self._node('uuid2', 'node2', power_state='power off',
+                       last_error='no power'),
+            self._node('uuid3', 'node3', power_state='power on'),
+        ]
+        results = self.mgr.wait_for_nodes(['node1', 'node2', 'node3'],
+                                          power_state='on')
+        self.assertEqual([True, False, True], [r.ok for r in results])
+        self.assertIsInstance(results[1].error, exc.StateTransitionFailed)
+        self.assertIn('no power', str(results[1].error))
+        self.assertEqual(2, mock_list.call_count)
+        mock_list.assert_called_with(self.mgr, limit=0, fields=None)
+        self.assertEqual([mock.call(self.mgr, 'node1'),
+                          mock.call(self.mgr, 'node2'),
+                          mock.call(self.mgr, 'node3')],
+                         mock_states.call_args_list)
+
+    @mock.patch.object(node.NodeManager, 'states', autospec=True)
+    def test_wait_for_nodes_timeout(self, mock_states, mock_sleep):
+        mock_states.side_effect = self._states_of({
+            'node1': [self._node(power_state='power on')],
+            'node2': [self._node(power_state='power off',
+                                 target_power_state='power on')],
+        })
+        with mock.patch.object(waiter.time, 'time', autospec=True,
+                               side_effect=[100.0, 110.0]):
+            results = self.mgr.wait_for_nodes(
+                ['node1', 'node2', 'node3'], power_state='on', timeout=5)
+        self.assertTrue(results[0].ok)
+        self.assertIsInstance(results[1].error, exc.StateTransitionTimeout)
+        self.assertIsInstance(results[2].error, exc.NotFound)
+
+    def test_wait_for_nodes_no_state(self, mock_sleep):
+        self.assertRaises(exc.InvalidAttribute, self.mgr.wait_for_nodes,
+                          ['node1'])
+        self.assertRaises(exc.InvalidAttribute, self.mgr.wait_for_nodes,
+                          ['node1'], provision_state='active',
+                          power_state='on')
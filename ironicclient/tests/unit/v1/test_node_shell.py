@@ -15,8 +15,11 @@
 #   under the License.
 
 import mock
+import six
 
+from ironicclient.common import bulk
 from ironicclient.common import utils as commonutils
+from ironicclient import exc
 from ironicclient.openstack.common.apiclient import exceptions
 from ironicclient.openstack.common import cliutils
 from ironicclient.tests.unit import utils
@@ -179,6 +182,52 @@ class NodeShellTest(utils.BaseTestCase):
         # assert get() wasn't called
         self.assertFalse(client_mock.node.get.called)
 
+    def test_do_node_show_fields(self):
+        client_mock = mock.MagicMock()
+        args = mock.MagicMock()
+        args.node = 'node_uuid'
+        args.instance_uuid = False
+        args.fields = [['uuid', 'power_state']]
+
+        n_shell.do_node_show(client_mock, args)
+        client_mock.node.get.assert_called_once_with(
+            'node_uuid', fields=['uuid', 'power_state'])
+
+    def test_do_node_show_invalid_fields(self):
+        client_mock = mock.MagicMock()
+        args = mock.MagicMock()
+        args.node = 'node_uuid'
+        args.instance_uuid = False
+        args.fields = [['uuid', 'foo']]
+
+        self.assertRaises(exceptions.CommandError,
+                          n_shell.do_node_show, client_mock, args)
+        self.assertFalse(client_mock.node.get.called)
+
+    def _get_list_args(self, **kwargs):
+        args = mock.Mock(associated=None, maintenance=None, marker=None,
+                         limit=None, sort_key=None, sort_dir=None,
+                         detail=False, fields=None)
+        for key, value in kwargs.items():
+            setattr(args, key, value)
+        return args
+
+    def test_do_node_list_fields(self):
+        client_mock = mock.MagicMock()
+        args = self._get_list_args(fields=[['uuid', 'name']])
+
+        n_shell.do_node_list(client_mock, args)
+        client_mock.node.list.assert_called_once_with(
+            detail=False, fields=['uuid', 'name'])
+
+    def test_do_node_list_fields_detail(self):
+        client_mock = mock.MagicMock()
+        args = self._get_list_args(fields=[['uuid']], detail=True)
+
+        self.assertRaises(exceptions.CommandError,
+                          n_shell.do_node_list, client_mock, args)
+        self.assertFalse(client_mock.node.list.called)
+
     def test_do_node_set_maintenance_true(self):
         client_mock = mock.MagicMock()
         args = mock.MagicMock()
@@ -266,6 +315,115 @@ class NodeShellTest(utils.BaseTestCase):
     def test_do_node_set_power_state_reboot(self):
         self._do_node_set_power_state_helper('reboot')
 
+    def _printed_rows(self, mock_print):
+        """The cells of the table printed by a mocked print_list()."""
+        objs, fields = mock_print.call_args[0]
+        formatters = mock_print.call_args[1].get('formatters', {})
+        return [[formatters[f](o) if f in formatters else getattr(o, f)
+                 for f in fields]
+                for o in objs]
+
+    def _do_node_bulk(self, func, stdin, errors=None, **kwargs):
+        client_mock = mock.MagicMock()
+        errors = errors or {}
+        client_mock.node.bulk.side_effect = lambda a, nodes, **kw: [
+            bulk.BulkResult(n, None, errors.get(n)) for n in nodes]
+        args = mock.MagicMock(concurrency=None, **kwargs)
+        with mock.patch.object(cliutils, 'print_list') as mock_print:
+            with mock.patch('sys.stdin', six.StringIO(stdin)):
+                func(client_mock, args)
+        return client_mock, mock_print
+
+    def test_do_node_bulk_set_power_state(self):
+        client_mock, mock_print = self._do_node_bulk(
+            n_shell.do_node_bulk_set_power_state, 'node1\n\n# c\n node2 \n',
+            power_state='reboot')
+        client_mock.node.bulk.assert_called_once_with(
+            'set_power_state', ['node1', 'node2'], args=('reboot',),
+            kwargs={}, concurrency=None)
+        self.assertEqual([['node1', 'OK', ''], ['node2', 'OK', '']],
+                         self._printed_rows(mock_print))
+
+    def test_do_node_bulk_set_provision_state(self):
+        client_mock, mock_print = self._do_node_bulk(
+            n_shell.do_node_bulk_set_provision_state, 'node1\n',
+            provision_state='active')
+        client_mock.node.bulk.assert_called_once_with(
+            'set_provision_state', ['node1'], args=('active',), kwargs={},
+            concurrency=None)
+
+    def test_do_node_bulk_set_maintenance(self):
+        client_mock, mock_print = self._do_node_bulk(
+            n_shell.do_node_bulk_set_maintenance, 'node1\n',
+            maintenance_mode='True', reason='broken')
+        client_mock.node.bulk.assert_called_once_with(
+            'set_maintenance', ['node1'], args=('true',),
+            kwargs={'maint_reason': 'broken'}, concurrency=None)
+
+    def test_do_node_bulk_failures(self):
+        self.assertRaises(exceptions.CommandError, self._do_node_bulk,
+                          n_shell.do_node_bulk_set_power_state,
+                          'node1\nnode2\n', power_state='on',
+                          errors={'node2': Exception('boom')})
+
+    def test_do_node_bulk_no_nodes(self):
+        self.assertRaises(exceptions.CommandError, self._do_node_bulk,
+                          n_shell.do_node_bulk_set_power_state, '\n',
+                          power_state='on')
+
+    def _do_node_wait(self, nodes, **kwargs):
+        client_mock = mock.MagicMock()
+        args = mock.MagicMock(node=nodes, timeout=0, poll_interval=2,
+                              provision_state=None, power_state=None)
+        for key, value in kwargs.items():
+            setattr(args, key, value)
+        with mock.patch.object(cliutils, 'print_list') as mock_print:
+            n_shell.do_node_wait(client_mock, args)
+        return client_mock, mock_print
+
+    def test_do_node_wait_provision_state(self):
+        client_mock, mock_print = self._do_node_wait(
+            ['node1'], provision_state='active')
+        client_mock.node.wait_for_provision_state.assert_called_once_with(
+            'node1', 'active', timeout=0, poll_interval=2)
+        self.assertEqual([['node1', 'OK', '']],
+                         self._printed_rows(mock_print))
+
+    def test_do_node_wait_power_state_failed(self):
+        client_mock = mock.MagicMock()
+        client_mock.node.wait_for_power_state.side_effect = (
+            exc.StateTransitionFailed('boom'))
+        args = mock.MagicMock(node=['node1'], timeout=10, poll_interval=2,
+                              provision_state=None, power_state='on')
+        with mock.patch.object(cliutils, 'print_list') as mock_print:
+            self.assertRaises(exceptions.CommandError, n_shell.do_node_wait,
+                              client_mock, args)
+        client_mock.node.wait_for_power_state.assert_called_once_with(
+            'node1', 'on', timeout=10, poll_interval=2)
+        self.assertEqual([['node1', 'FAILED', 'boom']],
+                         self._printed_rows(mock_print))
+
+    def test_do_node_wait_many(self):
+        client_mock = mock.MagicMock()
+        client_mock.node.wait_for_nodes.return_value = [
+            bulk.BulkResult('node1', None, None),
+            bulk.BulkResult('node2', None, None)]
+        args = mock.MagicMock(node=['node1', 'node2'], timeout=0,
+                              poll_interval=2, provision_state='available',
+                              power_state=None)
+        with mock.patch.object(cliutils, 'print_list'):
+            n_shell.do_node_wait(client_mock, args)
+        client_mock.node.wait_for_nodes.assert_called_once_with(
+            ['node1', 'node2'], provision_state='available', power_state=None,
+            timeout=0, poll_interval=2)
+
+    def test_do_node_wait_no_state(self):
+        self.assertRaises(exceptions.CommandError, self._do_node_wait,
+                          ['node1'])
+        self.assertRaises(exceptions.CommandError, self._do_node_wait,
+                          ['node1'], provision_state='active',
+                          power_state='on')
+
     def test_do_node_vendor_passthru_with_args(self):
         client_mock = mock.MagicMock()
         args = mock.MagicMock()
@@ -297,11 +455,24 @@ class NodeShellTest(utils.BaseTestCase):
         args.node = 'node_uuid'
         args.provision_state = 'active'
         args.config_drive = 'foo'
+        args.use_genisoimage = False
 
         n_shell.do_node_set_provision_state(client_mock, args)
         client_mock.node.set_provision_state.assert_called_once_with(
             'node_uuid', 'active', configdrive='foo')
 
+    def test_do_node_set_provision_state_active_genisoimage(self):
+        client_mock = mock.MagicMock()
+        args = mock.MagicMock()
+        args.node = 'node_uuid'
+        args.provision_state = 'active'
+        args.config_drive = 'foo'
+        args.use_genisoimage = True
+
+        n_shell.do_node_set_provision_state(client_mock, args)
+        client_mock.node.set_provision_state.assert_called_once_with(
+            'node_uuid', 'active', configdrive='foo', genisoimage=True)
+
     def test_do_node_set_provision_state_deleted(self):
         client_mock = mock.MagicMock()
         args = mock.MagicMock()
@@ -84,6 +84,13 @@ fake_responses = {
             {"ports": [PORT]},
         ),
     },
+    '/v1/ports/?fields=uuid,address':
+    {
+        'GET': (
+            {},
+            {"ports": [{'uuid': PORT['uuid'], 'address': PORT['address']}]},
+        ),
+    },
     '/v1/ports/?address=%s' % PORT['address']:
     {
         'GET': (
@@ -151,6 +158,12 @@ class PortManagerTest(testtools.TestCase):
         self.assertEqual(expect, self.api.calls)
         self.assertEqual(1, len(ports))
 
+    def test_ports_list_compact(self):
+        ports = self.mgr.list(compact=True)
+        self.assertIsInstance(ports[0], ironicclient.v1.port.CompactPort)
+        self.assertEqual(PORT, ports[0].to_dict())
+        self.assertEqual(PORT['node_uuid'], ports[0].node_uuid)
+
     def test_ports_list_by_address(self):
         ports = self.mgr.list(address=PORT['address'])
         expect = [
@@ -167,6 +180,31 @@ class PortManagerTest(testtools.TestCase):
         self.assertEqual(expect, self.api.calls)
         self.assertEqual(1, len(ports))
 
+    def test_ports_list_fields(self):
+        self.api.os_ironic_api_version = '1.8'
+        ports = self.mgr.list(fields=['uuid', 'address'])
+        expect = [
+            ('GET', '/v1/ports/?fields=uuid,address', {}, None),
+        ]
+        self.assertEqual(expect, self.api.calls)
+        self.assertEqual(PORT['address'], ports[0].address)
+
+    def test_ports_list_fields_trimmed(self):
+        ports = self.mgr.list(fields=['address'])
+        expect = [
+            ('GET', '/v1/ports/detail', {}, None),
+        ]
+        self.assertEqual(expect, self.api.calls)
+        self.assertEqual({'address': PORT['address']}, ports[0].to_dict())
+
+    def test_port_show_fields_trimmed(self):
+        port = self.mgr.get(PORT['uuid'], fields=['uuid'])
+        expect = [
+            ('GET', '/v1/ports/%s' % PORT['uuid'], {}, None),
+        ]
+        self.assertEqual(expect, self.api.calls)
+        self.assertEqual({'uuid': PORT['uuid']}, port.to_dict())
+
     def test_ports_list_detail(self):
         ports = self.mgr.list(detail=True)
         expect = [
@@ -206,6 +244,27 @@ class PortManagerTest(testtools.TestCase):
         self.assertEqual(expect, self.api.calls)
         self.assertThat(ports, HasLength(2))
 
+    def test_ports_iter_list_pagination_no_limit(self):
+        self.api = utils.FakeAPI(fake_responses_pagination)
+        self.mgr = ironicclient.v1.port.PortManager(self.api)
+        ports = list(self.mgr.iter_list(limit=0))
+        expect = [
+            ('GET', '/v1/ports', {}, None),
+            ('GET', '/v1/ports/?limit=1', {}, None)
+        ]
+        self.assertEqual(expect, self.api.calls)
+        self.assertThat(ports, HasLength(2))
+
+    def test_ports_iter_list_marker(self):
+        self.api = utils.FakeAPI(fake_responses_pagination)
+        self.mgr = ironicclient.v1.port.PortManager(self.api)
+        ports = list(self.mgr.iter_list(marker=PORT['uuid']))
+        expect = [
+            ('GET', '/v1/ports/?marker=%s' % PORT['uuid'], {}, None),
+        ]
+        self.assertEqual(expect, self.api.calls)
+        self.assertThat(ports, HasLength(1))
+
     def test_ports_list_sort_key(self):
         self.api = utils.FakeAPI(fake_responses_sorting)
         self.mgr = ironicclient.v1.port.PortManager(self.api)
@@ -57,6 +57,16 @@ class PortShellTest(utils.BaseTestCase):
         # assert get() wasn't called
         self.assertFalse(client_mock.port.get.called)
 
+    def test_do_port_list_fields(self):
+        client_mock = mock.MagicMock()
+        args = mock.Mock(address=None, marker=None, limit=None,
+                         sort_key=None, sort_dir=None, detail=False,
+                         fields=[['uuid', 'address']])
+
+        p_shell.do_port_list(client_mock, args)
+        client_mock.port.list.assert_called_once_with(
+            detail=False, fields=['uuid', 'address'])
+
     def test_do_port_update(self):
         client_mock = mock.MagicMock()
         args = mock.MagicMock()
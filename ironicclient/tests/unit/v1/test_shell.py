@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import argparse
+
+import mock
+
+from ironicclient.common import utils as common_utils
+from ironicclient.tests.unit import utils
+from ironicclient.v1 import node_shell
+from ironicclient.v1 import shell as v1_shell
+
+
+class CommandIndexTest(utils.BaseTestCase):
+
+    def test_index(self):
+        for module_name in v1_shell.COMMAND_MODULES:
+            module = common_utils.import_versioned_module('1', module_name)
+            commands = dict(
+                (name[3:].replace('_', '-'),
+                 (getattr(module, name).__doc__ or '').strip().split('\n')[0])
+                for name in dir(module) if name.startswith('do_'))
+            self.assertEqual(commands, v1_shell.COMMAND_INDEX[module_name])
+
+
+@mock.patch.object(common_utils, 'import_versioned_module',
+                   wraps=common_utils.import_versioned_module)
+class EnhanceParserTest(utils.BaseTestCase):
+
+    def _enhance_parser(self, commands):
+        parser = argparse.ArgumentParser()
+        subparsers = parser.add_subparsers()
+        cmd_mapper = {}
+        v1_shell.enhance_parser(parser, subparsers, cmd_mapper,
+                                commands=commands)
+        return parser, cmd_mapper
+
+    def _command_modules(self, mock_import):
+        return [c[0][1] for c in mock_import.call_args_list]
+
+    def test_lazy(self, mock_import):
+        parser, cmd_mapper = self._enhance_parser(['node-show'])
+        self.assertEqual(['node_shell'], self._command_modules(mock_import))
+        self.assertIn('chassis-list', cmd_mapper)
+        args = parser.parse_args(['node-show', 'node1', '--instance'])
+        self.assertEqual(node_shell.do_node_show, args.func)
+        self.assertTrue(args.instance_uuid)
+
+    def test_none(self, mock_import):
+        parser, cmd_mapper = self._enhance_parser([])
+        self.assertEqual([], self._command_modules(mock_import))
+        self.assertEqual(
+            sum(len(index) for index in v1_shell.COMMAND_INDEX.values()),
+            len(cmd_mapper))
+        self.assertIn('List the chassis.', parser.format_help())
+
+    def test_all(self, mock_import):
+        parser, cmd_mapper = self._enhance_parser(None)
+        self.assertEqual(v1_shell.COMMAND_MODULES,
+                         self._command_modules(mock_import))
+        args = parser.parse_args(['port-show', 'port1'])
+        self.assertEqual('port1', args.port)
+
+    def test_unknown_command(self, mock_import):
+        self._enhance_parser(['node-show', 'foo'])
+        self.assertEqual(v1_shell.COMMAND_MODULES,
+                         self._command_modules(mock_import))
@@ -0,0 +1,1047 @@
+# -*- coding: utf-8 -*-
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Implementation of :mod:`ironicclient.v1.aio`.
+
+It uses the async/await syntax, so it can only be imported, or even
+compiled, by Python 3.5 or newer: import ironicclient.v1.aio instead.
+"""
+
+import asyncio
+import collections
+import json
+import logging
+import socket
+import time
+
+from six.moves import http_client
+import six.moves.urllib.parse as urlparse
+
+from ironicclient.common import base
+from ironicclient.common import http
+from ironicclient.common.http import DEFAULT_VER
+from ironicclient.common.i18n import _
+from ironicclient.common import jsonstream
+from ironicclient.common import version_cache
+from ironicclient import exc
+from ironicclient.v1 import chassis
+from ironicclient.v1 import driver
+from ironicclient.v1 import node
+from ironicclient.v1 import port
+
+
+LOG = logging.getLogger(__name__)
+
+_DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+
+class Response(object):
+    """A HTTP response, read in full.
+
+    It has the attributes and methods of the httplib responses used by the
+    rest of the client, e.g. by exc.from_response().
+    """
+
+    def __init__(self, version, status, reason, headers):
+        self.version = version
+        self.status = status
+        self.reason = reason
+        self._headers = headers
+        self.body = b''
+        connection = (self.getheader('connection') or '').lower()
+        self.will_close = (connection == 'close' or
+                           (version < 11 and connection != 'keep-alive'))
+
+    def getheader(self, name, default=None):
+        name = name.lower()
+        values = [value for key, value in self._headers
+                  if key.lower() == name]
+        if not values:
+            return default
+        return ', '.join(values)
+
+    def getheaders(self):
+        return list(self._headers)
+
+    @property
+    def text(self):
+        return self.body.decode('utf-8', 'replace')
+
+
+class Connection(object):
+    """A HTTP/1.1 connection to a server, on top of asyncio streams.
+
+    The connection is opened on the first request, and kept open after
+    the responses which allow it.
+
+    :param host: the host name or address of the server.
+    :param port: the port of the server.
+    :param ssl_context: Optional, the SSLContext of HTTPS connections.
+    :param timeout: Optional, the maximum number of seconds a request and
+                    its response may take.
+    """
+
+    def __init__(self, host, port, ssl_context=None, timeout=None):
+        self.host = host
+        self.port = port
+        self.ssl_context = ssl_context
+        self.timeout = timeout
+        self._reader = None
+        self._writer = None
+
+    @property
+    def connected(self):
+        return self._writer is not None
+
+    def is_dropped(self):
+        """Whether the server closed the connection while it was idle."""
+        return self._reader is not None and self._reader.at_eof()
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+        self._reader = self._writer = None
+
+    def _host_header(self):
+        host = self.host
+        if ':' in host:
+            host = '[%s]' % host
+        scheme = 'https' if self.ssl_context is not None else 'http'
+        if self.port != _DEFAULT_PORTS[scheme]:
+            host = '%s:%d' % (host, self.port)
+        return host
+
+    async def request(self, method, url, body=None, headers=None):
+        """Send a request and read its response.
+
+        :returns: a Response, with its body.
+        :raises: OSError or asyncio.TimeoutError if the request failed, the
+                 connection is then closed.
+        """
+        try:
+            return await asyncio.wait_for(
+                self._request(method, url, body, headers or {}),
+                self.timeout)
+        except (asyncio.IncompleteReadError, ValueError) as e:
+            self.close()
+            raise ConnectionError('Invalid response from %s: %s' %
+                                  (self.host, e))
+        except BaseException:
+            self.close()
+            raise
+
+    async def _request(self, method, url, body, headers):
+        if self._writer is None:
+            kwargs = {}
+            if self.ssl_context is not None:
+                kwargs = {'ssl': self.ssl_context,
+                          'server_hostname': self.host}
+            self._reader, self._writer = await asyncio.open_connection(
+                self.host, self.port, **kwargs)
+
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+        lines = ['%s %s HTTP/1.1' % (method, url),
+                 'Host: %s' % self._host_header()]
+        lines.extend('%s: %s' % (key, value)
+                     for key, value in headers.items()
+                     if key.lower() not in ('host', 'content-length'))
+        if body is not None or method in ('POST', 'PUT', 'PATCH'):
+            lines.append('Content-Length: %d' % len(body or b''))
+        lines.extend(['', ''])
+        self._writer.write('\r\n'.join(lines).encode('latin-1'))
+        if isinstance(body, jsonstream.StreamBody):
+            # NOTE: the body may have been sent by a previous attempt
+            body.seek(0)
+            for chunk in iter(lambda: body.read(jsonstream.CHUNK_SIZE), b''):
+                self._writer.write(chunk)
+                await self._writer.drain()
+        elif body:
+            self._writer.write(body)
+        await self._writer.drain()
+
+        resp = await self._read_response_head()
+        if (method == 'HEAD' or resp.status < 200 or
+                resp.status in (204, 304)):
+            pass
+        elif 'chunked' in (resp.getheader('transfer-encoding') or '').lower():
+            resp.body = await self._read_chunked_body()
+        elif resp.getheader('content-length') is not None:
+            resp.body = await self._reader.readexactly(
+                int(resp.getheader('content-length')))
+        else:
+            # The end of the body is the end of the connection
+            resp.body = await self._reader.read()
+            resp.will_close = True
+
+        decoder = http._body_decoder(resp)
+        if decoder is not None:
+            resp.body = decoder.decompress(resp.body) + decoder.flush()
+
+        if resp.will_close:
+            self.close()
+        return resp
+
+    async def _read_response_head(self):
+        line = await self._reader.readline()
+        if not line:
+            # NOTE: the server closed the connection without answering,
+            # e.g. it timed out the idle keep-alive connection.
+            raise http_client.RemoteDisconnected(
+                'Remote end closed connection without response')
+        parts = line.decode('latin-1').rstrip('\r\n').split(None, 2)
+        if len(parts) < 2 or not parts[0].startswith('HTTP/1.'):
+            raise ValueError('Invalid status line %r' % line)
+        version = 11 if parts[0] == 'HTTP/1.1' else 10
+        reason = parts[2] if len(parts) > 2 else ''
+
+        headers = []
+        while True:
+            line = await self._reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            key, _sep, value = line.decode('latin-1').partition(':')
+            headers.append((key.strip(), value.strip()))
+        return Response(version, int(parts[1]), reason, headers)
+
+    async def _read_chunked_body(self):
+        chunks = []
+        while True:
+            line = await self._reader.readline()
+            size = int(line.split(b';', 1)[0].strip(), 16)
+            if not size:
+                break
+            chunks.append(await self._reader.readexactly(size))
+            await self._reader.readexactly(2)
+        # Skip the trailers
+        while True:
+            line = await self._reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+        return b''.join(chunks)
+
+
+class ConnectionPool(object):
+    """The keep-alive connections shared by the requests of a client.
+
+    At most ``max_connections`` requests are sent at the same time, the
+    others wait for a connection to be released. Idle connections older
+    than ``idle_timeout`` seconds, or closed by the server, are evicted
+    instead of being reused.
+
+    :param factory: callable returning a new (unconnected) Connection.
+    :param max_connections: maximum number of connections.
+    :param idle_timeout: seconds an idle connection may be kept around.
+    """
+
+    def __init__(self, factory, max_connections=http.DEFAULT_MAX_CONNECTIONS,
+                 idle_timeout=http.DEFAULT_CONNECTION_IDLE_TIMEOUT):
+        self._factory = factory
+        self.max_connections = max_connections
+        self.idle_timeout = idle_timeout
+        self._idle = collections.deque()
+        # NOTE: created on first use, so that it belongs to the event loop
+        # running the requests.
+        self._semaphore = None
+        self._stats = {'hits': 0, 'misses': 0, 'evicted': 0, 'discarded': 0}
+
+    @property
+    def stats(self):
+        """A snapshot of the pool counters, see http.ConnectionPool."""
+        return dict(self._stats)
+
+    async def get(self):
+        """Wait for a connection to be available and return it."""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_connections)
+        await self._semaphore.acquire()
+        while self._idle:
+            # NOTE: most recently released first, it is the least likely
+            # to have been timed out by the server.
+            conn, released_at = self._idle.pop()
+            if (time.time() - released_at > self.idle_timeout or
+                    conn.is_dropped()):
+                self._stats['evicted'] += 1
+                conn.close()
+                continue
+            self._stats['hits'] += 1
+            return conn
+        self._stats['misses'] += 1
+        return self._factory()
+
+    def put(self, conn):
+        """Return a connection whose response has been read."""
+        if conn.connected:
+            self._idle.append((conn, time.time()))
+        self._semaphore.release()
+
+    def discard(self, conn):
+        """Close a connection that can't be reused."""
+        self._stats['discarded'] += 1
+        conn.close()
+        self._semaphore.release()
+
+    def clear(self):
+        """Close all the idle connections."""
+        while self._idle:
+            conn, _released_at = self._idle.pop()
+            conn.close()
+
+
+class HTTPClient(http.VersionNegotiationMixin):
+    """Asynchronous HTTP client of the Ironic API.
+
+    Takes the same arguments as ironicclient.common.http.HTTPClient. The
+    API version is negotiated, and the errors are raised, the same way.
+    """
+
+    def __init__(self, endpoint, **kwargs):
+        parts = urlparse.urlparse(endpoint)
+        if parts.scheme not in _DEFAULT_PORTS:
+            msg = 'Unsupported scheme: %s' % parts.scheme
+            raise exc.EndpointException(msg)
+        self.endpoint = endpoint
+        self.endpoint_trimmed = http._trim_endpoint_api_version(endpoint)
+        self.base_path = http._trim_endpoint_api_version(parts.path)
+        self.host = parts.hostname
+        self.port = parts.port or _DEFAULT_PORTS[parts.scheme]
+        self.auth_token = kwargs.get('token')
+        self.os_ironic_api_version = kwargs.get('os_ironic_api_version',
+                                                DEFAULT_VER)
+        self.api_version_select_state = kwargs.get(
+            'api_version_select_state', 'default')
+        self.conflict_max_retries = kwargs.get('max_retries',
+                                               http.DEFAULT_MAX_RETRIES)
+        self.conflict_retry_interval = kwargs.get(
+            'retry_interval', http.DEFAULT_RETRY_INTERVAL)
+        self.retry_policy = kwargs.get('retry_policy') or http.RetryPolicy()
+        self.version_cache = kwargs.get('version_cache',
+                                        version_cache.MEMORY_CACHE)
+        self.timeout = (float(kwargs.get('timeout'))
+                        if kwargs.get('timeout') else 600)
+        self.keepalive = kwargs.get('keepalive', True)
+        self.compression = kwargs.get('compression', True)
+        self.tls_context = None
+        if parts.scheme == 'https':
+            self.tls_context = http.TLSContext(
+                ca_file=kwargs.get('ca_file'),
+                cert_file=kwargs.get('cert_file'),
+                key_file=kwargs.get('key_file'),
+                insecure=kwargs.get('insecure', False))
+        self.connection_pool = ConnectionPool(
+            self._create_connection,
+            max_connections=kwargs.get('max_connections',
+                                       http.DEFAULT_MAX_CONNECTIONS),
+            idle_timeout=kwargs.get('connection_idle_timeout',
+                                    http.DEFAULT_CONNECTION_IDLE_TIMEOUT))
+
+    def _create_connection(self):
+        ssl_context = None
+        if self.tls_context is not None:
+            ssl_context = self.tls_context.ssl_context
+        return Connection(self.host, self.port, ssl_context=ssl_context,
+                          timeout=self.timeout)
+
+    def close(self):
+        """Close the idle connections of the client."""
+        self.connection_pool.clear()
+
+    def _make_connection_url(self, url):
+        return '%s/%s' % (self.base_path, url.lstrip('/'))
+
+    def _parse_version_headers(self, resp):
+        return self._generic_parse_version_headers(resp.getheader)
+
+    def _version_cache_key(self):
+        return self.endpoint_trimmed
+
+    def _make_simple_request(self, conn, method, url):
+        # NOTE: 'conn' is the response to the version request, already
+        # sent by _negotiate_version() since this can't block.
+        return conn
+
+    async def _negotiate_version(self, resp):
+        min_ver, max_ver = self._parse_version_headers(resp)
+        if not max_ver:
+            LOG.debug('No version header in response, requesting from server')
+            resp = await self._send(
+                'GET', self._version_request_url(),
+                headers={'User-Agent': http.USER_AGENT})
+        return self.negotiate_version(resp, resp)
+
+    def _log_request(self, method, url, headers, body):
+        curl = ['curl -i -X %s' % method]
+        curl.extend('-H \'%s: %s\'' % (key, value)
+                    for key, value in headers.items())
+        if isinstance(body, jsonstream.StreamBody):
+            curl.append('-d \'%r\'' % body)
+        elif body:
+            curl.append('-d \'%s\'' % body.decode('utf-8', 'replace'))
+        curl.append(urlparse.urljoin(self.endpoint_trimmed, url))
+        LOG.debug(' '.join(curl))
+
+    async def _send(self, method, url, headers, body=None):
+        """Send a request on a pooled connection and read the response."""
+        conn = await self.connection_pool.get()
+        # NOTE: a pooled connection is already open
+        reused = conn.connected
+        conn_url = self._make_connection_url(url)
+        try:
+            try:
+                resp = await conn.request(method, conn_url, body=body,
+                                          headers=headers)
+            except (ConnectionResetError, BrokenPipeError):
+                if not reused:
+                    raise
+                # The server closed the idle keep-alive connection before
+                # it saw our request, retry once on a new connection.
+                LOG.debug('Pooled connection to %s was closed by the server, '
+                          'reconnecting', self.endpoint)
+                resp = await conn.request(method, conn_url, body=body,
+                                          headers=headers)
+        except socket.gaierror as e:
+            self.connection_pool.discard(conn)
+            message = ("Error finding address for %(url)s: %(e)s"
+                       % dict(url=url, e=e))
+            raise exc.EndpointNotFound(message)
+        except (OSError, asyncio.TimeoutError) as e:
+            self.connection_pool.discard(conn)
+            message = ("Error communicating with %(endpoint)s %(e)s"
+                       % dict(endpoint=self.endpoint, e=e))
+            raise exc.ConnectionRefused(message)
+        except BaseException:
+            self.connection_pool.discard(conn)
+            raise
+
+        if resp.will_close or not self.keepalive:
+            self.connection_pool.discard(conn)
+        else:
+            self.connection_pool.put(conn)
+        return resp
+
+    async def _request(self, url, method, headers=None, body=None):
+        self._use_cached_version()
+        headers = dict(headers or {})
+        headers.setdefault('User-Agent', http.USER_AGENT)
+        if self.os_ironic_api_version:
+            headers.setdefault('X-OpenStack-Ironic-API-Version',
+                               self.os_ironic_api_version)
+        if self.auth_token:
+            headers.setdefault('X-Auth-Token', self.auth_token)
+        if self.compression:
+            headers.setdefault('Accept-Encoding', http.ACCEPT_ENCODING)
+
+        if LOG.isEnabledFor(logging.DEBUG):
+            self._log_request(method, url, headers, body)
+        resp = await self._send(method, url, headers, body)
+        if LOG.isEnabledFor(logging.DEBUG):
+            http.HTTPClient.log_http_response(resp, resp.text)
+
+        if resp.status == 406:
+            negotiated_ver = await self._negotiate_version(resp)
+            headers['X-OpenStack-Ironic-API-Version'] = negotiated_ver
+            return await self._request(url, method, headers, body)
+
+        if 400 <= resp.status < 600:
+            LOG.warn("Request returned failure status.")
+            error_json = http._extract_error_json(resp.text)
+            raise exc.from_response(
+                resp, error_json.get('faultstring'),
+                error_json.get('debuginfo'), method, url)
+        elif resp.status in (301, 302, 305):
+            # Redirected. Reissue the request to the new location.
+            return await self._request(resp.getheader('location'), method,
+                                       headers, body)
+        elif resp.status == 300:
+            raise exc.from_response(resp, method=method, url=url)
+
+        return resp
+
+    async def _http_request(self, url, method, headers=None, body=None):
+        """Send a request, retrying it after Conflict errors.
+
+        The same as http.with_retries(), without blocking the event loop
+        while waiting.
+
+        :returns: the Response, whose body has been read.
+        """
+        policy = http._get_retry_policy(self)
+        started = time.time()
+        num_attempts = self.conflict_max_retries + 1
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                resp = await self._request(url, method, headers, body)
+            except exc.Conflict as error:
+                policy.record_attempt(conflict=True)
+                msg = ("Error contacting Ironic server: %(error)s. "
+                       "Attempt %(attempt)d of %(total)d" %
+                       {'attempt': attempt,
+                        'total': num_attempts,
+                        'error': error})
+                delay = policy.next_delay(attempt, self.conflict_max_retries,
+                                          self.conflict_retry_interval,
+                                          started)
+                if delay is None:
+                    LOG.error(msg)
+                    raise
+                LOG.warn("%(msg)s, retrying in %(delay).1f seconds",
+                         {'msg': msg, 'delay': delay})
+                await asyncio.sleep(delay)
+            else:
+                policy.record_attempt()
+                return resp
+
+    async def json_request(self, method, url, **kwargs):
+        headers = dict(kwargs.get('headers') or {})
+        headers.setdefault('Content-Type', 'application/json')
+        headers.setdefault('Accept', 'application/json')
+        body = None
+        if 'body' in kwargs:
+            body = jsonstream.dumps(kwargs['body'])
+
+        resp = await self._http_request(url, method, headers=headers,
+                                        body=body)
+        content_type = resp.getheader('content-type', None)
+
+        if resp.status == 204 or resp.status == 205 or content_type is None:
+            return resp, list()
+
+        body = None
+        if 'application/json' in content_type:
+            try:
+                body = json.loads(resp.text)
+            except ValueError:
+                LOG.error('Could not decode response body as JSON')
+
+        return resp, body
+
+    async def raw_request(self, method, url, **kwargs):
+        headers = dict(kwargs.get('headers') or {})
+        headers.setdefault('Content-Type', 'application/octet-stream')
+        resp = await self._http_request(url, method, headers=headers,
+                                        body=kwargs.get('body'))
+        return resp, resp.body
+
+
+class Paginator(object):
+    """Asynchronous iterator over the items of a list, page after page.
+
+    The next page is requested as soon as a page is received, so that it
+    is transferred while the items of the current page are processed.
+
+    :param manager: the Manager sending the requests.
+    :param url: a partial URL, e.g. '/nodes'
+    :param response_key: the key of the list in the response bodies,
+        e.g. 'nodes'
+    :param obj_class: class for constructing the returned objects.
+    :param limit: maximum number of items to return, 0 or None for all.
+    :param all_pages: whether to follow the 'next' links, otherwise only
+        the first page is returned.
+    """
+
+    def __init__(self, manager, url, response_key=None, obj_class=None,
+                 limit=None, all_pages=True):
+        self.manager = manager
+        self.response_key = response_key
+        self.obj_class = obj_class or manager.resource_class
+        self.limit = limit
+        self.all_pages = all_pages
+        self._items = collections.deque()
+        self._count = 0
+        self._url = url
+        self._next_page = None
+
+    def _fetch(self, url):
+        return asyncio.ensure_future(
+            self.manager._get_page(url, self.response_key))
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        while not self._items:
+            if self._next_page is not None:
+                page, self._next_page = self._next_page, None
+                data, url = await page
+            elif self._url is not None:
+                url, self._url = self._url, None
+                data, url = await self.manager._get_page(url,
+                                                         self.response_key)
+            else:
+                raise StopAsyncIteration
+            if self.limit:
+                data = data[:self.limit - self._count]
+                self._count += len(data)
+                if self._count >= self.limit:
+                    url = None
+            if url and self.all_pages:
+                self._next_page = self._fetch(url)
+            self._items.extend(obj for obj in data if obj)
+        return self.obj_class(self.manager, self._items.popleft(),
+                              loaded=True)
+
+    def close(self):
+        """Stop the iteration, cancelling the prefetched page if any."""
+        if self._next_page is not None:
+            self._next_page.cancel()
+            self._next_page = None
+        self._url = None
+        self._items.clear()
+
+
+class Manager(object):
+    """Provides CRUD operations with a particular API, asynchronously.
+
+    Unlike with ironicclient.common.base.Manager, the resources are always
+    built as loaded since they can't be fetched lazily.
+    """
+    resource_class = None
+
+    def __init__(self, api):
+        self.api = api
+
+    async def _create(self, url, body):
+        resp, body = await self.api.json_request('POST', url, body=body)
+        if body:
+            return self.resource_class(self, body, loaded=True)
+
+    async def _get_page(self, url, response_key=None):
+        """Retrieve one page of a list.
+
+        :returns: a tuple with the list of items of the page and the
+            partial URL of the next page (None if this is the last one).
+        """
+        resp, body = await self.api.json_request('GET', url)
+        if not body:
+            return [], None
+        data = base.Manager._format_body_data(body, response_key)
+        next_url = body.get('next') if isinstance(body, dict) else None
+        return data, base._relative_url(next_url)
+
+    async def _list(self, url, response_key=None, obj_class=None):
+        data, next_url = await self._get_page(url, response_key)
+        if obj_class is None:
+            obj_class = self.resource_class
+        return [obj_class(self, res, loaded=True) for res in data if res]
+
+    async def _list_pagination(self, url, response_key=None, obj_class=None,
+                               limit=None):
+        """Retrieve a list of items, following the 'next' links.
+
+        See ironicclient.common.base.Manager._list_pagination().
+        """
+        paginator = Paginator(self, url, response_key, obj_class=obj_class,
+                              limit=limit)
+        object_list = []
+        async for obj in paginator:
+            object_list.append(obj)
+        return object_list
+
+    def _iter_list(self, url, response_key=None, obj_class=None, limit=None):
+        """Return a Paginator over the items of a list.
+
+        :param limit: maximum number of items to return. If 0 returns
+            everything, if None only the first page is retrieved.
+        """
+        return Paginator(self, url, response_key, obj_class=obj_class,
+                         limit=limit, all_pages=limit is not None)
+
+    async def _list_or_paginate(self, url, response_key, limit=None,
+                                obj_class=None):
+        if limit is None:
+            return await self._list(url, response_key, obj_class=obj_class)
+        return await self._list_pagination(url, response_key,
+                                           obj_class=obj_class, limit=limit)
+
+    async def _get(self, url):
+        items = await self._list(url)
+        if items:
+            return items[0]
+
+    async def _update(self, url, body, method='PATCH'):
+        resp, body = await self.api.json_request(method, url, body=body)
+        # PATCH/PUT requests may not return a body
+        if body:
+            return self.resource_class(self, body, loaded=True)
+
+    async def _delete(self, url):
+        await self.api.raw_request('DELETE', url)
+
+    async def _vendor_passthru(self, path, args, http_method):
+        if args is None:
+            args = {}
+
+        if http_method is None:
+            http_method = 'POST'
+
+        http_method = http_method.upper()
+
+        if http_method in ('POST', 'PUT', 'PATCH'):
+            return await self.update(path, args, http_method=http_method)
+        elif http_method == 'DELETE':
+            return await self.delete(path)
+        elif http_method == 'GET':
+            return await self.get(path)
+        else:
+            raise exc.InvalidAttribute(
+                _('Unknown HTTP method: %s') % http_method)
+
+
+def _check_creation_attributes(kwargs, allowed):
+    for key in kwargs:
+        if key not in allowed:
+            raise exc.InvalidAttribute()
+    return dict(kwargs)
+
+
+class ChassisManager(Manager):
+    """See ironicclient.v1.chassis.ChassisManager."""
+    resource_class = chassis.Chassis
+
+    _path = staticmethod(chassis.ChassisManager._path)
+    _list_path = staticmethod(chassis.ChassisManager._list_path)
+    _nodes_path = staticmethod(chassis.ChassisManager._nodes_path)
+
+    async def list(self, marker=None, limit=None, sort_key=None,
+                   sort_dir=None, detail=False, compact=False):
+        if limit is not None:
+            limit = int(limit)
+        obj_class = chassis.CompactChassis if compact else None
+
+        path = self._list_path(marker, limit, sort_key, sort_dir, detail)
+        return await self._list_or_paginate(self._path(path), "chassis",
+                                            limit=limit, obj_class=obj_class)
+
+    def iter_list(self, marker=None, limit=None, sort_key=None,
+                  sort_dir=None, detail=False, compact=False):
+        if limit is not None:
+            limit = int(limit)
+        obj_class = chassis.CompactChassis if compact else None
+
+        path = self._list_path(marker, limit, sort_key, sort_dir, detail)
+        return self._iter_list(self._path(path), "chassis", limit=limit,
+                               obj_class=obj_class)
+
+    async def list_nodes(self, chassis_id, marker=None, limit=None,
+                         sort_key=None, sort_dir=None, detail=False,
+                         compact=False):
+        if limit is not None:
+            limit = int(limit)
+        obj_class = node.CompactNode if compact else node.Node
+
+        path = self._nodes_path(chassis_id, marker, limit, sort_key,
+                                sort_dir, detail)
+        return await self._list_or_paginate(self._path(path), "nodes",
+                                            limit=limit, obj_class=obj_class)
+
+    def iter_list_nodes(self, chassis_id, marker=None, limit=None,
+                        sort_key=None, sort_dir=None, detail=False,
+                        compact=False):
+        if limit is not None:
+            limit = int(limit)
+        obj_class = node.CompactNode if compact else node.Node
+
+        path = self._nodes_path(chassis_id, marker, limit, sort_key,
+                                sort_dir, detail)
+        return self._iter_list(self._path(path), "nodes", limit=limit,
+                               obj_class=obj_class)
+
+    async def get(self, chassis_id):
+        return await self._get(self._path(chassis_id))
+
+    async def create(self, **kwargs):
+        new = _check_creation_attributes(kwargs, chassis.CREATION_ATTRIBUTES)
+        return await self._create(self._path(), new)
+
+    async def delete(self, chassis_id):
+        return await self._delete(self._path(chassis_id))
+
+    async def update(self, chassis_id, patch):
+        return await self._update(self._path(chassis_id), patch)
+
+
+class NodeManager(Manager):
+    """See ironicclient.v1.node.NodeManager."""
+    resource_class = node.Node
+
+    _path = staticmethod(node.NodeManager._path)
+    _list_path = staticmethod(node.NodeManager._list_path)
+    _ports_path = staticmethod(node.NodeManager._ports_path)
+
+    async def list(self, associated=None, maintenance=None, marker=None,
+                   limit=None, detail=False, sort_key=None, sort_dir=None,
+                   compact=False):
+        if limit is not None:
+            limit = int(limit)
+        obj_class = node.CompactNode if compact else None
+
+        path = self._list_path(associated, maintenance, marker, limit,
+                               detail, sort_key, sort_dir)
+        return await self._list_or_paginate(self._path(path), "nodes",
+                                            limit=limit, obj_class=obj_class)
+
+    def iter_list(self, associated=None, maintenance=None, marker=None,
+                  limit=None, detail=False, sort_key=None, sort_dir=None,
+                  compact=False):
+        if limit is not None:
+            limit = int(limit)
+        obj_class = node.CompactNode if compact else None
+
+        path = self._list_path(associated, maintenance, marker, limit,
+                               detail, sort_key, sort_dir)
+        return self._iter_list(self._path(path), "nodes", limit=limit,
+                               obj_class=obj_class)
+
+    async def list_ports(self, node_id, marker=None, limit=None,
+                         sort_key=None, sort_dir=None, detail=False,
+                         compact=False):
+        if limit is not None:
+            limit = int(limit)
+        obj_class = port.CompactPort if compact else port.Port
+
+        path = self._ports_path(node_id, marker, limit, sort_key, sort_dir,
+                                detail)
+        return await self._list_or_paginate(self._path(path), "ports",
+                                            limit=limit, obj_class=obj_class)
+
+    def iter_list_ports(self, node_id, marker=None, limit=None,
+                        sort_key=None, sort_dir=None, detail=False,
+                        compact=False):
+        if limit is not None:
+            limit = int(limit)
+        obj_class = port.CompactPort if compact else port.Port
+
+        path = self._ports_path(node_id, marker, limit, sort_key, sort_dir,
+                                detail)
+        return self._iter_list(self._path(path), "ports", limit=limit,
+                               obj_class=obj_class)
+
+    async def get(self, node_id):
+        return await self._get(self._path(node_id))
+
+    async def get_by_instance_uuid(self, instance_uuid):
+        path = "detail?instance_uuid=%s" % instance_uuid
+        nodes = await self._list(self._path(path), 'nodes')
+        if len(nodes) == 1:
+            return nodes[0]
+        else:
+            raise exc.NotFound()
+
+    async def create(self, **kwargs):
+        new = _check_creation_attributes(kwargs, node.CREATION_ATTRIBUTES)
+        return await self._create(self._path(), new)
+
+    async def delete(self, node_id):
+        return await self._delete(self._path(node_id))
+
+    async def update(self, node_id, patch, http_method='PATCH'):
+        return await self._update(self._path(node_id), patch,
+                                  method=http_method)
+
+    async def vendor_passthru(self, node_id, method, args=None,
+                              http_method=None):
+        path = "%s/vendor_passthru/%s" % (node_id, method)
+        return await self._vendor_passthru(path, args, http_method)
+
+    async def set_maintenance(self, node_id, state, maint_reason=None):
+        path = "%s/maintenance" % node_id
+        if state in ('true', 'on'):
+            reason = {'reason': maint_reason}
+            return await self._update(self._path(path), reason, method='PUT')
+        if state in ('false', 'off'):
+            return await self._delete(self._path(path))
+
+    async def set_power_state(self, node_id, state):
+        path = "%s/states/power" % node_id
+        if state in ['on', 'off']:
+            state = "power %s" % state
+        if state in ['reboot']:
+            state = "rebooting"
+        target = {'target': state}
+        return await self._update(self._path(path), target, method='PUT')
+
+    async def validate(self, node_uuid):
+        path = "%s/validate" % node_uuid
+        return await self.get(path)
+
+    async def set_provision_state(self, node_uuid, state, configdrive=None,
+                                  genisoimage=False):
+        path = "%s/states/provision" % node_uuid
+        body = {'target': state}
+        if configdrive:
+            # NOTE: reading or building the config drive blocks
+            loop = asyncio.get_event_loop()
+            body['configdrive'] = await loop.run_in_executor(
+                None, node._load_configdrive, configdrive, genisoimage)
+        return await self._update(self._path(path), body, method='PUT')
+
+    async def states(self, node_uuid):
+        path = "%s/states" % node_uuid
+        return await self.get(path)
+
+    async def get_console(self, node_uuid):
+        path = "%s/states/console" % node_uuid
+        info = await self.get(path)
+        if not info:
+            return {}
+        return info.to_dict()
+
+    async def set_console_mode(self, node_uuid, enabled):
+        path = "%s/states/console" % node_uuid
+        target = {'enabled': enabled}
+        return await self._update(self._path(path), target, method='PUT')
+
+    async def set_boot_device(self, node_uuid, boot_device,
+                              persistent=False):
+        path = "%s/management/boot_device" % node_uuid
+        target = {'boot_device': boot_device, 'persistent': persistent}
+        return await self._update(self._path(path), target, method='PUT')
+
+    async def get_boot_device(self, node_uuid):
+        path = "%s/management/boot_device" % node_uuid
+        return (await self.get(path)).to_dict()
+
+    async def get_supported_boot_devices(self, node_uuid):
+        path = "%s/management/boot_device/supported" % node_uuid
+        return (await self.get(path)).to_dict()
+
+
+class PortManager(Manager):
+    """See ironicclient.v1.port.PortManager."""
+    resource_class = port.Port
+
+    _path = staticmethod(port.PortManager._path)
+    _list_path = staticmethod(port.PortManager._list_path)
+
+    async def list(self, address=None, limit=None, marker=None,
+                   sort_key=None, sort_dir=None, detail=False,
+                   compact=False):
+        if limit is not None:
+            limit = int(limit)
+        obj_class = port.CompactPort if compact else None
+
+        path = self._list_path(address, limit, marker, sort_key, sort_dir,
+                               detail)
+        return await self._list_or_paginate(self._path(path), "ports",
+                                            limit=limit, obj_class=obj_class)
+
+    def iter_list(self, address=None, limit=None, marker=None, sort_key=None,
+                  sort_dir=None, detail=False, compact=False):
+        if limit is not None:
+            limit = int(limit)
+        obj_class = port.CompactPort if compact else None
+
+        path = self._list_path(address, limit, marker, sort_key, sort_dir,
+                               detail)
+        return self._iter_list(self._path(path), "ports", limit=limit,
+                               obj_class=obj_class)
+
+    async def get(self, port_id):
+        return await self._get(self._path(port_id))
+
+    async def get_by_address(self, address):
+        path = "detail?address=%s" % address
+        ports = await self._list(self._path(path), 'ports')
+        if len(ports) == 1:
+            return ports[0]
+        else:
+            raise exc.NotFound()
+
+    async def create(self, **kwargs):
+        new = _check_creation_attributes(kwargs, port.CREATION_ATTRIBUTES)
+        return await self._create(self._path(), new)
+
+    async def delete(self, port_id):
+        return await self._delete(self._path(port_id))
+
+    async def update(self, port_id, patch):
+        return await self._update(self._path(port_id), patch)
+
+
+class DriverManager(Manager):
+    """See ironicclient.v1.driver.DriverManager."""
+    resource_class = driver.Driver
+
+    async def list(self):
+        return await self._list('/v1/drivers', "drivers")
+
+    async def get(self, driver_name):
+        return await self._get('/v1/drivers/%s' % driver_name)
+
+    async def update(self, driver_name, patch, http_method='PATCH'):
+        path = '/v1/drivers/%s' % driver_name
+        return await self._update(path, patch, method=http_method)
+
+    async def delete(self, driver_name):
+        return await self._delete('/v1/drivers/%s' % driver_name)
+
+    async def properties(self, driver_name):
+        info = await self.get('%s/properties' % driver_name)
+        if info:
+            return info.to_dict()
+        return {}
+
+    async def vendor_passthru(self, driver_name, method, args=None,
+                              http_method=None):
+        path = "%s/vendor_passthru/%s" % (driver_name, method)
+        return await self._vendor_passthru(path, args, http_method)
+
+
+class Client(object):
+    """Asynchronous client for the Ironic v1 API.
+
+    The managers have the methods of those of
+    :class:`ironicclient.v1.client.Client`, as coroutines, and the
+    iter_list*() methods return asynchronous iterators. All the managers
+    share the connections of the client: close() it once done, or use it
+    as an asynchronous context manager::
+
+        async with aio.Client(endpoint, token=token) as client:
+            node = await client.node.get(node_uuid)
+
+    :param string endpoint: The endpoint URL of the ironic service.
+    :param string token: The token for authentication; keystone sessions
+                         are not supported.
+
+    The other parameters are those of ironicclient.v1.client.Client,
+    'max_connections' being the maximum number of requests sent at the
+    same time.
+    """
+
+    def __init__(self, endpoint, **kwargs):
+        """Initialize a new asynchronous client for the Ironic v1 API."""
+        # set the default API version header string, if none specified
+        if not kwargs.get('os_ironic_api_version'):
+            kwargs['os_ironic_api_version'] = DEFAULT_VER
+            kwargs['api_version_select_state'] = "default"
+        else:
+            kwargs['api_version_select_state'] = "user"
+        self.http_client = HTTPClient(endpoint, **kwargs)
+        self.chassis = ChassisManager(self.http_client)
+        self.node = NodeManager(self.http_client)
+        self.port = PortManager(self.http_client)
+        self.driver = DriverManager(self.http_client)
+
+    def close(self):
+        """Close the connections to the ironic service."""
+        self.http_client.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.close()
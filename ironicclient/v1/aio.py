@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Client for the Ironic v1 API running on asyncio.
+
+The managers mirror the ones of :class:`ironicclient.v1.client.Client`,
+with coroutines instead of blocking methods. This module requires
+Python 3.5 or newer.
+"""
+
+import sys
+
+# NOTE: the implementation uses the async/await syntax, which the older
+# versions of Python can't even compile.
+if sys.version_info < (3, 5):
+    raise ImportError('ironicclient.v1.aio requires Python 3.5 or newer')
+
+from ironicclient.v1._aio import *  # noqa
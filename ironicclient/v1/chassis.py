@@ -17,6 +17,8 @@
 from ironicclient.common import base
 from ironicclient.common import utils
 from ironicclient import exc
+from ironicclient.v1 import node
+from ironicclient.v1 import resource_fields
 
 
 CREATION_ATTRIBUTES = ['description', 'extra']
@@ -27,6 +29,10 @@ class Chassis(base.Resource):
         return "<Chassis %s>" % self._info
 
 
+class CompactChassis(base.CompactResource):
+    __slots__ = tuple(resource_fields.CHASSIS_FIELDS) + ('links', 'nodes')
+
+
 class ChassisManager(base.Manager):
     resource_class = Chassis
 
@@ -35,7 +41,7 @@ class ChassisManager(base.Manager):
         return '/v1/chassis/%s' % id if id else '/v1/chassis'
 
     def list(self, marker=None, limit=None, sort_key=None,
-             sort_dir=None, detail=False):
+             sort_dir=None, detail=False, compact=False, fields=None):
         """Retrieve a list of chassis.
 
         :param marker: Optional, the UUID of a chassis, eg the last
@@ -58,28 +64,67 @@ class ChassisManager(base.Manager):
         :param detail: Optional, boolean whether to return detailed information
                        about chassis.
 
+        :param compact: Optional, boolean whether to return chassis storing
+                        their fields only once, using less memory for
+                        large listings. They have the same attributes but
+                        are read-only.
+
+        :param fields: Optional, a list with the fields of the chassis to
+                       return, e.g. ['uuid', 'name']. Can't be used along
+                       with 'detail'.
+
         :returns: A list of chassis.
 
         """
         if limit is not None:
             limit = int(limit)
+        obj_class = CompactChassis if compact else None
+        fields, trim, detail = self._select_fields(fields, detail)
 
-        filters = utils.common_filters(marker, limit, sort_key, sort_dir)
+        path = self._list_path(marker, limit, sort_key, sort_dir, detail,
+                               fields)
+        if limit is None:
+            return self._list(self._path(path), "chassis",
+                              obj_class=obj_class, fields=trim)
+        else:
+            return self._list_pagination(self._path(path), "chassis",
+                                         limit=limit, obj_class=obj_class,
+                                         fields=trim)
+
+    def iter_list(self, marker=None, limit=None, sort_key=None,
+                  sort_dir=None, detail=False, compact=False, fields=None):
+        """Retrieve chassis, yielding them as each page is received.
+
+        Takes the same parameters as list(), but only keeps one page of
+        chassis in memory at a time.
+
+        :returns: A generator of chassis.
+
+        """
+        if limit is not None:
+            limit = int(limit)
+        obj_class = CompactChassis if compact else None
+        fields, trim, detail = self._select_fields(fields, detail)
+
+        path = self._list_path(marker, limit, sort_key, sort_dir, detail,
+                               fields)
+        return self._iter_list(self._path(path), "chassis", limit=limit,
+                               obj_class=obj_class, fields=trim)
+
+    @staticmethod
+    def _list_path(marker, limit, sort_key, sort_dir, detail, fields=None):
+        filters = utils.common_filters(marker, limit, sort_key, sort_dir,
+                                       fields)
 
         path = ''
         if detail:
             path += 'detail'
         if filters:
             path += '?' + '&'.join(filters)
-
-        if limit is None:
-            return self._list(self._path(path), "chassis")
-        else:
-            return self._list_pagination(self._path(path), "chassis",
-                                         limit=limit)
+        return path
 
     def list_nodes(self, chassis_id, marker=None, limit=None,
-                   sort_key=None, sort_dir=None, detail=False):
+                   sort_key=None, sort_dir=None, detail=False, compact=False):
         """List all the nodes for a given chassis.
 
         :param chassis_id: The UUID of the chassis.
@@ -103,12 +148,49 @@ class ChassisManager(base.Manager):
         :param detail: Optional, boolean whether to return detailed information
                        about nodes.
 
+        :param compact: Optional, boolean whether to return nodes storing
+                        their fields only once, using less memory for
+                        large listings. They have the same attributes but
+                        are read-only.
+
         :returns: A list of nodes.
 
         """
         if limit is not None:
             limit = int(limit)
+        obj_class = node.CompactNode if compact else None
+
+        path = self._nodes_path(chassis_id, marker, limit, sort_key,
+                                sort_dir, detail)
+        if limit is None:
+            return self._list(self._path(path), "nodes",
+                              obj_class=obj_class)
+        else:
+            return self._list_pagination(self._path(path), "nodes",
+                                         limit=limit, obj_class=obj_class)
+
+    def iter_list_nodes(self, chassis_id, marker=None, limit=None,
+                        sort_key=None, sort_dir=None, detail=False,
+                        compact=False):
+        """Retrieve the nodes of a chassis, yielding them as they're received.
+
+        Takes the same parameters as list_nodes(), but only keeps one page
+        of nodes in memory at a time.
+
+        :returns: A generator of nodes.
+
+        """
+        if limit is not None:
+            limit = int(limit)
+        obj_class = node.CompactNode if compact else None
 
+        path = self._nodes_path(chassis_id, marker, limit, sort_key,
+                                sort_dir, detail)
+        return self._iter_list(self._path(path), "nodes", limit=limit,
+                               obj_class=obj_class)
+
+    @staticmethod
+    def _nodes_path(chassis_id, marker, limit, sort_key, sort_dir, detail):
         filters = utils.common_filters(marker, limit, sort_key, sort_dir)
 
         path = "%s/nodes" % chassis_id
@@ -117,18 +199,19 @@ class ChassisManager(base.Manager):
 
         if filters:
             path += '?' + '&'.join(filters)
+        return path
 
-        if limit is None:
-            return self._list(self._path(path), "nodes")
-        else:
-            return self._list_pagination(self._path(path), "nodes",
-                                         limit=limit)
+    def get(self, chassis_id, fields=None):
+        """Retrieve a chassis.
 
-    def get(self, chassis_id):
-        try:
-            return self._list(self._path(chassis_id))[0]
-        except IndexError:
-            return None
+        :param chassis_id: The UUID of the chassis.
+        :param fields: Optional, a list with the fields of the chassis to
+                       return, e.g. ['uuid', 'description'].
+        """
+        fields, trim = self._select_fields(fields)[:2]
+        if fields:
+            chassis_id += '?' + utils.common_filters(fields=fields)[0]
+        return self._get(self._path(chassis_id), fields=trim)
 
     def create(self, **kwargs):
         new = {}
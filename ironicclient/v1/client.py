@@ -16,6 +16,7 @@
 #    under the License.
 
 from ironicclient.common import http
+from ironicclient.common import instrumentation
 from ironicclient.common.http import DEFAULT_VER
 from ironicclient.v1 import chassis
 from ironicclient.v1 import driver
@@ -31,6 +32,36 @@ class Client(object):
     :param function token: Provides token for authentication.
     :param integer timeout: Allows customization of the timeout for client
                             http requests. (optional)
+    :param boolean keepalive: Whether to reuse connections to the ironic
+                              endpoint between requests. Defaults to True.
+                              (optional)
+    :param integer max_connections: Maximum number of connections open to
+                                    the endpoint at the same time, the
+                                    other requests wait for one to be
+                                    released, up to the timeout. Only
+                                    with keepalive. (optional)
+    :param retry_policy: A RetryPolicy deciding when requests failing with
+                         a Conflict error are retried. (optional)
+    :param version_cache: The VersionCache remembering the API versions
+                          supported by the endpoint, None to disable it.
+                          Defaults to a cache shared in memory by the
+                          clients of the process. (optional)
+    :param integer prefetch_depth: Number of pages requested ahead while
+                                   paginating through a list, 0 to disable.
+                                   (optional)
+    :param resource_cache: A ResourceCache from which the get() methods of
+                           the managers return the resources retrieved
+                           recently. Disabled by default. (optional)
+    :param boolean compression: Whether to ask the server to compress the
+                                response bodies with gzip or deflate.
+                                Defaults to True. (optional)
+    :param boolean timings: Whether to keep the timings of the last requests,
+                            returned by get_timings(). Defaults to False.
+                            (optional)
+    :param instrumentation: An Instrumentation whose hooks are called on
+                            each request. By default, one without hooks
+                            is available as the instrumentation attribute.
+                            (optional)
     """
 
     def __init__(self, *args, **kwargs):
@@ -41,8 +72,32 @@ class Client(object):
             kwargs['api_version_select_state'] = "default"
         else:
             kwargs['api_version_select_state'] = "user"
+        prefetch_depth = kwargs.pop('prefetch_depth', None)
+        resource_cache = kwargs.pop('resource_cache', None)
+        self.instrumentation = kwargs.pop('instrumentation', None)
+        if self.instrumentation is None:
+            self.instrumentation = instrumentation.Instrumentation(
+                timings=kwargs.pop('timings', False))
+        else:
+            kwargs.pop('timings', None)
+        kwargs['instrumentation'] = self.instrumentation
         self.http_client = http._construct_http_client(*args, **kwargs)
         self.chassis = chassis.ChassisManager(self.http_client)
         self.node = node.NodeManager(self.http_client)
         self.port = port.PortManager(self.http_client)
         self.driver = driver.DriverManager(self.http_client)
+        for manager in (self.chassis, self.node, self.port, self.driver):
+            if prefetch_depth is not None:
+                manager.prefetch_depth = prefetch_depth
+            manager.resource_cache = resource_cache
+
+    def get_timings(self):
+        """Return the ('METHOD url', start, end) of the last requests.
+
+        Only recorded when the client is created with timings=True, e.g. for
+        'openstack --timing'.
+        """
+        return self.instrumentation.get_timings()
+
+    def reset_timings(self):
+        self.instrumentation.reset_timings()
@@ -32,10 +32,7 @@ class DriverManager(base.Manager):
         return self._list('/v1/drivers', "drivers")
 
     def get(self, driver_name):
-        try:
-            return self._list('/v1/drivers/%s' % driver_name)[0]
-        except IndexError:
-            return None
+        return self._get('/v1/drivers/%s' % driver_name)
 
     def update(self, driver_name, patch, http_method='PATCH'):
         path = '/v1/drivers/%s' % driver_name
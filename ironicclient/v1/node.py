@@ -17,19 +17,94 @@
 import os
 
 from ironicclient.common import base
+from ironicclient.common import bulk
+from ironicclient.common import configdrive as configdrive_utils
 from ironicclient.common.i18n import _
+from ironicclient.common import jsonstream
 from ironicclient.common import utils
+from ironicclient.common import waiter
 from ironicclient import exc
+from ironicclient.v1 import port
+from ironicclient.v1 import resource_fields
 
 CREATION_ATTRIBUTES = ['chassis_uuid', 'driver', 'driver_info', 'extra',
                        'uuid', 'properties', 'name']
 
 
+def _load_configdrive(configdrive, genisoimage=False):
+    """The config drive to send, read from a file or built from a dir.
+
+    The config drives of files and directories are streamed from files
+    when the request is sent, rather than held in memory.
+    """
+    if os.path.isfile(configdrive):
+        return jsonstream.FileString(configdrive)
+    if os.path.isdir(configdrive):
+        return configdrive_utils.build(configdrive, genisoimage=genisoimage)
+    return configdrive
+
+
+# The fields of the nodes telling how an operation is going
+_STATE_FIELDS = ['provision_state', 'target_provision_state', 'power_state',
+                 'target_power_state', 'last_error']
+
+# Up to this number of nodes still waited for, wait_for_nodes() polls the
+# states of each node rather than listing all the nodes
+WAIT_FOR_NODES_LIST_THRESHOLD = 10
+
+
+def _provision_state_reached(node_id, node, expected_state):
+    """Whether a node is in a provision state.
+
+    :raises: StateTransitionFailed if the node is in an error state.
+    """
+    state = node.provision_state
+    if state == expected_state:
+        return True
+    if state == 'error' or (state or '').endswith(' failed'):
+        raise exc.StateTransitionFailed(
+            _('Node %(node)s went to provision state "%(state)s" instead of '
+              '"%(expected)s". Last error: %(error)s') %
+            {'node': node_id, 'state': state, 'expected': expected_state,
+             'error': getattr(node, 'last_error', None)})
+    return False
+
+
+def _power_state_reached(node_id, node, expected_state):
+    """Whether a node is in a power state.
+
+    :raises: StateTransitionFailed if the node is in the error state, or
+             if it's not changing its power state anymore and failed to.
+    """
+    state = node.power_state
+    if state == expected_state:
+        return True
+    last_error = getattr(node, 'last_error', None)
+    if state == 'error' or (
+            getattr(node, 'target_power_state', None) is None and last_error):
+        raise exc.StateTransitionFailed(
+            _('Node %(node)s is in power state "%(state)s" instead of '
+              '"%(expected)s". Last error: %(error)s') %
+            {'node': node_id, 'state': state, 'expected': expected_state,
+             'error': last_error})
+    return False
+
+
+def _power_state(state):
+    if state in ('on', 'off'):
+        return 'power %s' % state
+    return state
+
+
 class Node(base.Resource):
     def __repr__(self):
         return "<Node %s>" % self._info
 
 
+class CompactNode(base.CompactResource):
+    __slots__ = tuple(resource_fields.NODE_FIELDS) + ('links', 'ports')
+
+
 class NodeManager(base.Manager):
     resource_class = Node
 
@@ -38,7 +113,8 @@ class NodeManager(base.Manager):
         return '/v1/nodes/%s' % id if id else '/v1/nodes'
 
     def list(self, associated=None, maintenance=None, marker=None, limit=None,
-             detail=False, sort_key=None, sort_dir=None):
+             detail=False, sort_key=None, sort_dir=None, compact=False,
+             fields=None):
         """Retrieve a list of nodes.
 
         :param associated: Optional, boolean whether to return a list of
@@ -66,13 +142,59 @@ class NodeManager(base.Manager):
         :param sort_dir: Optional, direction of sorting, either 'asc' (the
                          default) or 'desc'.
 
+        :param compact: Optional, boolean whether to return nodes storing
+                        their fields only once, using less memory for
+                        large listings. They have the same attributes but
+                        are read-only.
+
+        :param fields: Optional, a list with the fields of the nodes to
+                       return, e.g. ['uuid', 'name']. Can't be used along
+                       with 'detail'.
+
         :returns: A list of nodes.
 
         """
         if limit is not None:
             limit = int(limit)
+        obj_class = CompactNode if compact else None
+        fields, trim, detail = self._select_fields(fields, detail)
 
-        filters = utils.common_filters(marker, limit, sort_key, sort_dir)
+        path = self._list_path(associated, maintenance, marker, limit,
+                               detail, sort_key, sort_dir, fields)
+        if limit is None:
+            return self._list(self._path(path), "nodes",
+                              obj_class=obj_class, fields=trim)
+        else:
+            return self._list_pagination(self._path(path), "nodes",
+                                         limit=limit, obj_class=obj_class,
+                                         fields=trim)
+
+    def iter_list(self, associated=None, maintenance=None, marker=None,
+                  limit=None, detail=False, sort_key=None, sort_dir=None,
+                  compact=False, fields=None):
+        """Retrieve nodes, yielding them as each page is received.
+
+        Takes the same parameters as list(), but only keeps one page of
+        nodes in memory at a time.
+
+        :returns: A generator of nodes.
+
+        """
+        if limit is not None:
+            limit = int(limit)
+        obj_class = CompactNode if compact else None
+        fields, trim, detail = self._select_fields(fields, detail)
+
+        path = self._list_path(associated, maintenance, marker, limit,
+                               detail, sort_key, sort_dir, fields)
+        return self._iter_list(self._path(path), "nodes", limit=limit,
+                               obj_class=obj_class, fields=trim)
+
+    @staticmethod
+    def _list_path(associated, maintenance, marker, limit, detail,
+                   sort_key, sort_dir, fields=None):
+        filters = utils.common_filters(marker, limit, sort_key, sort_dir,
+                                       fields)
         if associated is not None:
             filters.append('associated=%s' % associated)
         if maintenance is not None:
@@ -83,15 +205,10 @@ class NodeManager(base.Manager):
             path += 'detail'
         if filters:
             path += '?' + '&'.join(filters)
-
-        if limit is None:
-            return self._list(self._path(path), "nodes")
-        else:
-            return self._list_pagination(self._path(path), "nodes",
-                                         limit=limit)
+        return path
 
     def list_ports(self, node_id, marker=None, limit=None, sort_key=None,
-                   sort_dir=None, detail=False):
+                   sort_dir=None, detail=False, compact=False):
         """List all the ports for a given node.
 
         :param node_id: The UUID of the node.
@@ -115,12 +232,49 @@ class NodeManager(base.Manager):
         :param detail: Optional, boolean whether to return detailed information
                        about ports.
 
+        :param compact: Optional, boolean whether to return ports storing
+                        their fields only once, using less memory for
+                        large listings. They have the same attributes but
+                        are read-only.
+
         :returns: A list of ports.
 
         """
         if limit is not None:
             limit = int(limit)
+        obj_class = port.CompactPort if compact else None
+
+        path = self._ports_path(node_id, marker, limit, sort_key, sort_dir,
+                                detail)
+        if limit is None:
+            return self._list(self._path(path), "ports",
+                              obj_class=obj_class)
+        else:
+            return self._list_pagination(self._path(path), "ports",
+                                         limit=limit, obj_class=obj_class)
+
+    def iter_list_ports(self, node_id, marker=None, limit=None,
+                        sort_key=None, sort_dir=None, detail=False,
+                        compact=False):
+        """Retrieve the ports of a node, yielding them as they are received.
+
+        Takes the same parameters as list_ports(), but only keeps one page
+        of ports in memory at a time.
+
+        :returns: A generator of ports.
 
+        """
+        if limit is not None:
+            limit = int(limit)
+        obj_class = port.CompactPort if compact else None
+
+        path = self._ports_path(node_id, marker, limit, sort_key, sort_dir,
+                                detail)
+        return self._iter_list(self._path(path), "ports", limit=limit,
+                               obj_class=obj_class)
+
+    @staticmethod
+    def _ports_path(node_id, marker, limit, sort_key, sort_dir, detail):
         filters = utils.common_filters(marker, limit, sort_key, sort_dir)
 
         path = "%s/ports" % node_id
@@ -129,18 +283,19 @@ class NodeManager(base.Manager):
 
         if filters:
             path += '?' + '&'.join(filters)
+        return path
 
-        if limit is None:
-            return self._list(self._path(path), "ports")
-        else:
-            return self._list_pagination(self._path(path), "ports",
-                                         limit=limit)
+    def get(self, node_id, fields=None):
+        """Retrieve a node.
 
-    def get(self, node_id):
-        try:
-            return self._list(self._path(node_id))[0]
-        except IndexError:
-            return None
+        :param node_id: The name or UUID of the node.
+        :param fields: Optional, a list with the fields of the node to
+                       return, e.g. ['uuid', 'power_state'].
+        """
+        fields, trim = self._select_fields(fields)[:2]
+        if fields:
+            node_id += '?' + utils.common_filters(fields=fields)[0]
+        return self._get(self._path(node_id), fields=trim)
 
     def get_by_instance_uuid(self, instance_uuid):
         path = "detail?instance_uuid=%s" % instance_uuid
@@ -218,23 +373,210 @@ class NodeManager(base.Manager):
         path = "%s/validate" % node_uuid
         return self.get(path)
 
-    def set_provision_state(self, node_uuid, state, configdrive=None):
+    def set_provision_state(self, node_uuid, state, configdrive=None,
+                            genisoimage=False):
+        """Set the provision state of a node.
+
+        :param node_uuid: The UUID or name of the node.
+        :param state: The target provision state, e.g. 'active'.
+        :param configdrive: Optional, a gzipped and base64 encoded config
+                            drive, or the path of a file holding one, or
+                            the path of a directory to build one from.
+        :param genisoimage: Optional, whether to build the config drive of
+                            a directory with the genisoimage tool rather
+                            than in-process.
+        """
         path = "%s/states/provision" % node_uuid
         body = {'target': state}
         if configdrive:
-            if os.path.isfile(configdrive):
-                with open(configdrive, 'rb') as f:
-                    configdrive = f.read()
-            if os.path.isdir(configdrive):
-                configdrive = utils.make_configdrive(configdrive)
-
-            body['configdrive'] = configdrive
+            body['configdrive'] = _load_configdrive(configdrive, genisoimage)
         return self._update(self._path(path), body, method='PUT')
 
     def states(self, node_uuid):
         path = "%s/states" % node_uuid
         return self.get(path)
 
+    def _wait_for_state(self, node_id, reached, expected_state, description,
+                        timeout, poll_interval, max_poll_interval):
+        def _poll():
+            # NOTE: the states of a node are never cached
+            states = self.states(node_id)
+            return (reached(node_id, states, expected_state), states,
+                    tuple(getattr(states, f, None) for f in _STATE_FIELDS))
+
+        return waiter.wait(_poll, description, timeout=timeout,
+                           interval=waiter.PollInterval(poll_interval,
+                                                        max_poll_interval))
+
+    def wait_for_provision_state(
+            self, node_id, expected_state, timeout=0,
+            poll_interval=waiter.DEFAULT_POLL_INTERVAL,
+            max_poll_interval=waiter.DEFAULT_MAX_POLL_INTERVAL):
+        """Wait for a node to reach a provision state.
+
+        The states of the node are polled less and less often while they
+        don't change, and more often again after a change.
+
+        :param node_id: The UUID or name of the node.
+        :param expected_state: The provision state to wait for, e.g.
+                               'active' or 'available'.
+        :param timeout: Optional, the number of seconds to wait, 0 (the
+                        default) to wait forever.
+        :param poll_interval: Optional, the number of seconds between the
+                              first polls.
+        :param max_poll_interval: Optional, the maximum number of seconds
+                                  between polls.
+        :returns: The states of the node, as returned by states().
+        :raises: StateTransitionFailed if the node goes to an error state,
+                 like 'deploy failed'.
+        :raises: StateTransitionTimeout if the node didn't reach the state
+                 in time.
+        """
+        return self._wait_for_state(
+            node_id, _provision_state_reached, expected_state,
+            _('node %(node)s to reach provision state "%(state)s"') %
+            {'node': node_id, 'state': expected_state},
+            timeout, poll_interval, max_poll_interval)
+
+    def wait_for_power_state(
+            self, node_id, expected_state, timeout=0,
+            poll_interval=waiter.DEFAULT_POLL_INTERVAL,
+            max_poll_interval=waiter.DEFAULT_MAX_POLL_INTERVAL):
+        """Wait for a node to reach a power state.
+
+        Takes the same parameters as wait_for_provision_state(), the
+        expected state being 'power on' or 'power off' (or 'on' or 'off').
+
+        :returns: The states of the node, as returned by states().
+        :raises: StateTransitionFailed if the node goes to the error power
+                 state, or failed to change its power state.
+        :raises: StateTransitionTimeout if the node didn't reach the state
+                 in time.
+        """
+        expected_state = _power_state(expected_state)
+        return self._wait_for_state(
+            node_id, _power_state_reached, expected_state,
+            _('node %(node)s to reach power state "%(state)s"') %
+            {'node': node_id, 'state': expected_state},
+            timeout, poll_interval, max_poll_interval)
+
+    def wait_for_nodes(self, node_ids, provision_state=None,
+                       power_state=None, timeout=0,
+                       poll_interval=waiter.DEFAULT_POLL_INTERVAL,
+                       max_poll_interval=waiter.DEFAULT_MAX_POLL_INTERVAL):
+        """Wait for many nodes to reach a provision or a power state.
+
+        While few nodes are waited for, the states of each node are polled.
+        With more nodes, they are polled all at once by listing the nodes,
+        with only the fields telling their states from API version 1.8.
+        With older versions the nodes are listed without details, and the
+        states of some of the nodes not in the expected state yet are
+        polled in turn, to find out whether they failed to get there.
+
+        :param node_ids: The UUIDs or names of the nodes.
+        :param provision_state: The provision state to wait for.
+        :param power_state: The power state to wait for.
+        :param timeout: Optional, the number of seconds to wait, 0 (the
+                        default) to wait forever.
+        :param poll_interval: Optional, the number of seconds between the
+                              first polls.
+        :param max_poll_interval: Optional, the maximum number of seconds
+                                  between polls.
+        :returns: A list of ironicclient.common.bulk.BulkResult, one per
+                  node and in the same order, whose 'result' is the node
+                  or its states, as last polled, and 'error' the
+                  StateTransitionFailed, StateTransitionTimeout or NotFound
+                  error for it, if any.
+        :raises: InvalidAttribute unless either provision_state or
+                 power_state is given.
+        """
+        if (provision_state is None) == (power_state is None):
+            raise exc.InvalidAttribute(
+                _('Either a provision state or a power state to wait for '
+                  'must be given'))
+        if provision_state is not None:
+            reached, expected_state = _provision_state_reached, provision_state
+            description = _('%(count)d node(s) to reach provision state '
+                            '"%(state)s"')
+        else:
+            reached = _power_state_reached
+            expected_state = _power_state(power_state)
+            description = _('%(count)d node(s) to reach power state '
+                            '"%(state)s"')
+        node_ids = list(node_ids)
+        if not node_ids:
+            return []
+        description %= {'count': len(node_ids), 'state': expected_state}
+        fields = ['uuid', 'name'] + _STATE_FIELDS
+        # NOTE: below API version 1.8 the fields can't be selected, the
+        # nodes are listed without details rather than fetching them all
+        list_fields = fields if not self._select_fields(fields)[2] else None
+        results = {}
+        nodes = {}
+        # The index of the next node whose states to poll in turn
+        turn = [0]
+
+        def _check(index, node, partial=False):
+            node_id = node_ids[index]
+            nodes[index] = node
+            try:
+                if node is None:
+                    raise exc.NotFound(
+                        _('Node %s could not be found') % node_id)
+                if reached(node_id, node, expected_state):
+                    results[index] = bulk.BulkResult(node_id, node, None)
+            except exc.StateTransitionFailed as e:
+                # NOTE: without the last error, the node listed without
+                # details is polled for its states to tell why it failed
+                if not partial:
+                    results[index] = bulk.BulkResult(node_id, node, e)
+            except exc.NotFound as e:
+                results[index] = bulk.BulkResult(node_id, node, e)
+            return index in results
+
+        def _states(index):
+            try:
+                return self.states(node_ids[index])
+            except exc.NotFound:
+                return None
+
+        def _poll():
+            pending = [index for index in range(len(node_ids))
+                       if index not in results]
+            if len(pending) <= WAIT_FOR_NODES_LIST_THRESHOLD:
+                for index in pending:
+                    _check(index, _states(index))
+            else:
+                found = {}
+                for node in self.list(limit=0, fields=list_fields):
+                    found[node.uuid] = node
+                    if getattr(node, 'name', None):
+                        found[node.name] = node
+                unknown = [index for index in pending
+                           if not _check(index, found.get(node_ids[index]),
+                                         partial=list_fields is None)]
+                if list_fields is None and unknown:
+                    turned = ([i for i in unknown if i >= turn[0]] +
+                              [i for i in unknown if i < turn[0]])
+                    turned = turned[:WAIT_FOR_NODES_LIST_THRESHOLD]
+                    for index in turned:
+                        _check(index, _states(index))
+                    turn[0] = turned[-1] + 1
+            state = [tuple(getattr(nodes[index], f, None)
+                           for f in _STATE_FIELDS)
+                     for index in pending if index not in results]
+            return len(results) == len(node_ids), None, state
+
+        try:
+            waiter.wait(_poll, description, timeout=timeout,
+                        interval=waiter.PollInterval(poll_interval,
+                                                     max_poll_interval))
+        except exc.StateTransitionTimeout as e:
+            for index, node_id in enumerate(node_ids):
+                if index not in results:
+                    results[index] = bulk.BulkResult(node_id, nodes[index], e)
+        return [results[index] for index in range(len(node_ids))]
+
     def get_console(self, node_uuid):
         path = "%s/states/console" % node_uuid
         info = self.get(path)
@@ -259,3 +601,45 @@ class NodeManager(base.Manager):
     def get_supported_boot_devices(self, node_uuid):
         path = "%s/management/boot_device/supported" % node_uuid
         return self.get(path).to_dict()
+
+    def bulk(self, action, node_ids, args=None, kwargs=None,
+             concurrency=None):
+        """Run an action over many nodes in parallel.
+
+        The requests share the connections of the client. If a node is
+        locked (HTTP 409 Conflict) its action is retried later according
+        to the retry settings of the client, while the other nodes are
+        processed.
+
+        :param action: the name of a method of this manager taking the node
+                       UUID as first argument (e.g. 'set_power_state'), or
+                       a callable taking the node UUID.
+        :param node_ids: the UUIDs or names of the nodes.
+        :param args: Optional, the other positional arguments of the
+                     action.
+        :param kwargs: Optional, the keyword arguments of the action.
+        :param concurrency: Optional, the maximum number of requests sent
+                            at the same time.
+        :returns: a list of ironicclient.common.bulk.BulkResult, one per
+                  node and in the same order, whose 'item' is the node
+                  and 'error' the exception raised for it, if any.
+        :raises: InvalidAttribute if the action is unknown.
+
+        """
+        if not callable(action):
+            method = getattr(self, action, None)
+            if action.startswith('_') or action == 'bulk' or method is None:
+                raise exc.InvalidAttribute(
+                    _('Unknown node action: %s') % action)
+            action = method
+        args = args or ()
+        kwargs = kwargs or {}
+
+        def _run(node_id):
+            return action(node_id, *args, **kwargs)
+
+        return bulk.run(
+            _run, node_ids, concurrency=concurrency,
+            max_retries=getattr(self.api, 'conflict_max_retries', None),
+            retry_interval=getattr(self.api, 'conflict_retry_interval', None),
+            retry_policy=getattr(self.api, 'retry_policy', None))
@@ -16,21 +16,73 @@
 #    under the License.
 
 import argparse
+import sys
 
 import six
 
+from ironicclient.common import bulk
 from ironicclient.common.i18n import _
 from ironicclient.common import utils
+from ironicclient.common import waiter
+from ironicclient import exc
 from ironicclient.openstack.common.apiclient import exceptions
 from ironicclient.openstack.common import cliutils
 from ironicclient.v1 import resource_fields as res_fields
 
 
-def _print_node_show(node):
-    data = dict([(f, getattr(node, f, '')) for f in res_fields.NODE_FIELDS])
+def _print_node_show(node, fields=None):
+    if fields is None:
+        fields = res_fields.NODE_FIELDS
+    data = dict([(f, getattr(node, f, '')) for f in fields])
     cliutils.print_dict(data, wrap=72)
 
 
+def _read_nodes(stream):
+    """Read node names or UUIDs, one per line, skipping comments."""
+    nodes = []
+    for line in stream:
+        line = line.strip()
+        if line and not line.startswith('#'):
+            nodes.append(line)
+    if not nodes:
+        raise exceptions.CommandError(_('No node was given on stdin.'))
+    return nodes
+
+
+def _print_results(results, message):
+    """Print the BulkResult of the nodes, raise if any failed."""
+    failed = [r for r in results if not r.ok]
+    formatters = {
+        'result': lambda r: 'OK' if r.ok else 'FAILED',
+        'error': lambda r: six.text_type(r.error) if r.error else '',
+    }
+    cliutils.print_list(results, ['item', 'result', 'error'],
+                        formatters=formatters,
+                        field_labels=['Node', 'Result', 'Error'])
+    if failed:
+        raise exceptions.CommandError(
+            message % {'failed': len(failed), 'total': len(results)})
+
+
+def _node_bulk(cc, args, action, *action_args, **action_kwargs):
+    """Run a node action over the nodes read on stdin and print results."""
+    nodes = _read_nodes(sys.stdin)
+    results = cc.node.bulk(action, nodes, args=action_args,
+                           kwargs=action_kwargs, concurrency=args.concurrency)
+    _print_results(results, _('The action failed for %(failed)d node(s) out '
+                              'of %(total)d.'))
+
+
+def _bulk_arg(func):
+    return cliutils.arg(
+        '--concurrency',
+        metavar='<concurrency>',
+        type=int,
+        default=None,
+        help='Maximum number of nodes processed at the same time. '
+             'Default is %d.' % bulk.DEFAULT_CONCURRENCY)(func)
+
+
 @cliutils.arg(
     'node',
     metavar='<id>',
@@ -42,13 +94,26 @@ def _print_node_show(node):
     action='store_true',
     default=False,
     help='<id> is an instance UUID.')
+@cliutils.arg(
+    '--fields',
+    nargs='+',
+    dest='fields',
+    metavar='<field>',
+    action='append',
+    default=None,
+    help="One or more node fields. Only these fields will be fetched from "
+         "the server.")
 def do_node_show(cc, args):
     """Show detailed information about a node."""
+    fields = utils.select_fields(args.fields, res_fields.NODE_FIELDS,
+                                 res_fields.NODE_FIELD_LABELS)[0]
     if args.instance_uuid:
         node = cc.node.get_by_instance_uuid(args.node)
+    elif fields:
+        node = cc.node.get(args.node, fields=fields)
     else:
         node = cc.node.get(args.node)
-    _print_node_show(node)
+    _print_node_show(node, fields)
 
 
 @cliutils.arg(
@@ -88,6 +153,15 @@ def do_node_show(cc, args):
     action='store_true',
     default=False,
     help="Show detailed information about the nodes.")
+@cliutils.arg(
+    '--fields',
+    nargs='+',
+    dest='fields',
+    metavar='<field>',
+    action='append',
+    default=None,
+    help="One or more node fields. Only these fields will be fetched from "
+         "the server. Can not be used when '--detail' is specified.")
 def do_node_list(cc, args):
     """List the nodes which are registered with the Ironic service."""
     params = {}
@@ -97,7 +171,14 @@ def do_node_list(cc, args):
         params['maintenance'] = args.maintenance
     params['detail'] = args.detail
 
-    if args.detail:
+    if args.fields and args.detail:
+        raise exceptions.CommandError(
+            _("'--fields' can not be used with '--detail'."))
+    if args.fields:
+        fields, field_labels = utils.select_fields(
+            args.fields, res_fields.NODE_FIELDS, res_fields.NODE_FIELD_LABELS)
+        params['fields'] = fields
+    elif args.detail:
         fields = res_fields.NODE_FIELDS
         field_labels = res_fields.NODE_FIELD_LABELS
     else:
@@ -337,13 +418,132 @@ def do_node_set_power_state(cc, args):
           "containing the config drive files. In case it's a directory, a "
           "config drive will be generated from it. This parameter is only "
           "valid when setting provision state to 'active'."))
+@cliutils.arg(
+    '--use-genisoimage',
+    action='store_true',
+    default=False,
+    help=("Generate the config drive of a directory with the genisoimage "
+          "tool, rather than with the built-in ISO 9660 writer."))
 def do_node_set_provision_state(cc, args):
     """Provision, rebuild, delete, inspect, provide or manage an instance."""
     if args.config_drive and args.provision_state != 'active':
         raise exceptions.CommandError(_('--config-drive is only valid when '
                                         'setting provision state to "active"'))
+    kwargs = {}
+    if args.config_drive and args.use_genisoimage:
+        kwargs['genisoimage'] = True
     cc.node.set_provision_state(args.node, args.provision_state,
-                                configdrive=args.config_drive)
+                                configdrive=args.config_drive, **kwargs)
+
+
+@cliutils.arg(
+    'node',
+    metavar='<node>',
+    nargs='+',
+    help="Names or UUIDs of the nodes.")
+@cliutils.arg(
+    '--provision-state',
+    metavar='<provision-state>',
+    default=None,
+    help="Provision state to wait for, e.g. 'active' or 'available'.")
+@cliutils.arg(
+    '--power-state',
+    metavar='<power-state>',
+    choices=['on', 'off'],
+    default=None,
+    help="Power state to wait for, 'on' or 'off'.")
+@cliutils.arg(
+    '--timeout',
+    metavar='<timeout>',
+    type=int,
+    default=0,
+    help='Maximum number of seconds to wait, 0 (the default) to wait '
+         'forever.')
+@cliutils.arg(
+    '--poll-interval',
+    metavar='<poll-interval>',
+    type=float,
+    default=waiter.DEFAULT_POLL_INTERVAL,
+    help='Number of seconds between the first polls, the interval grows '
+         'while the states of the nodes do not change. Default is %d.'
+         % waiter.DEFAULT_POLL_INTERVAL)
+def do_node_wait(cc, args):
+    """Wait for nodes to reach a provision state or a power state.
+
+    A few nodes are polled with their states, many nodes are polled at
+    once by listing the nodes. The waiting stops early for the nodes going
+    to an error state.
+    """
+    if (args.provision_state is None) == (args.power_state is None):
+        raise exceptions.CommandError(
+            _('Either --provision-state or --power-state must be given.'))
+    kwargs = {'timeout': args.timeout, 'poll_interval': args.poll_interval}
+    if len(args.node) > 1:
+        results = cc.node.wait_for_nodes(
+            args.node, provision_state=args.provision_state,
+            power_state=args.power_state, **kwargs)
+    else:
+        if args.provision_state is not None:
+            wait = cc.node.wait_for_provision_state
+            state = args.provision_state
+        else:
+            wait = cc.node.wait_for_power_state
+            state = args.power_state
+        try:
+            result = bulk.BulkResult(args.node[0],
+                                     wait(args.node[0], state, **kwargs),
+                                     None)
+        except (exceptions.NotFound, exc.StateTransitionFailed,
+                exc.StateTransitionTimeout) as e:
+            result = bulk.BulkResult(args.node[0], None, e)
+        results = [result]
+    _print_results(results, _('%(failed)d node(s) out of %(total)d did not '
+                              'reach the state.'))
+
+
+@cliutils.arg(
+    'power_state',
+    metavar='<power-state>',
+    choices=['on', 'off', 'reboot'],
+    help="'on', 'off', or 'reboot'.")
+@_bulk_arg
+def do_node_bulk_set_power_state(cc, args):
+    """Power on or off or reboot the nodes read on stdin, one per line."""
+    _node_bulk(cc, args, 'set_power_state', args.power_state)
+
+
+@cliutils.arg(
+    'provision_state',
+    metavar='<provision-state>',
+    choices=['active', 'deleted', 'rebuild', 'inspect', 'provide',
+             'manage'],
+    help="Supported states: 'active', 'deleted', 'rebuild', "
+         "'inspect', 'provide' or 'manage'")
+@_bulk_arg
+def do_node_bulk_set_provision_state(cc, args):
+    """Change the provision state of the nodes read on stdin, one per line."""
+    _node_bulk(cc, args, 'set_provision_state', args.provision_state)
+
+
+@cliutils.arg(
+    'maintenance_mode',
+    metavar='<maintenance-mode>',
+    choices=['true', 'True', 'false', 'False', 'on', 'off'],
+    help="'true' or 'false'; 'on' or 'off'.")
+@cliutils.arg(
+    '--reason',
+    metavar='<reason>',
+    default=None,
+    help=('Reason for setting maintenance mode to "true" or "on";'
+          ' not valid when setting to "false" or "off".'))
+@_bulk_arg
+def do_node_bulk_set_maintenance(cc, args):
+    """Enable or disable maintenance mode for the nodes read on stdin."""
+    if args.reason and args.maintenance_mode.lower() in ('false', 'off'):
+        raise exceptions.CommandError(_('Cannot set "reason" when turning off '
+                                        'maintenance mode.'))
+    _node_bulk(cc, args, 'set_maintenance', args.maintenance_mode.lower(),
+               maint_reason=args.reason)
 
 
 @cliutils.arg('node', metavar='<node>', help="Name or UUID of the node.")
@@ -17,6 +17,7 @@
 from ironicclient.common import base
 from ironicclient.common import utils
 from ironicclient import exc
+from ironicclient.v1 import resource_fields
 
 CREATION_ATTRIBUTES = ['address', 'extra', 'node_uuid']
 
@@ -26,6 +27,10 @@ class Port(base.Resource):
         return "<Port %s>" % self._info
 
 
+class CompactPort(base.CompactResource):
+    __slots__ = tuple(resource_fields.PORT_FIELDS) + ('links',)
+
+
 class PortManager(base.Manager):
     resource_class = Port
 
@@ -34,7 +39,7 @@ class PortManager(base.Manager):
         return '/v1/ports/%s' % id if id else '/v1/ports'
 
     def list(self, address=None, limit=None, marker=None, sort_key=None,
-             sort_dir=None, detail=False):
+             sort_dir=None, detail=False, compact=False, fields=None):
         """Retrieve a list of port.
 
         :param address: Optional, MAC address of a port, to get
@@ -59,13 +64,58 @@ class PortManager(base.Manager):
         :param detail: Optional, boolean whether to return detailed information
                        about ports.
 
+        :param compact: Optional, boolean whether to return ports storing
+                        their fields only once, using less memory for
+                        large listings. They have the same attributes but
+                        are read-only.
+
+        :param fields: Optional, a list with the fields of the ports to
+                       return, e.g. ['uuid', 'name']. Can't be used along
+                       with 'detail'.
+
         :returns: A list of ports.
 
         """
         if limit is not None:
             limit = int(limit)
+        obj_class = CompactPort if compact else None
+        fields, trim, detail = self._select_fields(fields, detail)
+
+        path = self._list_path(address, limit, marker, sort_key, sort_dir,
+                               detail, fields)
+        if limit is None:
+            return self._list(self._path(path), "ports",
+                              obj_class=obj_class, fields=trim)
+        else:
+            return self._list_pagination(self._path(path), "ports",
+                                         limit=limit, obj_class=obj_class,
+                                         fields=trim)
+
+    def iter_list(self, address=None, limit=None, marker=None, sort_key=None,
+                  sort_dir=None, detail=False, compact=False, fields=None):
+        """Retrieve ports, yielding them as each page is received.
+
+        Takes the same parameters as list(), but only keeps one page of
+        ports in memory at a time.
+
+        :returns: A generator of ports.
 
-        filters = utils.common_filters(marker, limit, sort_key, sort_dir)
+        """
+        if limit is not None:
+            limit = int(limit)
+        obj_class = CompactPort if compact else None
+        fields, trim, detail = self._select_fields(fields, detail)
+
+        path = self._list_path(address, limit, marker, sort_key, sort_dir,
+                               detail, fields)
+        return self._iter_list(self._path(path), "ports", limit=limit,
+                               obj_class=obj_class, fields=trim)
+
+    @staticmethod
+    def _list_path(address, limit, marker, sort_key, sort_dir, detail,
+                   fields=None):
+        filters = utils.common_filters(marker, limit, sort_key, sort_dir,
+                                       fields)
         if address is not None:
             filters.append('address=%s' % address)
 
@@ -74,18 +124,19 @@ class PortManager(base.Manager):
             path += 'detail'
         if filters:
             path += '?' + '&'.join(filters)
+        return path
 
-        if limit is None:
-            return self._list(self._path(path), "ports")
-        else:
-            return self._list_pagination(self._path(path), "ports",
-                                         limit=limit)
+    def get(self, port_id, fields=None):
+        """Retrieve a port.
 
-    def get(self, port_id):
-        try:
-            return self._list(self._path(port_id))[0]
-        except IndexError:
-            return None
+        :param port_id: The UUID of the port.
+        :param fields: Optional, a list with the fields of the port to
+                       return, e.g. ['uuid', 'address'].
+        """
+        fields, trim = self._select_fields(fields)[:2]
+        if fields:
+            port_id += '?' + utils.common_filters(fields=fields)[0]
+        return self._get(self._path(port_id), fields=trim)
 
     def get_by_address(self, address):
         path = "detail?address=%s" % address
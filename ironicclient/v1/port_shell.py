@@ -15,7 +15,9 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+from ironicclient.common.i18n import _
 from ironicclient.common import utils
+from ironicclient import exc
 from ironicclient.openstack.common import cliutils
 from ironicclient.v1 import resource_fields as res_fields
 
@@ -77,13 +79,29 @@ def do_port_show(cc, args):
     metavar='<direction>',
     choices=['asc', 'desc'],
     help='Sort direction: "asc" (the default) or "desc".')
+@cliutils.arg(
+    '--fields',
+    nargs='+',
+    dest='fields',
+    metavar='<field>',
+    action='append',
+    default=None,
+    help="One or more port fields. Only these fields will be fetched from "
+         "the server. Can not be used when '--detail' is specified.")
 def do_port_list(cc, args):
     """List the ports."""
     params = {}
 
     if args.address is not None:
         params['address'] = args.address
-    if args.detail:
+    if args.fields and args.detail:
+        raise exc.CommandError(
+            _("'--fields' can not be used with '--detail'."))
+    if args.fields:
+        fields, field_labels = utils.select_fields(
+            args.fields, res_fields.PORT_FIELDS, res_fields.PORT_FIELD_LABELS)
+        params['fields'] = fields
+    elif args.detail:
         fields = res_fields.PORT_FIELDS
         field_labels = res_fields.PORT_FIELD_LABELS
     else:
@@ -12,22 +12,82 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
-
 from ironicclient.common import utils
-from ironicclient.v1 import chassis_shell
-from ironicclient.v1 import driver_shell
-from ironicclient.v1 import node_shell
-from ironicclient.v1 import port_shell
+
 
 COMMAND_MODULES = [
-    chassis_shell,
-    node_shell,
-    port_shell,
-    driver_shell,
+    'chassis_shell',
+    'node_shell',
+    'port_shell',
+    'driver_shell',
 ]
 
+# NOTE: the commands of each module with their help, so that the command
+# modules are only imported for the commands run. It must be updated with
+# the do_* functions of the modules, which is checked by the unit tests.
+COMMAND_INDEX = {
+    'chassis_shell': {
+        'chassis-create': 'Create a new chassis.',
+        'chassis-delete': 'Delete a chassis.',
+        'chassis-list': 'List the chassis.',
+        'chassis-node-list': 'List the nodes contained in a chassis.',
+        'chassis-show': 'Show detailed information about a chassis.',
+        'chassis-update': 'Update information about a chassis.',
+    },
+    'node_shell': {
+        'node-bulk-set-maintenance':
+            'Enable or disable maintenance mode for the nodes read on stdin.',
+        'node-bulk-set-power-state':
+            'Power on or off or reboot the nodes read on stdin, one per line.',
+        'node-bulk-set-provision-state':
+            'Change the provision state of the nodes read on stdin, one per '
+            'line.',
+        'node-create': 'Register a new node with the Ironic service.',
+        'node-delete': 'Unregister a node from the Ironic service.',
+        'node-get-boot-device': 'Get the current boot device for a node.',
+        'node-get-console':
+            "Get the connection information for a node's console, if "
+            "enabled.",
+        'node-get-supported-boot-devices':
+            'Get the supported boot devices for a node.',
+        'node-list':
+            'List the nodes which are registered with the Ironic service.',
+        'node-port-list': 'List the ports associated with a node.',
+        'node-set-boot-device': 'Set the boot device for a node.',
+        'node-set-console-mode':
+            'Enable or disable serial console access for a node.',
+        'node-set-maintenance':
+            'Enable or disable maintenance mode for a node.',
+        'node-set-power-state': 'Power a node on or off or reboot.',
+        'node-set-provision-state':
+            'Provision, rebuild, delete, inspect, provide or manage an '
+            'instance.',
+        'node-show': 'Show detailed information about a node.',
+        'node-update': 'Update information about a registered node.',
+        'node-validate': "Validate a node's driver interfaces.",
+        'node-vendor-passthru':
+            'Call a vendor-passthru extension for a node.',
+        'node-wait':
+            'Wait for nodes to reach a provision state or a power state.',
+    },
+    'port_shell': {
+        'port-create': 'Create a new port.',
+        'port-delete': 'Delete a port.',
+        'port-list': 'List the ports.',
+        'port-show': 'Show detailed information about a port.',
+        'port-update': 'Update information about a port.',
+    },
+    'driver_shell': {
+        'driver-list': 'List the enabled drivers.',
+        'driver-properties': 'Get properties of a driver.',
+        'driver-show': 'Show information about a driver.',
+        'driver-vendor-passthru':
+            'Call a vendor-passthru extension for a driver.',
+    },
+}
+
 
-def enhance_parser(parser, subparsers, cmd_mapper):
+def enhance_parser(parser, subparsers, cmd_mapper, commands=None):
     """Enhance parser with API version specific options.
 
     Take a basic (nonversioned) parser and enhance it with
@@ -35,7 +95,35 @@ def enhance_parser(parser, subparsers, cmd_mapper):
 
     :param parser: top level parser :param subparsers: top level
         parser's subparsers collection where subcommands will go
+    :param commands: the names of the commands to define with their
+        arguments. The others are only listed with their help, from
+        COMMAND_INDEX, without importing their module. All the commands
+        are defined if None, or if one of the names isn't a command.
     """
-    for command_module in COMMAND_MODULES:
-        utils.define_commands_from_module(subparsers, command_module,
-                                          cmd_mapper)
+    known = set()
+    for index in COMMAND_INDEX.values():
+        known.update(index)
+    if commands is not None and not set(commands) <= known:
+        commands = None
+
+    for module_name in COMMAND_MODULES:
+        index = COMMAND_INDEX[module_name]
+        defined = [command for command in index
+                   if commands is None or command in commands]
+        if defined:
+            command_module = utils.import_versioned_module('1', module_name)
+        for command in sorted(index):
+            if command in defined:
+                callback = getattr(command_module,
+                                   'do_%s' % command.replace('-', '_'))
+                utils.define_command(subparsers, command, callback,
+                                     cmd_mapper)
+            else:
+                _define_command_stub(subparsers, command, index[command],
+                                     cmd_mapper)
+
+
+def _define_command_stub(subparsers, command, help, cmd_mapper):
+    """Define a command with its help only, to be listed in the usage."""
+    cmd_mapper[command] = subparsers.add_parser(command, help=help,
+                                                add_help=False)
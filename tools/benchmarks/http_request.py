@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Overhead of the HTTP client on each request.
+
+The requests are answered in-process by a fake connection, so the time
+measured is the one spent by the client itself: building the headers,
+logging, and reading the response. With --debug, the requests and
+responses are logged at the DEBUG level (to a handler discarding them).
+
+    python tools/benchmarks/http_request.py [--requests N] [--repeat N]
+                                            [--debug]
+"""
+
+from __future__ import print_function
+
+import argparse
+import io
+import logging
+import time
+
+from ironicclient.common import http
+
+
+_BODY = (b'{"uuid": "1be26c0b-03f2-4d2e-ae87-c02d7f33c123", '
+         b'"provision_state": "active", "power_state": "power on", '
+         b'"driver": "fake", "maintenance": false, "extra": {}}')
+
+_HEADERS = {
+    'content-type': 'application/json',
+    'content-length': str(len(_BODY)),
+    'x-openstack-ironic-api-minimum-version': '1.1',
+    'x-openstack-ironic-api-maximum-version': '1.9',
+}
+
+
+class _Response(object):
+    status = 200
+    reason = 'OK'
+    version = 11
+    will_close = False
+
+    def __init__(self):
+        self._body = io.BytesIO(_BODY)
+
+    def getheader(self, name, default=None):
+        return _HEADERS.get(name, default)
+
+    def getheaders(self):
+        return list(_HEADERS.items())
+
+    def read(self, amt=None):
+        return self._body.read(amt)
+
+
+class _Connection(object):
+    sock = object()
+
+    def request(self, method, url, **kwargs):
+        pass
+
+    def getresponse(self):
+        return _Response()
+
+
+def run(requests, stream):
+    """Send requests to the fake connection, return the seconds taken."""
+    client = http.HTTPClient('http://localhost:6385/', token='token')
+    conn = _Connection()
+    client.get_connection = lambda: conn
+    client.release_connection = lambda conn, resp=None: None
+    headers = {'X-Request-Header': 'value'}
+    request = client.json_stream_request if stream else client.json_request
+    args = ('nodes',) if stream else ()
+    start = time.time()
+    for i in range(requests):
+        resp, body = request('GET', '/v1/nodes/node-1', *args,
+                             headers=headers)
+        if stream:
+            list(body)
+    return time.time() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--requests', type=int, default=20000,
+                        help='Number of requests sent.')
+    parser.add_argument('--repeat', type=int, default=5,
+                        help='Number of runs, the fastest one is reported.')
+    parser.add_argument('--debug', action='store_true',
+                        help='Log the requests at the DEBUG level.')
+    args = parser.parse_args()
+
+    logger = logging.getLogger('ironicclient')
+    logger.addHandler(logging.NullHandler())
+    logger.propagate = False
+    logger.setLevel(logging.DEBUG if args.debug else logging.WARNING)
+
+    print('%-20s %12s' % ('request', 'us/request'))
+    for name, stream in (('json_request', False),
+                         ('json_stream_request', True)):
+        elapsed = min(run(args.requests, stream)
+                      for i in range(args.repeat))
+        print('%-20s %12.1f' % (name, elapsed / args.requests * 1e6))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Startup time of the ironic shell.
+
+Each command line is run in new processes, without contacting any service,
+and the wall clock time of the processes is reported. "bash-completion"
+defines all the subcommands with their arguments, as every command did
+before they were loaded lazily, so it is the reference for the others.
+
+    python tools/benchmarks/startup.py [--repeat N] [COMMAND LINE ...]
+"""
+
+from __future__ import print_function
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+
+DEFAULT_COMMAND_LINES = [
+    '--version',
+    'help',
+    'help node-list',
+    'node-list --help',
+    'bash-completion',
+]
+
+_SCRIPT = 'import sys; from ironicclient import shell; shell.main()'
+
+
+def run(command_line, repeat):
+    """Run a command line of the shell, and return the times taken."""
+    argv = [sys.executable, '-c', _SCRIPT] + command_line.split()
+    times = []
+    with open(os.devnull, 'w') as devnull:
+        for i in range(repeat):
+            start = time.time()
+            subprocess.call(argv, stdout=devnull, stderr=devnull)
+            times.append(time.time() - start)
+    return sorted(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--repeat', type=int, default=10,
+                        help='Number of runs of each command line.')
+    parser.add_argument('command_lines', nargs='*', metavar='COMMAND LINE',
+                        default=DEFAULT_COMMAND_LINES,
+                        help='Command lines of the shell, quoted.')
+    args = parser.parse_args()
+
+    print('%-30s %10s %10s %10s' % ('command line', 'min (ms)', 'median',
+                                    'max'))
+    for command_line in args.command_lines:
+        times = run(command_line, args.repeat)
+        print('%-30s %10.1f %10.1f %10.1f' % (
+            command_line, times[0] * 1000, times[len(times) // 2] * 1000,
+            times[-1] * 1000))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,428 @@
+# -*- coding: utf-8 -*-
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Benchmarks of the hot paths of the client.
+
+Each benchmark runs in its own process, so that its peak memory usage is
+measured alone, against a fake Ironic API started on the local host (see
+ironicclient/tests/fakeserver.py): nothing else is contacted. For each
+benchmark, the throughput, the percentiles of the latency of its
+operations and the peak RSS of the process are reported.
+
+    python tools/benchmarks/suite.py [--nodes N [N ...]] [BENCHMARK ...]
+
+The results can be saved with --output, and compared with the ones of a
+previous run with --baseline: the command then fails if the throughput of
+a benchmark dropped by more than --threshold.
+"""
+
+from __future__ import print_function
+
+import argparse
+import collections
+import json
+import math
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+import six
+
+from ironicclient.tests import fakeserver
+
+# NOTE: the other scripts of this directory
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import startup  # noqa
+
+
+DEFAULT_NODES = [10000, 100000]
+DEFAULT_THRESHOLD = 0.1
+
+BENCHMARKS = collections.OrderedDict()
+
+
+def benchmark(name, unit, server=False):
+    """Register a benchmark function returning a Result.
+
+    :param unit: what the operations counted by the benchmark are.
+    :param server: whether the benchmark needs the fake server.
+    """
+    def decorator(func):
+        BENCHMARKS[name] = (func, unit, server)
+        return func
+    return decorator
+
+
+class Result(object):
+    """The outcome of a benchmark.
+
+    :param ops: the number of operations done.
+    :param elapsed: the number of seconds they took.
+    :param samples: the latencies in seconds of the operations (or of
+                    batches of them, divided by the batch size).
+    """
+
+    def __init__(self, ops, elapsed, samples):
+        self.ops = ops
+        self.elapsed = elapsed
+        self.samples = samples
+
+
+def percentile(samples, percent):
+    """The nearest-rank percentile of a list of numbers."""
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    rank = int(math.ceil(percent / 100.0 * len(ordered)))
+    return ordered[max(rank, 1) - 1]
+
+
+def _timed(func, count):
+    """Call func count times, return the list of durations."""
+    samples = []
+    for i in range(count):
+        start = time.time()
+        func()
+        samples.append(time.time() - start)
+    return samples
+
+
+def _client(endpoint):
+    from ironicclient import client
+
+    return client.get_client('1', ironic_url=endpoint,
+                             os_auth_token='token')
+
+
+def _request_latencies(client):
+    """Collect the durations of the requests of a client."""
+    samples = []
+    client.instrumentation.add_hooks(
+        end=lambda info: samples.append(info.duration))
+    return samples
+
+
+def _node_infos(count, detail=True):
+    api = fakeserver.FakeIronic(nodes=count)
+    return [api.render('nodes', i, 'http://127.0.0.1:6385', detail=detail)
+            for i in range(count)]
+
+
+@benchmark('list_nodes', 'nodes', server=True)
+def bench_list_nodes(args):
+    """List the detailed nodes, through all the pages of the server."""
+    client = _client(args.endpoint)
+    samples = _request_latencies(client)
+    start = time.time()
+    nodes = client.node.list(limit=args.size, detail=True)
+    return Result(len(nodes), time.time() - start, samples)
+
+
+@benchmark('json_request', 'requests')
+def bench_json_request(args):
+    """Decode a page of detailed nodes, from an in-process connection."""
+    from ironicclient.common import http
+    from ironicclient.tests.unit import utils
+
+    body = json.dumps({'nodes': _node_infos(fakeserver.DEFAULT_MAX_LIMIT)})
+    body = body.encode('utf-8')
+    client = http.HTTPClient('http://127.0.0.1:6385/', token='token')
+
+    def _request():
+        resp = utils.FakeResponse({'content-type': 'application/json'},
+                                  six.BytesIO(body), version=11, status=200)
+        client.get_connection = lambda: utils.FakeConnection(resp)
+        client.json_request('GET', '/v1/nodes/detail')
+
+    samples = _timed(_request, args.repeat * 10)
+    return Result(len(samples), sum(samples), samples)
+
+
+def _batches(items, size=1000):
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def _construct(resource_class, infos):
+    from ironicclient.v1 import node
+
+    manager = node.NodeManager(None)
+    batches = _batches(infos)
+    samples = []
+    start = time.time()
+    for batch in batches:
+        batch_start = time.time()
+        for info in batch:
+            resource_class(manager, info, loaded=True)
+        samples.append((time.time() - batch_start) / len(batch))
+    return Result(len(infos), time.time() - start, samples)
+
+
+@benchmark('resources', 'resources')
+def bench_resources(args):
+    """Build the Node objects of detailed nodes."""
+    from ironicclient.v1 import node
+
+    return _construct(node.Node, _node_infos(args.resources))
+
+
+@benchmark('compact_resources', 'resources')
+def bench_compact_resources(args):
+    """Build the CompactNode objects of detailed nodes."""
+    from ironicclient.v1 import node
+
+    return _construct(node.CompactNode, _node_infos(args.resources))
+
+
+@benchmark('print_list', 'rows')
+def bench_print_list(args):
+    """Render the table of 'ironic node-list'."""
+    from ironicclient.openstack.common import cliutils
+    from ironicclient.v1 import node
+    from ironicclient.v1 import resource_fields as res_fields
+
+    manager = node.NodeManager(None)
+    nodes = [node.Node(manager, info, loaded=True)
+             for info in _node_infos(args.resources, detail=False)]
+
+    def _print():
+        cliutils.print_list(nodes, res_fields.NODE_LIST_FIELDS,
+                            field_labels=res_fields.NODE_LIST_FIELD_LABELS,
+                            sortby_index=None)
+
+    stdout = sys.stdout
+    with open(os.devnull, 'w') as devnull:
+        sys.stdout = devnull
+        try:
+            samples = _timed(_print, args.repeat)
+        finally:
+            sys.stdout = stdout
+    return Result(len(nodes) * len(samples), sum(samples),
+                  [sample / len(nodes) for sample in samples])
+
+
+@benchmark('make_configdrive', 'config drives')
+def bench_make_configdrive(args):
+    """Build a config drive with a few metadata files and user data."""
+    from ironicclient.common import utils
+
+    path = tempfile.mkdtemp()
+    try:
+        latest = os.path.join(path, 'openstack', 'latest')
+        os.makedirs(latest)
+        with open(os.path.join(latest, 'meta_data.json'), 'w') as f:
+            json.dump({'uuid': fakeserver.node_uuid(0),
+                       'hostname': 'node-0',
+                       'public_keys': {'key': 'ssh-rsa ' + 'A' * 372}}, f)
+        with open(os.path.join(latest, 'user_data'), 'wb') as f:
+            # NOTE: not all zeros, so that gzip has some work to do
+            f.write(b''.join(('%08d' % i).encode('ascii')
+                             for i in range(128 * 1024)))
+        samples = _timed(lambda: utils.make_configdrive(path), args.repeat)
+    finally:
+        shutil.rmtree(path)
+    return Result(len(samples), sum(samples), samples)
+
+
+@benchmark('cli_startup', 'runs')
+def bench_cli_startup(args):
+    """Start the shell to display the help of node-list."""
+    samples = startup.run('node-list --help', args.repeat)
+    return Result(len(samples), sum(samples), samples)
+
+
+@benchmark('bulk_power', 'nodes', server=True)
+def bench_bulk_power(args):
+    """Power on nodes with concurrent requests."""
+    client = _client(args.endpoint)
+    samples = _request_latencies(client)
+    uuids = [fakeserver.node_uuid(i) for i in range(args.bulk_nodes)]
+    start = time.time()
+    results = client.node.bulk('set_power_state', uuids, args=('on',),
+                               concurrency=args.concurrency)
+    elapsed = time.time() - start
+    failed = [result for result in results if not result.ok]
+    if failed:
+        raise RuntimeError('%d nodes failed, e.g. %s' % (len(failed),
+                                                         failed[0].error))
+    return Result(len(results), elapsed, samples)
+
+
+def _peak_rss_kb(name):
+    if resource is None:
+        return None
+    who = resource.RUSAGE_SELF
+    if name == 'cli_startup':
+        who = resource.RUSAGE_CHILDREN
+    # NOTE: in kilobytes, except on OS X where it is in bytes
+    peak = resource.getrusage(who).ru_maxrss
+    if sys.platform == 'darwin':
+        peak //= 1024
+    return peak
+
+
+def run_child(args):
+    """Run one benchmark, in this process, and print its results as JSON."""
+    func, unit, server = BENCHMARKS[args.child]
+    result = func(args)
+    json.dump({'ops': result.ops, 'elapsed': result.elapsed,
+               'samples': result.samples,
+               'peak_rss_kb': _peak_rss_kb(args.child)}, sys.stdout)
+
+
+def _start_server(nodes):
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'ironicclient.tests.fakeserver',
+         '--nodes', str(nodes)],
+        stdout=subprocess.PIPE, universal_newlines=True)
+    endpoint = process.stdout.readline().strip()
+    if not endpoint:
+        raise RuntimeError('The fake server failed to start')
+    return process, endpoint
+
+
+def _run(name, args, endpoint=None, size=None):
+    argv = [sys.executable, os.path.abspath(__file__), '--child', name,
+            '--repeat', str(args.repeat),
+            '--resources', str(args.resources),
+            '--bulk-nodes', str(args.bulk_nodes),
+            '--concurrency', str(args.concurrency)]
+    if endpoint:
+        argv += ['--endpoint', endpoint]
+    if size:
+        argv += ['--size', str(size)]
+    output = subprocess.check_output(argv, universal_newlines=True)
+    return json.loads(output)
+
+
+def _summary(name, unit, data):
+    samples = data['samples']
+    throughput = data['ops'] / data['elapsed'] if data['elapsed'] else None
+    return {'name': name, 'unit': unit, 'ops': data['ops'],
+            'throughput': throughput,
+            'p50': percentile(samples, 50),
+            'p90': percentile(samples, 90),
+            'p99': percentile(samples, 99),
+            'peak_rss_kb': data['peak_rss_kb']}
+
+
+def _ms(seconds):
+    return '%10.3f' % (seconds * 1000) if seconds is not None else '%10s' % '-'
+
+
+def _print_summary(summary):
+    rss = summary['peak_rss_kb']
+    print('%-26s %10d %12.1f %-14s %s %s %s %10s' % (
+        summary['name'], summary['ops'], summary['throughput'] or 0,
+        summary['unit'] + '/s', _ms(summary['p50']), _ms(summary['p90']),
+        _ms(summary['p99']), '%.1f' % (rss / 1024.0) if rss else '-'))
+    sys.stdout.flush()
+
+
+def compare(summaries, baseline, threshold):
+    """Return the messages about the benchmarks slower than the baseline."""
+    regressions = []
+    for summary in summaries:
+        previous = baseline.get(summary['name'])
+        if not previous or not previous.get('throughput'):
+            continue
+        change = summary['throughput'] / previous['throughput'] - 1
+        if change < -threshold:
+            regressions.append('%s: %.1f %s/s instead of %.1f (%+.0f%%)' % (
+                summary['name'], summary['throughput'], summary['unit'],
+                previous['throughput'], change * 100))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('benchmarks', nargs='*', metavar='BENCHMARK',
+                        help='The benchmarks to run, all by default: %s.' %
+                        ', '.join(BENCHMARKS))
+    parser.add_argument('--nodes', type=int, nargs='+', default=DEFAULT_NODES,
+                        help='Numbers of nodes listed by list_nodes.')
+    parser.add_argument('--resources', type=int, default=10000,
+                        help='Number of nodes built and printed.')
+    parser.add_argument('--bulk-nodes', type=int, default=1000,
+                        help='Number of nodes powered on by bulk_power.')
+    parser.add_argument('--concurrency', type=int, default=10,
+                        help='Number of concurrent requests of bulk_power.')
+    parser.add_argument('--repeat', type=int, default=5,
+                        help='Number of runs of the short benchmarks.')
+    parser.add_argument('--output', metavar='FILE',
+                        help='Save the results as JSON to this file.')
+    parser.add_argument('--baseline', metavar='FILE',
+                        help='Compare the throughputs with the results of '
+                             'a previous run saved with --output.')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='Drop of throughput reported as a regression '
+                             'by --baseline, 0.1 for 10%%.')
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    parser.add_argument('--endpoint', help=argparse.SUPPRESS)
+    parser.add_argument('--size', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        return run_child(args)
+
+    names = args.benchmarks or list(BENCHMARKS)
+    unknown = set(names) - set(BENCHMARKS)
+    if unknown:
+        parser.error('Unknown benchmarks: %s' % ', '.join(sorted(unknown)))
+
+    server = endpoint = None
+    if any(BENCHMARKS[name][2] for name in names):
+        server, endpoint = _start_server(max(args.nodes + [args.bulk_nodes]))
+
+    print('%-26s %10s %12s %-14s %10s %10s %10s %10s' % (
+        'benchmark', 'ops', 'throughput', '', 'p50 (ms)', 'p90 (ms)',
+        'p99 (ms)', 'RSS (MB)'))
+    summaries = []
+    try:
+        for name in names:
+            func, unit, needs_server = BENCHMARKS[name]
+            sizes = args.nodes if name == 'list_nodes' else [None]
+            for size in sizes:
+                data = _run(name, args, endpoint if needs_server else None,
+                            size)
+                label = '%s[%d]' % (name, size) if size else name
+                summaries.append(_summary(label, unit, data))
+                _print_summary(summaries[-1])
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(dict((s['name'], s) for s in summaries), f, indent=2,
+                      sort_keys=True)
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(summaries, json.load(f), args.threshold)
+        if regressions:
+            print('\nRegressions:\n' + '\n'.join(regressions))
+            return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())